@@ -149,6 +149,11 @@ class OdmrMainWindow(QtWidgets.QMainWindow):
                 status_bar.elapsed_time_lineedit.setText(str(datetime.timedelta(seconds=round(time))))
             else:
                 status_bar.elapsed_time_lineedit.setText('0:00:00')
+        if time is not None and sweeps is not None:
+            # Effective number of sweeps per second
+            status_bar.sweep_rate_lineedit.setText(
+                f'{sweeps / time:.3g} /s' if time > 0 and sweeps >= 0 else '0 /s'
+            )
 
 
 class OdmrStatusBar(QtWidgets.QStatusBar):
@@ -186,4 +191,13 @@ class OdmrStatusBar(QtWidgets.QStatusBar):
         self.elapsed_time_lineedit.setMinimumWidth(min_widget_width)
         self.elapsed_time_lineedit.setFocusPolicy(QtCore.Qt.NoFocus)
         layout.addWidget(self.elapsed_time_lineedit)
+        label = QtWidgets.QLabel('Sweep Rate:')
+        label.setAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        layout.addWidget(label)
+        self.sweep_rate_lineedit = QtWidgets.QLineEdit('0 /s')
+        self.sweep_rate_lineedit.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        self.sweep_rate_lineedit.setReadOnly(True)
+        self.sweep_rate_lineedit.setMinimumWidth(min_widget_width)
+        self.sweep_rate_lineedit.setFocusPolicy(QtCore.Qt.NoFocus)
+        layout.addWidget(self.sweep_rate_lineedit)
         self.addPermanentWidget(widget, 1)
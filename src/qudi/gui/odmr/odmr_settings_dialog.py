@@ -56,6 +56,10 @@ class OdmrSettingsDialog(QtWidgets.QDialog):
         self.sample_rate_label = QtWidgets.QLabel('')
         self.sample_rate_label.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft)
         self._sample_rate_changed()
+        # Spinbox defining the number of frequency sweeps acquired with a single hardware frame
+        self.sweeps_per_frame_spinbox = QtWidgets.QSpinBox()
+        self.sweeps_per_frame_spinbox.setRange(1, 2 ** 31 - 1)
+        self.sweeps_per_frame_spinbox.setValue(1)
 
         # Buttonbox for this QDialog
         buttons = QtWidgets.QDialogButtonBox.Ok | \
@@ -80,14 +84,18 @@ class OdmrSettingsDialog(QtWidgets.QDialog):
         label.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignRight)
         layout.addWidget(label, 2, 0)
         layout.addWidget(self.sample_rate_label, 2, 1)
+        label = QtWidgets.QLabel('Sweeps per Frame:')
+        label.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignRight)
+        layout.addWidget(label, 3, 0)
+        layout.addWidget(self.sweeps_per_frame_spinbox, 3, 1)
         hline = QtWidgets.QFrame()
         hline.setFrameShape(QtWidgets.QFrame.HLine)
-        layout.addWidget(hline, 3, 0, 1, 2)
+        layout.addWidget(hline, 4, 0, 1, 2)
         label = QtWidgets.QLabel('Max. Displayed Number of Scans:')
         label.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignRight)
-        layout.addWidget(label, 4, 0)
-        layout.addWidget(self.max_scans_shown_spinbox, 4, 1)
-        layout.addWidget(self.button_box, 5, 0, 1, 2)
+        layout.addWidget(label, 5, 0)
+        layout.addWidget(self.max_scans_shown_spinbox, 5, 1)
+        layout.addWidget(self.button_box, 6, 0, 1, 2)
         layout.setColumnStretch(1, 1)
 
     @QtCore.Slot()
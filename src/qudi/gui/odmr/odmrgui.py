@@ -317,6 +317,9 @@ class OdmrGui(GuiBase):
             data_rate=self._odmr_settings_dialog.data_rate_spinbox.value(),
             oversampling=self._odmr_settings_dialog.oversampling_spinbox.value()
         )
+        self._odmr_logic().set_sweeps_per_frame(
+            self._odmr_settings_dialog.sweeps_per_frame_spinbox.value()
+        )
         self._max_shown_scans = self._odmr_settings_dialog.max_scans_shown_spinbox.value()
 
     @QtCore.Slot()
@@ -324,6 +327,7 @@ class OdmrGui(GuiBase):
         logic = self._odmr_logic()
         self._odmr_settings_dialog.oversampling_spinbox.setValue(logic.oversampling)
         self._odmr_settings_dialog.data_rate_spinbox.setValue(logic.data_rate)
+        self._odmr_settings_dialog.sweeps_per_frame_spinbox.setValue(logic.sweeps_per_frame)
         self._odmr_settings_dialog.max_scans_shown_spinbox.setValue(self._max_shown_scans)
 
     @QtCore.Slot(bool)
@@ -401,6 +405,10 @@ class OdmrGui(GuiBase):
         if param is not None:
             self._odmr_settings_dialog.oversampling_spinbox.setValue(param)
 
+        param = param_dict.get('sweeps_per_frame')
+        if param is not None:
+            self._odmr_settings_dialog.sweeps_per_frame_spinbox.setValue(param)
+
         param = param_dict.get('run_time')
         if param is not None:
             self._scan_control_dockwidget.set_runtime(param)
@@ -243,18 +243,16 @@ class PIDGui(GuiBase):
                 self._mw.labelkI.setText('{0:,.6f}'.format(extra['I']))
             if 'D' in extra:
                 self._mw.labelkD.setText('{0:,.6f}'.format(extra['D']))
-            self._curve1.setData(
-                y=self._pid_logic.history[0],
-                x=np.arange(0, self._pid_logic.get_buffer_length()) * self._pid_logic.timestep
-                )
-            self._curve2.setData(
-                y=self._pid_logic.history[1],
-                x=np.arange(0, self._pid_logic.get_buffer_length()) * self._pid_logic.timestep
-                )
-            self._curve3.setData(
-                y=self._pid_logic.history[2],
-                x=np.arange(0, self._pid_logic.get_buffer_length()) * self._pid_logic.timestep
-                )
+            # Fetch a single snapshot decimated to the plot width. The decimated samples are evenly
+            # spaced and end with the newest sample.
+            history = self._pid_logic.get_history(max_points=max(1, self._pw.width()))
+            points = history.shape[1]
+            buffer_length = max(self._pid_logic.get_buffer_length(), points)
+            step = -(-buffer_length // points) if points > 0 else 1
+            x = (buffer_length - 1 - step * np.arange(points - 1, -1, -1)) * self._pid_logic.timestep
+            self._curve1.setData(y=history[0], x=x)
+            self._curve2.setData(y=history[1], x=x)
+            self._curve3.setData(y=history[2], x=x)
 
         if self._pid_logic.get_saving_state():
             self._mw.record_control_Action.setText('Save')
@@ -3059,7 +3059,12 @@ class PulsedMeasurementGui(GuiBase):
             label.setObjectName('extract_param_label_' + param_name)
 
             # Create widget for parameter and connect update signal
-            if isinstance(value, float):
+            # (check bool before int since bool is a subclass of int)
+            if isinstance(value, bool):
+                widget = QtWidgets.QCheckBox()
+                widget.setChecked(value)
+                widget.stateChanged.connect(self.extraction_settings_changed)
+            elif isinstance(value, float):
                 widget = ScienDSpinBox()
                 widget.setValue(value)
                 widget.editingFinished.connect(self.extraction_settings_changed)
@@ -3071,10 +3076,6 @@ class PulsedMeasurementGui(GuiBase):
                 widget = QtWidgets.QLineEdit()
                 widget.setText(value)
                 widget.editingFinished.connect(self.extraction_settings_changed)
-            elif isinstance(value, bool):
-                widget = QtWidgets.QCheckBox()
-                widget.setChecked(value)
-                widget.stateChanged.connect(self.extraction_settings_changed)
             else:
                 self.log.error('Could not create widget for extraction parameter "{0}".\n'
                                'Default parameter value is of invalid type.'.format(param_name))
@@ -24,7 +24,7 @@ __all__ = ['Scan1DWidget', 'Scan2DWidget']
 
 import os
 import numpy as np
-from typing import Tuple, Union, Sequence
+from typing import Tuple, Union, Sequence, Dict
 from PySide2 import QtCore, QtWidgets, QtGui
 from typing import Optional, List
 from qudi.util.widgets.plotting.plot_widget import RubberbandZoomSelectionPlotWidget
@@ -173,6 +173,13 @@ class Scan1DWidget(_BaseScanWidget):
         # Set data
         self._update_scan_data(update_range=update_range)
 
+    def update_scan_lines(self, start: int, stop: int, data: Dict[str, np.ndarray]) -> None:
+        """ Overwrite lines of the displayed scan data in place (see ScanData.set_lines) """
+        if (self._scan_data is None) or (self._scan_data.data is None):
+            return
+        self._scan_data.set_lines(start, stop, data)
+        self._update_scan_data(update_range=False)
+
     @QtCore.Slot(dict)
     def _markers_changed(self, markers) -> None:
         position = markers[self.plot_widget.SelectionMode.X][0]
@@ -311,6 +318,16 @@ class Scan2DWidget(_BaseScanWidget):
         # Set data
         self._update_scan_data()
 
+    def update_scan_lines(self, start: int, stop: int, data: Dict[str, np.ndarray]) -> None:
+        """ Overwrite lines of the displayed scan data in place (see ScanData.set_lines) """
+        if (self._scan_data is None) or (self._scan_data.data is None):
+            return
+        self._scan_data.set_lines(start, stop, data)
+        current_channel = self.channel_selection_combobox.currentText()
+        if current_channel in self._scan_data.settings.channels:
+            # image extent and view range are unchanged during a scan
+            self.image_widget.set_image(self._scan_data.data[current_channel])
+
     @QtCore.Slot(dict)
     def _region_changed(self, regions) -> None:
         center = regions[self.image_widget.SelectionMode.XY][0][0]
@@ -22,7 +22,7 @@ If not, see <https://www.gnu.org/licenses/>.
 
 import os
 from uuid import UUID
-from typing import Union, Tuple, Optional
+from typing import Union, Tuple, Optional, Dict
 
 import numpy as np
 from PySide2 import QtCore, QtGui, QtWidgets
@@ -162,6 +162,7 @@ class ScannerGui(GuiBase):
         # misc
         self._optimizer_id = 0
         self._optimizer_state = {'is_running': False}
+        self._optimizer_scan_data = None
         self._n_save_tasks = 0
         return
 
@@ -172,6 +173,7 @@ class ScannerGui(GuiBase):
         the event argument from fysom to the methods.
         """
         self._optimizer_id = self._optimize_logic().module_uuid
+        self._optimizer_scan_data = None
 
         self.scan_2d_dockwidgets = dict()
         self.scan_1d_dockwidgets = dict()
@@ -236,6 +238,7 @@ class ScannerGui(GuiBase):
             self.update_scanner_settings_from_logic, QtCore.Qt.QueuedConnection
         )
         self._scanning_logic().sigScanStateChanged.connect(self.scan_state_updated, QtCore.Qt.QueuedConnection)
+        self._scanning_logic().sigScanDataUpdated.connect(self.scan_data_updated, QtCore.Qt.QueuedConnection)
         self._data_logic().sigHistoryScanDataRestored.connect(self._update_from_history, QtCore.Qt.QueuedConnection)
         self._optimize_logic().sigOptimizeStateChanged.connect(self.optimize_state_updated, QtCore.Qt.QueuedConnection)
         self.sigOptimizerSettingsChanged.connect(
@@ -312,6 +315,7 @@ class ScannerGui(GuiBase):
         self._mw.action_utility_zoom.toggled.disconnect()
         self._scanning_logic().sigScannerTargetChanged.disconnect(self.scanner_target_updated)
         self._scanning_logic().sigScanStateChanged.disconnect(self.scan_state_updated)
+        self._scanning_logic().sigScanDataUpdated.disconnect(self.scan_data_updated)
         self._scanning_logic().sigScanSettingsChanged.disconnect(self.update_scanner_settings_from_logic)
         self._optimize_logic().sigOptimizeStateChanged.disconnect(self.optimize_state_updated)
         self._optimize_logic().sigOptimizeSequenceDimensionsChanged.disconnect(self._init_optimizer_dockwidget)
@@ -766,6 +770,8 @@ class ScannerGui(GuiBase):
 
         if scan_data is not None:
             if caller_id is self._optimizer_id:
+                # keep the running optimizer scan to apply the scan line updates to
+                self._optimizer_scan_data = scan_data if is_running else None
                 channel = self._osd.data_channel
                 if scan_data.settings.scan_dimension == 2:
                     x_ax, y_ax = scan_data.settings.axes
@@ -800,6 +806,40 @@ class ScannerGui(GuiBase):
                     dockwidget.scan_widget.toggle_scan_button.setChecked(is_running)
                     self._update_scan_data(scan_data, back_scan_data)
 
+    @QtCore.Slot(tuple, int, int, dict, object, UUID)
+    def scan_data_updated(
+        self,
+        scan_axes: Union[Tuple[str], Tuple[str, str]],
+        start: int,
+        stop: int,
+        data: Dict[str, np.ndarray],
+        back_data: Optional[Dict[str, np.ndarray]] = None,
+        caller_id: Optional[UUID] = None,
+    ):
+        """ Apply the scan lines acquired during a running scan to the displayed scan data in place.
+        """
+        if caller_id is self._optimizer_id:
+            scan_data = self._optimizer_scan_data
+            if scan_data is None or scan_data.settings.axes != scan_axes:
+                return
+            scan_data.set_lines(start, stop, data)
+            channel = self._osd.data_channel
+            if scan_data.settings.scan_dimension == 2:
+                self.optimizer_dockwidget.set_image(image=scan_data.data[channel], axs=scan_axes)
+            else:
+                self.optimizer_dockwidget.set_plot_data(
+                    x=np.linspace(*scan_data.settings.range[0], scan_data.settings.resolution[0]),
+                    y=scan_data.data[channel],
+                    axs=scan_axes,
+                )
+        else:
+            if len(scan_axes) == 2:
+                dockwidget = self.scan_2d_dockwidgets.get(scan_axes, None)
+            else:
+                dockwidget = self.scan_1d_dockwidgets.get(scan_axes, None)
+            if dockwidget is not None:
+                dockwidget.scan_widget.update_scan_lines(start, stop, data)
+
     @QtCore.Slot(bool, dict, object)
     def optimize_state_updated(self, is_running, optimal_position=None, fit_data=None):
         self._optimizer_state['is_running'] = is_running
@@ -49,6 +49,7 @@ class TimeSeriesGui(GuiBase):
         module.Class: 'time_series.time_series_gui.TimeSeriesGui'
         options:
             use_antialias: True  # optional, set to False if you encounter performance issues
+            plot_envelope: True  # optional, plot min/max envelope at plot resolution
         connect:
             _time_series_logic_con: <TimeSeriesReaderLogic_name>
     """
@@ -58,6 +59,8 @@ class TimeSeriesGui(GuiBase):
 
     # declare ConfigOptions
     _use_antialias = ConfigOption('use_antialias', default=True, constructor=lambda x: bool(x))
+    # Let the logic reduce the trace data to a min/max envelope of the plot width in pixels
+    _plot_envelope = ConfigOption('plot_envelope', default=True, constructor=lambda x: bool(x))
 
     sigStartCounter = QtCore.Signal()
     sigStopCounter = QtCore.Signal()
@@ -65,6 +68,7 @@ class TimeSeriesGui(GuiBase):
     sigStopRecording = QtCore.Signal()
     sigTraceSettingsChanged = QtCore.Signal(dict)
     sigChannelSettingsChanged = QtCore.Signal(list, list)
+    sigDisplayResolutionChanged = QtCore.Signal(int)
 
     _current_value_channel = StatusVar(name='current_value_channel', default='None')
     _visible_traces = StatusVar(name='visible_traces', default=dict())
@@ -116,6 +120,10 @@ class TimeSeriesGui(GuiBase):
         self._vb.setMenuEnabled(False)
         # Sync resize events
         self._mw.trace_plot_widget.plotItem.vb.sigResized.connect(self.__update_viewbox_sync)
+        if self._plot_envelope:
+            self._mw.trace_plot_widget.plotItem.vb.sigResized.connect(
+                self.__update_display_resolution
+            )
 
         self._mw.trace_plot_widget.disableAutoRange(axis='x')
         # self._mw.trace_plot_widget.setAutoVisible(x=True)
@@ -181,6 +189,8 @@ class TimeSeriesGui(GuiBase):
         self.sigTraceSettingsChanged.connect(logic.set_trace_settings, QtCore.Qt.QueuedConnection)
         self.sigChannelSettingsChanged.connect(logic.set_channel_settings,
                                                QtCore.Qt.QueuedConnection)
+        self.sigDisplayResolutionChanged.connect(logic.set_display_resolution,
+                                                 QtCore.Qt.QueuedConnection)
 
         logic.sigDataChanged.connect(self.update_data, QtCore.Qt.QueuedConnection)
         logic.sigTraceSettingsChanged.connect(self.update_trace_settings,
@@ -194,6 +204,8 @@ class TimeSeriesGui(GuiBase):
         self.update_channel_settings(logic.active_channel_names, logic.averaged_channel_names)
         self.update_trace_settings(logic.trace_settings)
         self.update_data(*logic.trace_data, *logic.averaged_trace_data)
+        if self._plot_envelope:
+            self.__update_display_resolution()
         self._apply_trace_view_settings(self.trace_view_settings)
         index = self._mw.current_value_combobox.findText(self._current_value_channel)
         if index < 0:
@@ -231,6 +243,10 @@ class TimeSeriesGui(GuiBase):
         self.sigStopRecording.disconnect()
         self.sigTraceSettingsChanged.disconnect()
         self.sigChannelSettingsChanged.disconnect()
+        self.sigDisplayResolutionChanged.disconnect()
+        if self._plot_envelope:
+            # Other receivers of the trace data should get the full data again
+            logic.set_display_resolution(0)
         logic.sigDataChanged.disconnect(self.update_data)
         logic.sigTraceSettingsChanged.disconnect(self.update_trace_settings)
         logic.sigChannelSettingsChanged.disconnect(self.update_channel_settings)
@@ -275,6 +291,12 @@ class TimeSeriesGui(GuiBase):
             self.log.exception('sdsdasd')
             raise
 
+    def __update_display_resolution(self):
+        """ Helper method to request trace data reduced to the plot width in physical pixels """
+        width = self._mw.trace_plot_widget.plotItem.vb.width()
+        width *= self._mw.trace_plot_widget.devicePixelRatioF()
+        self.sigDisplayResolutionChanged.emit(max(1, int(round(width))))
+
     def _apply_trace_view_settings(self, setting):
         active_channels, averaged_channels = self._time_series_logic_con().channel_settings
         for chnl, (show_data, show_average, precision) in setting.items():
@@ -361,18 +383,19 @@ class TimeSeriesGui(GuiBase):
 
     @QtCore.Slot(object, object, object, object)
     def update_data(self, data_time, data, smooth_time, smooth_data):
-        """ The function that grabs the data and sends it to the plot """
-        shift_time = data_time[0] != 0
+        """ The function that grabs the data and sends it to the plot.
+        Data can either be the full trace data or its min/max envelope (see
+        TimeSeriesReaderLogic.get_trace_envelope), both sharing the same time axis.
+        """
+        time_offset = data_time[0] if data_time.size > 0 else 0
         if data is not None:
-            if shift_time:
-                data_time = data_time - data_time[0]
+            if time_offset != 0:
+                data_time = data_time - time_offset
             for channel, y_arr in data.items():
                 self.curves[channel].setData(y=y_arr, x=data_time)
         if smooth_data is not None:
-            if shift_time:
-                smooth_time = smooth_time + (
-                    data_time[data_time.shape[0] - smooth_time.shape[0]] - smooth_time[0]
-                )
+            if time_offset != 0:
+                smooth_time = smooth_time - time_offset
             for channel, y_arr in smooth_data.items():
                 self.averaged_curves[channel].setData(y=y_arr, x=smooth_time)
 
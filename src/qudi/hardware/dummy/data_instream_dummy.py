@@ -143,6 +143,9 @@ class SampleGenerator:
         samples_per_channel = int(elapsed_time * self.sample_rate)  # truncate
         if self.streaming_mode == StreamingMode.FINITE:
             samples_per_channel = min(samples_per_channel, self._free_samples)
+        elif self.__available_samples + samples_per_channel > self._buffer_sample_size:
+            raise OverflowError('Sample buffer has overflown. Decrease sample rate or increase '
+                                'data readout rate.')
         elapsed_time = samples_per_channel / self.sample_rate
         ch_count = self.channel_count
 
@@ -180,9 +183,6 @@ class SampleGenerator:
             self.__available_samples += samples_per_channel
             self.__end = end
         self._last_time += elapsed_time
-        if self.__available_samples > self._buffer_sample_size:
-            raise OverflowError('Sample buffer has overflown. Decrease sample rate or increase '
-                                'data readout rate.')
         return self._last_time
 
     def read_samples(self,
@@ -21,8 +21,10 @@ If not, see <https://www.gnu.org/licenses/>.
 
 from logging import getLogger
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Tuple, Any, List
 import numpy as np
+from scipy.spatial import cKDTree
 from PySide2 import QtCore
 from fysom import FysomError
 from qudi.core.configoption import ConfigOption
@@ -49,7 +51,12 @@ class DummyScanConstraints(ScanConstraints):
 
 
 class ImageGenerator:
-    """Generate 1D and 2D images with random Gaussian spots."""
+    """Generate 1D and 2D images with random Gaussian spots.
+
+    The spots are kept in a k-d tree, so each scan point only evaluates the spots within
+    spot_view_distance_factor times their size (sigma) instead of all spots. The image is generated
+    in chunks of scan lines processed by a thread pool.
+    """
 
     def __init__(
         self,
@@ -108,44 +115,34 @@ class ImageGenerator:
         self._spots["pos"] = spot_positions
         self._spots["sigma"] = spot_sigmas
         self._spots["amp"] = spot_amplitudes
+        # spatial index to look up the spots close to a scan point
+        self._spots["tree"] = cKDTree(spot_positions)
         logger.debug(f"Generated {spot_count} spots.")
 
-    def generate_image(self, scan_vectors: Dict[str, np.ndarray], scan_resolution: Tuple[int, ...]) -> np.ndarray:
-        sim_data = self._spots
-        positions = sim_data["pos"]
-        amplitudes = sim_data["amp"]
-        sigmas = sim_data["sigma"]
+    @property
+    def view_distance(self) -> float:
+        """Maximum distance of a visible spot from a scan point."""
+        return self.spot_view_distance_factor * np.max(np.abs(self._spots["sigma"]))
 
+    def generate_image(self, scan_vectors: Dict[str, np.ndarray], scan_resolution: Tuple[int, ...]) -> np.ndarray:
         t_start = time.perf_counter()
 
-        include_dist = max(self.spot_size_dist) * self.spot_view_distance_factor
         grid_array = self._scan_vectors_2_array(scan_vectors)
 
-        positions_in_detection_volume, indices = self._points_in_detection_volume(positions, grid_array, include_dist)
-
-        scan_image = np.random.uniform(0, min(self.spot_amplitude_dist) * 0.2, scan_resolution)
+        # lines along the last image axis, processed in chunks of whole lines
+        line_length = scan_resolution[-1]
+        lines_per_chunk = max(1, self._chunk_size // line_length)
+        chunk_length = lines_per_chunk * line_length
+        chunks = [grid_array[i : i + chunk_length] for i in range(0, grid_array.shape[0], chunk_length)]
 
-        if len(indices) > 0:
-            gauss_image = self._resolve_grid_processed_sum_m_gaussian_n_dim_return_method(
-                self._process_in_grid_chunks(
-                    method=self._sum_m_gaussian_n_dim,
-                    positions=positions_in_detection_volume,
-                    grid_points=grid_array,
-                    include_dist=include_dist,
-                    method_params={
-                        "grid_points": grid_array,
-                        "mus": positions_in_detection_volume,
-                        "sigmas": sigmas[indices],
-                        "amplitudes": amplitudes[indices],
-                    },
-                ),
-                image_dimension=scan_resolution,
-            )
+        with ThreadPoolExecutor() as executor:
+            gauss_image = np.concatenate(list(executor.map(self._sum_visible_gaussians, chunks)))
 
-            scan_image += gauss_image
+        scan_image = np.random.uniform(0, min(self.spot_amplitude_dist) * 0.2, scan_resolution)
+        scan_image += gauss_image.reshape(scan_resolution)
 
         logger.debug(
-            f"Image took {time.perf_counter()-t_start:.3f} s for {positions_in_detection_volume.shape[0]} spots on"
+            f"Image took {time.perf_counter()-t_start:.3f} s for {self._spots['count']} spots on"
             f" {len(grid_array)} grid points."
         )
 
@@ -173,154 +170,44 @@ class ImageGenerator:
         ]
         return np.asarray(sorted_axes).T
 
-    def _process_in_grid_chunks(
-        self, method, positions: np.ndarray, grid_points: np.ndarray, include_dist: float, method_params: dict
-    ) -> list:
-        if len(positions) * len(grid_points) <= self._image_generation_max_calculations:
-            return [method(**method_params)]
-
-        logger.warning(
-            f"number of grid_points * number of spot positions exceeds {self._image_generation_max_calculations} values. "
-            f"Processing in grid point chunks, this may take a while. "
-            f"Consider reducing the number of scan points, the view distance of spots or the spot density to regain performance.\n "
-            f"number of spots: {len(positions)}\n "
-            f"number of grid points: {len(grid_points)}\n "
-            f"view distance: {include_dist} m"
-        )
-
-        all_results = []
-
-        # Process grid points in chunks
-        for i in range(0, grid_points.shape[0], self._chunk_size):
-            grid_chunk = grid_points[i : i + self._chunk_size]
-            method_params.update({"grid_points": grid_chunk})
-            all_results.append(method(**method_params))
-
-        return all_results
-
-    @staticmethod
-    def _calc_plane_normal_vector(vectors):
+    def _sum_visible_gaussians(self, grid_points: np.ndarray) -> np.ndarray:
         """
-        Calculate the normal vector in n-dimensional space of a plane defined by a set of vectors.
-
-        Parameters
-        ----------
-        vectors : ndarray
-            A 2D array where each row represents one of the m vectors that define the plane,
-            and each column corresponds to one of the n dimensions of the space.
-
-        Returns
-        -------
-        ndarray
-            The normal vector of the plane, represented as a 1D array of length n.
-        """
-        # TODO: move to qudi-core.math
-        vectors = vectors - np.mean(vectors, axis=0)
-
-        # Find the orthogonal complement of the space spanned by the vectors
-        _, _, v = np.linalg.svd(vectors)
-        normal = v[-1]
-
-        normal /= np.linalg.norm(normal)
-
-        return normal
-
-    @staticmethod
-    def _distance_to_plane(point, point_in_plane, normal_vector):
-        # projection of the connection (point-point_in_plane) onto the normal
-        distance = np.abs(np.dot(point - point_in_plane, normal_vector))
-
-        return distance
-
-    @staticmethod
-    def _points_in_detection_volume(
-        positions: np.ndarray, grid_points: np.ndarray, include_dist: float
-    ) -> Tuple[np.ndarray, np.ndarray]:
-        n_scan_vecs = grid_points.T.shape[1]
-        n_emitters = positions.shape[0]
-        n_dim = grid_points.T.shape[0]
-
-        # need dim(plane) vectors to define plane. Some reserve if unlucky.
-        idxs_rand = []
-        for i in range(2 * n_dim):
-            idxs_rand.append(np.random.randint(0, n_scan_vecs))
-        plane_vecs_rand = grid_points[idxs_rand, :]  # todo: check whether vectors really span 2d plane in n dim
-
-        plane_normal_vec = ImageGenerator._calc_plane_normal_vector(plane_vecs_rand)
-        distances_svd = np.asarray(
-            [
-                ImageGenerator._distance_to_plane(positions[i, :], plane_vecs_rand[0, :], plane_normal_vec)
-                for i in range(0, n_emitters)
-            ]
-        )
-
-        idxs = np.where(distances_svd <= include_dist)[0]
-        # TODO: Remove in scan plane out of bounds spots
-        positions_svd = positions[idxs, :]
-        indices_svd = idxs
-
-        return positions_svd, indices_svd
-
-    @staticmethod
-    def _sum_m_gaussian_n_dim(grid_points, mus, sigmas, amplitudes=None) -> np.ndarray:
-        """
-        Calculate the Gaussian values for each point in an n-dimensional grid with customizable amplitudes.
+        Calculate the sum of the Gaussian spots visible from each point of a chunk of grid points.
 
         Parameters
         ----------
         grid_points : ndarray
-            A 1D NumPy array representing the coordinates at which the Gaussian should be evaluated.
-        mus : ndarray
-            A 1D NumPy array representing the mean values of the Gaussians for each dimension.
-        sigmas : ndarray
-            A 1D NumPy array representing the variances of each Gaussian along each axis.
-        amplitudes : float, optional
-            A scalar value representing the amplitude of the Gaussian, default is 1.0.
-
-        Returns
-        -------
-        ndarray
-            A NumPy array of Gaussian values evaluated at each point in `grid_points`.
-        """
-        if amplitudes is None:
-            amplitudes = np.ones(mus.shape[0])
-
-        grid_points = grid_points[:, np.newaxis, :]
-        mus = mus[np.newaxis, :, :]
-        sigmas = sigmas[np.newaxis, :, :]
-
-        diff = grid_points - mus
-        exponent = -0.5 * np.sum((diff / sigmas) ** 2, axis=2)
-
-        gaussians = amplitudes[:, np.newaxis] * np.exp(exponent.T)
-
-        return np.sum(gaussians, axis=0)
-
-    @staticmethod
-    def _resolve_grid_processed_sum_m_gaussian_n_dim_return_method(
-        gauss_data: List[np.ndarray], image_dimension: Tuple[int, ...]
-    ) -> np.ndarray:
-        return np.vstack(gauss_data).reshape(image_dimension)
-
-    @staticmethod
-    def _create_coordinates(axes_dict: Dict[int, np.ndarray]) -> np.ndarray:
-        """
-        Generate coordinates for calculating a Gaussian distribution from the specified axes.
-
-        Parameters
-        ----------
-        axes_dict : dict of {int: ndarray}
-            A dictionary where each key is an axis index, and each value is a 1D array of values along that axis
-            for which the Gaussian should be evaluated.
+            A 2D NumPy array of coordinates to evaluate the Gaussians at. Each row contains the coordinates
+            of a single scan point.
 
         Returns
         -------
         ndarray
-            A 2D NumPy array of coordinates to evaluate the Gaussian at. Each row contains the coordinates
-            of a single scan point.
+            A 1D NumPy array of the summed Gaussian values at each point in `grid_points`.
         """
-        axes_coords = [axes_dict[coords] for coords in sorted(axes_dict.keys())]
-        return np.column_stack(axes_coords)
+        # all pairs of grid points and spots closer than the view distance
+        pairs = cKDTree(grid_points).sparse_distance_matrix(
+            self._spots["tree"], self.view_distance, output_type="ndarray"
+        )
+        values = np.zeros(grid_points.shape[0])
+        # limit the number of pairs evaluated at once
+        for start in range(0, pairs.shape[0], self._image_generation_max_calculations):
+            pair_chunk = pairs[start : start + self._image_generation_max_calculations]
+            point_indices = pair_chunk["i"]
+            spot_indices = pair_chunk["j"]
+            exponent = np.sum(
+                ((grid_points[point_indices] - self._spots["pos"][spot_indices]) / self._spots["sigma"][spot_indices])
+                ** 2,
+                axis=1,
+            )
+            # each spot is visible within view distance factor times its size (sigma)
+            visible = exponent <= self.spot_view_distance_factor**2
+            values += np.bincount(
+                point_indices[visible],
+                weights=self._spots["amp"][spot_indices[visible]] * np.exp(-0.5 * exponent[visible]),
+                minlength=grid_points.shape[0],
+            )
+        return values
 
 
 class ScanningProbeDummyBare(ScanningProbeInterface):
@@ -350,7 +237,7 @@ class ScanningProbeDummyBare(ScanningProbeInterface):
                 z: 50e-9
             # max_spot_number: 80e3 # optional
             # spot_density: 5e4 # optional
-            # spot_view_distance_factor: 2 # optional
+            # spot_view_distance_factor: 4 # optional
             # spot_size_dist: [400e-9, 100e-9] # optional
             # spot_amplitude_dist: [2e5, 4e4] # optional
             # require_square_pixels: False # optional
@@ -371,8 +258,8 @@ class ScanningProbeDummyBare(ScanningProbeInterface):
     _max_spot_number: int = ConfigOption(name="max_spot_number", default=int(80e3), constructor=lambda x: int(x))
     _spot_density: float = ConfigOption(name="spot_density", default=1e5)  # in 1/m
     _spot_view_distance_factor: float = ConfigOption(
-        name="spot_view_distance_factor", default=2, constructor=lambda x: float(x)
-    )  # spots are visible by this factor times the maximum spot size from each scan point away
+        name="spot_view_distance_factor", default=4, constructor=lambda x: float(x)
+    )  # spots are visible by this factor times their size (sigma) from each scan point away
     _spot_size_dist: List[float] = ConfigOption(name="spot_size_dist", default=(400e-9, 100e-9))
     _spot_amplitude_dist: List[float] = ConfigOption(name="spot_amplitude_dist", default=(2e5, 4e4))
     _require_square_pixels: bool = ConfigOption(name='require_square_pixels', default=False)
@@ -381,10 +268,10 @@ class ScanningProbeDummyBare(ScanningProbeInterface):
     _back_scan_resolution_configurable: bool = ConfigOption(name='back_scan_resolution_configurable', default=True)
     _image_generation_max_calculations: int = ConfigOption(
         name="image_generation_max_calculations", default=int(100e6), constructor=lambda x: int(x)
-    )  # number of points that can be calculated at once during image generation
+    )  # number of (scan point, spot) pairs that can be calculated at once during image generation
     _image_generation_chunk_size: int = ConfigOption(
         name="image_generation_chunk_size", default=1000, constructor=lambda x: int(x)
-    )  # if too many points are being calculated at once during image generation, this gives the size of the chunks it should be broken up into
+    )  # number of scan points (rounded to whole scan lines) per image generation task of the thread pool
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -785,6 +672,22 @@ class ScanningProbeDummyBare(ScanningProbeInterface):
                 return None
             return self._back_scan_data.copy()
 
+    def get_filled_pixel_count(self) -> Optional[int]:
+        """Number of pixels of the forward scan acquired so far."""
+        with self._thread_lock:
+            if self._scan_data is None:
+                return None
+            return min(self.__last_forward_pixel, int(np.prod(self._scan_data.settings.resolution)))
+
+    def get_scan_data_lines(self, start: int, stop: int):
+        """Copy of the forward and backward scan lines start to stop (exclusive)."""
+        with self._thread_lock:
+            if self._scan_data is None:
+                return None, None
+            if self._back_scan_data is None:
+                return self._scan_data.get_lines(start, stop), None
+            return self._scan_data.get_lines(start, stop), self._back_scan_data.get_lines(start, stop)
+
     def __start_timer(self):
         """
         Offload __update_timer.start() from the caller to the module's thread.
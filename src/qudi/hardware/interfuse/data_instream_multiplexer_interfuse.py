@@ -0,0 +1,627 @@
+# -*- coding: utf-8 -*-
+
+"""
+Share a single data in-stream between multiple logic modules.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['DataInStreamMultiplexer', 'DataInStreamMultiplexerOutput']
+
+import time
+import threading
+import numpy as np
+from typing import List, Union, Optional, Tuple, Sequence
+
+from qudi.core.configoption import ConfigOption
+from qudi.core.connector import Connector
+from qudi.core.module import Base
+from qudi.util.mutex import RecursiveMutex
+from qudi.util.ring_buffer import RingBuffer
+from qudi.interface.data_instream_interface import DataInStreamInterface, DataInStreamConstraints
+from qudi.interface.data_instream_interface import StreamingMode, SampleTiming
+
+
+class DataInStreamMultiplexer(Base):
+    """
+    Owns a hardware data in-stream and continuously reads it into a shared ring buffer from a
+    background thread. Logic modules do not connect to this module directly but each to its own
+    DataInStreamMultiplexerOutput module, which implements DataInStreamInterface with an
+    independent read cursor into the shared buffer.
+
+    The hardware stream is started with the first and stopped with the last running output. All
+    outputs running at the same time share the sample rate. The hardware is configured with all
+    channels requested by any connected output, so outputs can read different channel subsets.
+    Each output can be configured independently as long as the stream is not running or the
+    configuration is compatible with the running stream.
+
+    Example config for copy-paste:
+
+    instream_multiplexer:
+        module.Class: 'interfuse.data_instream_multiplexer_interfuse.DataInStreamMultiplexer'
+        connect:
+            streamer: <data_instream_hardware>
+        options:
+            buffer_size: 1048576  # optional, shared buffer size in samples per channel
+            poll_interval: 0.005  # optional, hardware polling interval in seconds
+            read_timeout: 10  # optional, timeout in seconds for blocking reads of the outputs
+            read_data_views: False  # optional, read_data returns views into the shared buffer
+
+    instream_output_1:
+        module.Class: 'interfuse.data_instream_multiplexer_interfuse.DataInStreamMultiplexerOutput'
+        connect:
+            multiplexer: instream_multiplexer
+        options:
+            overflow_policy: 'raise'  # optional, 'raise' or 'skip' samples lost due to slow reading
+    """
+
+    _streamer = Connector(name='streamer', interface='DataInStreamInterface')
+
+    _buffer_size = ConfigOption(name='buffer_size',
+                                default=1024**2,
+                                missing='nothing',
+                                constructor=lambda x: int(round(x)))
+    _poll_interval = ConfigOption(name='poll_interval', default=0.005, missing='nothing')
+    _read_timeout = ConfigOption(name='read_timeout', default=10, missing='nothing')
+    # If True, read_data of all outputs returns read-only views into the shared ring buffer instead
+    # of copies whenever all hardware channels are read. The views remain valid until at least
+    # (buffer_size - <samples read at once>) more samples have been acquired.
+    _read_data_views = ConfigOption(name='read_data_views', default=False, missing='nothing')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = threading.Condition()
+        self._outputs = list()
+        self._running_outputs = set()
+        self._channels = list()
+        self._data = None
+        self._times = None
+        self._sample_count = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._error = None
+
+    def on_activate(self):
+        self._outputs = list()
+        self._running_outputs = set()
+
+    def on_deactivate(self):
+        with self._condition:
+            self._running_outputs.clear()
+            self._stop_hardware()
+        self._data = None
+        self._times = None
+
+    @property
+    def constraints(self) -> DataInStreamConstraints:
+        return self._streamer().constraints
+
+    @property
+    def buffer_size(self) -> int:
+        """ Size of the shared buffer in samples per channel """
+        return int(self._buffer_size)
+
+    @property
+    def read_timeout(self) -> float:
+        return float(self._read_timeout)
+
+    @property
+    def sample_count(self) -> int:
+        """ Total number of samples per channel acquired since the hardware stream has started """
+        return self._sample_count
+
+    @property
+    def channels(self) -> List[str]:
+        """ Hardware channels of the running stream in shared buffer column order """
+        return self._channels.copy()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def register_output(self, output: 'DataInStreamMultiplexerOutput') -> None:
+        with self._condition:
+            if output not in self._outputs:
+                self._outputs.append(output)
+
+    def unregister_output(self, output: 'DataInStreamMultiplexerOutput') -> None:
+        self.stop_output(output)
+        with self._condition:
+            if output in self._outputs:
+                self._outputs.remove(output)
+
+    def check_configuration(self,
+                            active_channels: Sequence[str],
+                            sample_rate: float) -> None:
+        """ Raises RuntimeError if an output with the given configuration can not be started while
+        the hardware stream is running.
+        """
+        with self._condition:
+            if not self.is_running:
+                return
+            missing = set(active_channels).difference(self._channels)
+            if missing:
+                raise RuntimeError(f'Shared data stream is running without channels {missing}')
+            if not np.isclose(sample_rate, self._streamer().sample_rate):
+                raise RuntimeError(f'Shared data stream is running with a different sample rate '
+                                   f'({self._streamer().sample_rate:.6g} Hz)')
+
+    def start_output(self, output: 'DataInStreamMultiplexerOutput') -> int:
+        """ Start the hardware stream if needed and register the output as running.
+
+        @return int: absolute index of the next sample to be acquired (start of read cursor)
+        """
+        with self._condition:
+            self.check_configuration(output.active_channels, output.sample_rate)
+            if not self.is_running:
+                self._start_hardware(output)
+            self._running_outputs.add(output)
+            return self._sample_count
+
+    def stop_output(self, output: 'DataInStreamMultiplexerOutput') -> None:
+        """ Remove the output from the running outputs and stop the hardware stream if it was the
+        last one.
+        """
+        with self._condition:
+            self._running_outputs.discard(output)
+            if not self._running_outputs:
+                self._stop_hardware()
+
+    def wait_for_samples(self, cursor: int, samples: int) -> int:
+        """ Blocks until the given number of samples behind the read cursor has been acquired.
+
+        @return int: absolute index behind the newest acquired sample
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self._error is not None or not self.is_running or
+                            self._sample_count - cursor >= samples,
+                    timeout=self.read_timeout
+            ):
+                raise TimeoutError(f'Timeout while waiting for {samples:d} samples per channel')
+            self._raise_on_error()
+            if not self.is_running:
+                raise RuntimeError('Shared data stream is not running')
+            return self._sample_count
+
+    def read(self,
+             cursor: int,
+             samples: int,
+             columns: Optional[np.ndarray] = None,
+             data_buffer: Optional[np.ndarray] = None,
+             timestamp_buffer: Optional[np.ndarray] = None
+             ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """ Read samples starting at the absolute index cursor from the shared buffer.
+        If no buffers are given, read-only views into the shared buffer are returned if possible
+        (ConfigOption read_data_views and all hardware channels read) or new arrays otherwise.
+        Samples must have been acquired before (see wait_for_samples) and must still be held by the
+        shared buffer (see oldest_sample).
+
+        @param int cursor: absolute index of the first sample to read
+        @param int samples: number of samples per channel to read
+        @param numpy.ndarray columns: optional column indices of the channels to read (all if None)
+        @param numpy.ndarray data_buffer: optional 1D array to write interleaved samples into
+        @param numpy.ndarray timestamp_buffer: optional 1D array to write timestamps into
+
+        @return (numpy.ndarray, numpy.ndarray): flat data array and timestamp array (or None)
+        """
+        with self._condition:
+            self._raise_on_error()
+            if cursor < self.oldest_sample:
+                raise OverflowError('Requested samples have already been overwritten in the shared '
+                                    'buffer')
+            if cursor + samples > self._sample_count:
+                raise IndexError('Requested samples have not been acquired yet')
+            data = self._data.latest(self._sample_count - cursor)[:samples]
+            times = None
+            if self._times is not None:
+                times = self._times.latest(self._sample_count - cursor)[:samples]
+            if columns is None:
+                if data_buffer is None:
+                    data = data.ravel() if self._read_data_views else data.flatten()
+                else:
+                    data_buffer.reshape(-1)[:data.size] = data.ravel()
+                    data = data_buffer
+            else:
+                if data_buffer is None:
+                    data_buffer = np.empty(samples * len(columns), dtype=data.dtype)
+                np.take(data,
+                        columns,
+                        axis=1,
+                        out=data_buffer.reshape(-1)[:samples * len(columns)].reshape(
+                            (samples, len(columns))
+                        ))
+                data = data_buffer
+            if times is not None:
+                if timestamp_buffer is None:
+                    times = times if self._read_data_views and columns is None else times.copy()
+                else:
+                    timestamp_buffer[:samples] = times
+                    times = timestamp_buffer
+            return data, times
+
+    @property
+    def oldest_sample(self) -> int:
+        """ Absolute index of the oldest sample still held by the shared buffer """
+        if self._data is None:
+            return self._sample_count
+        return max(0, self._sample_count - len(self._data))
+
+    def _raise_on_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError('Error while reading shared data stream') from self._error
+
+    def _start_hardware(self, output: 'DataInStreamMultiplexerOutput') -> None:
+        streamer = self._streamer()
+        constraints = streamer.constraints
+        # Configure all channels requested by any output in hardware channel order
+        requested = set()
+        for out in self._outputs:
+            requested.update(out.active_channels)
+        requested.update(output.active_channels)
+        channels = [ch for ch in constraints.channel_units if ch in requested]
+        buffer_size = max(out.channel_buffer_size for out in [output, *self._outputs])
+        streamer.configure(active_channels=channels,
+                           streaming_mode=StreamingMode.CONTINUOUS,
+                           channel_buffer_size=buffer_size,
+                           sample_rate=output.sample_rate)
+        self._channels = list(streamer.active_channels)
+        self._data = RingBuffer(size=self._buffer_size,
+                                sample_shape=(len(self._channels),),
+                                dtype=constraints.data_type)
+        if constraints.sample_timing == SampleTiming.TIMESTAMP:
+            self._times = RingBuffer(size=self._buffer_size, dtype=np.float64)
+        else:
+            self._times = None
+        self._sample_count = 0
+        self._error = None
+        self._stop_event.clear()
+        streamer.start_stream()
+        self._thread = threading.Thread(target=self._read_loop,
+                                        name='DataInStreamMultiplexer',
+                                        kwargs={'streamer': streamer},
+                                        daemon=True)
+        self._thread.start()
+
+    def _stop_hardware(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join()
+        self._thread = None
+        try:
+            self._streamer().stop_stream()
+        finally:
+            self._condition.notify_all()
+
+    def _read_loop(self, streamer) -> None:
+        """ Runs in the background thread. Reads all available samples from the hardware and appends
+        them to the shared buffer.
+        """
+        channel_count = len(self._channels)
+        # Read at most half the shared buffer at once
+        max_samples = max(1, self._buffer_size // 2)
+        data_buffer = np.empty(channel_count * max_samples, dtype=self._data.dtype)
+        times_buffer = None if self._times is None else np.empty(max_samples, dtype=np.float64)
+        try:
+            while not self._stop_event.is_set():
+                samples = min(streamer.available_samples, max_samples)
+                if samples <= 0:
+                    time.sleep(self._poll_interval)
+                    continue
+                streamer.read_data_into_buffer(data_buffer=data_buffer,
+                                               samples_per_channel=samples,
+                                               timestamp_buffer=times_buffer)
+                # Do not wait for the condition indefinitely. It is held while stopping.
+                while not self._condition.acquire(timeout=0.1):
+                    if self._stop_event.is_set():
+                        return
+                try:
+                    self._data.append(
+                        data_buffer[:channel_count * samples].reshape((samples, channel_count))
+                    )
+                    if times_buffer is not None:
+                        self._times.append(times_buffer[:samples])
+                    self._sample_count += samples
+                    self._condition.notify_all()
+                finally:
+                    self._condition.release()
+        except Exception as err:
+            self._error = err
+            if self._condition.acquire(timeout=1):
+                self._condition.notify_all()
+                self._condition.release()
+
+
+class DataInStreamMultiplexerOutput(DataInStreamInterface):
+    """
+    DataInStreamInterface implementation reading from a shared data stream owned by a
+    DataInStreamMultiplexer module. Each output has its own read cursor and configuration, so
+    multiple logic modules can read the same samples. See DataInStreamMultiplexer for an example
+    config.
+
+    If the output is read too slowly, samples are overwritten in the shared buffer before they are
+    read. Depending on ConfigOption overflow_policy, reading then raises an OverflowError
+    ('raise', same as most hardware) or skips the lost samples and continues with the oldest
+    samples still available ('skip', see lost_samples).
+    """
+
+    _multiplexer = Connector(name='multiplexer', interface='DataInStreamMultiplexer')
+
+    _overflow_policy = ConfigOption(name='overflow_policy',
+                                    default='raise',
+                                    missing='nothing',
+                                    checker=lambda x: x in ('raise', 'skip'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._thread_lock = RecursiveMutex()
+        self._constraints = None
+        self._active_channels = list()
+        self._sample_rate = 0.
+        self._channel_buffer_size = 0
+        self._columns = None
+        self._cursor = 0
+        self._lost_samples = 0
+
+    def on_activate(self):
+        multiplexer = self._multiplexer()
+        hw_constraints = multiplexer.constraints
+        self._constraints = DataInStreamConstraints(
+            channel_units=hw_constraints.channel_units,
+            sample_timing=hw_constraints.sample_timing,
+            streaming_modes=[StreamingMode.CONTINUOUS],
+            data_type=hw_constraints.data_type,
+            channel_buffer_size=hw_constraints.channel_buffer_size,
+            sample_rate=hw_constraints.sample_rate
+        )
+        self._active_channels = list(self._constraints.channel_units)
+        self._sample_rate = self._constraints.sample_rate.default
+        self._channel_buffer_size = int(self._constraints.channel_buffer_size.default)
+        self._lost_samples = 0
+        multiplexer.register_output(self)
+
+    def on_deactivate(self):
+        self._multiplexer().unregister_output(self)
+        if self.module_state() == 'locked':
+            self.module_state.unlock()
+
+    @property
+    def constraints(self) -> DataInStreamConstraints:
+        """ Read-only property returning the constraints on the settings for this data streamer. """
+        return self._constraints
+
+    @property
+    def available_samples(self) -> int:
+        """ Read-only property to return the currently available number of samples per channel ready
+        to read from buffer.
+        """
+        with self._thread_lock:
+            if self.module_state() != 'locked':
+                return 0
+            multiplexer = self._multiplexer()
+        return min(multiplexer.sample_count - self._cursor, multiplexer.buffer_size)
+
+    @property
+    def sample_rate(self) -> float:
+        """ Read-only property returning the currently set sample rate in Hz """
+        return self._sample_rate
+
+    @property
+    def channel_buffer_size(self) -> int:
+        """ Read-only property returning the currently set buffer size in samples per channel """
+        return self._channel_buffer_size
+
+    @property
+    def streaming_mode(self) -> StreamingMode:
+        """ Read-only property returning the currently configured StreamingMode Enum """
+        return StreamingMode.CONTINUOUS
+
+    @property
+    def active_channels(self) -> List[str]:
+        """ Read-only property returning the currently configured active channel names """
+        return self._active_channels.copy()
+
+    @property
+    def lost_samples(self) -> int:
+        """ Read-only property returning the number of samples per channel skipped since the stream
+        has been started because they were overwritten before being read (overflow_policy 'skip')
+        """
+        return self._lost_samples
+
+    def configure(self,
+                  active_channels: Sequence[str],
+                  streaming_mode: Union[StreamingMode, int],
+                  channel_buffer_size: int,
+                  sample_rate: float) -> None:
+        """ Configure a data stream. See read-only properties for information on each parameter. """
+        with self._thread_lock:
+            if self.module_state() == 'locked':
+                raise RuntimeError('Unable to configure data stream while it is already running')
+            channels = set(active_channels)
+            if not channels or not channels.issubset(self._constraints.channel_units):
+                raise ValueError(f'Invalid channels to set active {channels}. Allowed channels are '
+                                 f'{set(self._constraints.channel_units)}')
+            try:
+                streaming_mode = StreamingMode(streaming_mode.value)
+            except AttributeError:
+                streaming_mode = StreamingMode(streaming_mode)
+            if streaming_mode != StreamingMode.CONTINUOUS:
+                raise ValueError(f'Invalid streaming mode to set ({streaming_mode}). Only '
+                                 f'{StreamingMode.CONTINUOUS} is supported by shared streams.')
+            self._constraints.channel_buffer_size.check(channel_buffer_size)
+            self._constraints.sample_rate.check(sample_rate)
+            self._multiplexer().check_configuration(channels, sample_rate)
+            self._active_channels = [ch for ch in self._constraints.channel_units if ch in channels]
+            self._channel_buffer_size = int(channel_buffer_size)
+            self._sample_rate = float(sample_rate)
+
+    def start_stream(self) -> None:
+        """ Start the data acquisition/streaming """
+        with self._thread_lock:
+            if self.module_state() == 'locked':
+                self.log.warning('Unable to start input stream. It is already running.')
+                return
+            multiplexer = self._multiplexer()
+            self.module_state.lock()
+            try:
+                self._cursor = multiplexer.start_output(self)
+                channels = multiplexer.channels
+                if channels == self._active_channels:
+                    self._columns = None
+                else:
+                    self._columns = np.array([channels.index(ch) for ch in self._active_channels])
+                self._lost_samples = 0
+            except:
+                self.module_state.unlock()
+                raise
+
+    def stop_stream(self) -> None:
+        """ Stop the data acquisition/streaming """
+        with self._thread_lock:
+            if self.module_state() == 'locked':
+                try:
+                    self._multiplexer().stop_output(self)
+                finally:
+                    self.module_state.unlock()
+
+    def read_data_into_buffer(self,
+                              data_buffer: np.ndarray,
+                              samples_per_channel: int,
+                              timestamp_buffer: Optional[np.ndarray] = None) -> None:
+        """ Read data from the stream buffer into a 1D numpy array given as parameter.
+        Samples of all channels are stored interleaved in contiguous memory.
+        In case of a multidimensional buffer array, this buffer will be flattened before written
+        into.
+        The 1D data_buffer can be unraveled into channel and sample indexing with:
+
+            data_buffer.reshape([<samples_per_channel>, <channel_count>])
+
+        The data_buffer array must have the same data type as self.constraints.data_type.
+
+        In case of SampleTiming.TIMESTAMP a 1D numpy.float64 timestamp_buffer array has to be
+        provided to be filled with timestamps corresponding to the data_buffer array. It must be
+        able to hold at least <samples_per_channel> items:
+
+        This function is blocking until the required number of samples has been acquired.
+        """
+        if not isinstance(data_buffer, np.ndarray) or data_buffer.dtype != self._constraints.data_type:
+            raise TypeError(
+                f'data_buffer must be numpy.ndarray with dtype {self._constraints.data_type}'
+            )
+        if self._constraints.sample_timing == SampleTiming.TIMESTAMP and timestamp_buffer is None:
+            raise ValueError('timestamp_buffer must be provided for SampleTiming.TIMESTAMP')
+        self._read(samples_per_channel, data_buffer, timestamp_buffer)
+
+    def read_available_data_into_buffer(self,
+                                        data_buffer: np.ndarray,
+                                        timestamp_buffer: Optional[np.ndarray] = None) -> int:
+        """ Read data from the stream buffer into a 1D numpy array given as parameter.
+        The number of samples read per channel is returned and can be used to slice out valid data
+        from the buffer arrays like:
+
+            valid_data = data_buffer[:<channel_count> * <return_value>]
+            valid_timestamps = timestamp_buffer[:<return_value>]
+
+        See "read_data_into_buffer" documentation for more details.
+
+        This method will read all currently available samples into buffer. If number of available
+        samples exceeds buffer size, read only as many samples as fit into the buffer.
+        """
+        with self._thread_lock:
+            samples = min(self._available_samples(), data_buffer.size // len(self._active_channels))
+            if timestamp_buffer is not None:
+                samples = min(samples, timestamp_buffer.size)
+            self.read_data_into_buffer(data_buffer, samples, timestamp_buffer)
+            return samples
+
+    def read_data(self,
+                  samples_per_channel: Optional[int] = None
+                  ) -> Tuple[np.ndarray, Union[np.ndarray, None]]:
+        """ Read data from the stream buffer into a 1D numpy array and return it.
+        The returned data_buffer can be unraveled into channel samples with:
+
+            data_buffer.reshape([<samples_per_channel>, <channel_count>])
+
+        In case of SampleTiming.TIMESTAMP a 1D numpy.float64 timestamp_buffer array will be
+        returned as well with timestamps corresponding to the data_buffer array.
+        Depending on the multiplexer ConfigOption read_data_views, the returned arrays can be
+        read-only views into the shared buffer.
+
+        If samples_per_channel is omitted all currently available samples are read from buffer.
+        This method will not return until all requested samples have been read or a timeout occurs.
+        """
+        with self._thread_lock:
+            if samples_per_channel is None:
+                samples_per_channel = self._available_samples()
+            return self._read(samples_per_channel)
+
+    def read_single_point(self) -> Tuple[np.ndarray, Union[None, np.float64]]:
+        """ Returns the next sample of each configured data channel acquired by the shared stream.
+
+        In case of SampleTiming.TIMESTAMP a single numpy.float64 timestamp value will be returned
+        as well.
+        """
+        with self._thread_lock:
+            data, times = self._read(1)
+            return data.copy(), None if times is None else times[0]
+
+    def _available_samples(self) -> int:
+        if self.module_state() != 'locked':
+            raise RuntimeError('Unable to read data. Stream is not running.')
+        multiplexer = self._multiplexer()
+        return min(multiplexer.sample_count - self._cursor, multiplexer.buffer_size)
+
+    def _read(self,
+              samples: int,
+              data_buffer: Optional[np.ndarray] = None,
+              timestamp_buffer: Optional[np.ndarray] = None
+              ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        with self._thread_lock:
+            if self.module_state() != 'locked':
+                raise RuntimeError('Unable to read data. Stream is not running.')
+            multiplexer = self._multiplexer()
+            samples = int(samples)
+            if samples > multiplexer.buffer_size:
+                raise ValueError(f'Unable to read {samples:d} samples per channel at once. Shared '
+                                 f'buffer only holds {multiplexer.buffer_size:d} samples.')
+            while True:
+                if samples > 0:
+                    multiplexer.wait_for_samples(self._cursor, samples)
+                try:
+                    data, times = multiplexer.read(self._cursor,
+                                                   samples,
+                                                   columns=self._columns,
+                                                   data_buffer=data_buffer,
+                                                   timestamp_buffer=timestamp_buffer)
+                    break
+                except OverflowError:
+                    # Samples behind the cursor have been overwritten in the meantime
+                    lost = multiplexer.oldest_sample - self._cursor
+                    if self._overflow_policy == 'raise':
+                        raise OverflowError(
+                            f'Shared stream buffer has overflown ({lost:d} samples lost). Please '
+                            f'increase readout speed or shared buffer size.'
+                        ) from None
+                    self.log.warning(
+                        f'Shared stream buffer has overflown. Skipping {lost:d} samples.'
+                    )
+                    self._lost_samples += lost
+                    self._cursor += lost
+            self._cursor += samples
+            return data, times
@@ -80,6 +80,7 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
                 AI0: 'V'
             move_velocity: 400e-6 #m/s; This speed is used for scanner movements and avoids jumps from position to position.
             default_backward_resolution: 50
+            data_chunk_interval: 0.05 # optional, s; Max. time to wait for a chunk of scan data. At most one line per chunk.
     """
     _ni_finite_sampling_io = Connector(name='scan_hardware', interface='FiniteSamplingIOInterface')
     _ni_ao = Connector(name='analog_output', interface='ProcessSetpointInterface')
@@ -92,6 +93,7 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
 
     __max_move_velocity: float = ConfigOption(name='maximum_move_velocity', default=400e-6)
     __default_backward_resolution: int = ConfigOption(name='default_backward_resolution', default=50)
+    __data_chunk_interval: float = ConfigOption(name='data_chunk_interval', default=0.05)
 
     _threaded = True  # Interfuse is by default not threaded.
 
@@ -426,6 +428,7 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
             with self._thread_lock_data:
                 self._scan_data.new_scan()
                 self._back_scan_data.new_scan()
+                self.raw_data_container.reset()
                 self._stored_target_pos = self.bare_scanner.get_target(self).copy()
                 self.log.debug(f"Target pos at scan start: {self._stored_target_pos}")
                 self._scan_data.scanner_target_at_start = self._stored_target_pos
@@ -498,6 +501,25 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
             with self._thread_lock_data:
                 return self._back_scan_data.copy()
 
+    def get_filled_pixel_count(self) -> Optional[int]:
+        """ Number of pixels of the forward scan acquired so far.
+        """
+        if self._scan_data is None:
+            return None
+        with self._thread_lock_data:
+            container = self.raw_data_container
+            lines, line_samples = divmod(container.sample_count, container.line_size)
+            return lines * container.forward_line_resolution + min(line_samples,
+                                                                   container.forward_line_resolution)
+
+    def get_scan_data_lines(self, start: int, stop: int):
+        """ Copy of the forward and backward scan lines start to stop (exclusive).
+        """
+        if self._scan_data is None:
+            return None, None
+        with self._thread_lock_data:
+            return self._scan_data.get_lines(start, stop), self._back_scan_data.get_lines(start, stop)
+
     def emergency_stop(self):
         """
 
@@ -533,11 +555,22 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
         # not thread safe, call from thread_lock protected code only
         return self.raw_data_container.is_full
 
+    def _get_chunk_size(self) -> int:
+        """ Minimum number of samples to request per data chunk. This is a full (forward and backward)
+        line, limited to the samples acquired within ConfigOption data_chunk_interval at the scan
+        frequency, and to the samples missing to complete the frame.
+        """
+        # not thread safe, call from thread_lock protected code only
+        container = self.raw_data_container
+        interval_samples = int(self._scan_data.settings.frequency * self.__data_chunk_interval)
+        chunk_size = max(1, min(container.line_size, interval_samples))
+        return max(1, min(chunk_size, container.remaining_samples))
+
     def _fetch_data_chunk(self):
         try:
             # self.log.debug(f'fetch chunk: {self._ni_finite_sampling_io().samples_in_buffer}, {self.is_scan_running}')
-            # chunk_size = self._scan_data.settings.resolution[0] + self.__backwards_line_resolution
-            chunk_size = 10  # TODO Hardcode or go line by line as commented out above?
+            with self._thread_lock_data:
+                chunk_size = self._get_chunk_size()
             # Request a minimum of chunk_size samples per loop
             try:
                 samples_dict = self._ni_finite_sampling_io().get_buffered_samples(chunk_size) \
@@ -929,6 +962,14 @@ class NiScanningProbeInterfuseBare(ScanningProbeInterface):
 
 
 class RawDataContainer:
+    """
+    Raw sample buffers of a scan frame (forward and backward lines) for each channel.
+
+    New samples are written at a write cursor, so adding a chunk of samples costs O(chunk) no
+    matter how much of the frame has been acquired already. The forward and backward scan data are
+    views into the raw sample buffers that are created once, i.e. they always reflect the samples
+    written so far without copying or reshaping.
+    """
     def __init__(self, channel_keys, number_of_scan_lines: int,
                  forward_line_resolution: int, backwards_line_resolution: int):
         self.forward_line_resolution = forward_line_resolution
@@ -937,50 +978,73 @@ class RawDataContainer:
         self.backwards_line_resolution = backwards_line_resolution
 
         self._raw = {key: np.full(self.frame_size, np.nan) for key in channel_keys}
+        self._write_index = 0
+
+        # views of the forward and backward lines into the raw sample buffers
+        self._forwards_views = dict()
+        self._backwards_views = dict()
+        for key, raw in self._raw.items():
+            if self.number_of_scan_lines > 1:
+                reshaped_arr = raw.reshape(self.number_of_scan_lines, self.line_size)
+                self._forwards_views[key] = reshaped_arr[:, :self.forward_line_resolution].T
+                self._backwards_views[key] = reshaped_arr[:, self.forward_line_resolution:].T
+            elif self.number_of_scan_lines == 1:
+                self._forwards_views[key] = raw[:self.forward_line_resolution]
+                self._backwards_views[key] = raw[self.forward_line_resolution:]
+
+    @property
+    def line_size(self) -> int:
+        """ Number of samples of a forward and backward line """
+        return self.forward_line_resolution + self.backwards_line_resolution
 
     @property
     def frame_size(self) -> int:
-        return self.number_of_scan_lines * (self.forward_line_resolution + self.backwards_line_resolution)
+        return self.number_of_scan_lines * self.line_size
 
     def fill_container(self, samples_dict):
-        # get index of first nan from one element of dict
-        first_nan_idx = self.number_of_non_nan_values
+        """ Write new samples of each channel at the write cursor and advance the cursor. Samples
+        exceeding the frame size are discarded.
+
+        @param dict samples_dict: equally long sample arrays (values) for each channel (keys)
+        """
+        start = self._write_index
+        count = 0
         for key, samples in samples_dict.items():
-            self._raw[key][first_nan_idx:first_nan_idx + len(samples)] = samples
+            count = min(len(samples), self.frame_size - start)
+            self._raw[key][start:start + count] = samples[:count]
+        self._write_index += count
+
+    def reset(self):
+        """ Discard all samples and move the write cursor back to the start of the frame """
+        for raw in self._raw.values():
+            raw.fill(np.nan)
+        self._write_index = 0
 
     def forwards_data(self):
-        reshaped_2d_dict = dict.fromkeys(self._raw)
-        for key in self._raw:
-            if self.number_of_scan_lines > 1:
-                reshaped_arr = self._raw[key].reshape(self.number_of_scan_lines,
-                                                      self.forward_line_resolution + self.backwards_line_resolution)
-                reshaped_2d_dict[key] = reshaped_arr[:, :self.forward_line_resolution].T
-            elif self.number_of_scan_lines == 1:
-                reshaped_2d_dict[key] = self._raw[key][:self.forward_line_resolution]
-        return reshaped_2d_dict
+        """ Returns the forward scan data views (see class docstring) for each channel """
+        return self._forwards_views.copy()
 
     def backwards_data(self):
-        reshaped_2d_dict = dict.fromkeys(self._raw)
-        for key in self._raw:
-            if self.number_of_scan_lines > 1:
-                reshaped_arr = self._raw[key].reshape(self.number_of_scan_lines,
-                                                      self.forward_line_resolution + self.backwards_line_resolution)
-                reshaped_2d_dict[key] = reshaped_arr[:, self.forward_line_resolution:].T
-            elif self.number_of_scan_lines == 1:
-                reshaped_2d_dict[key] = self._raw[key][self.forward_line_resolution:]
+        """ Returns the backward scan data views (see class docstring) for each channel """
+        return self._backwards_views.copy()
 
-        return reshaped_2d_dict
+    @property
+    def sample_count(self) -> int:
+        """
+        returns number of samples written to the frame so far
+        """
+        return self._write_index
 
     @property
-    def number_of_non_nan_values(self):
+    def remaining_samples(self) -> int:
         """
-        returns number of not NaN samples
+        returns number of samples still missing to complete the frame
         """
-        return np.sum(~np.isnan(next(iter(self._raw.values()))))
+        return self.frame_size - self._write_index
 
     @property
     def is_full(self):
-        return self.number_of_non_nan_values == self.frame_size
+        return self._write_index >= self.frame_size
 
 
 class NiScanningProbeInterfuse(CoordinateTransformMixin, NiScanningProbeInterfuseBare):
@@ -111,6 +111,8 @@ class DataInStreamInterface(Base):
     newly allocated each time the method is called (less efficient but no buffer handling needed).
     In any case each time a "read_..." method is called, the samples returned are not available
     anymore and will be consumed. So multiple logic modules can not read from the same data stream.
+    Use the DataInStreamMultiplexer interfuse to share a single hardware stream among multiple
+    logic modules.
 
     The sample timing can behave according to 3 different modes (Enum). Check constraints to see
     which mode is used by the hardware.
@@ -392,6 +392,38 @@ class ScanData:
         }
         return
 
+    def get_lines(self, start: int, stop: int) -> Optional[Dict[str, np.ndarray]]:
+        """ Copy of the scan lines start to stop (exclusive) with channel names as keys.
+        Lines run along the fast axis, so each returned array has the shape
+        (fast axis resolution, stop - start).
+
+        @param int start: index of the first line
+        @param int stop: index of the line after the last line
+
+        @return dict: data array of the lines for each channel
+        """
+        if self._data is None:
+            return None
+        return {ch: self._as_lines(data)[:, start:stop].copy() for ch, data in
+                zip(self.settings.channels, self._data)}
+
+    def set_lines(self, start: int, stop: int, data_dict: Dict[str, np.ndarray]) -> None:
+        """ Overwrite the scan lines start to stop (exclusive) in place, e.g. with lines obtained
+        from get_lines of another ScanData instance of the same scan.
+
+        @param int start: index of the first line
+        @param int stop: index of the line after the last line
+        @param dict data_dict: data array of the lines (see get_lines) for each channel
+        """
+        data = self.data
+        for ch, lines in data_dict.items():
+            self._as_lines(data[ch])[:, start:stop] = lines
+
+    @staticmethod
+    def _as_lines(data: np.ndarray) -> np.ndarray:
+        # view with the slow axis as last dimension, also for 1D data
+        return data.reshape((data.shape[0], -1))
+
 
 @dataclass(frozen=True)
 class ScanImage:
@@ -608,6 +640,37 @@ class ScanningProbeInterface(Base):
         """
         pass
 
+    def get_filled_pixel_count(self) -> Optional[int]:
+        """ Number of pixels of the forward scan acquired so far, counted in acquisition order
+        (i.e. along the fast axis first). This index is reset by start_scan and increases
+        monotonically during a scan. The backward line belonging to a forward line has to be
+        completed before the next forward line is acquired.
+
+        Return None if the scan progress is not known. Override this together with
+        get_scan_data_lines to allow incremental scan data updates.
+
+        @return int: number of acquired forward scan pixels
+        """
+        return None
+
+    def get_scan_data_lines(self, start: int,
+                            stop: int) -> Tuple[Optional[Dict[str, np.ndarray]],
+                                                Optional[Dict[str, np.ndarray]]]:
+        """ Copy of the forward and backward scan lines start to stop (exclusive) of the current
+        scan (see ScanData.get_lines).
+        This default implementation takes full scan data snapshots, hardware modules should
+        override it to copy the requested lines only.
+
+        @param int start: index of the first line
+        @param int stop: index of the line after the last line
+
+        @return tuple: forward and backward line data dicts, None if not available
+        """
+        scan_data = self.get_scan_data()
+        back_scan_data = self.get_back_scan_data()
+        return (None if scan_data is None else scan_data.get_lines(start, stop),
+                None if back_scan_data is None else back_scan_data.get_lines(start, stop))
+
     @abstractmethod
     def emergency_stop(self) -> None:
         """
@@ -28,6 +28,7 @@ from datetime import datetime
 from qudi.core.connector import Connector
 from qudi.core.statusvariable import StatusVar
 from qudi.util.mutex import Mutex
+from qudi.util.count_trace import CountTrace, SampleArray
 from qudi.core.module import LogicBase
 from qtpy import QtCore
 from qudi.util.network import netobtain
@@ -60,6 +61,10 @@ class CountingLogic(LogicBase):
     
     counter1 = Connector(name= "apd_channel", interface='APDCounterInterface')
 
+    # Approximate time in seconds covered by a single hardware read. Multiple oversampled bins are
+    # read at once if the count frequency is high enough.
+    _read_interval = ConfigOption('read_interval', 0.05, missing='nothing')
+
     # Config options
     _count_length = StatusVar("count_length", default=300)
     _smooth_window_length = StatusVar("smooth_window_length", default=10)
@@ -75,12 +80,11 @@ class CountingLogic(LogicBase):
         # Hardware
         self._counting_device = self.counter1()
 
-        self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-        self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
-        self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
+        self._init_data_arrays()
         self._already_counted_samples = 0  # For gated counting
-        self._data_to_save = []
-        
+        self._saving = False
+        self._data_to_save = SampleArray(sample_shape=(len(self.get_channels()) + 1,))
+
         self.stopRequested = False
 
         self._saving_start_time = time.time()
@@ -119,7 +123,27 @@ class CountingLogic(LogicBase):
         for channel in self._counting_device._channel_units:
             channels.append(channel)
         return channels
-        return
+
+    @property
+    def countdata(self):
+        """ Read-only count trace of shape (channels, count_length), newest sample last """
+        return self._count_trace.data
+
+    @property
+    def countdata_smoothed(self):
+        """ Read-only moving average of countdata over smooth_window_length samples """
+        return self._count_trace.smoothed
+
+    def _init_data_arrays(self):
+        channel_count = len(self.get_channels())
+        self.rawdata = np.zeros([channel_count, self._counting_samples])
+        self._count_trace = CountTrace(channel_count=channel_count,
+                                       length=self._count_length,
+                                       smooth_window_length=self._smooth_window_length)
+
+    def _bins_per_read(self):
+        """ Number of oversampled bins to read at once """
+        return max(1, int(self._read_interval * self._count_frequency / self._counting_samples))
 
 
     def set_counting_samples(self, samples=1):
@@ -269,10 +293,7 @@ class CountingLogic(LogicBase):
             counter_status = self._counting_device.set_active_channels(self.get_channels())
 
             # initialising the data arrays
-            self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
-            self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-            self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
-            self._sampling_data = np.empty([len(self.get_channels()), self._counting_samples])
+            self._init_data_arrays()
             # the sample index for gated counting
             self._already_counted_samples = 0
 
@@ -308,8 +329,16 @@ class CountingLogic(LogicBase):
                     self.module_state.unlock()
                     self.sigCounterUpdated.emit()
                     return
-                # read the current counter value
-                self.rawdata = self._counting_device.acquire_frame(self._counting_samples)
+                # read the current counter values (multiple oversampled bins at once)
+                frame = self._counting_device.acquire_frame(
+                    self._counting_samples * self._bins_per_read()
+                )
+                if isinstance(frame, dict):
+                    frame = [frame[ch] for ch in self.get_channels()]
+                self.rawdata = np.asarray(frame, dtype=np.float64).reshape(
+                    (len(self.get_channels()), -1)
+                )
+                self._process_data_continous()
             # call this again from event loop
             self.sigCounterUpdated.emit()
             self.sigCountDataNext.emit()
@@ -319,39 +348,13 @@ class CountingLogic(LogicBase):
         Processes the raw data from the counting device
         @return:
         """
-        for i, ch in enumerate(self.get_channels()):
-            # remember the new count data in circular array
-            self.countdata[i, 0] = np.average(self.rawdata[i])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1, axis=1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1, axis=1)
-        # calculate the median and save it
-        window = -int(self._smooth_window_length / 2) - 1
-        for i, ch in enumerate(self.get_channels()):
-            self.countdata_smoothed[i, window:] = np.median(self.countdata[i,
-                                                            -self._smooth_window_length:])
+        raw = np.asarray(self.rawdata, dtype=np.float64)
+        # average each block of counting_samples raw samples into a single trace bin
+        self._count_trace.append_binned(raw.T, self._counting_samples)
 
         # save the data if necessary
         if self._saving:
-             # if oversampling is necessary
-            if self._counting_samples > 1:
-                chans = self.get_channels()
-                self._sampling_data = np.empty([len(chans) + 1, self._counting_samples])
-                self._sampling_data[0, :] = time.time() - self._saving_start_time
-                for i, ch in enumerate(chans):
-                    self._sampling_data[i+1, 0] = self.rawdata[i]
-
-                self._data_to_save.extend(list(self._sampling_data))
-            # if we don't want to use oversampling
-            else:
-                # append tuple to data stream (timestamp, average counts)
-                chans = self.get_channels()
-                newdata = np.empty((len(chans) + 1, ))
-                newdata[0] = time.time() - self._saving_start_time
-                for i, ch in enumerate(chans):
-                    newdata[i+1] = self.countdata[i, -1]
-                self._data_to_save.append(newdata)
+            self._save_raw_samples(raw)
         return
 
     def _process_data_gated(self):
@@ -359,49 +362,42 @@ class CountingLogic(LogicBase):
         Processes the raw data from the counting device
         @return:
         """
-        # remember the new count data in circular array
-        self.countdata[0] = np.average(self.rawdata[0])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1)
-        # calculate the median and save it
-        self.countdata_smoothed[-int(self._smooth_window_length / 2) - 1:] = np.median(
-            self.countdata[-self._smooth_window_length:])
+        # each read covers one gated bin
+        self._count_trace.append(np.mean(self.rawdata, axis=1))
 
         # save the data if necessary
         if self._saving:
-            # if oversampling is necessary
-            if self._counting_samples > 1:
-                self._sampling_data = np.empty((self._counting_samples, 2))
-                self._sampling_data[:, 0] = time.time() - self._saving_start_time
-                self._sampling_data[:, 1] = self.rawdata[0]
-                self._data_to_save.extend(list(self._sampling_data))
-            # if we don't want to use oversampling
-            else:
-                # append tuple to data stream (timestamp, average counts)
-                self._data_to_save.append(np.array((time.time() - self._saving_start_time,
-                                                    self.countdata[-1])))
+            self._save_raw_samples(np.asarray(self.rawdata, dtype=np.float64))
         return
 
+    def _save_raw_samples(self, raw):
+        """ Append the raw samples of all channels with timestamps to the data to save. The
+        timestamps are reconstructed from the read time and the count frequency.
+
+        @param numpy.ndarray raw: raw samples of shape (channels, samples)
+        """
+        samples = raw.shape[1]
+        rows = np.empty((samples, raw.shape[0] + 1))
+        rows[:, 0] = time.time() - self._saving_start_time
+        rows[:, 0] -= np.arange(samples - 1, -1, -1) / self._count_frequency
+        rows[:, 1:] = raw.T
+        self._data_to_save.append(rows)
+
     def _process_data_finite_gated(self):
         """
         Processes the raw data from the counting device
         @return:
         """
-        if self._already_counted_samples+len(self.rawdata[0]) >= len(self.countdata):
-            needed_counts = len(self.countdata) - self._already_counted_samples
-            self.countdata[0:needed_counts] = self.rawdata[0][0:needed_counts]
-            self.countdata = np.roll(self.countdata, -needed_counts)
+        samples = np.asarray(self.rawdata).shape[1]
+        needed_counts = self._count_length - self._already_counted_samples
+        if samples >= needed_counts:
+            self._count_trace.append(np.asarray(self.rawdata)[:, :needed_counts].T)
             self._already_counted_samples = 0
             self.stopRequested = True
         else:
-            # replace the first part of the array with the new data:
-            self.countdata[0:len(self.rawdata[0])] = self.rawdata[0]
-            # roll the array by the amount of data it had been inserted:
-            self.countdata = np.roll(self.countdata, -len(self.rawdata[0]))
+            self._count_trace.append(np.asarray(self.rawdata).T)
             # increment the index counter:
-            self._already_counted_samples += len(self.rawdata[0])
+            self._already_counted_samples += samples
         return
 
     def _stopCount_wait(self, timeout=5.0):
@@ -26,10 +26,12 @@ import time
 import matplotlib.pyplot as plt
 
 from qudi.core.connector import Connector
+from qudi.core.configoption import ConfigOption
 from qudi.core.statusvariable import StatusVar
 from qudi.core.module import LogicBase
 from qudi.interface.slow_counter_interface import CountingMode
 from qudi.util.mutex import Mutex
+from qudi.util.count_trace import CountTrace, SampleArray
 
 
 class CounterLogic1(LogicBase):
@@ -59,6 +61,11 @@ class CounterLogic1(LogicBase):
     counter1 = Connector(interface='SlowCounterInterface')
     savelogic = Connector(interface='SaveLogic')
 
+    # config options
+    # Approximate time in seconds covered by a single hardware read in continuous counting mode.
+    # Multiple oversampled bins are read at once if the count frequency is high enough.
+    _read_interval = ConfigOption('read_interval', 0.05, missing='nothing')
+
     # status vars
     _count_length = StatusVar('count_length', 300)
     _smooth_window_length = StatusVar('smooth_window_length', 10)
@@ -112,11 +119,9 @@ class CounterLogic1(LogicBase):
         number_of_detectors = constraints.max_detectors
 
         # initialize data arrays
-        self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-        self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
-        self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
+        self._init_data_arrays()
         self._already_counted_samples = 0  # For gated counting
-        self._data_to_save = []
+        self._data_to_save = SampleArray(sample_shape=(len(self.get_channels()) + 1,))
 
         # Flag to stop the loop
         self.stopRequested = False
@@ -148,6 +153,23 @@ class CounterLogic1(LogicBase):
         """
         return self._counting_device.get_constraints()
 
+    @property
+    def countdata(self):
+        """ Read-only count trace of shape (channels, count_length), newest sample last """
+        return self._count_trace.data
+
+    @property
+    def countdata_smoothed(self):
+        """ Read-only moving average of countdata over smooth_window_length samples """
+        return self._count_trace.smoothed
+
+    def _init_data_arrays(self):
+        channel_count = len(self.get_channels())
+        self.rawdata = np.zeros([channel_count, self._counting_samples])
+        self._count_trace = CountTrace(channel_count=channel_count,
+                                       length=self._count_length,
+                                       smooth_window_length=self._smooth_window_length)
+
     def set_counting_samples(self, samples=1):
         """
         Sets the length of the counted bins.
@@ -263,7 +285,7 @@ class CounterLogic1(LogicBase):
         @return bool: saving state
         """
         if not resume:
-            self._data_to_save = []
+            self._data_to_save.clear()
             self._saving_start_time = time.time()
 
         self._saving = True
@@ -308,11 +330,11 @@ class CounterLogic1(LogicBase):
             for i, detector in enumerate(self.get_channels()):
                 header = header + ',Signal{0} (counts/s)'.format(i)
 
-            data = {header: self._data_to_save}
+            data = {header: self._data_to_save.data}
             filepath = self._save_logic.get_path_for_module(module_name='Counter')
 
             if save_figure:
-                fig = self.draw_figure(data=np.array(self._data_to_save))
+                fig = self.draw_figure(data=self._data_to_save.data)
             else:
                 fig = None
             self._save_logic.save_data(data, filepath=filepath, parameters=parameters,
@@ -320,7 +342,7 @@ class CounterLogic1(LogicBase):
             self.log.info('Counter Trace saved to:\n{0}'.format(filepath))
 
         self.sigSavingStatusChanged.emit(self._saving)
-        return self._data_to_save, parameters
+        return self._data_to_save.data, parameters
 
     def draw_figure(self, data):
         """ Draw figure to save with data file.
@@ -425,10 +447,7 @@ class CounterLogic1(LogicBase):
                 return -1
 
             # initialising the data arrays
-            self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
-            self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-            self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
-            self._sampling_data = np.empty([len(self.get_channels()), self._counting_samples])
+            self._init_data_arrays()
 
             # the sample index for gated counting
             self._already_counted_samples = 0
@@ -467,8 +486,12 @@ class CounterLogic1(LogicBase):
                     self.sigCounterUpdated.emit()
                     return
 
-                # read the current counter value
-                self.rawdata = self._counting_device.get_counter(samples=self._counting_samples)
+                # read the current counter values. In continuous mode read multiple oversampled
+                # bins at once to keep up with high count frequencies.
+                samples = self._counting_samples
+                if self._counting_mode == CountingMode['CONTINUOUS']:
+                    samples *= self._bins_per_read()
+                self.rawdata = self._counting_device.get_counter(samples=samples)
                 if self.rawdata[0, 0] < 0:
                     self.log.error('The counting went wrong, killing the counter.')
                     self.stopRequested = True
@@ -510,7 +533,7 @@ class CounterLogic1(LogicBase):
             filelabel = 'snapshot_count_trace_' + name_tag
 
         stop_time = self._count_length / self._count_frequency
-        time_step_size = stop_time / len(self.countdata)
+        time_step_size = stop_time / self._count_length
         x_axis = np.arange(0, stop_time, time_step_size)
 
         # prepare the data in a dict or in an OrderedDict:
@@ -548,44 +571,22 @@ class CounterLogic1(LogicBase):
         """
         return self._counting_device.get_counter_channels()
 
+    def _bins_per_read(self):
+        """ Number of oversampled bins to read at once in continuous counting mode """
+        return max(1, int(self._read_interval * self._count_frequency / self._counting_samples))
+
     def _process_data_continous(self):
         """
         Processes the raw data from the counting device
         @return:
         """
-        for i, ch in enumerate(self.get_channels()):
-            # remember the new count data in circular array
-            self.countdata[i, 0] = np.average(self.rawdata[i])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1, axis=1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1, axis=1)
-        # calculate the median and save it
-        window = -int(self._smooth_window_length / 2) - 1
-        for i, ch in enumerate(self.get_channels()):
-            self.countdata_smoothed[i, window:] = np.median(self.countdata[i,
-                                                            -self._smooth_window_length:])
+        raw = np.asarray(self.rawdata, dtype=np.float64)
+        # average each block of counting_samples raw samples into a single trace bin
+        self._count_trace.append_binned(raw.T, self._counting_samples)
 
         # save the data if necessary
         if self._saving:
-             # if oversampling is necessary
-            if self._counting_samples > 1:
-                chans = self.get_channels()
-                self._sampling_data = np.empty([len(chans) + 1, self._counting_samples])
-                self._sampling_data[0, :] = time.time() - self._saving_start_time
-                for i, ch in enumerate(chans):
-                    self._sampling_data[i+1, 0] = self.rawdata[i]
-
-                self._data_to_save.extend(list(self._sampling_data))
-            # if we don't want to use oversampling
-            else:
-                # append tuple to data stream (timestamp, average counts)
-                chans = self.get_channels()
-                newdata = np.empty((len(chans) + 1, ))
-                newdata[0] = time.time() - self._saving_start_time
-                for i, ch in enumerate(chans):
-                    newdata[i+1] = self.countdata[i, -1]
-                self._data_to_save.append(newdata)
+            self._save_raw_samples(raw)
         return
 
     def _process_data_gated(self):
@@ -593,49 +594,42 @@ class CounterLogic1(LogicBase):
         Processes the raw data from the counting device
         @return:
         """
-        # remember the new count data in circular array
-        self.countdata[0] = np.average(self.rawdata[0])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1)
-        # calculate the median and save it
-        self.countdata_smoothed[-int(self._smooth_window_length / 2) - 1:] = np.median(
-            self.countdata[-self._smooth_window_length:])
+        # each read covers one gated bin
+        self._count_trace.append(np.mean(self.rawdata, axis=1))
 
         # save the data if necessary
         if self._saving:
-            # if oversampling is necessary
-            if self._counting_samples > 1:
-                self._sampling_data = np.empty((self._counting_samples, 2))
-                self._sampling_data[:, 0] = time.time() - self._saving_start_time
-                self._sampling_data[:, 1] = self.rawdata[0]
-                self._data_to_save.extend(list(self._sampling_data))
-            # if we don't want to use oversampling
-            else:
-                # append tuple to data stream (timestamp, average counts)
-                self._data_to_save.append(np.array((time.time() - self._saving_start_time,
-                                                    self.countdata[-1])))
+            self._save_raw_samples(np.asarray(self.rawdata, dtype=np.float64))
         return
 
+    def _save_raw_samples(self, raw):
+        """ Append the raw samples of all channels with timestamps to the data to save. The
+        timestamps are reconstructed from the read time and the count frequency.
+
+        @param numpy.ndarray raw: raw samples of shape (channels, samples)
+        """
+        samples = raw.shape[1]
+        rows = np.empty((samples, raw.shape[0] + 1))
+        rows[:, 0] = time.time() - self._saving_start_time
+        rows[:, 0] -= np.arange(samples - 1, -1, -1) / self._count_frequency
+        rows[:, 1:] = raw.T
+        self._data_to_save.append(rows)
+
     def _process_data_finite_gated(self):
         """
         Processes the raw data from the counting device
         @return:
         """
-        if self._already_counted_samples+len(self.rawdata[0]) >= len(self.countdata):
-            needed_counts = len(self.countdata) - self._already_counted_samples
-            self.countdata[0:needed_counts] = self.rawdata[0][0:needed_counts]
-            self.countdata = np.roll(self.countdata, -needed_counts)
+        samples = np.asarray(self.rawdata).shape[1]
+        needed_counts = self._count_length - self._already_counted_samples
+        if samples >= needed_counts:
+            self._count_trace.append(np.asarray(self.rawdata)[:, :needed_counts].T)
             self._already_counted_samples = 0
             self.stopRequested = True
         else:
-            # replace the first part of the array with the new data:
-            self.countdata[0:len(self.rawdata[0])] = self.rawdata[0]
-            # roll the array by the amount of data it had been inserted:
-            self.countdata = np.roll(self.countdata, -len(self.rawdata[0]))
+            self._count_trace.append(np.asarray(self.rawdata).T)
             # increment the index counter:
-            self._already_counted_samples += len(self.rawdata[0])
+            self._already_counted_samples += samples
         return
 
     def _stopCount_wait(self, timeout=5.0):
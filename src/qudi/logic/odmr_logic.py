@@ -34,6 +34,7 @@ from qudi.core.connector import Connector
 from qudi.core.configoption import ConfigOption
 from qudi.core.statusvariable import StatusVar
 from qudi.util.datastorage import TextDataStorage
+from qudi.util.sweep_buffer import SweepBuffer
 from qudi.util.enums import SamplingOutputMode
 
 
@@ -50,6 +51,7 @@ class OdmrLogic(LogicBase):
             data_scanner: <data_scanner_name>
         options:
             default_scan_mode: 'JUMP_LIST'  # optional
+            data_update_interval: 0.1  # optional, min. time in s between data updates during scan
     """
 
     # declare connectors
@@ -61,6 +63,7 @@ class OdmrLogic(LogicBase):
     _default_scan_mode = ConfigOption(name='default_scan_mode',
                                       default='JUMP_LIST',
                                       constructor=lambda x: SamplingOutputMode[x.upper()])
+    _data_update_interval = ConfigOption(name='data_update_interval', default=0.1, missing='nothing')
 
     # declare status variables
     _cw_frequency = StatusVar(name='cw_frequency', default=2870e6)
@@ -72,6 +75,7 @@ class OdmrLogic(LogicBase):
     _scans_to_average = StatusVar(name='scans_to_average', default=0)
     _data_rate = StatusVar(name='data_rate', default=200)
     _oversampling_factor = StatusVar(name='oversampling_factor', default=1)
+    _sweeps_per_frame = StatusVar(name='sweeps_per_frame', default=1)
     _fit_configs = StatusVar(name='fit_configs', default=None)
 
     # Internal signals
@@ -117,6 +121,8 @@ class OdmrLogic(LogicBase):
         self._elapsed_sweeps = 0
         self.__estimated_lines = 0
         self._start_time = 0.0
+        self._frame_sweeps = 1
+        self._last_data_update = 0.0
         self._fit_container = None
         self._fit_config_model = None
 
@@ -139,6 +145,7 @@ class OdmrLogic(LogicBase):
         self._run_time = max(1., self._run_time)
         self._scans_to_average = max(0, int(self._scans_to_average))
         self._oversampling_factor = max(1, int(self._oversampling_factor))
+        self._sweeps_per_frame = max(1, int(self._sweeps_per_frame))
         for ii, freq_range in enumerate(self._scan_frequency_ranges):
             self._scan_frequency_ranges[ii] = (
                 mw_constraints.frequency_in_range(freq_range[0])[1],
@@ -157,6 +164,8 @@ class OdmrLogic(LogicBase):
         self._elapsed_time = 0.0
         self._elapsed_sweeps = 0
         self._start_time = 0.0
+        self._frame_sweeps = 1
+        self._last_data_update = 0.0
         self.__estimated_lines = 0
 
         # Initialize the ODMR data arrays (mean signal and sweep matrix)
@@ -199,8 +208,10 @@ class OdmrLogic(LogicBase):
         self.__estimated_lines = max(1, int(1.05 * estimated_samples / samples_per_line))
         for channel in self._data_scanner().constraints.channel_names:
             self._raw_data[channel] = [
-                np.full((freq_arr.size, self.__estimated_lines), np.nan) for freq_arr in
-                self._frequency_data
+                SweepBuffer(points=freq_arr.size,
+                            line_buffer_size=self.__estimated_lines,
+                            average_lines=self._scans_to_average)
+                for freq_arr in self._frequency_data
             ]
             self._signal_data[channel] = [
                 np.zeros(freq_arr.size) for freq_arr in self._frequency_data
@@ -208,23 +219,10 @@ class OdmrLogic(LogicBase):
             self._fit_results[channel] = [None] * len(self._frequency_data)
 
     def _calculate_signal_data(self):
+        # The sweep buffers keep running sums, so this does not depend on the number of sweeps
         for channel, raw_data_list in self._raw_data.items():
             for range_index, raw_data in enumerate(raw_data_list):
-                masked_raw_data = np.ma.masked_invalid(raw_data)
-                if masked_raw_data.compressed().size == 0:
-                    arr_size = self._frequency_data[range_index].size
-                    self._signal_data[channel][range_index] = np.zeros(arr_size)
-                elif self._scans_to_average > 0:
-                    self._signal_data[channel][range_index] = np.mean(
-                        masked_raw_data[:, :self._scans_to_average],
-                        axis=1
-                    ).compressed()
-                    if self._signal_data[channel][range_index].size == 0:
-                        arr_size = self._frequency_data[range_index].size
-                        self._signal_data[channel][range_index] = np.zeros(arr_size)
-                else:
-                    self._signal_data[channel][range_index] = np.mean(masked_raw_data,
-                                                                      axis=1).compressed()
+                self._signal_data[channel][range_index] = raw_data.mean()
 
     @property
     def fit_config_model(self):
@@ -252,7 +250,8 @@ class OdmrLogic(LogicBase):
 
     @property
     def raw_data(self):
-        return self._raw_data.copy()
+        return {channel: [raw_data.data for raw_data in raw_data_list] for channel, raw_data_list
+                in self._raw_data.items()}
 
     @property
     def frequency_data(self):
@@ -276,6 +275,9 @@ class OdmrLogic(LogicBase):
             scans_to_average = int(number_of_scans)
             if scans_to_average != self._scans_to_average:
                 self._scans_to_average = scans_to_average
+                for raw_data_list in self._raw_data.values():
+                    for raw_data in raw_data_list:
+                        raw_data.set_average_lines(self._scans_to_average)
                 self._calculate_signal_data()
                 self.sigScanParametersUpdated.emit({'averaged_scans': self._scans_to_average})
                 self.sigScanDataUpdated.emit()
@@ -430,10 +432,43 @@ class OdmrLogic(LogicBase):
                 {'data_rate': self._data_rate, 'oversampling': self._oversampling_factor}
             )
 
+    @property
+    def sweeps_per_frame(self):
+        return self._sweeps_per_frame
+
+    @sweeps_per_frame.setter
+    def sweeps_per_frame(self, number_of_sweeps):
+        self.set_sweeps_per_frame(number_of_sweeps)
+
+    @QtCore.Slot(int)
+    def set_sweeps_per_frame(self, number_of_sweeps):
+        """ Set the number of frequency sweeps acquired with a single hardware frame. Requires the
+        microwave to support scan mode JUMP_LIST for more than one sweep per frame. Each frame is
+        split into single sweeps afterwards, so the result is the same as for one sweep per frame
+        but the per-frame overhead (frame acquisition, scan reset, signalling) is shared by all
+        sweeps of a frame.
+
+        @param int number_of_sweeps: number of sweeps per hardware frame (>= 1)
+        """
+        with self._threadlock:
+            if self.module_state() == 'locked':
+                self.log.error('Unable to set sweeps per frame. ODMR measurement in progress.')
+            else:
+                self._sweeps_per_frame = max(1, int(number_of_sweeps))
+            self.sigScanParametersUpdated.emit({'sweeps_per_frame': self._sweeps_per_frame})
+
+    @property
+    def sweep_rate(self):
+        """ Effective number of frequency sweeps per second of the current measurement """
+        if self._elapsed_time <= 0:
+            return 0.0
+        return self._elapsed_sweeps / self._elapsed_time
+
     @property
     def scan_parameters(self):
         params = {'data_rate': self._data_rate,
                   'oversampling': self._oversampling_factor,
+                  'sweeps_per_frame': self._sweeps_per_frame,
                   'frequency_ranges': self.frequency_ranges,
                   'run_time': self._run_time,
                   'averaged_scans': self._scans_to_average,
@@ -525,18 +560,30 @@ class OdmrLogic(LogicBase):
                                   'output mode "JUMP_LIST".')
                 else:
                     mode = self._default_scan_mode
+                if mode != SamplingOutputMode.JUMP_LIST and self._sweeps_per_frame > 1:
+                    if microwave.constraints.mode_supported(SamplingOutputMode.JUMP_LIST):
+                        mode = SamplingOutputMode.JUMP_LIST
+                        self.log.info('Multiple sweeps per frame set up. Trying to switch scanner '
+                                      'to output mode "JUMP_LIST".')
+                    else:
+                        self.log.warning('Microwave does not support output mode "JUMP_LIST". '
+                                         'Falling back to one sweep per frame.')
+                sweeps = 1
                 if mode == SamplingOutputMode.JUMP_LIST:
                     frequencies = np.concatenate(self._frequency_data)
                     if self._oversampling_factor > 1:
                         frequencies = np.repeat(frequencies, self._oversampling_factor)
                     samples = len(frequencies)
+                    sweeps = self._get_frame_sweeps(samples)
+                    if sweeps > 1:
+                        frequencies = np.tile(frequencies, sweeps)
                 elif mode == SamplingOutputMode.EQUIDISTANT_SWEEP:
                     frequencies = self._scan_frequency_ranges[0]
                     samples = frequencies[-1]
 
                 # Set up data acquisition device
                 sampler.set_sample_rate(sample_rate)
-                sampler.set_frame_size(samples)
+                sampler.set_frame_size(samples * sweeps)
                 # Set up microwave scan and start it
                 microwave.configure_scan(self._scan_power, frequencies, mode, sample_rate)
                 microwave.start_scan()
@@ -546,6 +593,7 @@ class OdmrLogic(LogicBase):
                 self.sigScanStateUpdated.emit(False)
                 return
 
+            self._frame_sweeps = sweeps
             self.clear_all_fits()
             self._elapsed_sweeps = 0
             self._elapsed_time = 0.0
@@ -554,6 +602,7 @@ class OdmrLogic(LogicBase):
             self.sigScanDataUpdated.emit()
             self.sigScanStateUpdated.emit(True)
             self._start_time = time.time()
+            self._last_data_update = self._start_time
             self._sigNextLine.emit()
 
     def clear_all_fits(self):
@@ -579,6 +628,7 @@ class OdmrLogic(LogicBase):
 
             self.sigScanStateUpdated.emit(True)
             self._start_time = time.time() - self._elapsed_time
+            self._last_data_update = time.time()
             self._sigNextLine.emit()
 
     @QtCore.Slot()
@@ -591,6 +641,9 @@ class OdmrLogic(LogicBase):
             if self.module_state() == 'locked':
                 self._microwave().off()
                 self.module_state.unlock()
+                # Data updates are throttled during the scan. Make sure the final state is shown.
+                self.sigElapsedUpdated.emit(self._elapsed_time, self._elapsed_sweeps)
+                self.sigScanDataUpdated.emit()
             self.sigScanStateUpdated.emit(False)
 
     @QtCore.Slot()
@@ -629,48 +682,54 @@ class OdmrLogic(LogicBase):
                 self.stop_odmr_scan()
                 return
 
-            # Add new count data to raw_data array and append if array is too small
-            current_line_buffer_size = next(iter(self._raw_data.values()))[0].shape[1]
-            if self._elapsed_sweeps == current_line_buffer_size:
-                self.log.debug(f'extending data grid for sweep number {self._elapsed_sweeps}')
-                expand_arrays = tuple(np.full((r[-1], self.__estimated_lines), np.nan) for r in
-                                      self._scan_frequency_ranges)
-                self._raw_data = {
-                    ch: [np.concatenate((r, expand_arrays[ii]), axis=0) for ii, r in
-                         enumerate(range_list)] for ch, range_list in self._raw_data.items()
-                }
-                self.log.warning(
-                    'raw data scan line buffer was not big enough for the entire measurement. '
-                    'Buffer will be expanded.\nOld line buffer size was {0:d}, new line buffer '
-                    'size is {1:d}.'.format(current_line_buffer_size,
-                                            current_line_buffer_size + self.__estimated_lines)
-                )
-
-            # shift data in the array "up" and add new data at the "bottom"
+            # Split frame into single sweeps and add them to the raw data sweep buffers (expanded
+            # automatically if needed)
+            line_size = sum(range_params[-1] for range_params in self._scan_frequency_ranges)
             for ch, range_list in self._raw_data.items():
-                start = 0
-                for range_index, range_params in enumerate(self._scan_frequency_ranges):
-                    range_list[range_index] = np.roll(range_list[range_index], 1, axis=1)
-                    tmp = new_counts[ch][start:start + range_params[-1]]
-                    range_list[range_index][0:len(tmp), 0] = tmp
-                    start += range_params[-1]
+                for sweep_start in range(0, line_size * self._frame_sweeps, line_size):
+                    start = sweep_start
+                    for range_index, range_params in enumerate(self._scan_frequency_ranges):
+                        range_list[range_index].add_sweep(
+                            new_counts[ch][start:start + range_params[-1]]
+                        )
+                        start += range_params[-1]
 
             # Calculate averaged signal
             self._calculate_signal_data()
 
             # Update elapsed time/sweeps
-            self._elapsed_sweeps += 1
-            self._elapsed_time = time.time() - self._start_time
-
-            # Fire update signals
-            self.sigElapsedUpdated.emit(self._elapsed_time, self._elapsed_sweeps)
-            self.sigScanDataUpdated.emit()
+            self._elapsed_sweeps += self._frame_sweeps
+            now = time.time()
+            self._elapsed_time = now - self._start_time
+
+            # Fire update signals at most every data_update_interval seconds. stop_odmr_scan takes
+            # care of the final update.
+            if now - self._last_data_update >= self._data_update_interval:
+                self._last_data_update = now
+                self.sigElapsedUpdated.emit(self._elapsed_time, self._elapsed_sweeps)
+                self.sigScanDataUpdated.emit()
             if self._elapsed_time >= self._run_time:
                 self.stop_odmr_scan()
             else:
                 self._sigNextLine.emit()
             return
 
+    def _get_frame_sweeps(self, line_samples):
+        """ Number of sweeps per hardware frame limited by the microwave scan size and sampler
+        frame size constraints.
+
+        @param int line_samples: number of samples of a single sweep (incl. oversampling)
+
+        @return int: number of sweeps per frame
+        """
+        max_sweeps = min(self._microwave().constraints.max_scan_size // line_samples,
+                         self._data_scanner().constraints.max_frame_size // line_samples)
+        sweeps = max(1, min(self._sweeps_per_frame, max_sweeps))
+        if sweeps < self._sweeps_per_frame:
+            self.log.warning(f'Unable to acquire {self._sweeps_per_frame:d} sweeps per frame due '
+                             f'to hardware constraints. Using {sweeps:d} sweeps per frame.')
+        return sweeps
+
     @QtCore.Slot(str, str, int)
     def do_fit(self, fit_config, channel, range_index):
         """
@@ -700,6 +759,8 @@ class OdmrLogic(LogicBase):
                     'Microwave Scan Power (dBm)': self._scan_power,
                     'Approx. Run Time (s)': self._elapsed_time,
                     'Number of Frequency Sweeps (#)': self._elapsed_sweeps,
+                    'Sweeps per Frame (#)': self._frame_sweeps,
+                    'Effective Sweep Rate (1/s)': self.sweep_rate,
                     'Start Frequencies (Hz)': tuple(rng[0] for rng in self._scan_frequency_ranges),
                     'Stop Frequencies (Hz)': tuple(rng[1] for rng in self._scan_frequency_ranges),
                     'Step sizes (Hz)': tuple(rng[2] for rng in self._scan_frequency_ranges),
@@ -731,8 +792,7 @@ class OdmrLogic(LogicBase):
         """
         channel_data = self._raw_data[channel]
         # Filter raw data to get rid of invalid values (nan or inf)
-        joined_data = np.concatenate([raw[:, :self._elapsed_sweeps] for raw in channel_data],
-                                     axis=0)
+        joined_data = np.concatenate([raw.sweeps for raw in channel_data], axis=0)
         # add frequency data as first column
         return np.column_stack((np.concatenate(self._frequency_data), joined_data))
 
@@ -804,7 +864,7 @@ class OdmrLogic(LogicBase):
         """
         freq_data = self._frequency_data[range_index]
         signal_data = self._signal_data[channel][range_index]
-        raw_data = self._raw_data[channel][range_index][:, :self._elapsed_sweeps]
+        raw_data = self._raw_data[channel][range_index].sweeps
         fit_result = self._fit_results[channel][range_index]
         if fit_result is not None:
             fit_x, fit_y = fit_result[1].high_res_best_fit
@@ -20,12 +20,15 @@ You should have received a copy of the GNU Lesser General Public License along w
 If not, see <https://www.gnu.org/licenses/>.
 """
 
+import time
+import threading
 import numpy as np
 
 from qudi.core.connector import Connector
 from qudi.core.statusvariable import StatusVar
 from qudi.core.configoption import ConfigOption
 from qudi.util.mutex import Mutex
+from qudi.util.ring_buffer import RingBuffer
 from qudi.core.module import Base
 from qtpy import QtCore
 
@@ -33,6 +36,11 @@ from qtpy import QtCore
 class PIDLogic(Base):
     """ Logic module to monitor and control a PID process
 
+    The recording loop runs at a fixed rate in its own thread, so its timing does not depend on the
+    load of the Qt event loop. Deviations of the actual loop period from timestep are available via
+    loop_statistics. The history is kept in a ring buffer. sigUpdateDisplay is emitted at most every
+    display_update_interval seconds; the GUI then fetches a (decimated) snapshot via get_history.
+
     Example config:
 
     pid_logic:
@@ -42,6 +50,8 @@ class PIDLogic(Base):
         options:
             # interval at which the logging updates (s)
             timestep: 0.1
+            # minimum interval between display update signals (s)
+            display_update_interval: 0.1
 
     """
 
@@ -51,6 +61,7 @@ class PIDLogic(Base):
     # status vars
     buffer_length = StatusVar('buffer_length', 1000)
     timestep = ConfigOption('timestep', 100e-3)  # timestep in seconds
+    display_update_interval = ConfigOption('display_update_interval', 100e-3, missing='nothing')
 
     # signals
     sigUpdateDisplay = QtCore.Signal()
@@ -64,26 +75,67 @@ class PIDLogic(Base):
 
         # initialize attributes
         self._controller = None
-        self.history = None
         self.saving_state = False
         self._is_recording = False
-        self.timer = None
+        self._history = None
+        self._loop_thread = None
+        self._stop_event = threading.Event()
+        self._last_display_update = 0.0
+        self._loop_ticks = 0
+        self._missed_ticks = 0
+        self._period_deviation_sum = 0.0
+        self._period_deviation_max = 0.0
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
         """
         self._controller = self.controller()
 
-        self.history = np.zeros([3, self.buffer_length])
+        self._history = RingBuffer(size=self.buffer_length, sample_shape=(3,))
         self.saving_state = False
-        self.timer = QtCore.QTimer()
-        self.timer.setSingleShot(True)
-        self.timer.setInterval(self.timestep * 1000)  # in ms
-        self.timer.timeout.connect(self._loop)
 
     def on_deactivate(self):
         """ Perform required deactivation. """
-        pass
+        self.stop_loop()
+
+    @property
+    def history(self):
+        """ Copy of the history of process value, control value and setpoint (rows) ordered from
+        oldest to newest sample.
+        """
+        return self.get_history()
+
+    def get_history(self, max_points=None):
+        """ Get a snapshot of the history of process value, control value and setpoint.
+
+            @param int max_points: optional, maximum number of points per row. The history is
+                                   decimated by taking every n-th sample (incl. the newest one).
+
+            @return numpy.ndarray: array of shape (3, points) ordered from oldest to newest sample
+        """
+        with self.threadlock:
+            data = self._history.data
+            if max_points is not None and 0 < max_points < data.shape[0]:
+                step = -(-data.shape[0] // int(max_points))
+                data = data[::-1][::step][::-1]
+            return data.T.copy()
+
+    @property
+    def loop_statistics(self):
+        """ Timing statistics of the recording loop since it has been started.
+
+            @return dict: number of loop iterations ('ticks'), number of skipped iterations due to
+                          overruns ('missed_ticks') and the mean and maximum absolute deviation of
+                          the loop period from timestep in seconds ('mean_period_deviation',
+                          'max_period_deviation')
+        """
+        with self.threadlock:
+            periods = self._loop_ticks - 1
+            return {'ticks': self._loop_ticks,
+                    'missed_ticks': self._missed_ticks,
+                    'mean_period_deviation': self._period_deviation_sum / periods if periods > 0
+                                             else 0.0,
+                    'max_period_deviation': self._period_deviation_max}
 
     def get_buffer_length(self):
         """ Get the current data buffer length.
@@ -100,25 +152,83 @@ class PIDLogic(Base):
     def start_loop(self):
         """ Start the data recording loop. Not identical to enabling the PID controller.
         """
-        self._is_recording = True
-        self.timer.start()
+        with self.threadlock:
+            if self._loop_thread is not None:
+                return
+            self._is_recording = True
+            self._loop_ticks = 0
+            self._missed_ticks = 0
+            self._period_deviation_sum = 0.0
+            self._period_deviation_max = 0.0
+            self._stop_event.clear()
+            self._loop_thread = threading.Thread(target=self._run_loop,
+                                                 name='PIDLogicLoop',
+                                                 daemon=True)
+            self._loop_thread.start()
 
     def stop_loop(self):
         """ Stop the data recording loop. Not identical to disabling the PID controller.
         """
-        self._is_recording = False
-        self.timer.stop()
+        with self.threadlock:
+            self._is_recording = False
+            self._stop_event.set()
+            thread = self._loop_thread
+        # Join without holding the lock since the loop thread acquires it in each iteration
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self.threadlock:
+            if self._loop_thread is thread:
+                self._loop_thread = None
+
+    def _run_loop(self):
+        """ Call _loop every timestep seconds until stop_loop is called. Iterations are scheduled
+        at fixed deadlines, so the loop period does not drift. Deadlines missed due to overruns are
+        skipped.
+        The loop stops on any error. The recording state is reset once the loop ends, so
+        start_loop can be called again.
+        """
+        try:
+            period = float(self.timestep)
+            next_tick = time.perf_counter()
+            last_tick = None
+            while not self._stop_event.is_set():
+                now = time.perf_counter()
+                with self.threadlock:
+                    if last_tick is not None:
+                        deviation = abs(now - last_tick - period)
+                        self._period_deviation_sum += deviation
+                        self._period_deviation_max = max(self._period_deviation_max, deviation)
+                    self._loop_ticks += 1
+                last_tick = now
+                self._loop()
+                next_tick += period
+                now = time.perf_counter()
+                if now > next_tick:
+                    missed = int((now - next_tick) // period) + 1
+                    with self.threadlock:
+                        self._missed_ticks += missed
+                    next_tick += missed * period
+                self._stop_event.wait(max(0.0, next_tick - time.perf_counter()))
+        except Exception:
+            self.log.exception('Error in PID recording loop. Stopping loop.')
+        finally:
+            with self.threadlock:
+                self._is_recording = False
+                if self._loop_thread is threading.current_thread():
+                    self._loop_thread = None
 
     def _loop(self):
         """ Execute step in the data recording loop: save one of each control and process values
         """
-        self.history = np.roll(self.history, -1, axis=1)
-        self.history[0, -1] = self._controller.get_process_value()
-        self.history[1, -1] = self._controller.get_control_value()
-        self.history[2, -1] = self._controller.get_setpoint()
-        self.sigUpdateDisplay.emit()
-        if self._is_recording:
-            self.timer.start()
+        values = (self._controller.get_process_value(),
+                  self._controller.get_control_value(),
+                  self._controller.get_setpoint())
+        with self.threadlock:
+            self._history.append(np.array([values]))
+        now = time.perf_counter()
+        if now - self._last_display_update >= self.display_update_interval:
+            self._last_display_update = now
+            self.sigUpdateDisplay.emit()
 
     def get_saving_state(self):
         """ Return whether we are saving data
@@ -151,7 +261,8 @@ class PIDLogic(Base):
 
     def reset_buffer(self):
         """ Reset the buffer, clearing out all data. """
-        self.history = np.zeros([3, self.buffer_length])
+        with self.threadlock:
+            self._history = RingBuffer(size=self.buffer_length, sample_shape=(3,))
 
     def get_kp(self):
         """ Return the proportional constant.
@@ -200,7 +311,8 @@ class PIDLogic(Base):
 
             @return float: current set point of the PID controller
         """
-        return self.history[2, -1]
+        with self.threadlock:
+            return self._history.latest(1)[0, 2]
 
     def set_setpoint(self, setpoint):
         """ Set the current setpoint of the PID controller.
@@ -258,7 +370,8 @@ class PIDLogic(Base):
 
             @return float: current process input value
         """
-        return self.history[0, -1]
+        with self.threadlock:
+            return self._history.latest(1)[0, 0]
 
     @property
     def process_value_unit(self):
@@ -271,7 +384,8 @@ class PIDLogic(Base):
 
             @return float: control output value
         """
-        return self.history[1, -1]
+        with self.threadlock:
+            return self._history.latest(1)[0, 1]
 
     @property
     def control_value_unit(self):
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains the Qudi sampling engine turning a PulseBlockEnsemble into sample arrays.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import numpy as np
+
+
+class EnsembleSampler:
+    """
+    Compiles a PulseBlockEnsemble into a flat table of PulseBlockElements (incl. repetitions) and
+    samples arbitrary chunks of the resulting waveform from it.
+
+    Each row of the table holds the start bin and length of an element, the index of the sampling
+    function used in each analog channel and the state of each digital channel.
+    Elements sharing the same sampling function within a chunk are evaluated in a single call if
+    the sampling function is flagged as "samples_elementwise". All other sampling functions are
+    evaluated element by element exactly as they have been before.
+    The resulting samples are bit-identical to sampling each element separately.
+    """
+
+    # Upper limit for the number of samples evaluated in a single batched sampling function call
+    max_batch_samples = 2 ** 22
+
+    def __init__(self, ensemble, blocks, elements_length_bins, sample_rate, analog_amplitudes,
+                 offset_bin=0):
+        """
+        @param PulseBlockEnsemble ensemble: The ensemble to compile
+        @param dict blocks: PulseBlock instances referenced by the ensemble. Keys are block names.
+        @param numpy.ndarray elements_length_bins: Length in bins of all elements incl. repetitions
+                                                  as returned by analyze_block_ensemble.
+        @param float sample_rate: The sample rate in samples/s
+        @param dict analog_amplitudes: pp-amplitudes with analog channel descriptors as keys
+        @param int offset_bin: Time offset in bins of the first sample (rotating frame)
+        """
+        self.sample_rate = sample_rate
+        self.rotating_frame = ensemble.rotating_frame
+        self.offset_bin = offset_bin
+        self._analog_scales = {chnl: amp / 2 for chnl, amp in analog_amplitudes.items()}
+
+        self.analog_channels = set()
+        self.digital_channels = set()
+        if len(ensemble) > 0:
+            first_block = blocks[ensemble[0][0]]
+            self.analog_channels = set(first_block.analog_channels)
+            self.digital_channels = set(first_block.digital_channels)
+
+        # Unique sampling functions per analog channel and lookup of function keys to list indices
+        self._functions = {chnl: list() for chnl in self.analog_channels}
+        function_indices = {chnl: dict() for chnl in self.analog_channels}
+
+        analog_ids = {chnl: list() for chnl in self.analog_channels}
+        digital_states = {chnl: list() for chnl in self.digital_channels}
+        for block_name, reps in ensemble.block_list:
+            block = blocks[block_name]
+            for chnl in self.analog_channels:
+                block_ids = [self._get_function_index(element.pulse_function[chnl],
+                                                      self._functions[chnl],
+                                                      function_indices[chnl])
+                             for element in block.element_list]
+                analog_ids[chnl].append(np.tile(np.array(block_ids, dtype='int64'), reps + 1))
+            for chnl in self.digital_channels:
+                block_states = [element.digital_high[chnl] for element in block.element_list]
+                digital_states[chnl].append(np.tile(np.array(block_states, dtype=bool), reps + 1))
+
+        lengths = np.asarray(elements_length_bins, dtype='int64')
+        stops = np.cumsum(lengths)
+        # Elements with zero length do not contribute any samples
+        non_empty = lengths > 0
+        self._starts = (stops - lengths)[non_empty]
+        self._stops = stops[non_empty]
+        self.number_of_samples = int(stops[-1]) if len(stops) > 0 else 0
+
+        self._analog_ids = dict()
+        for chnl, id_list in analog_ids.items():
+            ids = np.concatenate(id_list) if id_list else np.empty(0, dtype='int64')
+            self._analog_ids[chnl] = ids[non_empty]
+        self._digital_states = dict()
+        for chnl, state_list in digital_states.items():
+            states = np.concatenate(state_list) if state_list else np.empty(0, dtype=bool)
+            self._digital_states[chnl] = states[non_empty]
+
+    @staticmethod
+    def _get_function_index(function, function_list, index_dict):
+        try:
+            key = (type(function).__name__,
+                   tuple(getattr(function, param) for param in function.params))
+            hash(key)
+        except TypeError:
+            key = id(function)
+        if key not in index_dict:
+            index_dict[key] = len(function_list)
+            function_list.append(function)
+        return index_dict[key]
+
+    @property
+    def number_of_elements(self):
+        return len(self._starts)
+
+    @property
+    def end_offset_bin(self):
+        """ The offset bin to pass on to the next ensemble in order to preserve the rotating frame.
+        """
+        if self.rotating_frame:
+            return self.offset_bin + self.number_of_samples
+        return self.offset_bin
+
+    def fill_chunk(self, start, length, analog_samples, digital_samples):
+        """ Samples the waveform part [start, start + length) into the provided arrays.
+
+        @param int start: Index of the first sample of the chunk within the entire waveform
+        @param int length: Number of samples to create
+        @param dict analog_samples: Preallocated float32 arrays (at least "length" long) with
+                                    analog channel descriptors as keys
+        @param dict digital_samples: Preallocated bool arrays (at least "length" long) with digital
+                                     channel descriptors as keys
+        """
+        stop = start + length
+        first = np.searchsorted(self._stops, start, side='right')
+        last = np.searchsorted(self._starts, stop, side='left')
+        # Element segments clipped to the chunk boundaries
+        seg_starts = np.maximum(self._starts[first:last], start)
+        seg_lengths = np.minimum(self._stops[first:last], stop) - seg_starts
+
+        for chnl, states in self._digital_states.items():
+            digital_samples[chnl][:length] = np.repeat(states[first:last], seg_lengths)
+
+        if not self._analog_ids:
+            return
+
+        # Time offset (in bins) of the first sample of each segment. Without rotating frame each
+        # segment starts over at the ensemble offset.
+        if self.rotating_frame:
+            seg_offsets = self.offset_bin + seg_starts
+        else:
+            seg_offsets = np.full(len(seg_starts), self.offset_bin, dtype='int64')
+        seg_positions = seg_starts - start
+
+        for chnl, function_ids in self._analog_ids.items():
+            seg_ids = function_ids[first:last]
+            samples = analog_samples[chnl]
+            scale = self._analog_scales[chnl]
+            for func_id in np.unique(seg_ids):
+                function = self._functions[chnl][func_id]
+                mask = seg_ids == func_id
+                if getattr(function, 'samples_elementwise', False):
+                    self._sample_batched(function,
+                                         scale,
+                                         samples,
+                                         seg_positions[mask],
+                                         seg_offsets[mask],
+                                         seg_lengths[mask])
+                else:
+                    for pos, offset, seg_len in zip(seg_positions[mask],
+                                                    seg_offsets[mask],
+                                                    seg_lengths[mask]):
+                        time_arr = (offset + np.arange(seg_len, dtype='float64')) / self.sample_rate
+                        samples[pos:pos + seg_len] = function.get_samples(time_arr) / scale
+
+    def _sample_batched(self, function, scale, samples, positions, offsets, lengths):
+        """ Evaluates a single elementwise sampling function for many segments at once.
+        Segments are grouped into batches of roughly max_batch_samples to limit memory usage.
+        """
+        seg_stops = np.cumsum(lengths)
+        batch_ids = (seg_stops - lengths) // self.max_batch_samples
+        boundaries = np.flatnonzero(np.diff(batch_ids)) + 1
+        for batch in np.split(np.arange(len(lengths)), boundaries):
+            if len(batch) == 1:
+                pos, offset, seg_len = positions[batch[0]], offsets[batch[0]], lengths[batch[0]]
+                time_arr = (offset + np.arange(seg_len, dtype='float64')) / self.sample_rate
+                samples[pos:pos + seg_len] = function.get_samples(time_arr) / scale
+                continue
+            batch_lengths = lengths[batch]
+            batch_before = np.cumsum(batch_lengths) - batch_lengths
+            local_index = np.arange(batch_lengths.sum(), dtype='int64')
+            time_bins = local_index + np.repeat(offsets[batch] - batch_before, batch_lengths)
+            sample_index = local_index + np.repeat(positions[batch] - batch_before, batch_lengths)
+            time_arr = time_bins.astype('float64') / self.sample_rate
+            samples[sample_index] = function.get_samples(time_arr) / scale
+
+
+def init_sampling_worker(import_paths):
+    """ Initializer for worker processes of a process pool used with sample_ensemble_to_files.
+    Makes additional sampling function modules importable in the worker process.
+
+    @param list import_paths: additional paths to import sampling functions from
+    """
+    for path in import_paths:
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def sample_ensemble_to_files(ensemble, blocks, elements_length_bins, sample_rate, analog_amplitudes,
+                             offset_bin, directory, chunk_length=2 ** 22):
+    """ Samples an entire PulseBlockEnsemble into one .npy file per channel.
+    Intended to be run in a worker process. See EnsembleSampler for the parameters.
+
+    @param str directory: directory to create the .npy files in
+    @param int chunk_length: number of samples to calculate at once
+
+    @return tuple: two dicts (analog_paths, digital_paths) with channel descriptors as keys
+    """
+    sampler = EnsembleSampler(ensemble=ensemble,
+                              blocks=blocks,
+                              elements_length_bins=elements_length_bins,
+                              sample_rate=sample_rate,
+                              analog_amplitudes=analog_amplitudes,
+                              offset_bin=offset_bin)
+    os.makedirs(directory, exist_ok=True)
+    number_of_samples = sampler.number_of_samples
+    analog_paths = {chnl: os.path.join(directory, chnl + '.npy') for chnl in sampler.analog_channels}
+    digital_paths = {chnl: os.path.join(directory, chnl + '.npy') for chnl in sampler.digital_channels}
+    if number_of_samples == 0:
+        for path in analog_paths.values():
+            np.save(path, np.empty(0, dtype='float32'))
+        for path in digital_paths.values():
+            np.save(path, np.empty(0, dtype=bool))
+        return analog_paths, digital_paths
+
+    analog_samples = {
+        chnl: np.lib.format.open_memmap(path, mode='w+', dtype='float32', shape=(number_of_samples,))
+        for chnl, path in analog_paths.items()
+    }
+    digital_samples = {
+        chnl: np.lib.format.open_memmap(path, mode='w+', dtype=bool, shape=(number_of_samples,))
+        for chnl, path in digital_paths.items()
+    }
+    for start in range(0, number_of_samples, chunk_length):
+        length = min(chunk_length, number_of_samples - start)
+        sampler.fill_chunk(start,
+                           length,
+                           {chnl: arr[start:start + length] for chnl, arr in analog_samples.items()},
+                           {chnl: arr[start:start + length] for chnl, arr in digital_samples.items()})
+    for arr in list(analog_samples.values()) + list(digital_samples.values()):
+        arr.flush()
+    return analog_paths, digital_paths
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains the Qudi single-file storage backend for pulse objects (PulseBlock,
+PulseBlockEnsemble and PulseSequence instances).
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from logging import getLogger
+
+from qudi.util.helpers import natural_sort
+
+_logger = getLogger(__name__)
+
+
+class PulseAssetDatabase:
+    """
+    Stores pickled pulse objects in a single SQLite database file indexed by asset type and name.
+
+    Write access can be grouped in batches (see batch) which are committed in a single transaction.
+    Objects are only de-serialized on request (see load), so opening a database with thousands of
+    stored objects only requires reading the index.
+    """
+
+    # Asset types and the file extensions formerly used to store them as separate pickle files
+    asset_types = {'block': '.block', 'ensemble': '.ensemble', 'sequence': '.sequence'}
+
+    def __init__(self, path):
+        """
+        @param str path: path of the database file. Will be created if it does not exist.
+        """
+        self.path = path
+        self._connection = None
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+
+    @property
+    def is_open(self):
+        return self._connection is not None
+
+    def open(self):
+        with self._lock:
+            if self._connection is not None:
+                return
+            # The database is accessed from the logic thread as well as from GUI threads reading
+            # the lazily loaded asset dicts. Access is serialized by self._lock.
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS assets ('
+                                     'type TEXT NOT NULL, '
+                                     'name TEXT NOT NULL, '
+                                     'data BLOB NOT NULL, '
+                                     'PRIMARY KEY (type, name))')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta ('
+                                     'key TEXT PRIMARY KEY, '
+                                     'value TEXT)')
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is None:
+                return
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+            self._batch_depth = 0
+
+    @contextmanager
+    def batch(self):
+        """ Context manager grouping all write access within into a single transaction.
+        Batches can be nested. Changes are committed once the outermost batch is left.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._connection is not None:
+                    self._connection.commit()
+
+    def _commit(self):
+        if self._batch_depth == 0:
+            self._connection.commit()
+
+    def names(self, asset_type):
+        """ Naturally sorted list of all names stored for the given asset type.
+
+        @param str asset_type: one of 'block', 'ensemble' or 'sequence'
+        @return list: names of the stored objects
+        """
+        with self._lock:
+            cursor = self._connection.execute('SELECT name FROM assets WHERE type=?',
+                                              (asset_type,))
+            return natural_sort(row[0] for row in cursor)
+
+    def load(self, asset_type, name):
+        """ De-serializes a single object from the database.
+
+        @param str asset_type: one of 'block', 'ensemble' or 'sequence'
+        @param str name: name of the object to load
+
+        @return object: the de-serialized object or None if no object by that name is stored.
+                        Exceptions raised during de-serialization are passed on.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT data FROM assets WHERE type=? AND name=?',
+                                           (asset_type, name)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def store(self, asset_type, name, obj):
+        """ Serializes a single object into the database replacing any object with the same name.
+
+        @param str asset_type: one of 'block', 'ensemble' or 'sequence'
+        @param str name: name to store the object under
+        @param object obj: the object to serialize
+        """
+        data = pickle.dumps(obj)
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO assets (type, name, data) '
+                                     'VALUES (?, ?, ?)',
+                                     (asset_type, name, sqlite3.Binary(data)))
+            self._commit()
+
+    def remove(self, asset_type, name):
+        """ Removes a single object from the database. Does nothing if the object does not exist.
+
+        @param str asset_type: one of 'block', 'ensemble' or 'sequence'
+        @param str name: name of the object to remove
+        """
+        with self._lock:
+            self._connection.execute('DELETE FROM assets WHERE type=? AND name=?',
+                                     (asset_type, name))
+            self._commit()
+
+    def migrate_legacy_files(self, directory):
+        """ One-time import of pulse objects stored as separate pickle files (".block", ".ensemble"
+        and ".sequence") in the given directory. The raw file contents are copied without
+        de-serialization. Objects already present in the database are not overwritten.
+        The legacy files are left untouched. Subsequent calls do nothing.
+
+        @param str directory: directory containing the legacy pickle files
+
+        @return int: number of imported objects
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key='legacy_migration'"
+                                           ).fetchone()
+            if row is not None:
+                return 0
+
+            extension_types = {ext: asset_type for asset_type, ext in self.asset_types.items()}
+            rows = list()
+            if os.path.isdir(directory):
+                with os.scandir(directory) as scan:
+                    for entry in scan:
+                        if not entry.is_file():
+                            continue
+                        name, ext = os.path.splitext(entry.name)
+                        if ext not in extension_types:
+                            continue
+                        try:
+                            with open(entry.path, 'rb') as file:
+                                rows.append((extension_types[ext], name, sqlite3.Binary(file.read())))
+                        except OSError:
+                            _logger.exception('Unable to read legacy pulse asset file "{0}". '
+                                              'Skipping it.'.format(entry.path))
+            self._connection.executemany('INSERT OR IGNORE INTO assets (type, name, data) '
+                                         'VALUES (?, ?, ?)',
+                                         rows)
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) "
+                                     "VALUES ('legacy_migration', 'done')")
+            self._connection.commit()
+            return len(rows)
+
+
+class LazyAssetDict(MutableMapping):
+    """
+    Mapping of pulse objects that holds only the names of the stored objects until an object is
+    accessed for the first time. The object is then requested from a loader callable and cached.
+
+    Iterating over the keys and membership tests never trigger loading. The loader is called with
+    the name as single argument and must return the object or None if it can not be loaded, in which
+    case the name is removed from the mapping. Use copy() for a plain dict snapshot skipping such
+    entries.
+    Access is serialized by a lock since objects may be loaded from other threads than the owner.
+    Receivers in other threads should nevertheless be handed a plain snapshot instead of the
+    mapping itself.
+    """
+
+    class _NotLoaded:
+        def __repr__(self):
+            return '<not loaded>'
+
+    _not_loaded = _NotLoaded()
+
+    def __init__(self, loader, names=None):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._objects = dict()
+        if names is not None:
+            self._objects = dict.fromkeys(names, self._not_loaded)
+
+    @property
+    def loaded_names(self):
+        with self._lock:
+            return [name for name, obj in self._objects.items() if obj is not self._not_loaded]
+
+    def __getitem__(self, key):
+        with self._lock:
+            obj = self._objects[key]
+            if obj is self._not_loaded:
+                obj = self._loader(key)
+                if obj is None:
+                    self._objects.pop(key, None)
+                    raise KeyError(key)
+                self._objects[key] = obj
+            return obj
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._objects[key] = value
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._objects[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._objects
+
+    def __iter__(self):
+        # Iterate over a copy of the names since loading can remove broken entries
+        with self._lock:
+            return iter(list(self._objects))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._objects)
+
+    def values(self):
+        return [obj for _, obj in self.items()]
+
+    def items(self):
+        items = list()
+        for key in self:
+            obj = self.get(key)
+            if obj is not None:
+                items.append((key, obj))
+        return items
+
+    def copy(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        with self._lock:
+            return '{0}({1})'.format(type(self).__name__, repr(self._objects))
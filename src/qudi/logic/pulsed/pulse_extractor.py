@@ -75,7 +75,8 @@ class PulseExtractor(PulseExtractorBase):
        default values of the right data type. (e.g. differentiate between 42 (int) and 42.0 (float))
     7) Make sure that no two extraction methods in any module share a keyword argument of different
        default data type.
-    8) The keyword "method" must not be used in the extraction method parameters
+    8) The keyword "method" and the names of the general extraction settings (see
+       _general_parameters) must not be used in the extraction method parameters
 
     See BasicPulseExtractor class for an example usage.
     """
@@ -91,6 +92,13 @@ class PulseExtractor(PulseExtractorBase):
         self._parameters = dict()
         # Currently selected extraction method
         self._current_extraction_method = None
+        # Extraction settings independent of the selected extraction method:
+        # cache_laser_positions: gather laser pulses at the positions of the last extraction instead
+        #                        of extracting them on every analysis tick
+        # laser_drift_tolerance: maximum relative change of the fraction of counts within the
+        #                        cached laser pulse positions before extracting laser pulses again
+        self._general_parameters = {'cache_laser_positions': False,
+                                    'laser_drift_tolerance': 0.05}
 
         # import extraction modules from default namespace package
         # "qudi.logic.pulse_extraction_methods"
@@ -147,7 +155,8 @@ class PulseExtractor(PulseExtractorBase):
         if isinstance(pulsedmeasurementlogic.extraction_parameters, dict):
             # Delete unused parameters
             params = [p for p in pulsedmeasurementlogic.extraction_parameters if
-                      p not in self._parameters and p != 'method']
+                      p not in self._parameters and p not in self._general_parameters and
+                      p != 'method']
             for param in params:
                 del pulsedmeasurementlogic.extraction_parameters[param]
             # Update parameter dict and current method
@@ -158,7 +167,7 @@ class PulseExtractor(PulseExtractorBase):
     def extraction_settings(self):
         """
         This property holds all parameters needed for the currently selected extraction_method as
-        well as the currently selected method name.
+        well as the currently selected method name and the general extraction settings.
 
         @return dict: dictionary with keys being the parameter name and values being the parameter
         """
@@ -171,7 +180,8 @@ class PulseExtractor(PulseExtractorBase):
         # Get keyword arguments for the currently selected method
         settings_dict = self._get_extraction_method_kwargs(method)
 
-        # Attach current extraction method name
+        # Attach general extraction settings and current extraction method name
+        settings_dict.update(self._general_parameters)
         settings_dict['method'] = self._current_extraction_method
         return settings_dict
 
@@ -197,6 +207,15 @@ class PulseExtractor(PulseExtractorBase):
                 else:
                     self.log.error('Extraction method "{0}" could not be found in PulseExtractor.'
                                    ''.format(value))
+            elif parameter in self._general_parameters:
+                default = self._general_parameters[parameter]
+                if type(value) == type(default) or (isinstance(default, float) and
+                                                    isinstance(value, int) and
+                                                    not isinstance(value, bool)):
+                    self._general_parameters[parameter] = type(default)(value)
+                else:
+                    self.log.error('Extraction setting "{0}" must be of type {1}.'
+                                   ''.format(parameter, type(default).__name__))
             elif parameter in self._parameters:
                 self._parameters[parameter] = value
             else:
@@ -216,6 +235,26 @@ class PulseExtractor(PulseExtractorBase):
         else:
             return self._ungated_extraction_methods
 
+    @property
+    def cache_laser_positions(self):
+        """
+        Flag indicating if laser pulses should be gathered at the positions of the last extraction
+        instead of extracting them on every analysis tick.
+
+        @return bool: cache laser pulse positions (True) or extract on every tick (False)
+        """
+        return self._general_parameters['cache_laser_positions']
+
+    @property
+    def laser_drift_tolerance(self):
+        """
+        Maximum relative change of the fraction of counts within the cached laser pulse positions
+        before laser pulses are extracted again.
+
+        @return float: relative drift tolerance
+        """
+        return self._general_parameters['laser_drift_tolerance']
+
     @property
     def full_settings_dict(self):
         """
@@ -225,6 +264,7 @@ class PulseExtractor(PulseExtractorBase):
         @return dict: full set of parameters and currently selected extraction method.
         """
         settings_dict = self._parameters.copy()
+        settings_dict.update(self._general_parameters)
         settings_dict['method'] = self._current_extraction_method
         return settings_dict
 
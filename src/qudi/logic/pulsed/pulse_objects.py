@@ -692,8 +692,11 @@ class PulseSequence(object):
     Represents a playback procedure for a number of PulseBlockEnsembles. Unused for pulse
     generator hardware without sequencing functionality.
     """
+    # Class level default for instances stored before this attribute was introduced
+    rotating_frame_repetitions = False
 
-    def __init__(self, name, ensemble_list=None, rotating_frame=False):
+    def __init__(self, name, ensemble_list=None, rotating_frame=False,
+                 rotating_frame_repetitions=False):
         """
         The constructor for a PulseSequence objects needs to have:
 
@@ -739,9 +742,13 @@ class PulseSequence(object):
                                           and so the respective sequence step will play 42 times.
         @param bool rotating_frame: indicates, whether the phase has to be preserved in all
                                     analog signals ACROSS different waveforms
+        @param bool rotating_frame_repetitions: indicates, whether the preserved phase of each
+                                                sequence step also includes the repetitions of
+                                                the previous steps (only used with rotating_frame)
         """
         self.name = name
         self.rotating_frame = rotating_frame
+        self.rotating_frame_repetitions = rotating_frame_repetitions
         self.ensemble_list = list()
         if ensemble_list is not None:
             self.extend(ensemble_list)
@@ -794,6 +801,8 @@ class PulseSequence(object):
             return True
         if (self.name, self.rotating_frame, self.is_finite) != (other.name, other.rotating_frame, other.is_finite):
             return False
+        if self.rotating_frame_repetitions != other.rotating_frame_repetitions:
+            return False
         if self.ensemble_list != other.ensemble_list:
             return False
         if self.measurement_information != other.measurement_information:
@@ -981,6 +990,7 @@ class PulseSequence(object):
         dict_repr = dict()
         dict_repr['name'] = self.name
         dict_repr['rotating_frame'] = self.rotating_frame
+        dict_repr['rotating_frame_repetitions'] = self.rotating_frame_repetitions
         dict_repr['ensemble_list'] = self.ensemble_list
         dict_repr['sampling_information'] = self.sampling_information
         dict_repr['measurement_information'] = self.measurement_information
@@ -991,7 +1001,9 @@ class PulseSequence(object):
     def sequence_from_dict(sequence_dict):
         new_seq = PulseSequence(name=sequence_dict['name'],
                                 ensemble_list=sequence_dict['ensemble_list'],
-                                rotating_frame=sequence_dict['rotating_frame'])
+                                rotating_frame=sequence_dict['rotating_frame'],
+                                rotating_frame_repetitions=sequence_dict.get(
+                                    'rotating_frame_repetitions', False))
         new_seq.sampling_information = sequence_dict['sampling_information']
         new_seq.measurement_information = sequence_dict['measurement_information']
         new_seq.generation_method_parameters = sequence_dict['generation_method_parameters']
@@ -30,6 +30,36 @@ class BasicPulseAnalyzer(PulseAnalyzerBase):
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Analysis windows of the last call for each analysis method
+        self._window_cache = dict()
+
+    def _get_windows(self, method_name, laser_length, bin_width, *window_times):
+        """
+        Converts pairs of window start and end times into bin index windows for a given laser
+        pulse length. The windows are cached for each analysis method and only calculated again if
+        the settings or the laser pulse length change.
+
+        @param str method_name: name of the analysis method requesting the windows
+        @param int laser_length: number of bins per laser pulse
+        @param float bin_width: counter bin width in s
+        @param float window_times: start and end times of all windows in s (alternating)
+
+        @return list: tuples (slice, number of bins within laser pulse, end bin - start bin) for
+                      each window
+        """
+        key = (laser_length, bin_width, window_times)
+        cached = self._window_cache.get(method_name)
+        if cached is None or cached[0] != key:
+            windows = list()
+            for start, end in zip(window_times[::2], window_times[1::2]):
+                start_bin = round(start / bin_width)
+                end_bin = round(end / bin_width)
+                window = slice(start_bin, end_bin)
+                window_length = len(range(*window.indices(laser_length)))
+                windows.append((window, window_length, end_bin - start_bin))
+            cached = (key, windows)
+            self._window_cache[method_name] = cached
+        return cached[1]
 
     def analyse_mean_norm(self, laser_data, signal_start=0.0, signal_end=200e-9, norm_start=300e-9,
                           norm_end=500e-9):
@@ -50,41 +80,33 @@ class BasicPulseAnalyzer(PulseAnalyzerBase):
         if not isinstance(bin_width, float):
             return np.zeros(num_of_lasers), np.zeros(num_of_lasers)
 
-        # Convert the times in seconds to bins (i.e. array indices)
-        signal_start_bin = round(signal_start / bin_width)
-        signal_end_bin = round(signal_end / bin_width)
-        norm_start_bin = round(norm_start / bin_width)
-        norm_end_bin = round(norm_end / bin_width)
-
-        # initialize data arrays for signal and measurement error
-        signal_data = np.empty(num_of_lasers, dtype=float)
-        error_data = np.empty(num_of_lasers, dtype=float)
-
-        # loop over all laser pulses and analyze them
-        for ii, laser_arr in enumerate(laser_data):
-            # calculate the sum and mean of the data in the normalization window
-            tmp_data = laser_arr[norm_start_bin:norm_end_bin]
-            reference_sum = np.sum(tmp_data)
-            reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
-
-            # calculate the sum and mean of the data in the signal window
-            tmp_data = laser_arr[signal_start_bin:signal_end_bin]
-            signal_sum = np.sum(tmp_data)
-            signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        # Get the signal and normalization windows as bin index slices
+        (signal_window, signal_length, _), (norm_window, norm_length, _) = self._get_windows(
+            'mean_norm', laser_data.shape[1], bin_width, signal_start, signal_end, norm_start,
+            norm_end)
+
+        # calculate the sum and mean of the data in the normalization and signal window for all
+        # laser pulses at once
+        reference_sum = laser_data[:, norm_window].sum(axis=1)
+        signal_sum = laser_data[:, signal_window].sum(axis=1)
+        if norm_length != 0:
+            reference_mean = reference_sum / norm_length
+        else:
+            reference_mean = np.zeros(num_of_lasers)
+        if signal_length != 0:
+            signal_mean = signal_sum / signal_length
+        else:
+            signal_mean = np.zeros(num_of_lasers)
 
+        with np.errstate(divide='ignore', invalid='ignore'):
             # Calculate normalized signal while avoiding division by zero
-            if reference_mean > 0 and signal_mean >= 0:
-                signal_data[ii] = signal_mean / reference_mean
-            else:
-                signal_data[ii] = 0.0
-
-            # Calculate measurement error while avoiding division by zero
-            if reference_sum > 0 and signal_sum > 0:
-                # calculate with respect to gaussian error 'evolution'
-                error_data[ii] = signal_data[ii] * np.sqrt(1 / signal_sum + 1 / reference_sum)
-            else:
-                error_data[ii] = 0.0
-
+            signal_data = np.where((reference_mean > 0) & (signal_mean >= 0),
+                                   signal_mean / reference_mean,
+                                   0.0)
+            # Calculate measurement error (gaussian error 'evolution') avoiding division by zero
+            error_data = np.where((reference_sum > 0) & (signal_sum > 0),
+                                  signal_data * np.sqrt(1 / signal_sum + 1 / reference_sum),
+                                  0.0)
         return signal_data, error_data
 
     def analyse_sum(self, laser_data, signal_start=0.0, signal_end=200e-9):
@@ -102,28 +124,18 @@ class BasicPulseAnalyzer(PulseAnalyzerBase):
         if not isinstance(bin_width, float):
             return np.zeros(num_of_lasers), np.zeros(num_of_lasers)
 
-        # Convert the times in seconds to bins (i.e. array indices)
-        signal_start_bin = round(signal_start / bin_width)
-        signal_end_bin = round(signal_end / bin_width)
-
-        # initialize data arrays for signal and measurement error
-        signal_data = np.empty(num_of_lasers, dtype=float)
-        error_data = np.empty(num_of_lasers, dtype=float)
-
-        # loop over all laser pulses and analyze them
-        for ii, laser_arr in enumerate(laser_data):
-            # calculate the sum of the data in the signal window
-            signal = laser_arr[signal_start_bin:signal_end_bin].sum()
-            signal_error = np.sqrt(signal)
+        # Get the signal window as bin index slice
+        (signal_window, _, _), = self._get_windows('sum', laser_data.shape[1], bin_width,
+                                                   signal_start, signal_end)
 
-            # Avoid numpy C type variables overflow and NaN values
-            if signal < 0 or signal != signal:
-                signal_data[ii] = 0.0
-                error_data[ii] = 0.0
-            else:
-                signal_data[ii] = signal
-                error_data[ii] = signal_error
+        # calculate the sum of the data in the signal window for all laser pulses at once
+        signal = laser_data[:, signal_window].sum(axis=1)
 
+        # Avoid numpy C type variables overflow and NaN values
+        valid = ~((signal < 0) | (signal != signal))
+        with np.errstate(invalid='ignore'):
+            signal_data = np.where(valid, signal, 0.0)
+            error_data = np.where(valid, np.sqrt(signal), 0.0)
         return signal_data, error_data
 
     def analyse_mean(self, laser_data, signal_start=0.0, signal_end=200e-9):
@@ -142,29 +154,22 @@ class BasicPulseAnalyzer(PulseAnalyzerBase):
         if not isinstance(bin_width, float):
             return np.zeros(num_of_lasers), np.zeros(num_of_lasers)
 
-        # Convert the times in seconds to bins (i.e. array indices)
-        signal_start_bin = round(signal_start / bin_width)
-        signal_end_bin = round(signal_end / bin_width)
-
-        # initialize data arrays for signal and measurement error
-        signal_data = np.empty(num_of_lasers, dtype=float)
-        error_data = np.empty(num_of_lasers, dtype=float)
-
-        # loop over all laser pulses and analyze them
-        for ii, laser_arr in enumerate(laser_data):
-            # calculate the mean of the data in the signal window
-            signal = laser_arr[signal_start_bin:signal_end_bin].mean()
-            signal_sum = laser_arr[signal_start_bin:signal_end_bin].sum()
-            signal_error = np.sqrt(signal_sum) / (signal_end_bin - signal_start_bin)
-
-            # Avoid numpy C type variables overflow and NaN values
-            if signal < 0 or signal != signal:
-                signal_data[ii] = 0.0
-                error_data[ii] = 0.0
-            else:
-                signal_data[ii] = signal
-                error_data[ii] = signal_error
+        # Get the signal window as bin index slice
+        (signal_window, signal_length, signal_bins), = self._get_windows(
+            'mean', laser_data.shape[1], bin_width, signal_start, signal_end)
 
+        # calculate the mean of the data in the signal window for all laser pulses at once
+        if signal_length != 0:
+            signal = laser_data[:, signal_window].mean(axis=1)
+        else:
+            signal = np.full(num_of_lasers, np.nan)
+        signal_sum = laser_data[:, signal_window].sum(axis=1)
+
+        # Avoid numpy C type variables overflow and NaN values
+        valid = ~((signal < 0) | (signal != signal))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            signal_data = np.where(valid, signal, 0.0)
+            error_data = np.where(valid, np.sqrt(signal_sum) / signal_bins, 0.0)
         return signal_data, error_data
 
     def analyse_pass_through(self, laser_data):
@@ -208,31 +213,28 @@ class BasicPulseAnalyzer(PulseAnalyzerBase):
         if not isinstance(bin_width, float):
             return np.zeros(num_of_lasers), np.zeros(num_of_lasers)
 
-        # Convert the times in seconds to bins (i.e. array indices)
-        signal_start_bin = round(signal_start / bin_width)
-        signal_end_bin = round(signal_end / bin_width)
-        norm_start_bin = round(norm_start / bin_width)
-        norm_end_bin = round(norm_end / bin_width)
-
-        # initialize data arrays for signal and measurement error
-        signal_data = np.empty(num_of_lasers, dtype=float)
-        error_data = np.empty(num_of_lasers, dtype=float)
-
-        # loop over all laser pulses and analyze them
-        for ii, laser_arr in enumerate(laser_data):
-            # calculate the sum and mean of the data in the normalization window
-            tmp_data = laser_arr[norm_start_bin:norm_end_bin]
-            reference_sum = np.sum(tmp_data)
-            reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
-
-            # calculate the sum and mean of the data in the signal window
-            tmp_data = laser_arr[signal_start_bin:signal_end_bin]
-            signal_sum = np.sum(tmp_data)
-            signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        # Get the signal and background windows as bin index slices
+        (signal_window, signal_length, _), (norm_window, norm_length, _) = self._get_windows(
+            'mean_reference', laser_data.shape[1], bin_width, signal_start, signal_end, norm_start,
+            norm_end)
+
+        # calculate the sum and mean of the data in the background and signal window for all
+        # laser pulses at once
+        reference_sum = laser_data[:, norm_window].sum(axis=1)
+        signal_sum = laser_data[:, signal_window].sum(axis=1)
+        if norm_length != 0:
+            reference_mean = reference_sum / norm_length
+        else:
+            reference_mean = np.zeros(num_of_lasers)
+        if signal_length != 0:
+            signal_mean = signal_sum / signal_length
+        else:
+            signal_mean = np.zeros(num_of_lasers)
 
-            signal_data[ii] = signal_mean - reference_mean
+        signal_data = signal_mean - reference_mean
 
-            # calculate with respect to gaussian error 'evolution'
-            error_data[ii] = signal_data[ii] * np.sqrt(1 / abs(signal_sum) + 1 / abs(reference_sum))
+        # calculate with respect to gaussian error 'evolution'
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error_data = signal_data * np.sqrt(1 / np.abs(signal_sum) + 1 / np.abs(reference_sum))
 
         return signal_data, error_data
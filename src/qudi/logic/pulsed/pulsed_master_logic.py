@@ -99,6 +99,7 @@ class PulsedMasterLogic(LogicBase):
     sigLoadSequence = QtCore.Signal(str)
     sigSampleBlockEnsemble = QtCore.Signal(str)
     sigSampleSequence = QtCore.Signal(str)
+    sigCompileEnsembleToSequence = QtCore.Signal(str)
     sigClearPulseGenerator = QtCore.Signal()
     sigGeneratorSettingsChanged = QtCore.Signal(dict)
     sigSamplingSettingsChanged = QtCore.Signal(dict)
@@ -112,6 +113,7 @@ class PulsedMasterLogic(LogicBase):
     sigAvailableSequencesUpdated = QtCore.Signal(list)
     sigSampleEnsembleComplete = QtCore.Signal(object)
     sigSampleSequenceComplete = QtCore.Signal(object)
+    sigCompileEnsembleComplete = QtCore.Signal(object, dict)
     sigLoadedAssetUpdated = QtCore.Signal(str, str)
     sigGeneratorSettingsUpdated = QtCore.Signal(dict)
     sigSamplingSettingsUpdated = QtCore.Signal(dict)
@@ -124,6 +126,8 @@ class PulsedMasterLogic(LogicBase):
 
         # Dictionary servings as status register
         self.status_dict = dict()
+        # Load the asset sampled after compiling an ensemble into a sequence
+        self._compile_with_load = False
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
@@ -132,6 +136,7 @@ class PulsedMasterLogic(LogicBase):
         # Initialize status register
         self.status_dict = {'sampling_ensemble_busy': False,
                             'sampling_sequence_busy': False,
+                            'compiling_busy': False,
                             'sampload_busy': False,
                             'loading_busy': False,
                             'pulser_running': False,
@@ -214,6 +219,8 @@ class PulsedMasterLogic(LogicBase):
             self.sequencegeneratorlogic().sample_pulse_block_ensemble, QtCore.Qt.QueuedConnection)
         self.sigSampleSequence.connect(
             self.sequencegeneratorlogic().sample_pulse_sequence, QtCore.Qt.QueuedConnection)
+        self.sigCompileEnsembleToSequence.connect(
+            self.sequencegeneratorlogic().compile_ensemble_to_sequence, QtCore.Qt.QueuedConnection)
         self.sigClearPulseGenerator.connect(
             self.sequencegeneratorlogic().clear_pulser, QtCore.Qt.QueuedConnection)
         self.sigGeneratorSettingsChanged.connect(
@@ -244,6 +251,8 @@ class PulsedMasterLogic(LogicBase):
             self.sample_ensemble_finished, QtCore.Qt.QueuedConnection)
         self.sequencegeneratorlogic().sigSampleSequenceComplete.connect(
             self.sample_sequence_finished, QtCore.Qt.QueuedConnection)
+        self.sequencegeneratorlogic().sigCompileEnsembleComplete.connect(
+            self.compile_ensemble_finished, QtCore.Qt.QueuedConnection)
         self.sequencegeneratorlogic().sigLoadedAssetUpdated.connect(
             self.loaded_asset_updated, QtCore.Qt.QueuedConnection)
         self.sequencegeneratorlogic().sigBenchmarkComplete.connect(
@@ -295,6 +304,7 @@ class PulsedMasterLogic(LogicBase):
         self.sigLoadSequence.disconnect()
         self.sigSampleBlockEnsemble.disconnect()
         self.sigSampleSequence.disconnect()
+        self.sigCompileEnsembleToSequence.disconnect()
         self.sigClearPulseGenerator.disconnect()
         self.sigGeneratorSettingsChanged.disconnect()
         self.sigSamplingSettingsChanged.disconnect()
@@ -310,6 +320,7 @@ class PulsedMasterLogic(LogicBase):
         self.sequencegeneratorlogic().sigPredefinedSequenceGenerated.disconnect()
         self.sequencegeneratorlogic().sigSampleEnsembleComplete.disconnect()
         self.sequencegeneratorlogic().sigSampleSequenceComplete.disconnect()
+        self.sequencegeneratorlogic().sigCompileEnsembleComplete.disconnect()
         self.sequencegeneratorlogic().sigLoadedAssetUpdated.disconnect()
         self.sequencegeneratorlogic().sigBenchmarkComplete.disconnect()
         return
@@ -730,6 +741,42 @@ class PulsedMasterLogic(LogicBase):
                 self.load_ensemble(ensemble.name)
         return
 
+    @QtCore.Slot(str)
+    @QtCore.Slot(str, bool)
+    def sample_ensemble_as_sequence(self, ensemble_name, with_load=False):
+        """ Compiles repeated PulseBlocks of a PulseBlockEnsemble into sequence steps (see
+        SequenceGeneratorLogic.compile_ensemble_to_sequence) and samples the resulting
+        PulseSequence. Falls back to sampling the flat PulseBlockEnsemble if compiling is not
+        possible. The compiler report is emitted via sigCompileEnsembleComplete.
+
+        @param str ensemble_name: name of the PulseBlockEnsemble to sample
+        @param bool with_load: load the sampled asset into the pulse generator afterwards
+        """
+        already_busy = self.status_dict['sampling_ensemble_busy'] or self.status_dict[
+            'sampling_sequence_busy'] or self.status_dict['compiling_busy'] or \
+            self.sequencegeneratorlogic().module_state() == 'locked'
+        if already_busy:
+            self.log.error('Sampling of a different asset already in progress.\n'
+                           'PulseBlockEnsemble "{0}" not sampled!'.format(ensemble_name))
+        else:
+            self.status_dict['compiling_busy'] = True
+            self._compile_with_load = with_load
+            self.sigCompileEnsembleToSequence.emit(ensemble_name)
+        return
+
+    @QtCore.Slot(str, object, dict)
+    def compile_ensemble_finished(self, ensemble_name, sequence_name, report):
+        self.sigCompileEnsembleComplete.emit(sequence_name, report)
+        # Only sample if compiling has been requested by sample_ensemble_as_sequence
+        if not self.status_dict['compiling_busy']:
+            return
+        self.status_dict['compiling_busy'] = False
+        if sequence_name is None:
+            self.sample_ensemble(ensemble_name, self._compile_with_load)
+        else:
+            self.sample_sequence(sequence_name, self._compile_with_load)
+        return
+
     @QtCore.Slot(str)
     @QtCore.Slot(str, bool)
     def sample_sequence(self, sequence_name, with_load=False):
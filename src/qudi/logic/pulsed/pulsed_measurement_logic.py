@@ -232,6 +232,9 @@ class PulsedMeasurementLogic(LogicBase):
         self.laser_data = np.zeros((10, 20), dtype='int64')
         self.raw_data = np.zeros((10, 20), dtype='int64')
 
+        # Laser pulse positions of the last extraction (extraction setting cache_laser_positions)
+        self._laser_extraction_cache = None
+
         self._saved_raw_data = dict()  # temporary saved raw data
         self._recalled_raw_data_tag = None  # the currently recalled raw data dict key
 
@@ -394,6 +397,7 @@ class PulsedMeasurementLogic(LogicBase):
                 self.__fast_counter_record_length,
                 self.__fast_counter_gates
             )
+            self._laser_extraction_cache = None
         else:
             self.log.warning('Fast counter is not idle (status: {0}).\n'
                              'Unable to apply new settings.'.format(counter_status))
@@ -751,6 +755,15 @@ class PulsedMeasurementLogic(LogicBase):
             self.set_extraction_settings(settings_dict)
         return
 
+    @QtCore.Slot()
+    def request_laser_extraction(self):
+        """
+        Forces a full laser pulse extraction on the next analysis tick if laser pulse positions are
+        cached (extraction setting "cache_laser_positions").
+        """
+        self._laser_extraction_cache = None
+        return
+
     @QtCore.Slot(dict)
     def set_analysis_settings(self, settings_dict=None, **kwargs):
         """
@@ -803,6 +816,7 @@ class PulsedMeasurementLogic(LogicBase):
         # Use threadlock to update settings during a running measurement
         with self._threadlock:
             self._pulseextractor.extraction_settings = settings_dict
+            self._laser_extraction_cache = None
             self.sigExtractionSettingsUpdated.emit(self.extraction_settings)
         return
 
@@ -858,6 +872,7 @@ class PulsedMeasurementLogic(LogicBase):
 
         # Perform sanity checks on settings
         self._measurement_settings_sanity_check()
+        self._laser_extraction_cache = None
 
         # emit update signal for master (GUI or other logic module)
         self.sigMeasurementSettingsUpdated.emit(self.measurement_settings)
@@ -1271,11 +1286,94 @@ class PulsedMeasurementLogic(LogicBase):
         self.__elapsed_sweeps = info_dict['elapsed_sweeps']
         self.__elapsed_time = info_dict['elapsed_time']
 
+        # Gather the laser pulses at the positions of the last extraction if enabled
+        if self._pulseextractor.cache_laser_positions:
+            laser_data = self._gather_laser_pulses(self.raw_data)
+            if laser_data is not None:
+                self.laser_data = laser_data
+                return
+
         # extract laser pulses from raw data
         return_dict = self._pulseextractor.extract_laser_pulses(self.raw_data)
         self.laser_data = return_dict['laser_counts_arr']
+        if self._pulseextractor.cache_laser_positions:
+            self._cache_laser_extraction(return_dict)
         return
 
+    def _cache_laser_extraction(self, return_dict):
+        """
+        Remembers the laser pulse positions of a full extraction to gather the laser pulses from
+        subsequent raw data (extraction setting cache_laser_positions).
+        The positions are only cached if gathering reproduces the extracted laser pulses exactly.
+
+        @param dict return_dict: The dict returned by PulseExtractor.extract_laser_pulses
+        """
+        self._laser_extraction_cache = None
+        laser_data = np.asarray(return_dict['laser_counts_arr'])
+        rising_ind = return_dict.get('laser_indices_rising')
+        falling_ind = return_dict.get('laser_indices_falling')
+        # Do not cache failed extractions
+        if laser_data.ndim != 2 or not laser_data.any() or rising_ind is None:
+            return
+
+        if self.raw_data.ndim == 2 and np.ndim(rising_ind) == 0 and np.ndim(falling_ind) == 0:
+            cache = {'gated_slice': slice(int(rising_ind), int(falling_ind))}
+        elif self.raw_data.ndim == 1 and np.ndim(rising_ind) == 1 and len(rising_ind) == len(
+                laser_data):
+            gather_ind = np.asarray(rising_ind, dtype='int64')[:, np.newaxis] + np.arange(
+                laser_data.shape[1], dtype='int64')
+            out_of_range = gather_ind >= self.raw_data.size
+            cache = {'gather_ind': gather_ind,
+                     'out_of_range': out_of_range if out_of_range.any() else None}
+        else:
+            return
+        cache['raw_data_shape'] = self.raw_data.shape
+
+        gathered = self._gather_with_cache(self.raw_data, cache)
+        if not np.array_equal(gathered, laser_data):
+            self.log.debug('Laser pulses extracted with method "{0}" can not be gathered from raw '
+                           'data by index. Incremental analysis will extract laser pulses on each '
+                           'analysis tick.'
+                           ''.format(self.extraction_settings.get('method')))
+            return
+        total_counts = self.raw_data.sum()
+        cache['laser_fraction'] = gathered.sum() / total_counts if total_counts > 0 else 0
+        self._laser_extraction_cache = cache
+        return
+
+    def _gather_laser_pulses(self, raw_data):
+        """
+        Gathers the laser pulses from raw data at the cached positions of the last full extraction.
+
+        @param numpy.ndarray raw_data: The raw data to gather the laser pulses from
+        @return numpy.ndarray: The laser pulses or None if a full extraction is required
+        """
+        cache = self._laser_extraction_cache
+        if cache is None or raw_data.shape != cache['raw_data_shape']:
+            return None
+        laser_data = self._gather_with_cache(raw_data, cache)
+
+        # Check if the laser pulses have drifted away from the cached positions
+        total_counts = raw_data.sum()
+        if total_counts > 0 and cache['laser_fraction'] > 0:
+            laser_fraction = laser_data.sum() / total_counts
+            drift = abs(laser_fraction - cache['laser_fraction']) / cache['laser_fraction']
+            if drift > self._pulseextractor.laser_drift_tolerance:
+                self.log.debug('Fraction of counts within laser pulses drifted by {0:.2%}. '
+                               'Extracting laser pulses again.'.format(drift))
+                self._laser_extraction_cache = None
+                return None
+        return laser_data
+
+    @staticmethod
+    def _gather_with_cache(raw_data, cache):
+        if 'gated_slice' in cache:
+            return raw_data[:, cache['gated_slice']].astype('int64')
+        laser_data = np.take(raw_data, cache['gather_ind'], mode='clip').astype('int64', copy=False)
+        if cache['out_of_range'] is not None:
+            laser_data[cache['out_of_range']] = 0
+        return laser_data
+
     def _analyze_laser_pulses(self):
         # analyze pulses and get data points for signal array. Also check if extraction
         # worked (non-zero array returned).
@@ -1359,6 +1457,7 @@ class PulsedMeasurementLogic(LogicBase):
         else:
             self.raw_data = np.zeros(number_of_bins, dtype='int64')
 
+        self._laser_extraction_cache = None
         self.sigMeasurementDataUpdated.emit()
         return
 
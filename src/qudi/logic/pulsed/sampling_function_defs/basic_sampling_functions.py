@@ -28,6 +28,9 @@ class Idle(SamplingBase):
     """
     Object representing an idle element (zero voltage)
     """
+    samples_elementwise = True
+    periodic_frequencies = tuple()
+
     def __init__(self):
         pass
 
@@ -41,6 +44,8 @@ class DC(SamplingBase):
     """
     Object representing an DC element (constant voltage)
     """
+    samples_elementwise = True
+    periodic_frequencies = tuple()
     params = dict()
     params['voltage'] = {'unit': 'V', 'init': 0.0, 'min': -np.inf, 'max': +np.inf, 'type': float}
 
@@ -65,6 +70,8 @@ class Sin(SamplingBase):
     """
     Object representing a sine wave element
     """
+    samples_elementwise = True
+    periodic_frequencies = ('frequency',)
     params = dict()
     params['amplitude'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -100,6 +107,8 @@ class DoubleSinSum(SamplingBase):
     """
     Object representing a double sine wave element (Superposition of two sine waves; NOT normalized)
     """
+    samples_elementwise = True
+    periodic_frequencies = ('frequency_1', 'frequency_2')
     params = dict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -158,6 +167,8 @@ class DoubleSinProduct(SamplingBase):
     """
     Object representing a double sine wave element (Product of two sine waves; NOT normalized)
     """
+    samples_elementwise = True
+    periodic_frequencies = ('frequency_1', 'frequency_2')
     params = dict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -217,6 +228,8 @@ class TripleSinSum(SamplingBase):
     Object representing a linear combination of three sines
     (Superposition of three sine waves; NOT normalized)
     """
+    samples_elementwise = True
+    periodic_frequencies = ('frequency_1', 'frequency_2', 'frequency_3')
     params = dict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -297,6 +310,8 @@ class TripleSinProduct(SamplingBase):
     Object representing a wave element composed of the product of three sines
     (Product of three sine waves; NOT normalized)
     """
+    samples_elementwise = True
+    periodic_frequencies = ('frequency_1', 'frequency_2', 'frequency_3')
     params = dict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
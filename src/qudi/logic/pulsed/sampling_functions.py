@@ -104,6 +104,13 @@ class SamplingBase:
     Base class for all sampling functions
     """
     params = dict()
+    # Set to True if get_samples evaluates each entry of the time array independently of all other
+    # entries. Such sampling functions can be evaluated for many elements in a single call.
+    samples_elementwise = False
+    # Names of the frequency parameters the samples are periodic with. An empty tuple marks samples
+    # independent of time, None (default) samples that are not periodic. Repetitions of a block
+    # sampled in the rotating frame are identical if its length is a whole number of periods.
+    periodic_frequencies = None
     log = logging.getLogger(__name__)
 
     def __repr__(self):
@@ -28,6 +28,10 @@ import copy
 import traceback
 import datetime
 import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from PySide2 import QtCore
 from qudi.core.statusvariable import StatusVar
@@ -40,6 +44,10 @@ from qudi.core.module import LogicBase
 from qudi.logic.pulsed.pulse_objects import PulseBlock, PulseBlockEnsemble, PulseSequence
 from qudi.logic.pulsed.pulse_objects import PulseObjectGenerator, PulseBlockElement
 from qudi.logic.pulsed.sampling_functions import SamplingFunctions
+from qudi.logic.pulsed.ensemble_sampler import EnsembleSampler, init_sampling_worker
+from qudi.logic.pulsed.ensemble_sampler import sample_ensemble_to_files
+from qudi.logic.pulsed.waveform_cache import WaveformCache
+from qudi.logic.pulsed.pulse_asset_storage import PulseAssetDatabase, LazyAssetDict
 from qudi.interface.pulser_interface import SequenceOption
 from qudi.util.benchmark import BenchmarkTool
 
@@ -65,7 +73,13 @@ class SequenceGeneratorLogic(LogicBase):
         # options:
         #     additional_predefined_methods_path: # optional
         #     additional_sampling_functions_path: # optional
-        #     assets_storage_path: # optional
+        #     assets_storage_path: # optional, directory containing the pulse asset database
+        #     write_buffer_count: 2 # optional, number of chunk buffers used in overhead_bytes mode
+        #     sequence_sampling_processes: 0 # optional, sample sequence ensembles in worker processes
+        #     waveform_cache: False # optional, skip re-sampling and re-upload of unchanged waveforms
+        #     waveform_cache_path: # optional, directory to store sampled arrays of cached waveforms
+        #     waveform_cache_size_limit: 4294967296 # optional, max. bytes in waveform_cache_path
+        #     sequence_compiler_min_repetitions: 10 # optional, see compile_ensemble_to_sequence
         connect:
             pulsegenerator: 'pulser_dummy'
     """
@@ -78,6 +92,10 @@ class SequenceGeneratorLogic(LogicBase):
                                        default=os.path.join(get_home_dir(), 'saved_pulsed_assets'),
                                        missing='warn')
     _overhead_bytes = ConfigOption(name='overhead_bytes', default=0, missing='nothing')
+    # Number of chunk buffers used in chunkwise write mode (overhead_bytes). With more than one buffer
+    # the next chunk is sampled in a worker thread while the previous one is written to the device.
+    # Memory usage is write_buffer_count * overhead_bytes.
+    _write_buffer_count = ConfigOption(name='write_buffer_count', default=2, missing='nothing')
     # Optional additional paths to import from
     _additional_methods_import_path = ConfigOption(name='additional_predefined_methods_path',
                                                    default=None,
@@ -87,6 +105,28 @@ class SequenceGeneratorLogic(LogicBase):
                                                    missing='nothing')
     _info_on_estimated_upload_time = ConfigOption(name='info_on_estimated_upload_time', default=60, missing='nothing')
     _disable_bench_prompt = ConfigOption(name='disable_benchmark_prompt', default=False, missing='nothing')
+    # Number of worker processes used to sample the ensembles of a PulseSequence in parallel.
+    # Values < 2 disable parallel sampling.
+    _sequence_sampling_processes = ConfigOption(name='sequence_sampling_processes',
+                                                default=0,
+                                                missing='nothing')
+    _waveform_cache_enabled = ConfigOption(name='waveform_cache', default=False, missing='nothing')
+    _waveform_cache_dir = ConfigOption(name='waveform_cache_path', default=None, missing='nothing')
+    # Maximum size in bytes of the sampled arrays stored in waveform_cache_path. The least recently
+    # used arrays are removed first. Values <= 0 disable the limit.
+    _waveform_cache_size_limit = ConfigOption(name='waveform_cache_size_limit',
+                                              default=4 * 1024**3,
+                                              missing='nothing')
+    # Minimum number of plays of a PulseBlock to get its own sequence step in
+    # compile_ensemble_to_sequence
+    _sequence_compiler_min_repetitions = ConfigOption(name='sequence_compiler_min_repetitions',
+                                                      default=10,
+                                                      missing='nothing')
+
+    # File name of the database storing all pulse objects within assets_storage_path
+    _asset_database_filename = 'pulsed_assets.sqlite'
+    # Maximum number of PulseBlock timing entries memoized for analyze_block_ensemble
+    _block_timing_cache_size = 1000
 
     # status vars
     # Global parameters describing the channel usage and common parameters used during pulsed object
@@ -115,13 +155,19 @@ class SequenceGeneratorLogic(LogicBase):
     _benchmark_write_state = StatusVar(representer=_benchmark_write.save, constructor=_benchmark_write.load_from_dict)
     _benchmark_load = BenchmarkTool()
     _benchmark_load_state = StatusVar(representer=_benchmark_load.save, constructor=_benchmark_load.load_from_dict)
+    # Index of waveforms on the device with the content key they have been sampled with
+    _waveform_cache_index = StatusVar(name='waveform_cache_index', default=dict())
 
     # define signals
+    # The asset dict signals carry a snapshot with the names of all saved objects as keys and None
+    # as values. The objects are loaded lazily and must be requested via get_block etc.
     sigBlockDictUpdated = QtCore.Signal(dict)
     sigEnsembleDictUpdated = QtCore.Signal(dict)
     sigSequenceDictUpdated = QtCore.Signal(dict)
     sigSampleEnsembleComplete = QtCore.Signal(object)
     sigSampleSequenceComplete = QtCore.Signal(object)
+    # Ensemble name, name of the compiled PulseSequence (None on fallback) and compiler report
+    sigCompileEnsembleComplete = QtCore.Signal(str, object, dict)
     sigLoadedAssetUpdated = QtCore.Signal(str, str)
     sigGeneratorSettingsUpdated = QtCore.Signal(dict)
     sigSamplingSettingsUpdated = QtCore.Signal(dict)
@@ -147,12 +193,33 @@ class SequenceGeneratorLogic(LogicBase):
         self.__flags = set()
         # upload speed from benchmark
         self.__upload_speed = np.nan
+        # Time spent sampling and writing chunks during the last waveform generation
+        self.__last_stage_times = {'sampling': 0.0, 'writing': 0.0}
 
         # A flag indicating if sampling of a sequence is in progress
         self.__sequence_generation_in_progress = False
 
         # Get instance of PulseObjectGenerator which takes care of collecting all predefined methods
         self._pog = None
+        # Additional paths to import sampling functions from
+        self._sampling_functions_path_list = list()
+
+        # Cache of waveforms written to the device
+        self._waveform_cache = None
+
+        # Database file storing all pulse objects (PulseBlock, PulseBlockEnsemble, PulseSequence)
+        self._asset_database = None
+        # Waveforms and sequences present on the device during activation. Used to discard outdated
+        # sampling_information of lazily loaded ensembles and sequences.
+        self._device_waveforms_on_load = set()
+        self._device_sequences_on_load = set()
+
+        # Memoized per-block timing information used by analyze_block_ensemble.
+        # Keys are (block name, block version, sample rate). The version of a block is incremented
+        # whenever it is saved or deleted.
+        self._block_timing_cache = dict()
+        self._block_versions = dict()
+        self._block_timing_lock = threading.Lock()
 
         # The created pulse objects (PulseBlock, PulseBlockEnsemble, PulseSequence) are saved in
         # these dictionaries. The keys are the names.
@@ -201,17 +268,35 @@ class SequenceGeneratorLogic(LogicBase):
                 self.log.error('ConfigOption additional_sampling_functions_path needs to either be a string or '
                                'a list of strings.')
         SamplingFunctions.import_sampling_functions(sf_path_list)
+        self._sampling_functions_path_list = sf_path_list
 
         # Read back settings from device and update instance variables accordingly
         self._read_settings_from_device()
 
-        # Update saved blocks/ensembles/sequences from serialized files
-        self._saved_pulse_blocks = dict()
-        self._saved_pulse_block_ensembles = dict()
-        self._saved_pulse_sequences = dict()
-        self._update_blocks_from_file()
-        self._update_ensembles_from_file()
-        self._update_sequences_from_file()
+        # Set up waveform cache (optionally with disk storage of sampled arrays)
+        if self._waveform_cache_dir and not os.path.exists(self._waveform_cache_dir):
+            os.makedirs(self._waveform_cache_dir)
+        self._waveform_cache = WaveformCache(index=self._waveform_cache_index,
+                                             storage_dir=self._waveform_cache_dir,
+                                             storage_limit=self._waveform_cache_size_limit)
+        self._waveform_cache.prune(remove_incomplete=True)
+
+        # Open the asset database and import assets stored as separate files by older versions
+        self._asset_database = PulseAssetDatabase(
+            os.path.join(self._assets_storage_dir, self._asset_database_filename)
+        )
+        self._asset_database.open()
+        migrated = self._asset_database.migrate_legacy_files(self._assets_storage_dir)
+        if migrated > 0:
+            self.log.info('Imported {0:d} pulse objects from legacy asset files in "{1}" into '
+                          'asset database.'.format(migrated, self._assets_storage_dir))
+
+        # Index saved blocks/ensembles/sequences. Objects are only loaded on first access.
+        self._device_waveforms_on_load = set(self.sampled_waveforms)
+        self._device_sequences_on_load = set(self.sampled_sequences)
+        self._update_blocks_from_database()
+        self._update_ensembles_from_database()
+        self._update_sequences_from_database()
 
         # Get instance of PulseObjectGenerator which takes care of collecting all predefined methods
         self._pog = PulseObjectGenerator(sequencegeneratorlogic=self)
@@ -223,6 +308,9 @@ class SequenceGeneratorLogic(LogicBase):
     def on_deactivate(self):
         """ Deinitialisation performed during deactivation of the module.
         """
+        if self._asset_database is not None:
+            self._asset_database.close()
+            self._asset_database = None
         return
 
     # @_saved_pulse_blocks.constructor
@@ -319,6 +407,14 @@ class SequenceGeneratorLogic(LogicBase):
     def sampled_sequences(self):
         return netobtain(self.pulsegenerator().get_sequence_names())
 
+    @property
+    def waveform_cache_statistics(self):
+        """ Hit and miss counts of the waveform cache since activation (or last reset).
+        "hits" are waveforms reused on the device, "disk_hits" are waveforms written from stored
+        samples without sampling.
+        """
+        return self._waveform_cache.statistics
+
     @property
     def analog_channels(self):
         return {chnl for chnl in self.__activation_config[1] if chnl.startswith('a_ch')}
@@ -468,15 +564,19 @@ class SequenceGeneratorLogic(LogicBase):
             self.log.error('Can´t clear the pulser as it is running. Switch off the pulser and try again.')
             return -1
         self.pulsegenerator().clear_all()
-        # Delete all sampling information from all PulseBlockEnsembles and PulseSequences
-        for seq_name in self.saved_pulse_sequences:
-            seq = self.saved_pulse_sequences[seq_name]
-            seq.sampling_information = dict()
-            self.save_sequence(seq)
-        for ens_name in self.saved_pulse_block_ensembles:
-            ens = self.saved_pulse_block_ensembles[ens_name]
-            ens.sampling_information = dict()
-            self.save_ensemble(ens)
+        # Delete all sampling information from all PulseBlockEnsembles and PulseSequences.
+        # Objects not loaded yet will discard their sampling information once they are loaded.
+        self._device_waveforms_on_load = set()
+        self._device_sequences_on_load = set()
+        with self._asset_database.batch():
+            for seq_name in self.saved_pulse_sequences.loaded_names:
+                seq = self.saved_pulse_sequences[seq_name]
+                seq.sampling_information = dict()
+                self.save_sequence(seq)
+            for ens_name in self.saved_pulse_block_ensembles.loaded_names:
+                ens = self.saved_pulse_block_ensembles[ens_name]
+                ens.sampling_information = dict()
+                self.save_ensemble(ens)
         self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
         self.sigAvailableSequencesUpdated.emit(self.sampled_sequences)
         self.sigLoadedAssetUpdated.emit('', '')
@@ -740,8 +840,9 @@ class SequenceGeneratorLogic(LogicBase):
         @param PulseBlock block: PulseBlock instance to save
         """
         self._saved_pulse_blocks[block.name] = block
-        self._save_block_to_file(block)
-        self.sigBlockDictUpdated.emit(self._saved_pulse_blocks)
+        self._invalidate_block_timing(block.name)
+        self._save_block_to_database(block)
+        self.sigBlockDictUpdated.emit(dict.fromkeys(self._saved_pulse_blocks))
         return
 
     def get_block(self, name):
@@ -763,86 +864,68 @@ class SequenceGeneratorLogic(LogicBase):
         # Delete from dict
         if name in self.saved_pulse_blocks:
             del (self._saved_pulse_blocks[name])
+        self._invalidate_block_timing(name)
 
         # Delete from disk
-        filepath = os.path.join(self._assets_storage_dir, '{0}.block'.format(name))
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        self._asset_database.remove('block', name)
 
-        self.sigBlockDictUpdated.emit(self.saved_pulse_blocks)
+        self.sigBlockDictUpdated.emit(dict.fromkeys(self._saved_pulse_blocks))
         return
 
-    def _load_block_from_file(self, block_name):
+    def _load_block_from_database(self, block_name):
         """
-        De-serializes a PulseBlock instance from file.
+        De-serializes a PulseBlock instance from the asset database.
 
         @param str block_name: The name of the PulseBlock instance to de-serialize
         @return PulseBlock: The de-serialized PulseBlock instance
         """
         block = None
-        filepath = os.path.join(self._assets_storage_dir, '{0}.block'.format(block_name))
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'rb') as file:
-                    block = pickle.load(file)
-            except pickle.UnpicklingError:
-                self.log.error('Failed to de-serialize PulseBlock "{0}" from file.'
+        try:
+            block = self._asset_database.load('block', block_name)
+        except ModuleNotFoundError:
+            self.log.error('Failed to de-serialize PulseBlock "{0}" from file because of missing dependencies.\n'
+                           'For better debugging I dumped the traceback to debug.'.format(block_name))
+            self.log.debug('{0!s}'.format(traceback.format_exc()))
+        except pickle.UnpicklingError:
+            self.log.error('Failed to de-serialize PulseBlock "{0}" from file.'
+                           ''.format(block_name))
+            self._asset_database.remove('block', block_name)
+        except Exception:
+            self.log.exception('Failed to load PulseBlock "{0}" from the asset database:'
                                ''.format(block_name))
-                os.remove(filepath)
-            except ModuleNotFoundError:
-                self.log.error('Failed to de-serialize PulseBlock "{0}" from file because of missing dependencies.\n'
-                               'For better debugging I dumped the traceback to debug.'.format(block_name))
-                self.log.debug('{0!s}'.format(traceback.format_exc()))
         return block
 
-    def _update_blocks_from_file(self):
+    def _update_blocks_from_database(self):
         """
-        Update the saved_pulse_blocks dict by de-serializing stored file.
+        Update the saved_pulse_blocks dict from the asset database. Only the names are read, the
+        PulseBlock instances are de-serialized on first access.
         """
-        # Get all files in asset directory ending on ".block" and extract a sorted list of
-        # PulseBlock names
-        with os.scandir(self._assets_storage_dir) as scan:
-            names = natural_sort(f.name[:-6] for f in scan if f.is_file and f.name.endswith('.block'))
-
-        # Load all blocks from file
-        for block_name in names:
-            block = self._load_block_from_file(block_name)
-            if block is not None:
-                self._saved_pulse_blocks[block_name] = block
-
-        self.sigBlockDictUpdated.emit(self._saved_pulse_blocks)
+        self._saved_pulse_blocks = LazyAssetDict(loader=self._load_block_from_database,
+                                                 names=self._asset_database.names('block'))
+        self._invalidate_block_timing()
+        self.sigBlockDictUpdated.emit(dict.fromkeys(self._saved_pulse_blocks))
         return
 
-    def _save_block_to_file(self, block):
+    def _save_block_to_database(self, block):
         """
-        Saves a single PulseBlock instance to file by serialization using pickle.
+        Saves a single PulseBlock instance to the asset database by serialization using pickle.
 
         @param PulseBlock block: The PulseBlock instance to be saved
         """
-        filename = '{0}.block'.format(block.name)
         try:
-            with open(os.path.join(self._assets_storage_dir, filename), 'wb') as file:
-                pickle.dump(block, file)
+            self._asset_database.store('block', block.name, block)
         except:
             self.log.error('Failed to serialize PulseBlock "{0}" to file.'.format(block.name))
         return
 
-    def _save_blocks_to_file(self):
-        """
-        Saves the saved_pulse_blocks dict items to files.
-        """
-        for block in self._saved_pulse_blocks.values():
-            self._save_block_to_file(block)
-        return
-
     def save_ensemble(self, ensemble):
         """ Saves a PulseBlockEnsemble instance
 
         @param PulseBlockEnsemble ensemble: PulseBlockEnsemble instance to save
         """
         self._saved_pulse_block_ensembles[ensemble.name] = ensemble
-        self._save_ensemble_to_file(ensemble)
-        self.sigEnsembleDictUpdated.emit(self.saved_pulse_block_ensembles)
+        self._save_ensemble_to_database(ensemble)
+        self.sigEnsembleDictUpdated.emit(dict.fromkeys(self._saved_pulse_block_ensembles))
         return
 
     def get_ensemble(self, name):
@@ -864,89 +947,72 @@ class SequenceGeneratorLogic(LogicBase):
         # Delete from dict
         if name in self.saved_pulse_block_ensembles:
             # check if ensemble has already been sampled and delete associated waveforms
-            if self.saved_pulse_block_ensembles[name].sampling_information:
-                self._delete_waveform(
-                    self.saved_pulse_block_ensembles[name].sampling_information['waveforms'])
+            ensemble = self.saved_pulse_block_ensembles.get(name)
+            if ensemble is not None and ensemble.sampling_information:
+                self._delete_waveform(ensemble.sampling_information['waveforms'])
                 self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
             # delete PulseBlockEnsemble
-            del self._saved_pulse_block_ensembles[name]
+            self._saved_pulse_block_ensembles.pop(name, None)
 
         # Delete from disk
-        filepath = os.path.join(self._assets_storage_dir, '{0}.ensemble'.format(name))
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        self._asset_database.remove('ensemble', name)
 
-        self.sigEnsembleDictUpdated.emit(self.saved_pulse_block_ensembles)
+        self.sigEnsembleDictUpdated.emit(dict.fromkeys(self._saved_pulse_block_ensembles))
         return
 
-    def _load_ensemble_from_file(self, ensemble_name):
+    def _load_ensemble_from_database(self, ensemble_name):
         """
-        De-serializes a PulseBlockEnsemble instance from file.
+        De-serializes a PulseBlockEnsemble instance from the asset database.
+        Outdated sampling_information (waveforms not present on the device during activation) is
+        discarded.
 
         @param str ensemble_name: The name of the PulseBlockEnsemble instance to de-serialize
         @return PulseBlockEnsemble: The de-serialized PulseBlockEnsemble instance
         """
-        ensemble = None
-        filepath = os.path.join(self._assets_storage_dir, '{0}.ensemble'.format(ensemble_name))
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'rb') as file:
-                    ensemble = pickle.load(file)
-            except pickle.UnpicklingError:
-                self.log.error('Failed to de-serialize PulseBlockEnsemble "{0}" from file. '
-                               'Deleting broken file.'.format(ensemble_name))
-                os.remove(filepath)
+        try:
+            ensemble = self._asset_database.load('ensemble', ensemble_name)
+        except pickle.UnpicklingError:
+            self.log.error('Failed to de-serialize PulseBlockEnsemble "{0}" from file. '
+                           'Deleting broken file.'.format(ensemble_name))
+            self._asset_database.remove('ensemble', ensemble_name)
+            return None
+        except Exception:
+            self.log.exception('Failed to load PulseBlockEnsemble "{0}" from the asset database:'
+                               ''.format(ensemble_name))
+            return None
+
+        if ensemble is not None and ensemble.sampling_information.get('waveforms'):
+            waveform_set = set(ensemble.sampling_information['waveforms'])
+            if not self._device_waveforms_on_load.issuperset(waveform_set):
+                ensemble.sampling_information = dict()
         return ensemble
 
-    def _update_ensembles_from_file(self):
+    def _update_ensembles_from_database(self):
         """
-        Update the saved_pulse_block_ensembles dict from temporary file.
+        Update the saved_pulse_block_ensembles dict from the asset database. Only the names are
+        read, the PulseBlockEnsemble instances are de-serialized on first access.
         """
-        # Get all files in asset directory ending on ".ensemble" and extract a sorted list of
-        # PulseBlockEnsemble names
-        with os.scandir(self._assets_storage_dir) as scan:
-            names = natural_sort(f.name[:-9] for f in scan if f.is_file and f.name.endswith('.ensemble'))
-
-        # Get all waveforms currently stored on pulser hardware in order to delete outdated
-        # sampling_information dicts
-        sampled_waveforms = set(self.sampled_waveforms)
-
-        # Load all ensembles from file
-        for ensemble_name in names:
-            ensemble = self._load_ensemble_from_file(ensemble_name)
-            if ensemble is not None:
-                if ensemble.sampling_information.get('waveforms'):
-                    waveform_set = set(ensemble.sampling_information['waveforms'])
-                    if not sampled_waveforms.issuperset(waveform_set):
-                        ensemble.sampling_information = dict()
-                self._saved_pulse_block_ensembles[ensemble_name] = ensemble
-
-        self.sigEnsembleDictUpdated.emit(self.saved_pulse_block_ensembles)
+        self._saved_pulse_block_ensembles = LazyAssetDict(
+            loader=self._load_ensemble_from_database,
+            names=self._asset_database.names('ensemble')
+        )
+        self.sigEnsembleDictUpdated.emit(dict.fromkeys(self._saved_pulse_block_ensembles))
         return
 
-    def _save_ensemble_to_file(self, ensemble):
+    def _save_ensemble_to_database(self, ensemble):
         """
-        Saves a single PulseBlockEnsemble instance to file by serialization using pickle.
+        Saves a single PulseBlockEnsemble instance to the asset database by serialization using
+        pickle.
 
         @param PulseBlockEnsemble ensemble: The PulseBlockEnsemble instance to be saved
         """
-        filename = '{0}.ensemble'.format(ensemble.name)
         try:
-            with open(os.path.join(self._assets_storage_dir, filename), 'wb') as file:
-                pickle.dump(ensemble, file)
+            self._asset_database.store('ensemble', ensemble.name, ensemble)
         except:
             self.log.error('Failed to serialize PulseBlockEnsemble "{0}" to file.'
                            ''.format(ensemble.name))
         return
 
-    def _save_ensembles_to_file(self):
-        """
-        Saves the saved_pulse_block_ensembles dict items to files.
-        """
-        for ensemble in self.saved_pulse_block_ensembles.values():
-            self._save_ensemble_to_file(ensemble)
-        return
-
     def save_sequence(self, sequence):
         """ Saves a PulseSequence instance
 
@@ -956,8 +1022,8 @@ class SequenceGeneratorLogic(LogicBase):
         @return: str: name of the serialized object, if needed.
         """
         self._saved_pulse_sequences[sequence.name] = sequence
-        self._save_sequence_to_file(sequence)
-        self.sigSequenceDictUpdated.emit(self.saved_pulse_sequences)
+        self._save_sequence_to_database(sequence)
+        self.sigSequenceDictUpdated.emit(dict.fromkeys(self._saved_pulse_sequences))
         return
 
     def get_sequence(self, name):
@@ -979,44 +1045,48 @@ class SequenceGeneratorLogic(LogicBase):
         if name in self.saved_pulse_sequences:
             # check if sequence has already been sampled and delete associated sequence from pulser.
             # Also delete associated waveforms if sequence has been sampled within rotating frame.
-            if self.saved_pulse_sequences[name].sampling_information:
+            sequence = self.saved_pulse_sequences.get(name)
+            if sequence is not None and sequence.sampling_information:
                 self._delete_sequence(name)
-                if self.saved_pulse_sequences[name].rotating_frame:
-                    self._delete_waveform(
-                        self.saved_pulse_sequences[name].sampling_information['waveforms'])
+                if sequence.rotating_frame:
+                    self._delete_waveform(sequence.sampling_information['waveforms'])
                     self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
             # delete PulseSequence
-            del self._saved_pulse_sequences[name]
+            self._saved_pulse_sequences.pop(name, None)
 
         # Delete from disk
-        filepath = os.path.join(self._assets_storage_dir, '{0}.sequence'.format(name))
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        self._asset_database.remove('sequence', name)
 
-        self.sigSequenceDictUpdated.emit(self.saved_pulse_sequences)
+        self.sigSequenceDictUpdated.emit(dict.fromkeys(self._saved_pulse_sequences))
         return
 
-    def _load_sequence_from_file(self, sequence_name):
+    def _load_sequence_from_database(self, sequence_name):
         """
-        De-serializes a PulseSequence instance from file.
+        De-serializes a PulseSequence instance from the asset database.
+        Outdated sampling_information (sequence or waveforms not present on the device during
+        activation) is discarded.
 
         @param str sequence_name: The name of the PulseSequence instance to de-serialize
         @return PulseSequence: The de-serialized PulseSequence instance
         """
-        filepath = os.path.join(self._assets_storage_dir, '{0}.sequence'.format(sequence_name))
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'rb') as file:
-                    sequence = pickle.load(file)
-                # FIXME: Due to the pickling the dict namespace merging gets lost on the way.
-                # Restored it here but a better way needs to be found.
-                for step in range(len(sequence)):
-                    sequence[step].__dict__ = sequence[step]
-            except pickle.UnpicklingError:
-                self.log.error('Failed to de-serialize PulseSequence "{0}" from file.'
+        try:
+            sequence = self._asset_database.load('sequence', sequence_name)
+        except pickle.UnpicklingError:
+            self.log.error('Failed to de-serialize PulseSequence "{0}" from file.'
+                           ''.format(sequence_name))
+            self._asset_database.remove('sequence', sequence_name)
+            return None
+        except Exception:
+            self.log.exception('Failed to load PulseSequence "{0}" from the asset database:'
                                ''.format(sequence_name))
-                os.remove(filepath)
-                return None
+            return None
+        if sequence is None:
+            return None
+
+        # FIXME: Due to the pickling the dict namespace merging gets lost on the way.
+        # Restored it here but a better way needs to be found.
+        for step in range(len(sequence)):
+            sequence[step].__dict__ = sequence[step]
 
         # Conversion for backwards compatibility
         if len(sequence) > 0 and not isinstance(sequence[0].flag_high, list):
@@ -1039,7 +1109,7 @@ class SequenceGeneratorLogic(LogicBase):
                     self.log.error('Failed to de-serialize PulseSequence "{0}" from file.'
                                    '"flag_high" step parameter is of unknown type'
                                    ''.format(sequence_name))
-                    os.remove(filepath)
+                    self._asset_database.remove('sequence', sequence_name)
                     return None
 
                 # Try to convert "flag_trigger" step parameter
@@ -1055,62 +1125,40 @@ class SequenceGeneratorLogic(LogicBase):
                     self.log.error('Failed to de-serialize PulseSequence "{0}" from file.'
                                    '"flag_trigger" step parameter is of unknown type'
                                    ''.format(sequence_name))
-                    os.remove(filepath)
+                    self._asset_database.remove('sequence', sequence_name)
                     return None
-            self._save_sequence_to_file(sequence)
+            self._save_sequence_to_database(sequence)
+
+        if sequence.name not in self._device_sequences_on_load:
+            sequence.sampling_information = dict()
+        elif sequence.sampling_information:
+            waveform_set = set(sequence.sampling_information['waveforms'])
+            if not self._device_waveforms_on_load.issuperset(waveform_set):
+                sequence.sampling_information = dict()
         return sequence
 
-    def _update_sequences_from_file(self):
-        """
-        Update the saved_pulse_sequences dict from files.
-        """
-        # Get all files in asset directory ending on ".sequence" and extract a sorted list of
-        # PulseSequence names
-        with os.scandir(self._assets_storage_dir) as scan:
-            names = natural_sort(f.name[:-9] for f in scan if f.is_file and f.name.endswith('.sequence'))
-
-        # Get all waveforms and sequences currently stored on pulser hardware in order to delete
-        # outdated sampling_information dicts
-        sampled_waveforms = set(self.sampled_waveforms)
-        sampled_sequences = set(self.sampled_sequences)
-
-        # Load all sequences from file
-        for sequence_name in names:
-            sequence = self._load_sequence_from_file(sequence_name)
-            if sequence is not None:
-                if sequence.name not in sampled_sequences:
-                    sequence.sampling_information = dict()
-                elif sequence.sampling_information:
-                    waveform_set = set(sequence.sampling_information['waveforms'])
-                    if not sampled_waveforms.issuperset(waveform_set):
-                        sequence.sampling_information = dict()
-                self._saved_pulse_sequences[sequence_name] = sequence
-
-        self.sigSequenceDictUpdated.emit(self.saved_pulse_sequences)
+    def _update_sequences_from_database(self):
+        """
+        Update the saved_pulse_sequences dict from the asset database. Only the names are read, the
+        PulseSequence instances are de-serialized on first access.
+        """
+        self._saved_pulse_sequences = LazyAssetDict(loader=self._load_sequence_from_database,
+                                                    names=self._asset_database.names('sequence'))
+        self.sigSequenceDictUpdated.emit(dict.fromkeys(self._saved_pulse_sequences))
         return
 
-    def _save_sequence_to_file(self, sequence):
+    def _save_sequence_to_database(self, sequence):
         """
-        Saves a single PulseSequence instance to file by serialization using pickle.
+        Saves a single PulseSequence instance to the asset database by serialization using pickle.
 
         @param PulseSequence sequence: The PulseSequence instance to be saved
         """
-        filename = '{0}.sequence'.format(sequence.name)
         try:
-            with open(os.path.join(self._assets_storage_dir, filename), 'wb') as file:
-                pickle.dump(sequence, file)
+            self._asset_database.store('sequence', sequence.name, sequence)
         except:
             self.log.error('Failed to serialize PulseSequence "{0}" to file.'.format(sequence.name))
         return
 
-    def _save_sequences_to_file(self):
-        """
-        Saves the saved_pulse_sequences dict items to files.
-        """
-        for sequence in self.saved_pulse_sequences.values():
-            self._save_sequence_to_file(sequence)
-        return
-
     def generate_predefined_sequence(self, predefined_sequence_name, kwargs_dict):
         """
 
@@ -1142,25 +1190,26 @@ class SequenceGeneratorLogic(LogicBase):
             self.sigPredefinedSequenceGenerated.emit(None, False)
             return
 
-        # Save objects
-        for block in blocks:
-            self.save_block(block)
-        for ensemble in ensembles:
-            ensemble.sampling_information = dict()
-            ensemble.generation_method_parameters = kwargs_dict
-            self.save_ensemble(ensemble)
-
-        if self.pulse_generator_constraints.sequence_option == SequenceOption.FORCED and len(sequences) < 1:
-            self.log.info('Adding default sequence for: {0:s}'.format(predefined_sequence_name))
-            self._add_default_sequence(ensembles, sequences)
-            if len(sequences) > 0:
-                self.log.debug('New default PulseSequence is: {0:s} length {1:d}'
-                               ''.format(sequences[0].name, len(sequences)))
-
-        for sequence in sequences:
-            sequence.sampling_information = dict()
-            sequence.generation_method_parameters = kwargs_dict
-            self.save_sequence(sequence)
+        # Save objects (committed to the asset database in a single transaction)
+        with self._asset_database.batch():
+            for block in blocks:
+                self.save_block(block)
+            for ensemble in ensembles:
+                ensemble.sampling_information = dict()
+                ensemble.generation_method_parameters = kwargs_dict
+                self.save_ensemble(ensemble)
+
+            if self.pulse_generator_constraints.sequence_option == SequenceOption.FORCED and len(sequences) < 1:
+                self.log.info('Adding default sequence for: {0:s}'.format(predefined_sequence_name))
+                self._add_default_sequence(ensembles, sequences)
+                if len(sequences) > 0:
+                    self.log.debug('New default PulseSequence is: {0:s} length {1:d}'
+                                   ''.format(sequences[0].name, len(sequences)))
+
+            for sequence in sequences:
+                sequence.sampling_information = dict()
+                sequence.generation_method_parameters = kwargs_dict
+                self.save_sequence(sequence)
 
         created_name = gen_params.get('name') if 'name' not in kwargs_dict else kwargs_dict['name']
         self.sigPredefinedSequenceGenerated.emit(created_name, len(sequences) > 0)
@@ -1291,94 +1340,101 @@ class SequenceGeneratorLogic(LogicBase):
         laser_channel = self.generation_parameters['gate_channel'] if self.generation_parameters[
             'gate_channel'] else self.generation_parameters['laser_channel']
 
-        # memorize the digital channel state of the previous element
-        tmp_digital_high = dict()
-        # memorize the laser_on flag of the previous element (in case of non-digital laser channel)
-        tmp_laser_on = False
+        # Per-block timing information (memoized by block name, block version and sample rate) and
+        # repetitions of each block
+        block_timings = [(self._get_block_timing(block_name), reps) for block_name, reps in ensemble]
+
         # Set of used analog and digital channels
         digital_channels = set()
         analog_channels = set()
-        # check for active channels and initialize tmp_digital_high/tmp_laser_on with the state of
-        # the very last element in the ensemble
         if len(ensemble) > 0:
             block = self.get_block(ensemble[0][0])
             digital_channels = block.digital_channels
             analog_channels = block.analog_channels
-            block = self.get_block(ensemble[-1][0])
-            if len(block) > 0:
-                tmp_digital_high = block[-1].digital_high.copy()
-                tmp_laser_on = block[-1].laser_on
-            else:
-                tmp_digital_high = {chnl: False for chnl in digital_channels}
-                tmp_laser_on = False
-
-        # dicts containing the bins where the digital channels are rising/falling
-        digital_rising_bins = {chnl: list() for chnl in digital_channels}
-        digital_falling_bins = {chnl: list() for chnl in digital_channels}
-        laser_rising_bins = list()
-        laser_falling_bins = list()
-
-        # Array to store the length in bins for all elements including repetitions in the order
-        # they are occuring in the waveform later on.
-        elements_length_bins = list()
-
-        # variables to keep track of the current timeframe
-        current_end_time = 0.0
-        current_start_bin = 0
-
-        # Loop through all blocks in the ensemble
-        for block_name, reps in ensemble:
-            # Get the stored PulseBlock instance
-            block = self.get_block(block_name)
-
-            # Iterate over all repetitions of the current block
-            for rep_no in range(reps + 1):
-                # Iterate over the Block_Elements inside the current block
-                for element in block:
-                    # save bin position if a transition from low to high or vice versa has occurred
-                    # in a digital channel
-                    if tmp_digital_high != element.digital_high:
-                        for chnl, state in element.digital_high.items():
-                            if not tmp_digital_high[chnl] and state:
-                                digital_rising_bins[chnl].append(current_start_bin)
-                            elif tmp_digital_high[chnl] and not state:
-                                digital_falling_bins[chnl].append(current_start_bin)
-                        tmp_digital_high = element.digital_high.copy()
-
-                    if not laser_channel.startswith('d') and tmp_laser_on != element.laser_on:
-                        if not tmp_laser_on and element.laser_on:
-                            laser_rising_bins.append(current_start_bin)
-                        else:
-                            laser_falling_bins.append(current_start_bin)
-                        tmp_laser_on = element.laser_on
-
-                    # Calculate length of the current element with current repetition count in sec
-                    # and add this to the ideal end time for the sequence up until this point.
-                    current_end_time += element.init_length_s + rep_no * element.increment_s
-
-                    # Nearest possible match including the discretization in bins
-                    current_end_bin = int(np.rint(current_end_time * self.__sample_rate))
-
-                    # append current element length in discrete bins to temporary array
-                    elements_length_bins.append(current_end_bin - current_start_bin)
 
-                    # advance bin offset for next element
-                    current_start_bin = current_end_bin
-
-        elements_length_bins = np.array(elements_length_bins, dtype='int64')
-
-        # convert rising/falling indices to numpy.ndarrays. Remove duplicates.
-        for chnl in digital_channels:
-            digital_rising_bins[chnl] = sorted(set(digital_rising_bins[chnl]))
-            digital_falling_bins[chnl] = sorted(set(digital_falling_bins[chnl]))
-            digital_rising_bins[chnl] = np.array(digital_rising_bins[chnl], dtype='int64')
-            digital_falling_bins[chnl] = np.array(digital_falling_bins[chnl], dtype='int64')
+        # Compose the element lengths in bins (incl. repetitions) in the order they are occurring in
+        # the waveform later on. If all blocks consist of elements with a whole number of bins the
+        # memoized bins are used. Otherwise the element end times are rounded to the nearest bin.
+        # Summation order is the same as element-by-element accumulation.
+        block_timings = [(timing, reps) for timing, reps in block_timings
+                         if timing['element_count'] > 0]
+        if all(timing['length_bins'] is not None for timing, _ in block_timings):
+            elements_length_bins = [np.tile(timing['length_bins'], reps + 1)
+                                    for timing, reps in block_timings]
+            elements_length_bins = np.concatenate(elements_length_bins) if elements_length_bins \
+                else np.empty(0, dtype='int64')
+            end_bins = np.cumsum(elements_length_bins)
+            ideal_length = np.sum([(reps + 1) * np.sum(timing['init_length_s'])
+                                   for timing, reps in block_timings])
+        else:
+            lengths_s = list()
+            for timing, reps in block_timings:
+                rep_numbers = np.repeat(np.arange(reps + 1, dtype='int64'), timing['element_count'])
+                lengths_s.append(np.tile(timing['init_length_s'], reps + 1) +
+                                 rep_numbers * np.tile(timing['increment_s'], reps + 1))
+            lengths_s = np.concatenate(lengths_s) if lengths_s else np.empty(0, dtype='float64')
+            end_times = np.cumsum(lengths_s)
+            end_bins = np.rint(end_times * self.__sample_rate).astype('int64')
+            elements_length_bins = np.diff(end_bins, prepend=0)
+            ideal_length = end_times[-1] if len(end_times) > 0 else 0.0
+        start_bins = end_bins - elements_length_bins
+
+        # Compose the state transitions from the memoized transitions within each block repetition
+        # and the transitions at the start of each block repetition. The state before the first
+        # element is the state of the very last element in the ensemble (all low if the last block
+        # is empty).
+        last_block_empty = len(ensemble) > 0 and len(self.get_block(ensemble[-1][0])) == 0
+        state_keys = list(digital_channels) + ['laser_on']
+        if last_block_empty or len(block_timings) == 0:
+            previous = {key: False for key in state_keys}
+        else:
+            previous = block_timings[-1][0]['last_states']
+        rising_elements = {key: list() for key in state_keys}
+        falling_elements = {key: list() for key in state_keys}
+        element_offset = 0
+        for timing, reps in block_timings:
+            count = timing['element_count']
+            rep_offsets = element_offset + count * np.arange(reps + 1, dtype='int64')
+            for key in state_keys:
+                first_state = timing['first_states'][key]
+                last_state = timing['last_states'][key]
+                rising_elements[key].append(
+                    np.add.outer(rep_offsets, timing['rising_elements'][key]).ravel()
+                )
+                falling_elements[key].append(
+                    np.add.outer(rep_offsets, timing['falling_elements'][key]).ravel()
+                )
+                # Transitions at the first element of the first and all following repetitions
+                if first_state and not previous[key]:
+                    rising_elements[key].append(rep_offsets[:1])
+                elif not first_state and previous[key]:
+                    falling_elements[key].append(rep_offsets[:1])
+                if first_state and not last_state:
+                    rising_elements[key].append(rep_offsets[1:])
+                elif not first_state and last_state:
+                    falling_elements[key].append(rep_offsets[1:])
+            previous = timing['last_states']
+            element_offset += count * (reps + 1)
+
+        def transition_bins(elements):
+            if len(elements) == 0:
+                return np.empty(0, dtype='int64')
+            bins = np.sort(start_bins[np.concatenate(elements)])
+            # Remove duplicates (transitions separated by elements of zero length)
+            unique = np.ones(len(bins), dtype=bool)
+            unique[1:] = bins[1:] != bins[:-1]
+            return bins[unique]
+
+        digital_rising_bins = {chnl: transition_bins(rising_elements[chnl])
+                               for chnl in digital_channels}
+        digital_falling_bins = {chnl: transition_bins(falling_elements[chnl])
+                                for chnl in digital_channels}
         if laser_channel.startswith('d'):
             laser_rising_bins = digital_rising_bins[laser_channel]
             laser_falling_bins = digital_falling_bins[laser_channel]
         else:
-            laser_rising_bins = np.array(sorted(set(laser_rising_bins)), dtype='int64')
-            laser_falling_bins = np.array(sorted(set(laser_falling_bins)), dtype='int64')
+            laser_rising_bins = transition_bins(rising_elements['laser_on'])
+            laser_falling_bins = transition_bins(falling_elements['laser_on'])
 
         return_dict = dict()
         return_dict['number_of_samples'] = np.sum(elements_length_bins)
@@ -1390,11 +1446,86 @@ class SequenceGeneratorLogic(LogicBase):
         return_dict['digital_channels'] = digital_channels
         return_dict['channel_set'] = analog_channels.union(digital_channels)
         return_dict['generation_parameters'] = self.generation_parameters.copy()
-        return_dict['ideal_length'] = current_end_time
+        return_dict['ideal_length'] = ideal_length
         return_dict['laser_rising_bins'] = laser_rising_bins
         return_dict['laser_falling_bins'] = laser_falling_bins
         return return_dict
 
+    def _get_block_timing(self, block_name):
+        """
+        Returns the timing information of a single repetition of a saved PulseBlock needed by
+        analyze_block_ensemble. Results are memoized by block name, block version and sample rate.
+        The block version is incremented each time the block is saved or deleted, which also
+        discards all memoized entries of the block.
+
+        @param str block_name: The name of the saved PulseBlock to get the timing information for
+        @return dict: 'element_count' (int), 'init_length_s' and 'increment_s' (float arrays),
+                      'length_bins' (int array of element lengths in bins or None if the elements
+                      are not a whole number of bins long or have a length increment),
+                      'laser_count' (number of laser_on rising edges within one repetition),
+                      'rising_elements' and 'falling_elements' (dicts of int arrays containing the
+                      indices of elements with a state transition with respect to the previous
+                      element of the same repetition),
+                      'first_states' and 'last_states' (dicts of bool).
+                      Keys of the state dicts are the digital channels and 'laser_on'.
+        """
+        with self._block_timing_lock:
+            key = (block_name, self._block_versions.get(block_name, 0), self.__sample_rate)
+            timing = self._block_timing_cache.get(key)
+        if timing is not None:
+            return timing
+
+        block = self.get_block(block_name)
+        init_length_s = np.array([element.init_length_s for element in block], dtype='float64')
+        increment_s = np.array([element.increment_s for element in block], dtype='float64')
+        states = {chnl: np.array([element.digital_high[chnl] for element in block], dtype=bool)
+                  for chnl in block.digital_channels}
+        states['laser_on'] = np.array([element.laser_on for element in block], dtype=bool)
+
+        length_bins = None
+        if not np.any(increment_s):
+            ideal_bins = init_length_s * key[2]
+            rounded_bins = np.rint(ideal_bins)
+            if np.allclose(ideal_bins, rounded_bins, rtol=0, atol=1e-6):
+                length_bins = rounded_bins.astype('int64')
+
+        timing = {'element_count': len(block),
+                  'init_length_s': init_length_s,
+                  'increment_s': increment_s,
+                  'length_bins': length_bins,
+                  'rising_elements': dict(),
+                  'falling_elements': dict(),
+                  'first_states': dict(),
+                  'last_states': dict()}
+        for state_key, state in states.items():
+            transitions = np.flatnonzero(state[1:] != state[:-1]) + 1
+            timing['rising_elements'][state_key] = transitions[state[transitions]]
+            timing['falling_elements'][state_key] = transitions[~state[transitions]]
+            timing['first_states'][state_key] = bool(state[0]) if len(state) > 0 else False
+            timing['last_states'][state_key] = bool(state[-1]) if len(state) > 0 else False
+        timing['laser_count'] = len(timing['rising_elements']['laser_on'])
+
+        with self._block_timing_lock:
+            while len(self._block_timing_cache) >= self._block_timing_cache_size:
+                del self._block_timing_cache[next(iter(self._block_timing_cache))]
+            self._block_timing_cache[key] = timing
+        return timing
+
+    def _invalidate_block_timing(self, block_name=None):
+        """
+        Discards the memoized timing information of a PulseBlock by incrementing its version.
+
+        @param str block_name: The name of the PulseBlock. None discards all memoized entries.
+        """
+        with self._block_timing_lock:
+            if block_name is None:
+                self._block_versions.clear()
+                self._block_timing_cache.clear()
+            else:
+                self._block_versions[block_name] = self._block_versions.get(block_name, 0) + 1
+                for key in [key for key in self._block_timing_cache if key[0] == block_name]:
+                    del self._block_timing_cache[key]
+
     def analyze_sequence(self, sequence):
         """
         This helper method runs through each step of a PulseSequence object and extracts
@@ -1657,7 +1788,7 @@ class SequenceGeneratorLogic(LogicBase):
         return -1 if ensembles_missing else 0
 
     @QtCore.Slot(str)
-    def sample_pulse_block_ensemble(self, ensemble, offset_bin=0, name_tag=None):
+    def sample_pulse_block_ensemble(self, ensemble, offset_bin=0, name_tag=None, samples=None):
         """ General sampling of a PulseBlockEnsemble object, which serves as the construction plan.
 
         @param str|PulseBlockEnsemble ensemble: PulseBlockEnsemble instance or name of a saved
@@ -1668,6 +1799,10 @@ class SequenceGeneratorLogic(LogicBase):
         @param str name_tag: a name tag, which is used to keep the sampled files together, which
                              where sampled from the same PulseBlockEnsemble object but where
                              different offset_bins were used.
+        @param tuple samples: optional tuple of two dicts (analog_samples, digital_samples) holding
+                              the entire waveform already sampled with the given offset_bin (e.g.
+                              by parallel sequence sampling). If given, these samples are written
+                              to the device instead of sampling the ensemble here.
 
         @return tuple: of length 3 with
                        (offset_bin, created_waveforms, ensemble_info).
@@ -1680,9 +1815,10 @@ class SequenceGeneratorLogic(LogicBase):
 
         This method is creating the actual samples (voltages and logic states) for each time step
         of the analog and digital channels specified in the PulseBlockEnsemble.
-        Therefore it iterates through all blocks, repetitions and elements of the ensemble and
-        calculates the exact voltages (float64) according to the specified math_function. The
-        samples are later on stored inside a float32 array.
+        Therefore the ensemble is compiled into a flat table of all elements (incl. repetitions)
+        by an EnsembleSampler instance, which calculates the exact voltages (float64) according to
+        the specified math_function. Elements sharing the same sampling function are evaluated
+        together where possible. The samples are later on stored inside a float32 array.
         So each element is calculated with high precision (float64) and then down-converted to
         float32 to be stored.
 
@@ -1723,12 +1859,130 @@ class SequenceGeneratorLogic(LogicBase):
         # Set the waveform name (excluding the device specific channel naming suffix, i.e. '_ch1')
         waveform_name = name_tag if name_tag else ensemble.name
 
-        # check for old waveforms associated with the ensemble and delete them from pulse generator.
-        self._delete_waveform_by_nametag(waveform_name)
-
         # Take current time
         start_time = time.time()
 
+        # get important parameters from the ensemble. Extend the ensemble by an idle block if
+        # needed to match the waveform length granularity.
+        ensemble_info = self._analyze_and_extend_ensemble(ensemble)
+
+        # Determine the size of the sample arrays to be written as a whole.
+        array_length = self._get_write_array_length(ensemble_info)
+
+        n_max_samples = self.pulsegenerator().get_constraints().waveform_length.max
+        if n_max_samples > 0. and ensemble_info['number_of_samples'] > n_max_samples:
+            self.log.error("Tried to write more samples ({:d}) than device supports ({:d}).".format(
+                ensemble_info['number_of_samples'],
+                n_max_samples))
+            if not self.__sequence_generation_in_progress:
+                self.module_state.unlock()
+            self.sigSampleEnsembleComplete.emit(None)
+            return -1, list(), dict()
+
+        # Check if an identical waveform has already been written to the device
+        cache_key = None
+        cached_waveforms = None
+        if self._waveform_cache_enabled:
+            cache_key = WaveformCache.content_key(ensemble=ensemble,
+                                                  blocks=self._saved_pulse_blocks,
+                                                  pulse_generator_settings=self.pulse_generator_settings,
+                                                  offset_bin=offset_bin)
+            cached_waveforms = self._waveform_cache.lookup(waveform_name,
+                                                           cache_key,
+                                                           self.sampled_waveforms)
+
+        if cached_waveforms is not None:
+            self.log.info('Waveform "{0}" with identical content already present on device. '
+                          'Skipping sampling and upload.'.format(waveform_name))
+            written_waveforms = set(cached_waveforms)
+            if ensemble.rotating_frame:
+                offset_bin += ensemble_info['number_of_samples']
+        else:
+            # check for old waveforms associated with the ensemble and delete them from pulse
+            # generator.
+            self._delete_waveform_by_nametag(waveform_name)
+
+            written_waveforms, offset_bin = self._sample_and_write_ensemble(ensemble=ensemble,
+                                                                            ensemble_info=ensemble_info,
+                                                                            waveform_name=waveform_name,
+                                                                            array_length=array_length,
+                                                                            offset_bin=offset_bin,
+                                                                            cache_key=cache_key,
+                                                                            samples=samples)
+            if written_waveforms is None:
+                if not self.__sequence_generation_in_progress:
+                    self.module_state.unlock()
+                self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
+                self.sigSampleEnsembleComplete.emit(None)
+                return -1, list(), dict()
+            if cache_key is not None:
+                self._waveform_cache.add(waveform_name, cache_key, written_waveforms)
+
+        # Save sampling related parameters to the sampling_information container within the
+        # PulseBlockEnsemble.
+        # This step is only performed if the resulting waveforms are named by the PulseBlockEnsemble
+        # and not by a sequence nametag
+        if waveform_name == ensemble.name:
+            ensemble.sampling_information = dict()
+            ensemble.sampling_information.update(ensemble_info)
+            ensemble.sampling_information['pulse_generator_settings'] = self.pulse_generator_settings
+            ensemble.sampling_information['waveforms'] = natural_sort(written_waveforms)
+            self.save_ensemble(ensemble)
+
+        if cached_waveforms is None:
+            self.log.info('Time needed for sampling and writing PulseBlockEnsemble {0} to device: {1} sec'
+                          ''.format(ensemble.name, int(np.rint(time.time() - start_time))))
+            self.log.debug('Estimated {:.3f} s from current estimated write speed {:.2f} MSa/s'
+                           ' from {} benchmarks'.format(
+                self._benchmark_write.estimate_time(ensemble_info['number_of_samples']),
+                self._benchmark_write.estimate_speed() / 1e6,
+                self._benchmark_write.n_benchmarks))
+
+            self._benchmark_write.add_benchmark(time.time() - start_time, ensemble_info['number_of_samples'])
+            self._log_write_pipeline_report(ensemble_info['number_of_samples'],
+                                            time.time() - start_time)
+
+        if ensemble_info['number_of_samples'] == 0:
+            self.log.warning('Empty waveform (0 samples) created from PulseBlockEnsemble "{0}".'
+                             ''.format(ensemble.name))
+        if not self.__sequence_generation_in_progress:
+            self.module_state.unlock()
+        self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
+        self.sigSampleEnsembleComplete.emit(ensemble)
+        return offset_bin, natural_sort(written_waveforms), ensemble_info
+
+    def _get_write_array_length(self, ensemble_info):
+        """ Determines the number of samples to be written as a whole (chunk size) according to the
+        overhead_bytes ConfigOption.
+
+        @param dict ensemble_info: information about the ensemble returned by analyze_block_ensemble
+
+        @return int: number of samples per chunk
+        """
+        # Calculate the byte size per sample.
+        # One analog sample per channel is 4 bytes (np.float32) and one digital sample per channel
+        # is 1 byte (np.bool).
+        bytes_per_sample = len(ensemble_info['analog_channels']) * 4 + len(
+            ensemble_info['digital_channels'])
+
+        # Calculate the bytes estimate for the entire ensemble
+        bytes_per_ensemble = bytes_per_sample * ensemble_info['number_of_samples']
+
+        # Determine the size of the sample arrays to be written as a whole.
+        if bytes_per_ensemble <= self._overhead_bytes or self._overhead_bytes == 0:
+            array_length = ensemble_info['number_of_samples']
+        else:
+            array_length = self._overhead_bytes // bytes_per_sample
+        return array_length
+
+    def _analyze_and_extend_ensemble(self, ensemble):
+        """ Analyzes a PulseBlockEnsemble (see analyze_block_ensemble) and appends an idle block to
+        it if its length does not fulfil the waveform length granularity of the pulse generator.
+
+        @param PulseBlockEnsemble ensemble: The ensemble to analyze and possibly extend
+
+        @return dict: information about the (extended) ensemble returned by analyze_block_ensemble
+        """
         # get important parameters from the ensemble
         ensemble_info = self.analyze_block_ensemble(ensemble)
 
@@ -1776,31 +2030,24 @@ class SequenceGeneratorLogic(LogicBase):
                 self.log.warn('Extending waveform {0} by {2} bins. New length {1}.'.format(
                     ensemble.name, ensemble_info['number_of_samples'], extension_samples))
 
-        # Calculate the byte size per sample.
-        # One analog sample per channel is 4 bytes (np.float32) and one digital sample per channel
-        # is 1 byte (np.bool).
-        bytes_per_sample = len(ensemble_info['analog_channels']) * 4 + len(
-            ensemble_info['digital_channels'])
+        return ensemble_info
 
-        # Calculate the bytes estimate for the entire ensemble
-        bytes_per_ensemble = bytes_per_sample * ensemble_info['number_of_samples']
+    def _sample_and_write_ensemble(self, ensemble, ensemble_info, waveform_name, array_length,
+                                   offset_bin=0, cache_key=None, samples=None):
+        """ Samples a PulseBlockEnsemble chunkwise and writes the chunks to the pulse generator.
+        If already sampled arrays are passed via "samples" or stored samples for cache_key are
+        available from the waveform cache, these are written instead of sampling the ensemble again.
 
-        # Determine the size of the sample arrays to be written as a whole.
-        if bytes_per_ensemble <= self._overhead_bytes or self._overhead_bytes == 0:
-            array_length = ensemble_info['number_of_samples']
-        else:
-            array_length = self._overhead_bytes // bytes_per_sample
-
-        n_max_samples = self.pulsegenerator().get_constraints().waveform_length.max
-        if n_max_samples > 0. and ensemble_info['number_of_samples'] > n_max_samples:
-            self.log.error("Tried to write more samples ({:d}) than device supports ({:d}).".format(
-                ensemble_info['number_of_samples'],
-                n_max_samples))
-            if not self.__sequence_generation_in_progress:
-                self.module_state.unlock()
-            self.sigSampleEnsembleComplete.emit(None)
-            return -1, list(), dict()
+        @param PulseBlockEnsemble ensemble: The ensemble to sample
+        @param dict ensemble_info: information about the ensemble returned by analyze_block_ensemble
+        @param str waveform_name: name of the waveform (excl. channel suffix) to write
+        @param int array_length: maximum number of samples to write in a single chunk
+        @param int offset_bin: offset bin of the first sample for rotating frame preservation
+        @param str cache_key: content key of the waveform, None to bypass the waveform cache
+        @param tuple samples: optional (analog_samples, digital_samples) dicts of the entire waveform
 
+        @return tuple: (set of written waveform names or None if failed, offset_bin after ensemble)
+        """
         # Allocate the sample arrays that are used for a single write command
         analog_samples = dict()
         digital_samples = dict()
@@ -1814,10 +2061,7 @@ class SequenceGeneratorLogic(LogicBase):
                            'The sample array needed is too large to allocate in memory.\n'
                            'Try using the overhead_bytes ConfigOption to limit memory usage.'
                            ''.format(ensemble.name))
-            if not self.__sequence_generation_in_progress:
-                self.module_state.unlock()
-            self.sigSampleEnsembleComplete.emit(None)
-            return -1, list(), dict()
+            return None, offset_bin
 
         t_est_upload = self._benchmark_write.estimate_time(ensemble_info['number_of_samples'])
         if t_est_upload > self._info_on_estimated_upload_time:
@@ -1826,135 +2070,364 @@ class SequenceGeneratorLogic(LogicBase):
                           " {0:%Y-%m-%d %H:%M:%S} ({1:d} s)".format(
                 (now + datetime.timedelta(0, t_est_upload)), int(t_est_upload)))
 
-        # integer to keep track of the sampls already processed
-        processed_samples = 0
-        # Index to keep track of the samples written into the preallocated samples array
-        array_write_index = 0
-        # Keep track of the number of elements already written
-        element_count = 0
+        # Try to get previously stored samples from the waveform cache. Otherwise store the samples
+        # while sampling if the disk storage of the waveform cache is enabled.
+        stored_samples = samples
+        sample_store = None
+        if stored_samples is None and cache_key is not None:
+            stored_samples = self._waveform_cache.load_samples(cache_key,
+                                                               ensemble_info['analog_channels'],
+                                                               ensemble_info['digital_channels'],
+                                                               ensemble_info['number_of_samples'])
+            if stored_samples is None:
+                self._waveform_cache.record_miss()
+                sample_store = self._waveform_cache.create_sample_store(
+                    cache_key,
+                    ensemble_info['analog_channels'],
+                    ensemble_info['digital_channels'],
+                    ensemble_info['number_of_samples'])
+
+        # Compile the ensemble into a flat element table used to sample the waveform chunkwise
+        sampler = EnsembleSampler(ensemble=ensemble,
+                                  blocks=self._saved_pulse_blocks,
+                                  elements_length_bins=ensemble_info['elements_length_bins'],
+                                  sample_rate=self.__sample_rate,
+                                  analog_amplitudes=self.__analog_levels[0],
+                                  offset_bin=offset_bin)
+
+        total_samples = ensemble_info['number_of_samples']
+        number_of_chunks = -(-total_samples // array_length) if array_length > 0 else 0
+
+        # Allocate additional buffers to sample the next chunks while the current one is written.
+        # This only makes sense if there is more than one chunk to write.
+        buffers = [(analog_samples, digital_samples)]
+        buffer_count = min(max(1, int(self._write_buffer_count)), number_of_chunks)
+        try:
+            for _ in range(buffer_count - 1):
+                buffers.append(
+                    ({chnl: np.empty(array_length, dtype='float32') for chnl in analog_samples},
+                     {chnl: np.empty(array_length, dtype=bool) for chnl in digital_samples})
+                )
+        except MemoryError:
+            self.log.warning('Unable to allocate {0:d} buffers for pipelined sampling due to a '
+                             'MemoryError. Using {1:d} buffer(s) instead.'
+                             ''.format(buffer_count, len(buffers)))
+        buffer_count = len(buffers)
+
+        def sample_chunk(chunk_index):
+            """ Fills the buffer associated with chunk_index and returns the (truncated) arrays
+            together with the time needed.
+            """
+            t_start = time.perf_counter()
+            chunk_start = chunk_index * array_length
+            chunk_length = min(array_length, total_samples - chunk_start)
+            analog_buffer, digital_buffer = buffers[chunk_index % buffer_count]
+            # The last chunk can be shorter than the previous chunks
+            analog_chunk = {chnl: arr[:chunk_length] for chnl, arr in analog_buffer.items()}
+            digital_chunk = {chnl: arr[:chunk_length] for chnl, arr in digital_buffer.items()}
+            if stored_samples is None:
+                sampler.fill_chunk(chunk_start, chunk_length, analog_chunk, digital_chunk)
+                self._waveform_cache.append_to_sample_store(sample_store,
+                                                            analog_chunk,
+                                                            digital_chunk)
+            else:
+                chunk_slice = slice(chunk_start, chunk_start + chunk_length)
+                for chnl, samples in analog_chunk.items():
+                    samples[:] = stored_samples[0][chnl][chunk_slice]
+                for chnl, samples in digital_chunk.items():
+                    samples[:] = stored_samples[1][chnl][chunk_slice]
+            return analog_chunk, digital_chunk, time.perf_counter() - t_start
+
+        stage_times = {'sampling': 0.0, 'writing': 0.0}
         # set of written waveform names on the device
         written_waveforms = set()
-        # Iterate over all blocks within the PulseBlockEnsemble object
-        for block_name, reps in ensemble.block_list:
-            block = self.get_block(block_name)
-            # Iterate over all repetitions of the current block
-            for rep_no in range(reps + 1):
-                # Iterate over the PulseBlockElement instances inside the current block
-                for element in block.element_list:
-                    digital_high = element.digital_high
-                    pulse_function = element.pulse_function
-                    element_length_bins = ensemble_info['elements_length_bins'][element_count]
-
-                    # Indicator on how many samples of this element have been written already
-                    element_samples_written = 0
-
-                    while element_samples_written != element_length_bins:
-                        samples_to_add = min(array_length - array_write_index,
-                                             element_length_bins - element_samples_written)
-                        # create floating point time array for the current element inside rotating
-                        # frame if analog samples are to be calculated.
-                        if pulse_function:
-                            time_arr = (offset_bin + np.arange(
-                                samples_to_add, dtype='float64')) / self.__sample_rate
-
-                        # Calculate respective part of the sample arrays
-                        for chnl in digital_high:
-                            digital_samples[chnl][array_write_index:array_write_index + samples_to_add] = digital_high[
-                                chnl]
-                        for chnl in pulse_function:
-                            analog_samples[chnl][array_write_index:array_write_index + samples_to_add] = pulse_function[
-                                                                                                             chnl].get_samples(
-                                time_arr) / (self.__analog_levels[0][chnl] / 2)
-
-                        # Free memory
-                        if pulse_function:
-                            del time_arr
-
-                        element_samples_written += samples_to_add
-                        array_write_index += samples_to_add
-                        processed_samples += samples_to_add
-                        # if the rotating frame should be preserved (default) increment the offset
-                        # counter for the time array.
-                        if ensemble.rotating_frame:
-                            offset_bin += samples_to_add
-
-                        # Check if the temporary sample array is full and write to the device if so.
-                        if array_write_index == array_length:
-                            # Set first/last chunk flags
-                            is_first_chunk = array_write_index == processed_samples
-                            is_last_chunk = processed_samples == ensemble_info['number_of_samples']
-                            written_samples, wfm_list = self.pulsegenerator().write_waveform(
-                                name=waveform_name,
-                                analog_samples=analog_samples,
-                                digital_samples=digital_samples,
-                                is_first_chunk=is_first_chunk,
-                                is_last_chunk=is_last_chunk,
-                                total_number_of_samples=ensemble_info['number_of_samples'])
-
-                            # Update written waveforms set
-                            written_waveforms.update(wfm_list)
-
-                            # check if write process was successful
-                            if written_samples != array_length:
-                                self.log.error('Sampling of block "{0}" in ensemble "{1}" failed. '
-                                               'Write to device was unsuccessful.\nThe number of '
-                                               'actually written samples ({2:d}) does not match '
-                                               'the number of samples staged to write ({3:d}).'
-                                               ''.format(block_name, ensemble.name, written_samples,
-                                                         array_length))
-                                if not self.__sequence_generation_in_progress:
-                                    self.module_state.unlock()
-                                self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
-                                self.sigSampleEnsembleComplete.emit(None)
-                                return -1, list(), dict()
-
-                            # Reset array write start pointer
-                            array_write_index = 0
-
-                            # check if the temporary write array needs to be truncated for the next
-                            # part. (because it is the last part of the ensemble to write which can
-                            # be shorter than the previous chunks)
-                            if array_length > ensemble_info['number_of_samples'] - processed_samples:
-                                array_length = ensemble_info['number_of_samples'] - processed_samples
-                                analog_samples = dict()
-                                digital_samples = dict()
-                                for chnl in ensemble_info['analog_channels']:
-                                    analog_samples[chnl] = np.empty(array_length, dtype='float32')
-                                for chnl in ensemble_info['digital_channels']:
-                                    digital_samples[chnl] = np.empty(array_length, dtype=bool)
-
-                    # Increment element index
-                    element_count += 1
+        # Single worker thread sampling chunks ahead of the chunk currently written to the device
+        executor = ThreadPoolExecutor(max_workers=1) if buffer_count > 1 else None
+        pending_chunks = dict()
+        success = False
+        try:
+            if executor is not None:
+                for chunk_index in range(buffer_count - 1):
+                    pending_chunks[chunk_index] = executor.submit(sample_chunk, chunk_index)
 
-        # Save sampling related parameters to the sampling_information container within the
-        # PulseBlockEnsemble.
-        # This step is only performed if the resulting waveforms are named by the PulseBlockEnsemble
-        # and not by a sequence nametag
-        if waveform_name == ensemble.name:
-            ensemble.sampling_information = dict()
-            ensemble.sampling_information.update(ensemble_info)
-            ensemble.sampling_information['pulse_generator_settings'] = self.pulse_generator_settings
-            ensemble.sampling_information['waveforms'] = natural_sort(written_waveforms)
-            self.save_ensemble(ensemble)
+            for chunk_index in range(number_of_chunks):
+                if executor is None:
+                    analog_chunk, digital_chunk, sampling_time = sample_chunk(chunk_index)
+                else:
+                    analog_chunk, digital_chunk, sampling_time = pending_chunks.pop(
+                        chunk_index).result()
+                    # The buffer of the chunk written before this one is free again
+                    next_index = chunk_index + buffer_count - 1
+                    if next_index < number_of_chunks:
+                        pending_chunks[next_index] = executor.submit(sample_chunk, next_index)
+                stage_times['sampling'] += sampling_time
+
+                # Set first/last chunk flags
+                chunk_length = min(array_length, total_samples - chunk_index * array_length)
+                is_first_chunk = chunk_index == 0
+                is_last_chunk = chunk_index == number_of_chunks - 1
+                t_start = time.perf_counter()
+                written_samples, wfm_list = self.pulsegenerator().write_waveform(
+                    name=waveform_name,
+                    analog_samples=analog_chunk,
+                    digital_samples=digital_chunk,
+                    is_first_chunk=is_first_chunk,
+                    is_last_chunk=is_last_chunk,
+                    total_number_of_samples=total_samples)
+                stage_times['writing'] += time.perf_counter() - t_start
+
+                # Update written waveforms set
+                written_waveforms.update(wfm_list)
+
+                # check if write process was successful
+                if written_samples != chunk_length:
+                    self.log.error('Sampling of ensemble "{0}" failed. Write to device was '
+                                   'unsuccessful.\nThe number of actually written samples ({1:d}) '
+                                   'does not match the number of samples staged to write ({2:d}).'
+                                   ''.format(ensemble.name, written_samples, chunk_length))
+                    return None, offset_bin
+            success = True
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._waveform_cache.finalize_sample_store(cache_key, sample_store, success=success)
+            self.__last_stage_times = stage_times
+
+        # if the rotating frame should be preserved (default) increment the offset counter
+        return written_waveforms, sampler.end_offset_bin
+
+    def _log_write_pipeline_report(self, number_of_samples, total_time):
+        """ Adds the time spent in sampling and writing during the last waveform generation to the
+        write benchmark and reports the effective speed together with the speed of each stage to
+        identify the bottleneck.
+        Logged at info level while the write benchmark provides a valid speed estimate, else at
+        debug level.
+        """
+        if number_of_samples < 1 or total_time <= 0:
+            return
+        self._benchmark_write.add_stage_benchmark(self.__last_stage_times, number_of_samples)
+        stage_speeds = self._benchmark_write.estimate_stage_speeds()
+        stage_report = ', '.join(
+            '{0}: {1:.3f} s ({2:.2f} MSa/s, benchmark {3:.2f} MSa/s)'.format(
+                stage,
+                stage_time,
+                number_of_samples / stage_time / 1e6 if stage_time > 0 else np.inf,
+                stage_speeds.get(stage, np.nan) / 1e6)
+            for stage, stage_time in self.__last_stage_times.items()
+        )
+        log = self.log.info if self._benchmark_write.sanity else self.log.debug
+        log('Effective write speed {0:.2f} MSa/s (benchmark estimate {1:.2f} MSa/s).\n'
+            '{2}.\nBottleneck is {3}.'.format(number_of_samples / total_time / 1e6,
+                                              self._benchmark_write.estimate_speed() / 1e6,
+                                              stage_report,
+                                              self._benchmark_write.bottleneck))
 
-        self.log.info('Time needed for sampling and writing PulseBlockEnsemble {0} to device: {1} sec'
-                      ''.format(ensemble.name, int(np.rint(time.time() - start_time))))
-        self.log.debug('Estimated {:.3f} s from current estimated write speed {:.2f} MSa/s'
-                       ' from {} benchmarks'.format(
-            self._benchmark_write.estimate_time(ensemble_info['number_of_samples']),
-            self._benchmark_write.estimate_speed() / 1e6,
-            self._benchmark_write.n_benchmarks))
+    @QtCore.Slot(str)
+    def compile_ensemble_to_sequence(self, ensemble):
+        """ Compiles a PulseBlockEnsemble into a PulseSequence making use of the hardware sequencer
+        instead of writing the fully unrolled waveform.
+
+        Each block_list entry played at least sequence_compiler_min_repetitions times becomes a
+        sequence step holding a single repetition of the block. Consecutive other entries are
+        merged into steps played once. Identical segments share the same PulseBlockEnsemble (named
+        "<ensemble name>_seg<index>"), so each unique segment is sampled only once by
+        sample_pulse_sequence. The created PulseSequence is named "<ensemble name>_seq" and loops
+        back to its first step like the flat waveform.
+
+        In the rotating frame (with analog channels) only blocks whose repetitions are
+        phase-coherent (see _is_block_phase_coherent) are played as repeated sequence steps. Other
+        blocks are sampled flat within their segment. The PulseSequence is created in the rotating
+        frame as well, with rotating_frame_repetitions set, so each step is sampled with the time
+        offset of its position in the flat waveform.
+
+        Compiling falls back (returns None as sequence name) if the pulse generator does not
+        support sequences, if no block can be deduplicated, if the segments do not reproduce the
+        discretization of the flat waveform or if they violate the waveform length or sequence step
+        constraints.
+        Emits sigCompileEnsembleComplete with the result.
+
+        @param str|PulseBlockEnsemble ensemble: Name or instance of the ensemble to compile
+
+        @return (str, dict): Name of the created PulseSequence (None on fallback) and a report with
+                             the number of samples of the flat waveform ("flat_samples"), the number
+                             of samples to write for all sequence steps ("sequence_samples"),
+                             the difference ("saved_samples"), the number of sequence steps,
+                             unique segments and repeated blocks that are not phase-coherent
+                             ("incoherent_blocks") and the reason for a fallback ("fallback_reason").
+        """
+        sequence_name, report = self._compile_ensemble_to_sequence(ensemble)
+        self.sigCompileEnsembleComplete.emit(report['ensemble'] or '', sequence_name, report)
+        return sequence_name, report
+
+    def _compile_ensemble_to_sequence(self, ensemble):
+        """ See compile_ensemble_to_sequence """
+        if isinstance(ensemble, str):
+            ensemble = self.get_ensemble(ensemble)
+        report = {'ensemble': ensemble.name if isinstance(ensemble, PulseBlockEnsemble) else None,
+                  'sequence': None,
+                  'flat_samples': 0,
+                  'sequence_samples': 0,
+                  'saved_samples': 0,
+                  'steps': 0,
+                  'unique_segments': 0,
+                  'incoherent_blocks': 0,
+                  'fallback_reason': ''}
+
+        def fallback(reason):
+            report['fallback_reason'] = reason
+            self.log.info('PulseBlockEnsemble "{0}" is not compiled into a PulseSequence: {1}.\n'
+                          'Use flat sampling instead.'.format(report['ensemble'], reason))
+            return None, report
 
-        self._benchmark_write.add_benchmark(time.time() - start_time, ensemble_info['number_of_samples'])
+        if not isinstance(ensemble, PulseBlockEnsemble):
+            return fallback('PulseBlockEnsemble not found')
+        if self.module_state() != 'idle':
+            return fallback('SequenceGeneratorLogic is busy')
+        if self._sampling_ensemble_sanity_check(ensemble) < 0:
+            return fallback('sanity check failed')
+        constraints = self.pulse_generator_constraints
+        if constraints.sequence_option == SequenceOption.NON:
+            return fallback('pulse generator does not support sequences')
 
-        if ensemble_info['number_of_samples'] == 0:
-            self.log.warning('Empty waveform (0 samples) created from PulseBlockEnsemble "{0}".'
-                             ''.format(ensemble.name))
-        if not self.__sequence_generation_in_progress:
-            self.module_state.unlock()
-        self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
-        self.sigSampleEnsembleComplete.emit(ensemble)
-        return offset_bin, natural_sort(written_waveforms), ensemble_info
+        ensemble_info = self.analyze_block_ensemble(ensemble)
+        elements_length_bins = ensemble_info['elements_length_bins']
+        report['flat_samples'] = int(ensemble_info['number_of_samples'])
+        check_coherence = ensemble.rotating_frame and bool(ensemble_info['analog_channels'])
+
+        # Split the block_list into segments given as (block_list, number of plays)
+        segments = list()
+        flat_run = list()
+        position = 0
+        for block_name, reps in ensemble.block_list:
+            elements = len(self.get_block(block_name))
+            rep_bins = elements_length_bins[position:position + elements * (reps + 1)]
+            rep_bins = rep_bins.reshape(reps + 1, elements)
+            position += elements * (reps + 1)
+            repeatable = reps + 1 >= self._sequence_compiler_min_repetitions and elements > 0 and \
+                np.sum(rep_bins[0]) > 0 and np.all(rep_bins == rep_bins[0])
+            if repeatable and check_coherence and not self._is_block_phase_coherent(
+                    self.get_block(block_name), int(np.sum(rep_bins[0])), self.__sample_rate):
+                report['incoherent_blocks'] += 1
+                repeatable = False
+            if repeatable:
+                if flat_run:
+                    segments.append((flat_run, 1))
+                    flat_run = list()
+                segments.append(([(block_name, 0)], reps + 1))
+            else:
+                flat_run.append((block_name, reps))
+        if flat_run:
+            segments.append((flat_run, 1))
+        if not any(plays > 1 for _, plays in segments):
+            if report['incoherent_blocks'] > 0:
+                return fallback('repeated PulseBlocks are not phase-coherent in the rotating frame')
+            return fallback('no repeated PulseBlocks to deduplicate')
+
+        # Create one PulseBlockEnsemble per unique segment
+        segment_names = dict()
+        steps = list()
+        for block_list, plays in segments:
+            key = tuple(block_list)
+            if key not in segment_names:
+                segment_names[key] = '{0}_seg{1:03d}'.format(ensemble.name, len(segment_names))
+            steps.append((segment_names[key], plays))
+        segment_ensembles = {name: PulseBlockEnsemble(name=name,
+                                                      block_list=list(key),
+                                                      rotating_frame=ensemble.rotating_frame)
+                             for key, name in segment_names.items()}
+        segment_infos = {name: self.analyze_block_ensemble(seg_ensemble)
+                         for name, seg_ensemble in segment_ensembles.items()}
+
+        # Segments must fulfill the waveform length constraints since they must not be extended
+        granularity = constraints.waveform_length.step
+        for name, info in segment_infos.items():
+            if info['number_of_samples'] < constraints.waveform_length.min or \
+                    info['number_of_samples'] % granularity != 0:
+                return fallback('segment length of {0:d} samples violates the waveform length '
+                                'constraints'.format(int(info['number_of_samples'])))
+
+        # The discretization of the concatenated segments must match the flat waveform
+        compiled_bins = np.concatenate(
+            [np.tile(segment_infos[name]['elements_length_bins'], plays) for name, plays in steps]
+        )
+        if not np.array_equal(compiled_bins, elements_length_bins):
+            return fallback('discretization of the segments differs from the flat waveform')
+
+        # Create the PulseSequence. Split steps exceeding the maximum repetition count.
+        max_plays = max(constraints.repetitions.max, 0) + 1
+        sequence = PulseSequence(name='{0}_seq'.format(ensemble.name),
+                                 rotating_frame=ensemble.rotating_frame,
+                                 rotating_frame_repetitions=True)
+        for name, plays in steps:
+            while plays > 0:
+                step_plays = min(plays, max_plays)
+                sequence.append(name)
+                sequence[-1].repetitions = step_plays - 1
+                plays -= step_plays
+        if 0 < constraints.sequence_steps.max < len(sequence):
+            return fallback('number of sequence steps ({0:d}) exceeds the device limit'
+                            ''.format(len(sequence)))
+        sequence[-1].go_to = 1
+        sequence.refresh_parameters()
+        sequence.measurement_information = copy.deepcopy(ensemble.measurement_information)
+        sequence.generation_method_parameters = copy.deepcopy(
+            ensemble.generation_method_parameters)
+
+        # Remove outdated segments of previous compilations and save all new objects
+        segment_pattern = re.compile(re.escape(ensemble.name) + r'_seg\d{3}$')
+        for name in list(self._saved_pulse_block_ensembles):
+            if segment_pattern.match(name) and name not in segment_ensembles:
+                self.delete_ensemble(name)
+        with self._asset_database.batch():
+            for seg_ensemble in segment_ensembles.values():
+                self.save_ensemble(seg_ensemble)
+            self.save_sequence(sequence)
+
+        report['sequence'] = sequence.name
+        report['steps'] = len(sequence)
+        report['unique_segments'] = len(segment_ensembles)
+        if sequence.rotating_frame:
+            # Each step is sampled with its own time offset
+            report['sequence_samples'] = int(sum(segment_infos[step.ensemble]['number_of_samples']
+                                                 for step in sequence))
+        else:
+            report['sequence_samples'] = int(sum(info['number_of_samples']
+                                                 for info in segment_infos.values()))
+        report['saved_samples'] = report['flat_samples'] - report['sequence_samples']
+        self.log.info('Compiled PulseBlockEnsemble "{0}" into PulseSequence "{1}" with {2:d} steps '
+                      '({3:d} unique segments).\nSamples to write: {4:d} instead of {5:d} '
+                      '({6:d} samples saved).'.format(ensemble.name,
+                                                      sequence.name,
+                                                      report['steps'],
+                                                      report['unique_segments'],
+                                                      report['sequence_samples'],
+                                                      report['flat_samples'],
+                                                      report['saved_samples']))
+        return sequence.name, report
+
+    @staticmethod
+    def _is_block_phase_coherent(block, length_bins, sample_rate):
+        """ Checks if all repetitions of a PulseBlock sampled in the rotating frame yield identical
+        samples. This is the case if all sampling functions of the block are independent of time
+        (e.g. Idle, DC) or periodic with a whole number of periods within the block length (see
+        SamplingBase.periodic_frequencies).
+
+        @param PulseBlock block: The PulseBlock to check
+        @param int length_bins: The length of a single repetition of the block in bins
+        @param float sample_rate: The sample rate in Hz
+
+        @return bool: True if the block repetitions are phase-coherent, False otherwise
+        """
+        for element in block:
+            for func in element.pulse_function.values():
+                frequencies = getattr(func, 'periodic_frequencies', None)
+                if frequencies is None:
+                    return False
+                for param in frequencies:
+                    periods = length_bins * getattr(func, param) / sample_rate
+                    if abs(periods - round(periods)) > 1e-6:
+                        return False
+        return True
 
     @QtCore.Slot(str)
     def sample_pulse_sequence(self, sequence):
@@ -1969,6 +2442,9 @@ class SequenceGeneratorLogic(LogicBase):
         function for the Pulse_Block_Ensembles. One, which samples by preserving the phase (i.e.
         staying in the rotating frame) and the other which samples without keep a phase
         relationship between the different entries of the PulseSequence object.
+        When preserving the phase, the time offset of each step includes a single play of each
+        previous step, or all repetitions of the previous steps if the rotating_frame_repetitions
+        flag of the PulseSequence is set.
         ATTENTION: The phase preservation within a single PulseBlockEnsemble is NOT affected by
                    this method.
 
@@ -2021,6 +2497,12 @@ class SequenceGeneratorLogic(LogicBase):
         #           (('waveform3', 'waveform4'), seq_param_dict2)]
         sequence_param_dict_list = list()
 
+        # Optionally sample all ensembles in parallel worker processes in advance. Uploading them to
+        # the device is still done in sequence order below.
+        parallel_sampling = None
+        if self._sequence_sampling_processes > 1:
+            parallel_sampling = self._start_parallel_sequence_sampling(sequence)
+
         # if all the Pulse_Block_Ensembles should be in the rotating frame, then each ensemble
         # will be created in general with a different offset_bin. Therefore, in order to keep track
         # of the sampled Pulse_Block_Ensembles one has to introduce a running number as an
@@ -2039,15 +2521,23 @@ class SequenceGeneratorLogic(LogicBase):
                     not self.get_ensemble(name_tag).sampling_information or \
                     self.get_ensemble(name_tag).sampling_information['pulse_generator_settings'] != self.pulse_generator_settings:
 
+                samples = self._get_parallel_sampling_result(parallel_sampling, step_index)
+                step_offset_bin = offset_bin
                 offset_bin, waveform_list, ensemble_info = self.sample_pulse_block_ensemble(
                     ensemble=seq_step.ensemble,
                     offset_bin=offset_bin,
-                    name_tag=name_tag)
+                    name_tag=name_tag,
+                    samples=samples)
+                del samples
+                # Repetitions of a step advance the time of the rotating frame as well if requested
+                if sequence.rotating_frame_repetitions and seq_step.repetitions > 0:
+                    offset_bin += seq_step.repetitions * (offset_bin - step_offset_bin)
 
                 if len(waveform_list) == 0:
                     self.log.error('Sampling of PulseBlockEnsemble "{0}" failed during sampling of '
                                    'PulseSequence "{1}".\nFailed to create waveforms on device.'
                                    ''.format(seq_step.ensemble, sequence.name))
+                    self._stop_parallel_sequence_sampling(parallel_sampling)
                     self.module_state.unlock()
                     self.__sequence_generation_in_progress = False
                     self.sigSampleSequenceComplete.emit(None)
@@ -2072,6 +2562,8 @@ class SequenceGeneratorLogic(LogicBase):
             sequence_param_dict_list.append(
                 (tuple(generated_ensembles[name_tag]['waveforms']), seq_step))
 
+        self._stop_parallel_sequence_sampling(parallel_sampling)
+
         # pass the whole information to the sequence creation method:
         steps_written = self.pulsegenerator().write_sequence(sequence.name,
                                                              sequence_param_dict_list)
@@ -2101,6 +2593,89 @@ class SequenceGeneratorLogic(LogicBase):
         self.sigSampleSequenceComplete.emit(sequence)
         return
 
+    def _start_parallel_sequence_sampling(self, sequence):
+        """ Submits all ensembles of a PulseSequence that need to be sampled to a process pool.
+        Each ensemble is sampled into temporary .npy files. The offset bins for rotating frame
+        preservation are precomputed from analyze_block_ensemble, so the results are identical to
+        serial sampling.
+
+        @param PulseSequence sequence: The sequence to sample
+
+        @return tuple: (ProcessPoolExecutor, temporary directory, dict of futures with step indices
+                       as keys)
+        """
+        executor = ProcessPoolExecutor(max_workers=int(self._sequence_sampling_processes),
+                                       initializer=init_sampling_worker,
+                                       initargs=(self._sampling_functions_path_list,))
+        directory = tempfile.mkdtemp(prefix='qudi_sequence_sampling_')
+        futures = dict()
+        submitted_tags = set()
+        offset_bin = 0
+        for step_index, seq_step in enumerate(sequence):
+            ensemble = self.get_ensemble(seq_step.ensemble)
+            # Use the same naming and selection of ensembles to sample as sample_pulse_sequence
+            if sequence.rotating_frame:
+                name_tag = seq_step.ensemble + '_' + str(step_index).zfill(3)
+            else:
+                name_tag = seq_step.ensemble
+                offset_bin = 0
+                if name_tag in submitted_tags or (
+                        ensemble.sampling_information and
+                        ensemble.sampling_information['pulse_generator_settings'] == self.pulse_generator_settings):
+                    continue
+            # Erroneous ensembles are left to the serial sampling to report
+            if self._sampling_ensemble_sanity_check(ensemble) < 0:
+                break
+
+            ensemble_info = self._analyze_and_extend_ensemble(ensemble)
+            blocks = {name: self._saved_pulse_blocks[name] for name, _ in ensemble.block_list}
+            futures[step_index] = executor.submit(sample_ensemble_to_files,
+                                                  ensemble=ensemble,
+                                                  blocks=blocks,
+                                                  elements_length_bins=ensemble_info['elements_length_bins'],
+                                                  sample_rate=self.__sample_rate,
+                                                  analog_amplitudes=self.__analog_levels[0],
+                                                  offset_bin=offset_bin,
+                                                  directory=os.path.join(directory, name_tag),
+                                                  chunk_length=self._get_write_array_length(ensemble_info))
+            submitted_tags.add(name_tag)
+            if ensemble.rotating_frame:
+                if sequence.rotating_frame_repetitions:
+                    offset_bin += ensemble_info['number_of_samples'] * (max(seq_step.repetitions, 0) + 1)
+                else:
+                    offset_bin += ensemble_info['number_of_samples']
+        return executor, directory, futures
+
+    def _get_parallel_sampling_result(self, parallel_sampling, step_index):
+        """ Waits for the worker process sampling the ensemble of the given sequence step and
+        returns the sampled arrays as read-only memory maps.
+
+        @return tuple: (analog_samples, digital_samples) dicts or None if not sampled in parallel
+        """
+        if parallel_sampling is None or step_index not in parallel_sampling[2]:
+            return None
+        try:
+            analog_paths, digital_paths = parallel_sampling[2].pop(step_index).result()
+            analog_samples = {chnl: np.load(path, mmap_mode='r')
+                              for chnl, path in analog_paths.items()}
+            digital_samples = {chnl: np.load(path, mmap_mode='r')
+                               for chnl, path in digital_paths.items()}
+        except Exception:
+            self.log.exception('Parallel sampling of sequence step {0:d} failed. Falling back to '
+                               'serial sampling:'.format(step_index))
+            return None
+        return analog_samples, digital_samples
+
+    def _stop_parallel_sequence_sampling(self, parallel_sampling):
+        """ Shuts down the process pool and removes all temporary files.
+        """
+        if parallel_sampling is None:
+            return
+        executor, directory, futures = parallel_sampling
+        executor.shutdown(wait=True, cancel_futures=True)
+        futures.clear()
+        shutil.rmtree(directory, ignore_errors=True)
+
     def _delete_waveform(self, names):
         if isinstance(names, str):
             names = [names]
@@ -2117,6 +2692,7 @@ class SequenceGeneratorLogic(LogicBase):
         wfm_to_delete = [wfm for wfm in self.sampled_waveforms if
                          wfm.rsplit('_', 1)[0] == nametag]
         self._delete_waveform(wfm_to_delete)
+        self._waveform_cache.discard(nametag)
         # Erase sampling information if a PulseBlockEnsemble by the same name can be found in saved
         # ensembles
         if nametag in self.saved_pulse_block_ensembles:
@@ -2125,6 +2701,15 @@ class SequenceGeneratorLogic(LogicBase):
             self.save_ensemble(ensemble)
         return
 
+    def clear_waveform_cache(self, clear_disk=False):
+        """ Forget about all cached waveforms, so the next sampling of each ensemble is enforced.
+
+        @param bool clear_disk: Flag indicating if the stored sample arrays should be deleted as well
+        """
+        self._waveform_cache.clear(clear_disk=clear_disk)
+        self._waveform_cache.reset_statistics()
+        return
+
     def _delete_sequence(self, names):
         if isinstance(names, str):
             names = [names]
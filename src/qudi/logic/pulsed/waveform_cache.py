@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains the Qudi content-addressed cache for sampled waveforms.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from logging import getLogger
+
+_logger = getLogger(__name__)
+
+
+class WaveformCache:
+    """
+    Helper keeping track of waveforms sampled from PulseBlockEnsembles in order to skip re-sampling
+    and re-uploading of unchanged ensembles.
+
+    Waveforms are identified by a hash of everything that has an impact on the resulting samples
+    (see content_key). The index maps waveform names (excl. channel suffix) to the content key they
+    have been sampled with and the names of the created waveforms on the device.
+    Optionally the sampled arrays are stored on disk (one .npy file per channel and content key) so
+    that a cached waveform can be written to the device again without sampling. The size of the
+    disk storage can be limited in which case the least recently used samples are removed first.
+    """
+
+    def __init__(self, index=None, storage_dir=None, storage_limit=None):
+        """
+        @param dict index: Index of waveforms written to the device. Is mutated in place, so it can
+                           be a StatusVar of the owning module.
+        @param str storage_dir: optional path to store sampled arrays in. None disables disk storage.
+        @param int storage_limit: optional maximum size of the disk storage in bytes. None or values
+                                  <= 0 disable the limit.
+        """
+        self.index = dict() if index is None else index
+        self.storage_dir = storage_dir
+        self.storage_limit = storage_limit if storage_limit and storage_limit > 0 else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def statistics(self):
+        total = self.hits + self.disk_hits + self.misses
+        return {'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.disk_hits) / total if total > 0 else np.nan}
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(ensemble, blocks, pulse_generator_settings, offset_bin=0):
+        """ Calculates the hash of all parameters that define the samples of an ensemble.
+
+        @param PulseBlockEnsemble ensemble: The ensemble to sample
+        @param dict blocks: PulseBlock instances referenced by the ensemble. Keys are block names.
+        @param dict pulse_generator_settings: see SequenceGeneratorLogic.pulse_generator_settings
+        @param int offset_bin: Time offset of the first sample (only relevant in rotating frame)
+
+        @return str: hex digest identifying the sampled waveform
+        """
+        config_name, active_channels = pulse_generator_settings['activation_config']
+        amplitudes, offsets = pulse_generator_settings['analog_levels']
+        content = {
+            'rotating_frame': ensemble.rotating_frame,
+            'block_list': [[name, reps] for name, reps in ensemble.block_list],
+            'blocks': {name: blocks[name].get_dict_representation()['element_list']
+                       for name, _ in ensemble.block_list},
+            'sample_rate': pulse_generator_settings['sample_rate'],
+            'activation_config': [config_name, sorted(active_channels)],
+            'analog_levels': [amplitudes, offsets],
+            'offset_bin': int(offset_bin) if ensemble.rotating_frame else 0
+        }
+        content_str = json.dumps(content, sort_keys=True, default=repr)
+        return hashlib.sha256(content_str.encode('utf-8')).hexdigest()
+
+    def lookup(self, waveform_name, key, device_waveforms):
+        """ Check if a waveform by the given name has been sampled with the given content key and
+        all corresponding waveforms are still present on the device.
+
+        @param str waveform_name: waveform name excl. channel suffix
+        @param str key: content key of the waveform to sample
+        @param iterable device_waveforms: waveform names present on the device
+
+        @return list: names of the cached waveforms on the device or None if not cached
+        """
+        entry = self.index.get(waveform_name)
+        if entry is not None and entry['key'] == key and set(entry['waveforms']).issubset(
+                device_waveforms):
+            self.hits += 1
+            return list(entry['waveforms'])
+        return None
+
+    def record_miss(self):
+        self.misses += 1
+
+    def add(self, waveform_name, key, waveforms):
+        self.index[waveform_name] = {'key': key, 'waveforms': list(waveforms)}
+
+    def discard(self, waveform_name):
+        self.index.pop(waveform_name, None)
+
+    def clear(self, clear_disk=False):
+        self.index.clear()
+        if clear_disk and self.storage_dir and os.path.isdir(self.storage_dir):
+            for name in os.listdir(self.storage_dir):
+                shutil.rmtree(os.path.join(self.storage_dir, name), ignore_errors=True)
+
+    def load_samples(self, key, analog_channels, digital_channels, number_of_samples):
+        """ Opens previously stored sample arrays as read-only memory maps.
+
+        @return tuple: (analog_samples, digital_samples) dicts or None if not available
+        """
+        if not self.storage_dir:
+            return None
+        path = os.path.join(self.storage_dir, key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            analog_samples = {chnl: np.load(os.path.join(path, chnl + '.npy'), mmap_mode='r')
+                              for chnl in analog_channels}
+            digital_samples = {chnl: np.load(os.path.join(path, chnl + '.npy'), mmap_mode='r')
+                               for chnl in digital_channels}
+        except (OSError, ValueError):
+            _logger.exception('Failed to load stored samples for waveform cache key "{0}". '
+                              'Discarding them.'.format(key))
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        arrays = list(analog_samples.values()) + list(digital_samples.values())
+        if any(len(arr) != number_of_samples for arr in arrays):
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        self.disk_hits += 1
+        # Mark the samples as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return analog_samples, digital_samples
+
+    def prune(self, keep=None, remove_incomplete=False):
+        """ Removes the least recently used stored samples until the disk storage fits into
+        storage_limit.
+
+        @param str keep: optional content key of stored samples to never remove
+        @param bool remove_incomplete: also remove leftovers of sample stores that have not been
+                                       finalized. Only use if no sample store is currently open.
+
+        @return int: number of removed sample stores
+        """
+        if not self.storage_dir or not os.path.isdir(self.storage_dir):
+            return 0
+        removed = 0
+        entries = list()
+        for name in os.listdir(self.storage_dir):
+            path = os.path.join(self.storage_dir, name)
+            if not os.path.isdir(path):
+                continue
+            if name.endswith('.tmp'):
+                if remove_incomplete:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed += 1
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                entries.append((os.stat(path).st_mtime, size, name))
+            except OSError:
+                continue
+        if self.storage_limit is None:
+            return removed
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.storage_limit:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.storage_dir, name), ignore_errors=True)
+            total_size -= size
+            removed += 1
+        return removed
+
+    def create_sample_store(self, key, analog_channels, digital_channels, number_of_samples):
+        """ Creates .npy files to store sampled arrays in while sampling. Chunks need to be appended
+        in order via append_to_sample_store. Call finalize_sample_store once all chunks are written.
+
+        @return dict: open file handles with channel descriptors as keys or None if disk storage is
+                      disabled
+        """
+        if not self.storage_dir:
+            return None
+        path = os.path.join(self.storage_dir, key + '.tmp')
+        store = dict()
+        try:
+            os.makedirs(path, exist_ok=True)
+            for chnl in sorted(analog_channels) + sorted(digital_channels):
+                dtype = np.dtype('float32') if chnl in analog_channels else np.dtype(bool)
+                file = open(os.path.join(path, chnl + '.npy'), 'wb')
+                store[chnl] = file
+                np.lib.format.write_array_header_1_0(
+                    file,
+                    {'descr': np.lib.format.dtype_to_descr(dtype),
+                     'fortran_order': False,
+                     'shape': (number_of_samples,)}
+                )
+        except OSError:
+            _logger.exception('Unable to create sample store for waveform cache in "{0}".'
+                              ''.format(path))
+            self.finalize_sample_store(key, store, success=False)
+            return None
+        return store
+
+    @staticmethod
+    def append_to_sample_store(store, analog_samples, digital_samples):
+        """ Appends the next chunk of samples to a sample store created by create_sample_store.
+        """
+        if store is None:
+            return
+        for chnl, samples in analog_samples.items():
+            store[chnl].write(samples.tobytes())
+        for chnl, samples in digital_samples.items():
+            store[chnl].write(samples.tobytes())
+
+    def finalize_sample_store(self, key, store, success=True):
+        """ Closes a sample store created by create_sample_store.
+        Discards the stored samples if success is False.
+        """
+        if store is None:
+            return
+        for file in store.values():
+            file.close()
+        tmp_path = os.path.join(self.storage_dir, key + '.tmp')
+        path = os.path.join(self.storage_dir, key)
+        if success:
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            self.prune(keep=key)
+        else:
+            shutil.rmtree(tmp_path, ignore_errors=True)
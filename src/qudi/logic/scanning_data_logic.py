@@ -21,7 +21,12 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 
+import os
+import re
+import uuid
 import datetime
+from collections import OrderedDict
+from dataclasses import replace
 
 import numpy as np
 from functools import reduce
@@ -39,6 +44,7 @@ from qudi.core.configoption import ConfigOption
 from qudi.core.statusvariable import StatusVar
 from qudi.util.datastorage import TextDataStorage
 from qudi.util.units import ScaledFloat
+from qudi.util.paths import get_appdata_dir
 
 from qudi.interface.scanning_probe_interface import ScanData, ScanImage
 from qudi.logic.scanning_probe_logic import ScanningProbeLogic
@@ -55,6 +61,9 @@ class ScanningDataLogic(LogicBase):
         options:
             max_history_length: 50
             save_back_scan_data: False
+            history_directory: 'C:\\Users\\Public\\qudi\\scan_history'  # optional, module name is appended
+            compress_history: False  # optional
+            history_cache_length: 4  # optional
         connect:
             scan_logic: scanning_probe_logic
 
@@ -66,10 +75,17 @@ class ScanningDataLogic(LogicBase):
     # config options
     _max_history_length: int = ConfigOption(name='max_history_length', default=10)
     _save_back_scan_data: bool = ConfigOption(name='save_back_scan_data', default=False)
+    # parent directory of the scan history files, defaults to the qudi appdata directory. The files
+    # are stored in a subdirectory named after the module, so multiple modules can share it.
+    _history_directory: Optional[str] = ConfigOption(name='history_directory', default=None)
+    _compress_history: bool = ConfigOption(name='compress_history', default=False)
+    # number of history entries to keep loaded in memory
+    _history_cache_length: int = ConfigOption(name='history_cache_length', default=4)
 
     # status variables
-    # both forward and backward scan data are retained
-    _scan_history: List[Tuple[ScanData, Optional[ScanData]]] = StatusVar(name='scan_history', default=list())
+    # index of the scan history entries. Both forward and backward scan data are retained in one
+    # .npz file per entry, the index holds the file name and the scan data without data arrays.
+    _scan_history: List[Dict] = StatusVar(name='scan_history', default=list())
 
     # signals
     sigHistoryScanDataRestored = QtCore.Signal(ScanData, ScanData, int)
@@ -82,11 +98,14 @@ class ScanningDataLogic(LogicBase):
 
         self._curr_history_index = 0
         self._logic_id = None
+        self._history_cache = OrderedDict()
         return
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
         """
+        self._history_cache = OrderedDict()
+        self._remove_orphaned_history_files()
         self._shrink_history()
         if self._scan_history:
             self._restore_from_history_index(-1)
@@ -99,43 +118,52 @@ class ScanningDataLogic(LogicBase):
         """ Reverse steps of activation
         """
         self._scan_logic().sigNewScanDataForHistory.disconnect(self._append_to_history)
-
-    @_scan_history.representer
-    def __scan_history_to_dicts(self, history: List[Tuple[ScanData, Optional[ScanData]]])\
-            -> List[Tuple[Dict, Optional[Dict]]]:
-        history_dicts = []
-        for data, back_data in history:
-            data_dict = data.to_dict()
-            back_data_dict = back_data.to_dict() if back_data is not None else None
-            history_dicts.append((data_dict, back_data_dict))
-        return history_dicts
+        self._history_cache.clear()
 
     @_scan_history.constructor
-    def __scan_history_from_dicts(self, history_dicts: List[List[Optional[Dict]]])\
-            -> List[Tuple[ScanData, Optional[ScanData]]]:
-        history = []
+    def __scan_history_from_index(self, history: List[Union[Dict, List[Optional[Dict]]]]) -> List[Dict]:
+        index = []
 
         scan_axes = self._scan_logic().scanner_axes
         scan_axes_avail = [ax.name for ax in scan_axes.values()]
 
         data_dropped = False
+        files_missing = False
         try:
-            for data_dict, back_data_dict in history_dicts:
-                data = ScanData.from_dict(data_dict)
-                back_data = ScanData.from_dict(back_data_dict) if back_data_dict is not None else None
-                data_axs = data.scanner_target_at_start.keys()
-                if not (set(data_axs) <= set(scan_axes_avail)):
+            for entry in history:
+                if not isinstance(entry, dict):
+                    # former versions kept the complete scan data in the status variable
+                    data_dict, back_data_dict = entry
+                    data = ScanData.from_dict(data_dict)
+                    back_data = ScanData.from_dict(back_data_dict) if back_data_dict is not None else None
+                    if not (set(data.scanner_target_at_start) <= set(scan_axes_avail)):
+                        data_dropped = True
+                        continue
+                    entry = self._write_history_entry(data, back_data)
+                elif not (set(entry['data']['scanner_target_at_start']) <= set(scan_axes_avail)):
                     data_dropped = True
                     continue
+                elif not os.path.isfile(os.path.join(self.history_directory, entry['file'])):
+                    files_missing = True
+                    continue
 
-                history.append((data, back_data))
+                index.append(entry)
         except Exception as e:
             self.log.warning("Unable to load scan history. Deleting scan history.", exc_info=e)
 
         if data_dropped:
             self.log.warning("Deleted scan history entries containing an incompatible scan axes configuration.")
-            
-        return history
+        if files_missing:
+            self.log.warning(f"Deleted scan history entries with missing data files in {self.history_directory}.")
+
+        return index
+
+    @property
+    def history_directory(self) -> str:
+        """ Module specific directory of the scan history data files """
+        if self._history_directory:
+            return os.path.join(self._history_directory, self.module_name)
+        return os.path.join(get_appdata_dir(), 'scan_history', self.module_name)
 
     def get_last_history_entry(self, scan_axes: Optional[Tuple[str, ...]] = None)\
             -> Tuple[Optional[ScanData], Optional[ScanData]]:
@@ -145,23 +173,19 @@ class ScanningDataLogic(LogicBase):
         @return tuple: most recent scan data and back scan data
         """
         with self._thread_lock:
-            if scan_axes is None:
-                if self._scan_history:
-                    return self._scan_history[-1]
-                else:
-                    # history is empty
-                    return None, None
-            else:
-                index = self._get_last_history_entry_index(scan_axes)
-                if index is not None:
-                    return self._scan_history[index]
-                else:
-                    # no scan saved in history for these axes
-                    return None, None
+            index = self._get_last_history_entry_index(scan_axes)
+            if index is None:
+                # history is empty or no scan saved in history for these axes
+                return None, None
+            try:
+                return self._load_history_entry(index)
+            except Exception:
+                self.log.exception('Unable to load scan history entry:')
+                return None, None
 
     def get_axes_with_history_entry(self) -> Set[Tuple[str, ...]]:
         """Get all axes with at least one history entry."""
-        return {data.settings.axes for data, _ in self._scan_history}
+        return {tuple(entry['axes']) for entry in self._scan_history}
 
     def restore_from_history(self, scan_axes: Optional[Tuple[str, ...]] = None, set_target: bool = True):
         """Restore the latest entry in history for specified scan axes."""
@@ -198,8 +222,8 @@ class ScanningDataLogic(LogicBase):
             index = self._abs_index(index)
 
             try:
-                data, back_data = self._scan_history[index]
-            except IndexError:
+                data, back_data = self._load_history_entry(index)
+            except Exception:
                 self.log.exception('Unable to restore scan history with index "{0}"'.format(index))
                 return
 
@@ -217,20 +241,115 @@ class ScanningDataLogic(LogicBase):
             if scan_axes is None and self._scan_history:
                 return -1
             for i in range(len(self._scan_history) - 1, -1, -1):
-                data, _ = self._scan_history[i]
-                if data.settings.axes == scan_axes:
+                if tuple(self._scan_history[i]['axes']) == scan_axes:
                     return i
 
     def _append_to_history(self, data: ScanData, back_data: Optional[ScanData]):
         with self._thread_lock:
-            self._scan_history.append((data, back_data))
-            self._shrink_history()
-            self._curr_history_index = len(self._scan_history) - 1
+            try:
+                entry = self._write_history_entry(data, back_data)
+            except Exception:
+                self.log.exception('Unable to write scan data to scan history:')
+            else:
+                self._scan_history.append(entry)
+                self._cache_history_entry(entry['file'], data, back_data)
+                self._shrink_history()
+                self._curr_history_index = len(self._scan_history) - 1
             self.sigHistoryScanDataRestored.emit(data, back_data, True)
 
     def _shrink_history(self):
         while len(self._scan_history) > self._max_history_length:
-            self._scan_history.pop(0)
+            file = self._scan_history.pop(0)['file']
+            self._history_cache.pop(file, None)
+            try:
+                os.remove(os.path.join(self.history_directory, file))
+            except OSError:
+                self.log.warning(f'Unable to delete scan history file "{file}".')
+
+    def _write_history_entry(self, data: ScanData, back_data: Optional[ScanData]) -> Dict:
+        """ Write the data arrays of forward and backward scan data to a new history file.
+
+        @param ScanData data: scan data to store
+        @param ScanData back_data: optional back scan data to store
+
+        @return dict: history index entry
+        """
+        arrays = dict()
+        for prefix, scan_data in (('data', data), ('back_data', back_data)):
+            if scan_data is None:
+                continue
+            if scan_data.data is not None:
+                arrays.update({f'{prefix}_{ii:d}': arr for ii, arr in enumerate(scan_data.data.values())})
+            if scan_data.position_data is not None:
+                arrays.update({f'{prefix}_position_{ii:d}': arr for ii, arr in
+                               enumerate(scan_data.position_data.values())})
+
+        file = f'scan_{uuid.uuid4().hex}.npz'
+        os.makedirs(self.history_directory, exist_ok=True)
+        save = np.savez_compressed if self._compress_history else np.savez
+        save(os.path.join(self.history_directory, file), **arrays)
+        return {'file': file,
+                'axes': list(data.settings.axes),
+                'data': self.__scan_data_metadata(data),
+                'back_data': None if back_data is None else self.__scan_data_metadata(back_data)}
+
+    def _load_history_entry(self, index: int) -> Tuple[ScanData, Optional[ScanData]]:
+        """ Get forward and backward scan data of a history entry, loading it from disk if it is
+        not cached.
+
+        @param int index: history index
+
+        @return tuple: scan data and back scan data
+        """
+        entry = self._scan_history[index]
+        file = entry['file']
+        if file in self._history_cache:
+            self._history_cache.move_to_end(file)
+            return self._history_cache[file]
+
+        with np.load(os.path.join(self.history_directory, file)) as arrays:
+            data = self.__scan_data_from_arrays(entry['data'], arrays, 'data')
+            if entry['back_data'] is None:
+                back_data = None
+            else:
+                back_data = self.__scan_data_from_arrays(entry['back_data'], arrays, 'back_data')
+        self._cache_history_entry(file, data, back_data)
+        return data, back_data
+
+    def _cache_history_entry(self, file: str, data: ScanData, back_data: Optional[ScanData]):
+        self._history_cache[file] = (data, back_data)
+        while len(self._history_cache) > max(0, self._history_cache_length):
+            self._history_cache.popitem(last=False)
+
+    def _remove_orphaned_history_files(self):
+        """ Delete history files in the history directory that are not in the history index """
+        try:
+            files = os.listdir(self.history_directory)
+        except OSError:
+            return
+        indexed_files = {entry['file'] for entry in self._scan_history}
+        for file in files:
+            if re.fullmatch(r'scan_[0-9a-f]{32}\.npz', file) and file not in indexed_files:
+                try:
+                    os.remove(os.path.join(self.history_directory, file))
+                except OSError:
+                    self.log.warning(f'Unable to delete orphaned scan history file "{file}".')
+
+    @staticmethod
+    def __scan_data_metadata(scan_data: ScanData) -> Dict:
+        # dict representation of the scan data without data arrays
+        return replace(scan_data, _data=None, _position_data=None).to_dict()
+
+    @staticmethod
+    def __scan_data_from_arrays(metadata: Dict, arrays, prefix: str) -> ScanData:
+        scan_data = ScanData.from_dict(metadata)
+        if f'{prefix}_0' in arrays:
+            scan_data.data = {ch: arrays[f'{prefix}_{ii:d}'] for ii, ch in
+                              enumerate(scan_data.settings.channels)}
+        if f'{prefix}_position_0' in arrays:
+            scan_data.position_data = {ax: arrays[f'{prefix}_position_{ii:d}'] for ii, ax in
+                                       enumerate(scan_data.settings.position_feedback_axes)}
+        return scan_data
 
     def _abs_index(self, index):
         if index < 0:
@@ -22,11 +22,14 @@ If not, see <https://www.gnu.org/licenses/>.
 
 from uuid import UUID
 
+import time
 import numpy as np
 from PySide2 import QtCore
 import copy as cp
+from dataclasses import dataclass
 from typing import Dict, Tuple, List, Optional, Union
 import itertools
+from lmfit import Parameters
 
 from qudi.core.module import LogicBase
 from qudi.interface.scanning_probe_interface import ScanData, BackScanCapability
@@ -38,6 +41,16 @@ from qudi.util.fit_models.gaussian import Gaussian2D, Gaussian
 from qudi.core.configoption import ConfigOption
 
 
+@dataclass(frozen=True)
+class PeakEstimate:
+    """ Result of the centroid peak estimation providing the attributes of a lmfit ModelResult
+    used by the optimizer.
+    """
+    params: Parameters
+    best_values: Dict[str, float]
+    best_fit: np.ndarray
+
+
 class ScanningOptimizeLogic(LogicBase):
     """
     This logic module makes use of the scanning probe logic to perform a sequence of
@@ -47,6 +60,11 @@ class ScanningOptimizeLogic(LogicBase):
 
     scanning_optimize_logic:
         module.Class: 'scanning_optimize_logic.ScanningOptimizeLogic'
+        options:
+            estimator: 'fit'  # optional, 'fit' or 'centroid'
+            refine_steps: 0  # optional
+            refine_factor: 0.5  # optional
+            convergence_pixel_fraction: 0.5  # optional
         connect:
             scan_logic: scanning_probe_logic
 
@@ -55,6 +73,20 @@ class ScanningOptimizeLogic(LogicBase):
     # declare connectors
     _scan_logic = Connector(name='scan_logic', interface='ScanningProbeLogic')
 
+    # config options
+    # peak position estimation of each optimizer scan: Gaussian fit ('fit') or background-subtracted
+    # centroid of the peak above half maximum ('centroid')
+    _estimator: str = ConfigOption(name='estimator', default='fit', checker=lambda x: x in ('fit', 'centroid'))
+    # coarse-to-fine scanning: with refine_steps > 0 each sequence step starts with a coarse scan with
+    # the resolution scaled by refine_factor**refine_steps. Up to refine_steps scans follow around
+    # the estimated peak position with the range scaled by refine_factor each, so the last one
+    # reaches the configured pixel size.
+    _refine_steps: int = ConfigOption(name='refine_steps', default=0, checker=lambda x: x >= 0)
+    _refine_factor: float = ConfigOption(name='refine_factor', default=0.5, checker=lambda x: 0 < x < 1)
+    # a sequence step is finished early once the estimated peak position moved by less than this
+    # fraction of the pixel size of the last scan along all scan axes compared to the previous scan
+    _convergence_pixel_fraction: float = ConfigOption(name='convergence_pixel_fraction', default=0.5)
+
     # status variables
     # not configuring the back scan parameters is represented by empty dictionaries
 
@@ -87,6 +119,16 @@ class ScanningOptimizeLogic(LogicBase):
         self._last_fits = list()
         self._avail_axes = tuple()
         self._stashed_settings = None
+        self._refine_count = 0
+        # range, resolution and back scan resolution per axis of the current sequence step before
+        # coarse-to-fine scanning changed them
+        self._step_settings = None
+        # estimated peak position of the previous scan of the current sequence step
+        self._step_position = None
+        self._optimize_start_time = 0.
+        self._estimation_time = 0.
+        self._scan_count = 0
+        self._last_optimize_timing = dict()
 
     def on_activate(self):
         """Initialisation performed during activation of the module."""
@@ -268,6 +310,30 @@ class ScanningOptimizeLogic(LogicBase):
     def optimal_position(self):
         return self._optimal_position.copy()
 
+    @property
+    def estimator(self) -> str:
+        return self._estimator
+
+    @estimator.setter
+    def estimator(self, estimator: str) -> None:
+        """
+        @param str estimator: peak position estimation method, 'fit' or 'centroid'
+        """
+        if estimator not in ('fit', 'centroid'):
+            raise ValueError(f'Unknown optimizer estimator "{estimator}". Valid values are "fit" and "centroid".')
+        with self._thread_lock:
+            if self.module_state() != 'idle':
+                self.log.error('Cannot change optimizer estimator when module is locked.')
+            else:
+                self._estimator = estimator
+
+    @property
+    def last_optimize_timing(self) -> Dict[str, Union[str, int, float]]:
+        """ Timing of the last finished optimization run: estimator, total time, number of scans and
+        time spent estimating the peak positions (in s).
+        """
+        return self._last_optimize_timing.copy()
+
     def toggle_optimize(self, start):
         if start:
             self.start_optimize()
@@ -313,7 +379,11 @@ class ScanningOptimizeLogic(LogicBase):
                 self._last_fits = list()
             self._scan_logic().save_to_history = False  # optimizer scans not saved
             self._sequence_index = 0
+            self._refine_count = 0
             self._optimal_position = dict()
+            self._optimize_start_time = time.perf_counter()
+            self._estimation_time = 0.
+            self._scan_count = 0
             self.sigOptimizeStateChanged.emit(True, self.optimal_position, None)
             self._sigNextSequenceStep.emit()
 
@@ -321,7 +391,10 @@ class ScanningOptimizeLogic(LogicBase):
         with self._thread_lock:
             if self.module_state() == 'idle':
                 return
-            self._scan_logic().toggle_scan(True, self._scan_sequence[self._sequence_index], self.module_uuid)
+            scan_axes = self._scan_sequence[self._sequence_index]
+            if self._refine_steps > 0 and self._refine_count == 0:
+                self._configure_coarse_scan(scan_axes)
+            self._scan_logic().toggle_scan(True, scan_axes, self.module_uuid)
 
     def _scan_state_changed(self, is_running: bool,
                             data: Optional[ScanData], back_scan_data: Optional[ScanData],
@@ -336,16 +409,31 @@ class ScanningOptimizeLogic(LogicBase):
                 # self.log.debug(f"Trying to fit on data after scan of dim {data.scan_dimension}")
 
                 try:
+                    self._scan_count += 1
+                    t_start = time.perf_counter()
                     if data.settings.scan_dimension == 1:
                         x = np.linspace(*data.settings.range[0], data.settings.resolution[0])
-                        opt_pos, fit_data, fit_res = self._get_pos_from_1d_gauss_fit(x, data.data[self._data_channel])
+                        if self._estimator == 'centroid':
+                            opt_pos, fit_data, fit_res = self._get_pos_from_1d_centroid(
+                                x, data.data[self._data_channel]
+                            )
+                        else:
+                            opt_pos, fit_data, fit_res = self._get_pos_from_1d_gauss_fit(
+                                x, data.data[self._data_channel]
+                            )
                     else:
                         x = np.linspace(*data.settings.range[0], data.settings.resolution[0])
                         y = np.linspace(*data.settings.range[1], data.settings.resolution[1])
                         xy = np.meshgrid(x, y, indexing='ij')
-                        opt_pos, fit_data, fit_res = self._get_pos_from_2d_gauss_fit(
-                            xy, data.data[self._data_channel].ravel()
-                        )
+                        if self._estimator == 'centroid':
+                            opt_pos, fit_data, fit_res = self._get_pos_from_2d_centroid(
+                                xy, data.data[self._data_channel].ravel()
+                            )
+                        else:
+                            opt_pos, fit_data, fit_res = self._get_pos_from_2d_gauss_fit(
+                                xy, data.data[self._data_channel].ravel()
+                            )
+                    self._estimation_time += time.perf_counter() - t_start
 
                     position_update = {ax: opt_pos[ii] for ii, ax in enumerate(data.settings.axes)}
                     # self.log.debug(f"Optimizer issuing position update: {position_update}")
@@ -368,10 +456,18 @@ class ScanningOptimizeLogic(LogicBase):
                         self.stop_optimize()
                         return
 
+                    # Scan the same axes again around the new position if not converged yet
+                    if self._configure_refine_scan(data, position_update):
+                        self._refine_count += 1
+                        self._sigNextSequenceStep.emit()
+                        return
+
                 except:
                     self.log.exception("")
 
+            self._restore_step_settings()
             self._sequence_index += 1
+            self._refine_count = 0
 
             # Terminate optimize sequence if finished; continue with next sequence step otherwise
             if self._sequence_index >= len(self._scan_sequence):
@@ -391,6 +487,7 @@ class ScanningOptimizeLogic(LogicBase):
                     # optimizer scans are never saved in scanning history
                     self._scan_logic().stop_scan()
             finally:
+                self._restore_step_settings()
 
                 for setting, back_setting in self._stashed_settings:
                     # self.log.debug(f"Recovering scan settings: {setting}")
@@ -400,6 +497,13 @@ class ScanningOptimizeLogic(LogicBase):
                 self._stashed_settings = None
 
                 self._scan_logic().save_to_history = True
+                self._last_optimize_timing = {'estimator': self._estimator,
+                                              'total_time': time.perf_counter() - self._optimize_start_time,
+                                              'scan_count': self._scan_count,
+                                              'estimation_time': self._estimation_time}
+                self.log.info(f'Optimization took {self._last_optimize_timing["total_time"]:.3f} s for '
+                              f'{self._scan_count:d} scans, {self._estimation_time:.3f} s of which were spent '
+                              f'in peak estimation ({self._estimator}).')
                 self.module_state.unlock()
                 self.sigOptimizeStateChanged.emit(False, dict(), None)
 
@@ -435,6 +539,176 @@ class ScanningOptimizeLogic(LogicBase):
 
         return (fit_result.best_values['center'],), fit_result.best_fit, fit_result
 
+    def _get_pos_from_2d_centroid(self, xy, data):
+        model = Gaussian2D()
+
+        try:
+            values = self._estimate_centroid(np.stack([xy[0].ravel(), xy[1].ravel()]), data)
+            params = model.make_params(offset=values['offset'],
+                                       amplitude=values['amplitude'],
+                                       center_x=values['center'][0],
+                                       center_y=values['center'][1],
+                                       sigma_x=values['sigma'][0],
+                                       sigma_y=values['sigma'][1],
+                                       theta=0.)
+        except:
+            x_min, x_max = xy[0].min(), xy[0].max()
+            y_min, y_max = xy[1].min(), xy[1].max()
+            x_middle = (x_max - x_min) / 2 + x_min
+            y_middle = (y_max - y_min) / 2 + y_min
+            self.log.exception('2D centroid estimation unsuccessful.')
+            return (x_middle, y_middle), None, None
+
+        best_fit = model.eval(params, x=xy).reshape(xy[0].shape)
+        estimate = PeakEstimate(params=params, best_values=params.valuesdict(), best_fit=best_fit)
+        return (params['center_x'].value, params['center_y'].value), best_fit, estimate
+
+    def _get_pos_from_1d_centroid(self, x, data):
+        model = Gaussian()
+
+        try:
+            values = self._estimate_centroid(x[np.newaxis, :], data)
+            params = model.make_params(offset=values['offset'],
+                                       amplitude=values['amplitude'],
+                                       center=values['center'][0],
+                                       sigma=values['sigma'][0])
+        except:
+            x_min, x_max = x.min(), x.max()
+            middle = (x_max - x_min) / 2 + x_min
+            self.log.exception('1D centroid estimation unsuccessful.')
+            return (middle,), None, None
+
+        best_fit = model.eval(params, x=x)
+        estimate = PeakEstimate(params=params, best_values=params.valuesdict(), best_fit=best_fit)
+        return (params['center'].value,), best_fit, estimate
+
+    @staticmethod
+    def _estimate_centroid(coords: np.ndarray, data: np.ndarray) -> Dict[str, Union[float, np.ndarray]]:
+        """ Estimate a single Gaussian peak from the data points above half maximum after subtracting
+        the background (lowest decile of the data).
+        The center is the centroid of the data above half maximum, the widths are derived from the
+        second moments of the area above half maximum.
+
+        @param numpy.ndarray coords: coordinates of shape (dimensions, points)
+        @param numpy.ndarray data: data values of shape (points,)
+
+        @return dict: offset, amplitude, center and sigma (arrays of length dimensions)
+        """
+        valid = np.isfinite(data)
+        coords = coords[:, valid]
+        data = data[valid]
+        offset = np.percentile(data, 10)
+        amplitude = np.max(data) - offset
+        if not amplitude > 0:
+            raise ValueError('No peak found in data.')
+
+        # a peak narrower than the pixel size (e.g. in a coarse scan) leaves only the maximum above
+        # half maximum, its width is then limited to half the pixel size below
+        pixel_sizes = np.array([np.min(np.diff(np.unique(c))) if np.unique(c).size > 1 else 0 for c in coords])
+        weights = data - (offset + amplitude / 2)
+        above = weights > 0
+        weights = weights[above]
+        coords = coords[:, above]
+        center = np.sum(coords * weights, axis=1) / np.sum(weights)
+
+        # second moment of the area above half maximum: r**2/3 for a line, r**2/4 for a disk of
+        # half width r = sqrt(2 ln2) * sigma
+        moment_factor = 3 if coords.shape[0] == 1 else 4
+        half_widths = np.sqrt(moment_factor * np.var(coords, axis=1))
+        sigma = np.maximum(half_widths, pixel_sizes / 2) / np.sqrt(2 * np.log(2))
+        return {'offset': offset, 'amplitude': amplitude, 'center': center, 'sigma': sigma}
+
+    def _configure_coarse_scan(self, scan_axes: Tuple[str, ...]) -> None:
+        """ Remember the scan settings of the given axes and reduce their resolution by
+        refine_factor**refine_steps for the first scan of a sequence step.
+
+        @param tuple scan_axes: axes of the current sequence step
+        """
+        scan_logic: ScanningProbeLogic = self._scan_logic()
+        ranges = scan_logic.scan_ranges
+        resolution = scan_logic.scan_resolution
+        back_resolution = scan_logic.back_scan_resolution
+        self._step_settings = {ax: (ranges[ax], resolution[ax], back_resolution[ax]) for ax in scan_axes}
+        factor = self._refine_factor ** self._refine_steps
+        constraints = scan_logic.scanner_constraints
+        for ax, (_, res, back_res) in self._step_settings.items():
+            # keep more pixels than Gaussian fit parameters (offset, amplitude, center, sigma)
+            scan_logic.set_scan_resolution(ax, constraints.axes[ax].resolution.clip(max(5, round(res * factor))))
+            scan_logic.set_back_scan_resolution(
+                ax, constraints.axes[ax].resolution.clip(max(5, round(back_res * factor)))
+            )
+
+    def _configure_refine_scan(self, data: ScanData, position: Dict[str, float]) -> bool:
+        """ Configure the scan logic for another scan of the current sequence step around the
+        estimated peak position with the range of the step scaled by refine_factor**(n + 1) for the
+        n-th refinement scan, unless the maximum number of refinement scans is reached or the
+        position estimate converged between the last two scans.
+
+        @param ScanData data: data of the finished scan
+        @param dict position: estimated peak position for the scan axes
+
+        @return bool: True if a refinement scan has been configured, False otherwise
+        """
+        if self._step_settings is None:
+            return False
+        settings = data.settings
+        previous_position = self._step_position
+        self._step_position = {ax: position[ax] for ax in settings.axes}
+        if self._refine_count >= self._refine_steps:
+            return False
+
+        pixel_sizes = {ax: abs(rng[1] - rng[0]) / max(1, res - 1)
+                       for ax, rng, res in zip(settings.axes, settings.range, settings.resolution)}
+        if self._position_converged(previous_position,
+                                    self._step_position,
+                                    pixel_sizes,
+                                    self._convergence_pixel_fraction):
+            return False
+
+        scan_logic: ScanningProbeLogic = self._scan_logic()
+        constraints = scan_logic.scanner_constraints
+        factor = self._refine_factor ** (self._refine_count + 1)
+        for ax in settings.axes:
+            step_rng = self._step_settings[ax][0]
+            half_range = abs(step_rng[1] - step_rng[0]) * factor / 2
+            rng_start = constraints.axes[ax].position.clip(position[ax] - half_range)
+            rng_stop = constraints.axes[ax].position.clip(position[ax] + half_range)
+            scan_logic.set_scan_range(ax, (rng_start, rng_stop))
+        return True
+
+    @staticmethod
+    def _position_converged(previous_position: Optional[Dict[str, float]],
+                            position: Dict[str, float],
+                            pixel_sizes: Dict[str, float],
+                            pixel_fraction: float) -> bool:
+        """ Check if the estimated peak position moved by less than a fraction of the pixel size
+        along all axes since the previous scan.
+
+        @param dict previous_position: estimated position of the previous scan, None for the first scan
+        @param dict position: estimated position of the last scan
+        @param dict pixel_sizes: pixel size of the last scan for each axis
+        @param float pixel_fraction: fraction of the pixel size the position may move
+
+        @return bool: True if the position converged, False otherwise
+        """
+        if previous_position is None:
+            return False
+        return all(abs(pos - previous_position[ax]) < pixel_fraction * pixel_sizes[ax]
+                   for ax, pos in position.items())
+
+    def _restore_step_settings(self) -> None:
+        """ Restore the scan settings of the current sequence step changed by coarse-to-fine scanning.
+        """
+        if self._step_settings is None:
+            return
+        scan_logic: ScanningProbeLogic = self._scan_logic()
+        for ax, (rng, res, back_res) in self._step_settings.items():
+            scan_logic.set_scan_range(ax, rng)
+            scan_logic.set_scan_resolution(ax, res)
+            scan_logic.set_back_scan_resolution(ax, back_res)
+        self._step_settings = None
+        self._step_position = None
+
     def _check_scan_settings(self):
         """Basic check of scan settings for all axes."""
         scan_logic: ScanningProbeLogic = self._scan_logic()
@@ -75,6 +75,8 @@ class ScanningProbeLogic(LogicBase):
 
     # signals
     sigScanStateChanged = QtCore.Signal(bool, ScanData, ScanData, UUID)
+    # scan axes, first line, line after last line, forward lines, backward lines, caller id
+    sigScanDataUpdated = QtCore.Signal(tuple, int, int, dict, object, UUID)
     sigNewScanDataForHistory = QtCore.Signal(ScanData, ScanData)
     sigScannerTargetChanged = QtCore.Signal(dict, object)
     sigScanSettingsChanged = QtCore.Signal()
@@ -89,6 +91,7 @@ class ScanningProbeLogic(LogicBase):
         self.__scan_poll_timer = None
         self.__scan_poll_interval = 0
         self.__scan_stop_requested = True
+        self.__emitted_pixel_count = 0
         self._curr_caller_id = self.module_uuid
         self._save_to_hist = True
         self._tilt_corr_transform = None
@@ -600,6 +603,7 @@ class ScanningProbeLogic(LogicBase):
 
             self.log.debug(f'Successfully configured scanner and logic scan poll timer: {t_poll_ms} ms')
             self.__scan_poll_timer.setInterval(t_poll_ms)
+            self.__emitted_pixel_count = 0
 
             try:
                 self._scanner().start_scan()
@@ -639,8 +643,7 @@ class ScanningProbeLogic(LogicBase):
                 if self._scanner().module_state() == 'idle':
                     self.stop_scan()
                     return
-                # TODO Added the following line as a quick test; Maybe look at it with more caution if correct
-                self.sigScanStateChanged.emit(True, self.scan_data, self.back_scan_data, self._curr_caller_id)
+                self.__emit_scan_data_update()
 
                 # Queue next call to this slot
                 self.__scan_poll_timer.start()
@@ -650,6 +653,29 @@ class ScanningProbeLogic(LogicBase):
                 self.log.exception('An exception was raised while polling the scan:')
             return
 
+    def __emit_scan_data_update(self):
+        """
+        Emit the scan lines acquired since the last update instead of the full scan data. The line
+        being acquired during the last update is emitted again, since it was incomplete.
+        All lines are emitted if the scanner does not report the number of acquired pixels.
+        """
+        scanner = self._scanner()
+        settings = scanner.scan_settings
+        line_count = settings.resolution[1] if settings.scan_dimension == 2 else 1
+        filled_pixels = scanner.get_filled_pixel_count()
+        if filled_pixels is None:
+            start, stop = 0, line_count
+        else:
+            line_size = settings.resolution[0]
+            start = max(0, self.__emitted_pixel_count - 1) // line_size
+            stop = min(line_count, -(-filled_pixels // line_size))
+            self.__emitted_pixel_count = filled_pixels
+        if stop <= start:
+            return
+        data, back_data = scanner.get_scan_data_lines(start, stop)
+        if data is not None:
+            self.sigScanDataUpdated.emit(settings.axes, start, stop, data, back_data, self._curr_caller_id)
+
     def set_default_scan_settings(self):
         axes = self.scanner_constraints.axes
         self._scan_ranges = {ax: axes[ax].position.bounds for ax in self.scanner_axes}
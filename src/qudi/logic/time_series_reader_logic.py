@@ -19,6 +19,10 @@ You should have received a copy of the GNU Lesser General Public License along w
 If not, see <https://www.gnu.org/licenses/>.
 """
 
+import os
+import time
+import queue
+import threading
 import numpy as np
 import datetime as dt
 import matplotlib.pyplot as plt
@@ -35,8 +39,11 @@ from qudi.util.helpers import is_integer_type
 from qudi.util.network import netobtain
 from qudi.interface.data_instream_interface import StreamingMode, SampleTiming
 from qudi.interface.data_instream_interface import DataInStreamConstraints
-from qudi.util.datastorage import TextDataStorage
+from qudi.util.datastorage import TextDataStorage, NpyDataStorage, get_timestamp_filename
 from qudi.util.units import ScaledFloat
+from qudi.util.ring_buffer import RingBuffer
+from qudi.util.npy_stream_writer import NpyStreamWriter
+from qudi.util.min_max_pyramid import MinMaxPyramid
 
 
 class TimeSeriesReaderLogic(LogicBase):
@@ -51,6 +58,11 @@ class TimeSeriesReaderLogic(LogicBase):
             max_frame_rate: 20  # optional (default: 20Hz)
             channel_buffer_size: 1048576  # optional (default: 1MSample)
             max_raw_data_bytes: 1073741824  # optional (default: 1GB)
+            stream_recording: False  # optional, stream recorded raw data to .npy files on disk
+            stream_recording_queue_size: 256  # optional, max. number of data blocks held in RAM
+            recorded_envelope_block_size: 1024  # optional, finest resolution of recording envelope
+            acquisition_buffer_count: 4  # optional, number of data blocks queued for processing
+            backpressure_policy: 'block'  # optional, 'block' or 'drop' (loses data blocks) if processing falls behind
         connect:
             streamer: <streamer_name>
     """
@@ -75,6 +87,32 @@ class TimeSeriesReaderLogic(LogicBase):
                                         default=1024**3,
                                         missing='info',
                                         constructor=lambda x: int(round(x)))
+    # Stream recorded raw data to disk instead of accumulating it in RAM (not limited by
+    # max_raw_data_bytes)
+    _stream_recording = ConfigOption(name='stream_recording', default=False, missing='nothing')
+    _stream_recording_queue_size = ConfigOption(name='stream_recording_queue_size',
+                                                default=256,
+                                                missing='nothing',
+                                                constructor=lambda x: int(round(x)))
+    # Number of raw samples per block in the finest level of the recorded data min/max pyramid
+    _recorded_envelope_block_size = ConfigOption(name='recorded_envelope_block_size',
+                                                 default=1024,
+                                                 missing='nothing',
+                                                 constructor=lambda x: int(round(x)))
+    # Number of preallocated data block buffers passed from the acquisition thread to processing
+    _acquisition_buffer_count = ConfigOption(name='acquisition_buffer_count',
+                                             default=4,
+                                             missing='nothing',
+                                             constructor=lambda x: max(1, int(round(x))))
+    # Behaviour of the acquisition thread if all buffers are waiting to be processed:
+    # 'block' waits for processing (the hardware buffer keeps filling up), 'drop' discards the
+    # oldest unprocessed data block. Dropped data blocks are missing in the traces and in the raw
+    # data emitted via sigNewRawData, not only in the display updates. Data blocks are never
+    # dropped while recording.
+    _backpressure_policy = ConfigOption(name='backpressure_policy',
+                                        default='block',
+                                        missing='nothing',
+                                        checker=lambda x: x in ('block', 'drop'))
 
     # status vars
     _trace_window_size = StatusVar('trace_window_size', default=6)
@@ -99,24 +137,39 @@ class TimeSeriesReaderLogic(LogicBase):
         self._threadlock = Mutex()
         self._samples_per_frame = None
 
-        # Data arrays
-        self._data_buffer = None
-        self._times_buffer = None
+        # Data arrays (trace data and averaged trace data are dicts of one RingBuffer per channel)
+        self._frame_buffers = list()
         self._trace_data = None
         self._trace_times = None
         self._trace_data_averaged = None
         self.__moving_filter = None
 
+        # min/max decimation pyramids of trace data and averaged trace data for display
+        self._trace_pyramid = None
+        self._trace_pyramid_averaged = None
+        # Number of pixels to reduce the emitted trace data to (0 to emit full trace data)
+        self._display_resolution = 0
+
         # for data recording
         self._recorded_raw_data = None
         self._recorded_raw_times = None
         self._recorded_sample_count = 0
         self._data_recording_active = False
         self._record_start_time = None
+        self._recording_writer = None
+        self._recorded_pyramid = None
 
         # important to know for method of reading the buffer
         self._streamer_is_remote = False
 
+        # acquisition thread passing data blocks to processing via a bounded queue
+        self._acquisition_thread = None
+        self._acquisition_stop_event = threading.Event()
+        self._acquisition_error = None
+        self._free_frames = queue.Queue()
+        self._acquired_frames = queue.Queue()
+        self._acquisition_metrics = dict()
+
     def on_activate(self) -> None:
         """ Initialisation performed during activation of the module. """
         # Temp reference to connected hardware module
@@ -175,7 +228,7 @@ class TimeSeriesReaderLogic(LogicBase):
         self.set_channel_settings(self._active_channels, self._averaged_channels)
         self.set_trace_settings(data_rate=self._data_rate)
         # set up internal frame loop connection
-        self._sigNextDataFrame.connect(self._acquire_data_block, QtCore.Qt.QueuedConnection)
+        self._sigNextDataFrame.connect(self._process_data_frames, QtCore.Qt.QueuedConnection)
 
     def on_deactivate(self) -> None:
         """ De-initialisation performed during deactivation of the module.
@@ -187,38 +240,74 @@ class TimeSeriesReaderLogic(LogicBase):
                 self._stop()
         finally:
             # Free (potentially) large raw data buffers
-            self._data_buffer = None
-            self._times_buffer = None
+            self._frame_buffers = list()
 
     def _init_data_arrays(self) -> None:
+        self._samples_per_frame = max(1, int(round(self.data_rate / self._max_frame_rate)))
         channel_count = len(self.active_channel_names)
-        averaged_channel_count = len(self._averaged_channels)
         window_size = int(round(self._trace_window_size * self.data_rate))
         constraints = self.streamer_constraints
         trace_dtype = np.float64 if is_integer_type(constraints.data_type) else constraints.data_type
 
-        # processed data arrays
-        self._trace_data = np.zeros(
-            [window_size + self._moving_average_width // 2, channel_count],
-            dtype=trace_dtype
-        )
-        self._trace_data_averaged = np.zeros(
-            [window_size - self._moving_average_width // 2, averaged_channel_count],
-            dtype=trace_dtype
-        )
-        self._trace_times = np.arange(window_size, dtype=np.float64)
+        # processed data ring buffers (one per channel to keep each channel trace contiguous)
+        self._trace_data = {
+            ch: RingBuffer(size=window_size + self._moving_average_width // 2, dtype=trace_dtype)
+            for ch in self.active_channel_names
+        }
+        self._trace_data_averaged = {
+            ch: RingBuffer(size=window_size - self._moving_average_width // 2, dtype=trace_dtype)
+            for ch in self._averaged_channels
+        }
+        trace_times = np.arange(window_size, dtype=np.float64)
         if constraints.sample_timing == SampleTiming.TIMESTAMP:
-            self._trace_times -= window_size
+            trace_times -= window_size
         if constraints.sample_timing != SampleTiming.RANDOM:
-            self._trace_times /= self.data_rate
-
-        # raw data buffers
-        self._data_buffer = np.zeros(shape=(channel_count, self._channel_buffer_size),
-                                    dtype=constraints.data_type)
-        if constraints.sample_timing == SampleTiming.TIMESTAMP:
-            self._times_buffer = np.zeros(self._channel_buffer_size, dtype=np.float64)
+            trace_times /= self.data_rate
+        self._trace_times = RingBuffer.from_array(trace_times)
+
+        # min/max decimation pyramids (initially covering the zero filled ring buffers). The
+        # recorded data pyramid is discarded along with the previous settings.
+        self._recorded_pyramid = None
+        trace_size = window_size + self._moving_average_width // 2
+        self._trace_pyramid = MinMaxPyramid(
+            channel_count=channel_count,
+            capacity=trace_size,
+            dtype=trace_dtype,
+            sample_reader=lambda start, stop: self._read_trace_samples(self._trace_pyramid,
+                                                                       self._trace_data,
+                                                                       start,
+                                                                       stop)
+        )
+        self._trace_pyramid.append(np.zeros((trace_size, channel_count), dtype=trace_dtype))
+        if self._averaged_channels:
+            averaged_size = window_size - self._moving_average_width // 2
+            self._trace_pyramid_averaged = MinMaxPyramid(
+                channel_count=len(self._averaged_channels),
+                capacity=averaged_size,
+                dtype=trace_dtype,
+                sample_reader=lambda start, stop: self._read_trace_samples(
+                    self._trace_pyramid_averaged,
+                    self._trace_data_averaged,
+                    start,
+                    stop
+                )
+            )
+            self._trace_pyramid_averaged.append(
+                np.zeros((averaged_size, len(self._averaged_channels)), dtype=trace_dtype)
+            )
         else:
-            self._times_buffer = None
+            self._trace_pyramid_averaged = None
+
+        # raw data buffers (one pair of data and timestamp buffer per queued data block)
+        self._frame_buffers = list()
+        for _ in range(self._acquisition_buffer_count):
+            data_buffer = np.zeros(channel_count * self._channel_buffer_size,
+                                   dtype=constraints.data_type)
+            if constraints.sample_timing == SampleTiming.TIMESTAMP:
+                times_buffer = np.zeros(self._channel_buffer_size, dtype=np.float64)
+            else:
+                times_buffer = None
+            self._frame_buffers.append((data_buffer, times_buffer))
 
     @property
     def streamer_constraints(self) -> DataInStreamConstraints:
@@ -296,23 +385,149 @@ class TimeSeriesReaderLogic(LogicBase):
     @property
     def trace_data(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
         """ Read-only property returning the x-axis of the data trace and a dictionary of the
-        corresponding trace data arrays for each channel
+        corresponding trace data arrays for each channel.
+        The arrays are read-only views into the trace ring buffers (see _emit_data_changed).
         """
-        data_offset = self._trace_data.shape[0] - self._moving_average_width // 2
-        data = {ch: self._trace_data[:data_offset, i] for i, ch in
-                enumerate(self.active_channel_names)}
-        return self._trace_times, data
+        data_offset = len(self._trace_times)
+        data = {ch: self._trace_data[ch].data[:data_offset] for ch in self.active_channel_names}
+        return self._trace_times.data, data
 
     @property
     def averaged_trace_data(self) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
         """ Read-only property returning the x-axis of the averaged data trace and a dictionary of
-        the corresponding averaged trace data arrays for each channel
+        the corresponding averaged trace data arrays for each channel.
+        The arrays are read-only views into the trace ring buffers (see _emit_data_changed).
         """
         if not self.averaged_channel_names or self.moving_average_width <= 1:
             return None, None
-        data = {ch: self._trace_data_averaged[:, i] for i, ch in
-                enumerate(self.averaged_channel_names)}
-        return self._trace_times[-self._trace_data_averaged.shape[0]:], data
+        data = {ch: self._trace_data_averaged[ch].data for ch in self.averaged_channel_names}
+        averaged_size = len(self._trace_times) - self._moving_average_width // 2
+        return self._trace_times.latest(averaged_size), data
+
+    @property
+    def display_resolution(self) -> int:
+        """ Number of pixels the trace data emitted via sigDataChanged is reduced to (min/max
+        envelope, see get_trace_envelope). 0 means the full trace data is emitted.
+        """
+        return self._display_resolution
+
+    @display_resolution.setter
+    def display_resolution(self, val: int) -> None:
+        self.set_display_resolution(val)
+
+    @QtCore.Slot(int)
+    def set_display_resolution(self, pixel_count: int) -> None:
+        """ Set the number of pixels the trace data emitted via sigDataChanged is reduced to.
+        Set to 0 in order to emit the full trace data.
+
+        @param int pixel_count: number of pixels (usually the width of the plot area)
+        """
+        with self._threadlock:
+            self._display_resolution = max(0, int(pixel_count))
+            if self.module_state() != 'locked':
+                self._emit_data_changed()
+
+    def get_trace_envelope(self,
+                           pixel_count: int,
+                           start: Optional[float] = None,
+                           stop: Optional[float] = None
+                           ) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.ndarray, Dict[str, np.ndarray]]:
+        """ Returns the min/max envelope of the trace data and averaged trace data within the x-axis
+        range [start, stop] reduced to pixel_count pixels.
+        Each pixel is represented by two points (minimum and maximum) at the x-axis value of the
+        first sample in that pixel. The newest sample within the range is added as last point.
+        The cost does not depend on the trace window size or data rate (see MinMaxPyramid).
+
+        @param int pixel_count: number of pixels to reduce the trace data to
+        @param float start: optional x-axis value to start from (default: trace start)
+        @param float stop: optional x-axis value to stop at (default: trace end)
+
+        @return tuple: x-axis, trace data dict, x-axis of averaged trace, averaged trace data dict
+                       (same format as trace_data and averaged_trace_data)
+        """
+        with self._threadlock:
+            return self._get_trace_envelope(pixel_count, start, stop)
+
+    def _get_trace_envelope(self, pixel_count, start=None, stop=None):
+        times = self._trace_times.data
+        x, data = self._envelope_curves(self._trace_pyramid,
+                                        self._trace_data,
+                                        times,
+                                        pixel_count,
+                                        start,
+                                        stop)
+        if not self.averaged_channel_names or self.moving_average_width <= 1:
+            return x, data, None, None
+        averaged_times = self._trace_times.latest(len(times) - self._moving_average_width // 2)
+        averaged_x, averaged_data = self._envelope_curves(self._trace_pyramid_averaged,
+                                                          self._trace_data_averaged,
+                                                          averaged_times,
+                                                          pixel_count,
+                                                          start,
+                                                          stop)
+        return x, data, averaged_x, averaged_data
+
+    @staticmethod
+    def _envelope_curves(pyramid: MinMaxPyramid,
+                         buffers: Mapping[str, RingBuffer],
+                         times: np.ndarray,
+                         pixel_count: int,
+                         start: Optional[float],
+                         stop: Optional[float]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """ Envelope curves of the oldest len(times) samples in the ring buffers covered by the
+        given pyramid.
+        """
+        first = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        last = len(times) if stop is None else int(np.searchsorted(times, stop, side='right'))
+        indices, minima, maxima = pyramid.envelope(pyramid.first_sample + first,
+                                                   pyramid.first_sample + last,
+                                                   pixel_count)
+        if indices.size == 0:
+            return times[:0].copy(), {ch: buffer.data[:0].copy() for ch, buffer in buffers.items()}
+        x = np.empty(2 * indices.size + 1, dtype=times.dtype)
+        x[:-1] = np.repeat(times[indices - pyramid.first_sample], 2)
+        x[-1] = times[last - 1]
+        data = dict()
+        for ii, (ch, buffer) in enumerate(buffers.items()):
+            y = np.empty(2 * indices.size + 1, dtype=minima.dtype)
+            y[0:-1:2] = minima[:, ii]
+            y[1:-1:2] = maxima[:, ii]
+            y[-1] = buffer.data[last - 1]
+            data[ch] = y
+        return x, data
+
+    @staticmethod
+    def _read_trace_samples(pyramid: MinMaxPyramid,
+                            buffers: Mapping[str, RingBuffer],
+                            start: int,
+                            stop: int) -> np.ndarray:
+        """ Sample reader for the trace pyramids. Reads samples by absolute index from the ring
+        buffers (one per channel) the pyramid is built on.
+        """
+        count = pyramid.sample_count - start
+        return np.column_stack([buffer.latest(count)[:stop - start] for buffer in buffers.values()])
+
+    def _emit_data_changed(self) -> None:
+        """ Emits sigDataChanged with the current trace data.
+        If a display resolution is set, the min/max envelope of the trace data is emitted instead
+        (see get_trace_envelope).
+        The trace arrays are views into the trace ring buffers which remain unchanged until at least
+        a full trace window of new samples has been acquired (minus one frame). Copies are only
+        emitted for short trace windows where this would not leave enough time for receivers in
+        other threads to process the data.
+        """
+        if 0 < 2 * self._display_resolution < len(self._trace_times):
+            self.sigDataChanged.emit(*self._get_trace_envelope(self._display_resolution))
+            return
+        times, data = self.trace_data
+        avg_times, avg_data = self.averaged_trace_data
+        if len(self._trace_times) < 4 * self._samples_per_frame:
+            times = times.copy()
+            data = {ch: arr.copy() for ch, arr in data.items()}
+            if avg_data is not None:
+                avg_times = avg_times.copy()
+                avg_data = {ch: arr.copy() for ch, arr in avg_data.items()}
+        self.sigDataChanged.emit(times, data, avg_times, avg_data)
 
     @property
     def trace_settings(self) -> Dict[str, Union[int, float]]:
@@ -397,7 +612,6 @@ class TimeSeriesReaderLogic(LogicBase):
                 self._trace_window_size = settings['trace_window_size']
                 self.__moving_filter = np.full(shape=self._moving_average_width,
                                                 fill_value=1.0 / self._moving_average_width)
-                self._samples_per_frame = max(1, int(round(self.data_rate / self._max_frame_rate)))
                 self._init_data_arrays()
         except:
             self.log.exception('Error while trying to configure new trace settings:')
@@ -407,7 +621,7 @@ class TimeSeriesReaderLogic(LogicBase):
             if restart:
                 self.start_reading()
             else:
-                self.sigDataChanged.emit(*self.trace_data, *self.averaged_trace_data)
+                self._emit_data_changed()
 
     @QtCore.Slot(list, list)
     def set_channel_settings(self, enabled: Sequence[str], averaged: Sequence[str]) -> None:
@@ -444,7 +658,7 @@ class TimeSeriesReaderLogic(LogicBase):
             if restart:
                 self.start_reading()
             else:
-                self.sigDataChanged.emit(*self.trace_data, *self.averaged_trace_data)
+                self._emit_data_changed()
 
     @QtCore.Slot()
     def start_reading(self) -> None:
@@ -461,12 +675,12 @@ class TimeSeriesReaderLogic(LogicBase):
                     self._init_recording_arrays()
                     self._record_start_time = dt.datetime.now()
                 self._streamer().start_stream()
+                self._start_acquisition_thread()
             except:
                 self.module_state.unlock()
                 self.log.exception('Error while starting stream reader:')
                 raise
             finally:
-                self._sigNextDataFrame.emit()
                 self.sigStatusChanged.emit(self.module_state() == 'locked',
                                             self._data_recording_active)
 
@@ -479,6 +693,7 @@ class TimeSeriesReaderLogic(LogicBase):
     def _stop(self) -> None:
         if self.module_state() == 'locked':
             try:
+                self._stop_acquisition_thread()
                 self._streamer().stop_stream()
             except:
                 self.log.exception('Error while trying to stop stream reader:')
@@ -487,60 +702,196 @@ class TimeSeriesReaderLogic(LogicBase):
                 self._stop_cleanup()
 
     def _stop_cleanup(self) -> None:
-        self.module_state.unlock()
-        self._stop_recording()
+        # Process data blocks acquired before stopping so recordings are complete
+        try:
+            self._process_acquired_frames()
+        except:
+            self.log.exception('Error while processing remaining data blocks:')
+        finally:
+            self.module_state.unlock()
+            self._stop_recording()
 
-    @QtCore.Slot()
-    def _acquire_data_block(self) -> None:
-        """ This method gets the available data from the hardware. It runs repeatedly by being
-        connected to a QTimer timeout signal.
+    @property
+    def acquisition_metrics(self) -> Dict[str, Union[int, float]]:
+        """ Read-only property returning statistics of the current (or last) data acquisition:
+
+            queue_depth: number of acquired data blocks currently waiting to be processed
+            max_queue_depth: maximum number of data blocks waiting to be processed at once
+            acquired_frames: number of data blocks read from the streaming hardware
+            processed_frames: number of data blocks processed
+            dropped_frames: number of data blocks discarded before processing (backpressure
+                            policy 'drop')
+            skipped_display_updates: number of processed data blocks without a separate display
+                                     update (sigDataChanged) because of pending data blocks
+            blocked_time: time in seconds the acquisition thread waited for processing to free a
+                          buffer (backpressure policy 'block' or while recording)
         """
-        with self._threadlock:
-            if self.module_state() == 'locked':
+        metrics = self._acquisition_metrics.copy()
+        metrics['queue_depth'] = self._acquired_frames.qsize()
+        return metrics
+
+    def _start_acquisition_thread(self) -> None:
+        """ Resets the data block queues and starts the thread reading data blocks from the streaming
+        hardware.
+        """
+        self._acquisition_stop_event.clear()
+        self._acquisition_error = None
+        self._acquisition_metrics = {'max_queue_depth'        : 0,
+                                     'acquired_frames'        : 0,
+                                     'processed_frames'       : 0,
+                                     'dropped_frames'         : 0,
+                                     'skipped_display_updates': 0,
+                                     'blocked_time'           : 0.}
+        self._free_frames = queue.Queue()
+        self._acquired_frames = queue.Queue()
+        for frame_buffers in self._frame_buffers:
+            self._free_frames.put(frame_buffers)
+        self._acquisition_thread = threading.Thread(
+            target=self._acquisition_loop,
+            name='TimeSeriesReaderLogic acquisition',
+            kwargs={'streamer'          : self._streamer(),
+                    'channel_count'     : len(self.active_channel_names),
+                    'samples_per_frame' : self._samples_per_frame * self._oversampling_factor,
+                    'max_samples'       : (self._channel_buffer_size // self._oversampling_factor) *
+                                          self._oversampling_factor,
+                    'oversampling_factor': self._oversampling_factor},
+            daemon=True
+        )
+        self._acquisition_thread.start()
+
+    def _stop_acquisition_thread(self) -> None:
+        """ Stops the acquisition thread and waits for the currently running read to finish """
+        thread = self._acquisition_thread
+        self._acquisition_thread = None
+        if thread is not None:
+            self._acquisition_stop_event.set()
+            thread.join()
+
+    def _acquisition_loop(self,
+                          streamer,
+                          channel_count: int,
+                          samples_per_frame: int,
+                          max_samples: int,
+                          oversampling_factor: int) -> None:
+        """ Runs in the acquisition thread. Repeatedly reads all available samples (at least one
+        frame) from the streaming hardware into a free buffer and queues it for processing by
+        _process_data_frames. Does not access any logic state except for the data block queues.
+        """
+        metrics = self._acquisition_metrics
+        try:
+            while not self._acquisition_stop_event.is_set():
+                frame_buffers = self._get_free_frame()
+                if frame_buffers is None:
+                    break
+                data_buffer, times_buffer = frame_buffers
+                samples_to_read = max(
+                    (streamer.available_samples // oversampling_factor) * oversampling_factor,
+                    samples_per_frame
+                )
+                samples_to_read = min(samples_to_read, max_samples)
                 try:
-                    streamer = self._streamer()
-                    samples_to_read = max(
-                        (streamer.available_samples // self._oversampling_factor) * self._oversampling_factor,
-                        self._samples_per_frame * self._oversampling_factor
-                    )
-                    samples_to_read = min(
-                        samples_to_read,
-                        (self._channel_buffer_size // self._oversampling_factor) * self._oversampling_factor
-                    )
                     # read the current counter values
                     if not self._streamer_is_remote:
                         # we can use the more efficient method of using a shared buffer
-                        streamer.read_data_into_buffer(data_buffer=self._data_buffer,
-                                                        samples_per_channel=samples_to_read,
-                                                        timestamp_buffer=self._times_buffer)
+                        streamer.read_data_into_buffer(data_buffer=data_buffer,
+                                                       samples_per_channel=samples_to_read,
+                                                       timestamp_buffer=times_buffer)
                     else:
                         # streamer is remote, we need to have a new buffer created and passed to us
-                        self._data_buffer, self._times_buffer = streamer.read_data(
-                            samples_per_channel=samples_to_read
-                        )
-                        self._data_buffer = netobtain(self._data_buffer)
-                        self._times_buffer = netobtain(self._times_buffer)
-
-                    # Process data
-                    channel_count = len(self.active_channel_names)
-                    data_view = self._data_buffer[:channel_count * samples_to_read]
-                    self._process_trace_data(data_view)
-                    if self._times_buffer is None:
-                        times_view = None
+                        data, times = streamer.read_data(samples_per_channel=samples_to_read)
+                        data_buffer, times_buffer = netobtain(data), netobtain(times)
+                except:
+                    self._free_frames.put(frame_buffers)
+                    raise
+                data_view = data_buffer[:channel_count * samples_to_read]
+                times_view = None if times_buffer is None else times_buffer[:samples_to_read]
+                self._acquired_frames.put((frame_buffers, data_view, times_view))
+                metrics['acquired_frames'] += 1
+                metrics['max_queue_depth'] = max(metrics['max_queue_depth'],
+                                                 self._acquired_frames.qsize())
+                self._sigNextDataFrame.emit()
+        except Exception as err:
+            self._acquisition_error = err
+            self._sigNextDataFrame.emit()
+
+    def _get_free_frame(self) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """ Returns a free pair of data and timestamp buffer for the acquisition thread according to
+        the backpressure policy. Returns None if the acquisition thread has been stopped meanwhile.
+        """
+        metrics = self._acquisition_metrics
+        try:
+            return self._free_frames.get_nowait()
+        except queue.Empty:
+            pass
+        wait_start = time.perf_counter()
+        try:
+            while not self._acquisition_stop_event.is_set():
+                if self._backpressure_policy == 'drop' and not self._data_recording_active:
+                    try:
+                        frame_buffers, _, _ = self._acquired_frames.get_nowait()
+                    except queue.Empty:
+                        pass
                     else:
-                        times_view = self._times_buffer[:samples_to_read]
-                        self._process_trace_times(times_view)
+                        metrics['dropped_frames'] += 1
+                        return frame_buffers
+                try:
+                    return self._free_frames.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            return None
+        finally:
+            metrics['blocked_time'] += time.perf_counter() - wait_start
 
-                    if self._data_recording_active:
-                        self._add_to_recording_array(data_view, times_view)
-                    self.sigNewRawData.emit(data_view, times_view)
+    @QtCore.Slot()
+    def _process_data_frames(self) -> None:
+        """ Processes all data blocks queued by the acquisition thread and emits a single display
+        update afterwards.
+        """
+        with self._threadlock:
+            if self.module_state() != 'locked':
+                return
+            try:
+                if self._acquisition_error is not None:
+                    raise self._acquisition_error
+                if self._process_acquired_frames() > 0:
                     # Emit update signal
-                    self.sigDataChanged.emit(*self.trace_data, *self.averaged_trace_data)
-                except Exception as e:
-                    self.log.warning(f'Reading data from streamer went wrong: {e}')
-                    self._stop_cleanup()
-                    return
-                self._sigNextDataFrame.emit()
+                    self._emit_data_changed()
+            except Exception as e:
+                self.log.warning(f'Reading data from streamer went wrong: {e}')
+                self._stop_acquisition_thread()
+                self._stop_cleanup()
+
+    def _process_acquired_frames(self) -> int:
+        """ Processes all data blocks waiting in the queue and returns them to the free buffers.
+        Data blocks queued meanwhile are left for the next call, so processing slower than
+        acquisition does not starve the display updates.
+
+        @return int: number of processed data blocks
+        """
+        processed = 0
+        for _ in range(self._acquired_frames.qsize()):
+            try:
+                frame_buffers, data_view, times_view = self._acquired_frames.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                # Process data
+                self._process_trace_data(data_view)
+                if times_view is not None:
+                    self._process_trace_times(times_view)
+                if self._data_recording_active:
+                    self._add_to_recording_array(data_view, times_view)
+                # Emit copies since the buffers are reused by the acquisition thread before queued
+                # receivers get to read them
+                self.sigNewRawData.emit(data_view.copy(),
+                                        None if times_view is None else times_view.copy())
+            finally:
+                self._free_frames.put(frame_buffers)
+            processed += 1
+        self._acquisition_metrics['processed_frames'] += processed
+        if processed > 1:
+            self._acquisition_metrics['skipped_display_updates'] += processed - 1
+        return processed
 
     def _process_trace_times(self, times_buffer: np.ndarray) -> None:
         if self.oversampling_factor > 1:
@@ -549,13 +900,8 @@ class TimeSeriesReaderLogic(LogicBase):
             )
             times_buffer = np.mean(times_buffer, axis=1)
 
-        # discard data outside time frame
-        times_buffer = times_buffer[-self._trace_times.size:]
-
-        # Roll data array to have a continuously running time trace
-        self._trace_times = np.roll(self._trace_times, -times_buffer.size)
-        # Insert new data
-        self._trace_times[-times_buffer.size:] = times_buffer
+        # Append new times to the ring buffer (discards times outside the time frame)
+        self._trace_times.append(times_buffer)
 
     def _process_trace_data(self, data_buffer: np.ndarray) -> None:
         """ Processes raw data from the streaming device """
@@ -563,38 +909,62 @@ class TimeSeriesReaderLogic(LogicBase):
         samples_per_channel = data_buffer.size // channel_count
         data_view = data_buffer.reshape([samples_per_channel, channel_count])
         # Down-sample and average according to oversampling factor
+        data_view = self._oversample_trace_data(data_view)
+        # Append new data to the ring buffers (discards data outside the time frame)
+        self._append_trace_data(data_view)
+        # Calculate moving average of the new samples
+        if self.moving_average_width > 1 and self.averaged_channel_names:
+            self._append_moving_average(data_view.shape[0])
+
+    def _oversample_trace_data(self, data_view: np.ndarray) -> np.ndarray:
+        """ Averages each oversampling_factor consecutive raw samples of shape
+        (samples, channels) into a single trace sample.
+        """
         if self.oversampling_factor > 1:
+            samples_per_channel, channel_count = data_view.shape
             data_view = data_view.reshape(
                 [samples_per_channel // self.oversampling_factor,
                 self.oversampling_factor,
                 channel_count]
             )
             data_view = np.mean(data_view, axis=1)
-        # discard data outside time frame
-        data_view = data_view[-self._trace_data.shape[0]:, :]
-        new_channel_samples = data_view.shape[0]
-
-        # Roll data array to have a continuously running time trace
-        self._trace_data = np.roll(self._trace_data, -new_channel_samples, axis=0)
-        
-        # Insert new data
-        self._trace_data[-new_channel_samples:, :] = data_view
-        # Calculate moving average by using numpy.convolve with a normalized uniform filter
-        if self.moving_average_width > 1 and self.averaged_channel_names:
-            # Only convolve the new data and roll the previously calculated moving average
-            self._trace_data_averaged = np.roll(self._trace_data_averaged,
-                                                -new_channel_samples,
-                                                axis=0)
-            offset = new_channel_samples + len(self.__moving_filter) - 1
-            for i, ch in enumerate(self.averaged_channel_names):
-                data_index = self.active_channel_names.index(ch)
-                self._trace_data_averaged[-new_channel_samples:, i] = np.convolve(
-                    self._trace_data[-offset:, data_index],
-                    self.__moving_filter,
-                    mode='valid'
-                )
+        return data_view
+
+    def _append_trace_data(self, data_view: np.ndarray) -> None:
+        """ Appends new trace samples of shape (samples, channels) to the trace ring buffers and the
+        trace min/max pyramid.
+        """
+        for i, ch in enumerate(self.active_channel_names):
+            self._trace_data[ch].append(data_view[:, i])
+        self._trace_pyramid.append(data_view)
+
+    def _append_moving_average(self, new_samples: int) -> None:
+        """ Calculates the moving average for the newest new_samples trace samples by using
+        numpy.convolve with a normalized uniform filter.
+        """
+        # Only convolve the new data and append it to the previously calculated moving average
+        averaged_samples = list()
+        for ch in self.averaged_channel_names:
+            averaged_buffer = self._trace_data_averaged[ch]
+            new_averaged_samples = min(new_samples, len(averaged_buffer))
+            offset = new_averaged_samples + len(self.__moving_filter) - 1
+            averaged_samples.append(
+                np.convolve(self._trace_data[ch].latest(offset), self.__moving_filter, mode='valid')
+            )
+            averaged_buffer.append(averaged_samples[-1])
+        self._trace_pyramid_averaged.append(np.column_stack(averaged_samples))
 
     def _init_recording_arrays(self) -> None:
+        # Coarse min/max pyramid of the recorded raw data. Raw samples are only accessible for
+        # partial blocks if the data is held in RAM.
+        self._recorded_pyramid = MinMaxPyramid(
+            channel_count=len(self.active_channel_names),
+            base_factor=self._recorded_envelope_block_size,
+            sample_reader=None if self._stream_recording else self._read_recorded_samples
+        )
+        if self._stream_recording:
+            self._init_recording_writer()
+            return
         constraints = self.streamer_constraints
         try:
             sample_bytes = np.finfo(constraints.data_type).bits // 8
@@ -619,6 +989,28 @@ class TimeSeriesReaderLogic(LogicBase):
                                             dtype=constraints.data_type)
         self._recorded_sample_count = 0
 
+    def _init_recording_writer(self) -> None:
+        """ Creates the .npy files to stream recorded raw data (and timestamps) into and starts
+        the writer thread. The file name is derived from the recording start time.
+        """
+        constraints = self.streamer_constraints
+        self._recorded_raw_data = None
+        self._recorded_raw_times = None
+        self._recorded_sample_count = 0
+        file_path = os.path.join(self.module_default_data_dir,
+                                 get_timestamp_filename(dt.datetime.now(), nametag='data_trace'))
+        files = {'data': (f'{file_path}.npy',
+                          constraints.data_type,
+                          (len(self.active_channel_names),))}
+        if constraints.sample_timing == SampleTiming.TIMESTAMP:
+            files['times'] = (f'{file_path}_times.npy', np.float64, tuple())
+        self._recording_writer = NpyStreamWriter(
+            files,
+            max_queued_blocks=self._stream_recording_queue_size
+        )
+        self._recording_writer.start()
+        self.log.debug(f'Streaming recorded raw data to "{file_path}.npy"')
+
     def _expand_recording_arrays(self) -> int:
         total_samples = self._recorded_raw_data.size
         channel_count = len(self.active_channel_names)
@@ -643,6 +1035,15 @@ class TimeSeriesReaderLogic(LogicBase):
 
     def _add_to_recording_array(self, data, times=None) -> None:
         channel_count = len(self.active_channel_names)
+        if self._recording_writer is not None:
+            new_samples = data.size // channel_count
+            blocks = {'data': np.ravel(data)[:new_samples * channel_count]}
+            if times is not None and 'times' in self._recording_writer.paths:
+                blocks['times'] = times[:new_samples]
+            self._recording_writer.append(**blocks)
+            self._recorded_pyramid.append(blocks['data'])
+            self._recorded_sample_count += new_samples
+            return
         free_samples_per_channel = (self._recorded_raw_data.size // channel_count) - \
             self._recorded_sample_count
         new_samples = data.size // channel_count
@@ -656,6 +1057,7 @@ class TimeSeriesReaderLogic(LogicBase):
                     f'data recording.'
                 )
                 self._recorded_raw_data[channel_count * self._recorded_sample_count:] = data[:channel_count * free_samples_per_channel]
+                self._recorded_pyramid.append(data[:channel_count * free_samples_per_channel])
                 if self._recorded_raw_times is not None:
                     self._recorded_raw_times[self._recorded_sample_count:] = times[:free_samples_per_channel]
                 self._recorded_sample_count += free_samples_per_channel
@@ -669,8 +1071,50 @@ class TimeSeriesReaderLogic(LogicBase):
             begin = self._recorded_sample_count
             end = begin + new_samples
             self._recorded_raw_times[begin:end] = times[:new_samples]
+        self._recorded_pyramid.append(data[:total_new_samples])
         self._recorded_sample_count += new_samples
 
+    def _read_recorded_samples(self, start: int, stop: int) -> np.ndarray:
+        """ Sample reader for the recorded data pyramid """
+        channel_count = len(self._trace_data)
+        return self._recorded_raw_data[start * channel_count:stop * channel_count].reshape(
+            (-1, channel_count)
+        )
+
+    def get_recorded_envelope(self,
+                              pixel_count: int,
+                              start: Optional[int] = None,
+                              stop: Optional[int] = None
+                              ) -> Tuple[Optional[np.ndarray], Optional[Dict[str, np.ndarray]]]:
+        """ Returns the min/max envelope of the raw data of the current (or last) recording within
+        the sample index range [start, stop) reduced to pixel_count pixels.
+        Each pixel is represented by two points (minimum and maximum) at the sample index of the
+        first sample in that pixel.
+        Envelopes finer than the recorded data pyramid resolution (ConfigOption
+        recorded_envelope_block_size) are calculated from raw samples. This is not possible for
+        streamed recordings (ConfigOption stream_recording), in which case the envelope is limited
+        to the pyramid resolution.
+
+        @param int pixel_count: number of pixels to reduce the recorded data to
+        @param int start: optional raw sample index to start from (default: 0)
+        @param int stop: optional raw sample index to stop at (default: recorded sample count)
+
+        @return tuple: sample indices, dict of recorded data envelope for each channel
+                       (None, None if nothing has been recorded)
+        """
+        with self._threadlock:
+            pyramid = self._recorded_pyramid
+            if pyramid is None:
+                return None, None
+            start = 0 if start is None else start
+            stop = pyramid.sample_count if stop is None else stop
+            indices, minima, maxima = pyramid.envelope(start, stop, pixel_count)
+            envelope = np.empty((2 * indices.size, minima.shape[1]), dtype=minima.dtype)
+            envelope[0::2] = minima
+            envelope[1::2] = maxima
+            return np.repeat(indices, 2), {ch: envelope[:, ii] for ii, ch in
+                                           enumerate(self._trace_data)}
+
     @QtCore.Slot()
     def start_recording(self):
         """ Will start to continuously accumulate raw data from the streaming hardware (without
@@ -701,8 +1145,12 @@ class TimeSeriesReaderLogic(LogicBase):
     def _stop_recording(self) -> None:
         try:
             if self._data_recording_active:
-                self._save_recorded_data(save_figure=True)
+                if self._recording_writer is not None:
+                    self._save_streamed_data(save_figure=True)
+                else:
+                    self._save_recorded_data(save_figure=True)
         finally:
+            self._recording_writer = None
             self._data_recording_active = False
             self.sigStatusChanged.emit(self.module_state() == 'locked', False)
 
@@ -743,7 +1191,50 @@ class TimeSeriesReaderLogic(LogicBase):
             self.log.exception('Something went wrong while saving raw data:')
             raise
 
-    def _draw_raw_data_thumbnail(self, data: np.ndarray) -> plt.Figure:
+    def _save_streamed_data(self, save_figure=True):
+        """ Finishes streaming the recorded raw data to disk and saves metadata and thumbnail
+        alongside. The recorded data is read back as memory map.
+        """
+        try:
+            writer = self._recording_writer
+            writer.stop()
+            data_path = writer.paths['data']
+            times_path = writer.paths.get('times')
+            constraints = self.streamer_constraints
+            metadata = {
+                'Start recoding time': self._record_start_time.strftime('%d.%m.%Y, %H:%M:%S.%f'),
+                'Sample rate (Hz)'   : self.sampling_rate,
+                'Sample timing'      : constraints.sample_timing.name
+            }
+            if times_path is not None:
+                metadata['Timestamps file'] = os.path.basename(times_path)
+            column_headers = [
+                f'{ch} ({constraints.channel_units[ch]})' for ch in self.active_channel_names
+            ]
+            storage = NpyDataStorage(root_dir=self.module_default_data_dir)
+            data = np.load(data_path, mmap_mode='r')
+            header = storage.create_header(self._record_start_time,
+                                           data.dtype,
+                                           metadata=metadata,
+                                           column_headers=column_headers)
+            file_path = data_path.rsplit('.', 1)[0]
+            with open(f'{file_path}_metadata.txt', 'w') as file:
+                file.write(header)
+
+            if save_figure and data.shape[0] > 0:
+                # Only read a bounded number of samples from disk for the thumbnail
+                step = max(1, data.shape[0] // 200000)
+                thumbnail_data = np.array(data[::step])
+                if times_path is not None:
+                    times = np.load(times_path, mmap_mode='r')
+                    thumbnail_data = np.column_stack([times[::step], thumbnail_data])
+                fig = self._draw_raw_data_thumbnail(thumbnail_data, sample_step=step)
+                storage.save_thumbnail(mpl_figure=fig, file_path=file_path)
+        except:
+            self.log.exception('Something went wrong while saving streamed raw data:')
+            raise
+
+    def _draw_raw_data_thumbnail(self, data: np.ndarray, sample_step: int = 1) -> plt.Figure:
         """ Draw figure to save with data file """
         constraints = self.streamer_constraints
         # Handle excessive data size for plotting. Artefacts may occur due to IIR decimation filter.
@@ -757,9 +1248,9 @@ class TimeSeriesReaderLogic(LogicBase):
             x_label = 'Sample Index'
         elif constraints.sample_timing == SampleTiming.CONSTANT:
             if decimate_factor > 0:
-                x = np.arange(data.shape[0]) / (self.sampling_rate / decimate_factor)
+                x = np.arange(data.shape[0]) / (self.sampling_rate / decimate_factor / sample_step)
             else:
-                x = np.arange(data.shape[0]) / self.sampling_rate
+                x = np.arange(data.shape[0]) / (self.sampling_rate / sample_step)
             x_label = 'Time (s)'
         else:
             x = data[:, 0] - data[0, 0]
@@ -796,9 +1287,8 @@ class TimeSeriesReaderLogic(LogicBase):
             ]
             nametag = f'trace_snapshot_{name_tag}' if name_tag else 'trace_snapshot'
 
-            data_offset = self._trace_data.shape[0] - self._moving_average_width // 2
-            data = self._trace_data[:data_offset, :]
-            x = self._trace_times
+            x, trace_data = self.trace_data
+            data = np.column_stack([trace_data[ch] for ch in self.active_channel_names])
             try:
                 fig = self._draw_trace_snapshot_thumbnail(x, data) if save_figure else None
             finally:
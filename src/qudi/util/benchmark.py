@@ -39,6 +39,8 @@ class BenchmarkTool(object):
         # data point: a tuple of (time [s], 'quantity')
         self._datapoints = deque(maxlen=n_save_datapoints)  # fifo-like
         self._datapoints_fixed = list()
+        # stage name: rolling data points of the individual stages of a pipelined task
+        self._stage_datapoints = dict()
 
     @property
     def n_benchmarks(self):
@@ -60,6 +62,7 @@ class BenchmarkTool(object):
         """
         self._datapoints_fixed = []
         self._datapoints.clear()
+        self._stage_datapoints = dict()
 
     def add_benchmark(self, time_s, y, is_persistent=False):
         """
@@ -78,6 +81,42 @@ class BenchmarkTool(object):
         else:
             self._datapoints_fixed.append((time_s, y))
 
+    def add_stage_benchmark(self, stage_times, y):
+        """
+        Add the time needed by each stage of a pipelined task (eg. sampling and writing) for a single
+        data point. Stages running in parallel limit the task to the speed of the slowest one.
+        :param stage_times: dict with stage names as keys and time needed (s) as values
+        :param y: quantity processed by each stage
+        :return:
+        """
+        for stage, time_s in stage_times.items():
+            if time_s <= 0.:
+                continue
+            if stage not in self._stage_datapoints:
+                self._stage_datapoints[stage] = deque(maxlen=self._n_save_datapoints)
+            self._stage_datapoints[stage].append((time_s, y))
+
+    def estimate_stage_speeds(self):
+        """
+        Estimate the speed of each stage of a pipelined task from the gathered data.
+        :return: dict with stage names as keys and speed ([quantity] / s) as values
+        """
+        speeds = dict()
+        for stage, datapoints in self._stage_datapoints.items():
+            data = np.asarray(datapoints)
+            speeds[stage] = data[:, 1].sum() / data[:, 0].sum()
+        return speeds
+
+    @property
+    def bottleneck(self):
+        """
+        Name of the slowest stage of a pipelined task, None if no stage data has been gathered.
+        """
+        speeds = self.estimate_stage_speeds()
+        if not speeds:
+            return None
+        return min(speeds, key=speeds.get)
+
     def estimate_time(self, y, check_sanity=True):
         """
         Estimate the time needed to perform a task of given 'quantity'.
@@ -112,6 +151,8 @@ class BenchmarkTool(object):
         save_dict = copy.deepcopy(self.__dict__)
         # make deque serializable
         save_dict['_datapoints'] = copy.deepcopy(list(self._datapoints))
+        save_dict['_stage_datapoints'] = {stage: list(datapoints)
+                                          for stage, datapoints in self._stage_datapoints.items()}
 
         return save_dict
 
@@ -119,6 +160,10 @@ class BenchmarkTool(object):
 
         if saved_dict != None:
             saved_dict['_datapoints'] = deque(saved_dict['_datapoints'], maxlen=self._n_save_datapoints)
+            saved_dict['_stage_datapoints'] = {
+                stage: deque(datapoints, maxlen=self._n_save_datapoints)
+                for stage, datapoints in saved_dict.get('_stage_datapoints', dict()).items()
+            }
 
             self.__dict__.update(saved_dict)
 
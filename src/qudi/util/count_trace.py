@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains helpers to hold rolling count traces and growing sample records.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['CountTrace', 'SampleArray']
+
+import numpy as np
+from typing import Optional, Sequence, Union
+
+from qudi.util.ring_buffer import RingBuffer
+
+
+class CountTrace:
+    """
+    Rolling multi-channel count trace of fixed length together with its moving average.
+
+    Samples are appended block-wise and stored in ring buffers, so appending n samples costs
+    O(n + smooth_window_length) no matter how long the trace is. The trace and the smoothed trace
+    are available as read-only views of shape (channels, length) ordered from oldest to newest
+    sample, i.e. the newest sample of channel i is trace.data[i, -1].
+
+    Each smoothed value is the mean of the smooth_window_length newest samples up to and including
+    the corresponding sample. The trace is initially filled with zeros.
+    """
+
+    def __init__(self, channel_count: int, length: int, smooth_window_length: int = 1):
+        """
+        @param int channel_count: number of channels
+        @param int length: number of samples per channel in the trace
+        @param int smooth_window_length: number of samples to average for the smoothed trace
+        """
+        self._channel_count = int(channel_count)
+        self._length = max(1, int(length))
+        self._window = max(1, min(int(smooth_window_length), self._length))
+        self._data = RingBuffer(size=self._length, sample_shape=(self._channel_count,))
+        self._smoothed = RingBuffer(size=self._length, sample_shape=(self._channel_count,))
+        self._sample_count = 0
+
+    @property
+    def channel_count(self) -> int:
+        return self._channel_count
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def smooth_window_length(self) -> int:
+        return self._window
+
+    @property
+    def sample_count(self) -> int:
+        """ Total number of samples appended so far """
+        return self._sample_count
+
+    @property
+    def data(self) -> np.ndarray:
+        """ Read-only view of shape (channels, length) ordered from oldest to newest sample """
+        return self._data.data.T
+
+    @property
+    def smoothed(self) -> np.ndarray:
+        """ Read-only view of shape (channels, length) of the moving average of data """
+        return self._smoothed.data.T
+
+    def append(self, samples: np.ndarray) -> None:
+        """ Append a block of new samples to the trace and update the moving average.
+
+        @param numpy.ndarray samples: new samples of shape (n, channels) or (n,) for one channel
+        """
+        samples = np.asarray(samples, dtype=np.float64).reshape((-1, self._channel_count))
+        count = samples.shape[0]
+        if count == 0:
+            return
+        # Moving average from the cumulative sum over the previous window - 1 and the new samples
+        history = np.concatenate([self._data.latest(self._window - 1), samples])
+        cumsum = np.zeros((history.shape[0] + 1, self._channel_count))
+        np.cumsum(history, axis=0, out=cumsum[1:])
+        smoothed = (cumsum[self._window:] - cumsum[:-self._window]) / self._window
+        self._data.append(samples)
+        self._smoothed.append(smoothed)
+        self._sample_count += count
+
+    def append_binned(self, samples: np.ndarray, bin_size: int) -> None:
+        """ Average each bin_size consecutive samples (e.g. oversampled raw counts) into a single
+        sample and append the results. Incomplete bins at the end of the block are dropped.
+
+        @param numpy.ndarray samples: raw samples of shape (n, channels) or (n,) for one channel
+        @param int bin_size: number of raw samples per trace sample
+        """
+        samples = np.asarray(samples, dtype=np.float64).reshape((-1, self._channel_count))
+        bin_size = max(1, int(bin_size))
+        bins = samples.shape[0] // bin_size
+        self.append(samples[:bins * bin_size].reshape(
+            (bins, bin_size, self._channel_count)
+        ).mean(axis=1))
+
+    def clear(self) -> None:
+        """ Reset all samples of the trace and the smoothed trace to zero """
+        self._data.fill(0)
+        self._smoothed.fill(0)
+        self._sample_count = 0
+
+
+class SampleArray:
+    """
+    Preallocated array of samples stacked along the first axis, growing as needed.
+
+    The capacity is doubled whenever it is exhausted, so appending n samples costs amortized O(n)
+    instead of building up lists of rows. The recorded samples are available as read-only view.
+    """
+
+    def __init__(self,
+                 sample_shape: Optional[Sequence[int]] = None,
+                 dtype: Union[type, str, np.dtype] = np.float64,
+                 capacity: int = 1024):
+        """
+        @param tuple sample_shape: optional shape of a single sample (e.g. (channel_count,))
+        @param dtype: numpy data type of the samples
+        @param int capacity: initial number of samples to preallocate
+        """
+        sample_shape = tuple() if sample_shape is None else tuple(sample_shape)
+        self._storage = np.empty((max(1, int(capacity)), *sample_shape), dtype=dtype)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def data(self) -> np.ndarray:
+        """ Read-only view of all samples recorded so far """
+        view = self._storage[:self._count]
+        view.flags.writeable = False
+        return view
+
+    def append(self, samples: np.ndarray) -> None:
+        """ Append new samples stacked along the first axis """
+        samples = np.asarray(samples)
+        count = samples.shape[0]
+        if self._count + count > self._storage.shape[0]:
+            capacity = max(self._count + count, 2 * self._storage.shape[0])
+            storage = np.empty((capacity, *self._storage.shape[1:]), dtype=self._storage.dtype)
+            storage[:self._count] = self._storage[:self._count]
+            self._storage = storage
+        self._storage[self._count:self._count + count] = samples
+        self._count += count
+
+    def clear(self) -> None:
+        """ Remove all samples (keeping the allocated memory) """
+        self._count = 0
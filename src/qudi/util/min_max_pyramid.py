@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains an incrementally updated multi-resolution min/max envelope of sample streams.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['MinMaxPyramid']
+
+import numpy as np
+from typing import Callable, List, Optional, Tuple, Union
+
+from qudi.util.ring_buffer import RingBuffer
+
+
+class MinMaxPyramid:
+    """
+    Min/max decimation pyramid of a multi-channel sample stream, updated incrementally with each
+    block of appended samples.
+
+    Level 0 holds the minimum and maximum of each channel for consecutive blocks of base_factor
+    samples. Each higher level combines factor blocks of the level below. Appending n samples costs
+    O(n) and the pyramid needs about 2 / (base_factor - base_factor / factor) times the memory of
+    the samples it covers.
+
+    Samples are addressed by their absolute index in the stream (number of samples appended
+    before). If a capacity is given, the pyramid only covers the newest capacity samples (sliding
+    window, e.g. on top of a RingBuffer). Otherwise it covers all samples ever appended.
+
+    The envelope method returns the exact min/max envelope of an index range reduced to a given
+    number of pixels. Each pixel covers whole blocks of the coarsest level not exceeding the
+    requested samples per pixel, so the cost only depends on the number of pixels.
+    Samples at the range borders not covering a full block are read via the optional sample_reader
+    callable (at most one block per border). Without a sample_reader, the requested range is shrunk
+    to full blocks instead.
+    """
+
+    def __init__(self,
+                 channel_count: int,
+                 capacity: Optional[int] = None,
+                 base_factor: int = 8,
+                 factor: int = 4,
+                 levels: int = 8,
+                 dtype: Union[type, str, np.dtype] = np.float64,
+                 sample_reader: Optional[Callable[[int, int], np.ndarray]] = None):
+        """
+        @param int channel_count: number of channels (columns) of each sample
+        @param int capacity: optional number of newest samples to cover (None for unlimited)
+        @param int base_factor: number of samples per block in level 0
+        @param int factor: number of blocks combined into a single block of the next level
+        @param int levels: number of levels
+        @param dtype: numpy data type of minima and maxima
+        @param callable sample_reader: optional callable returning the samples for an absolute
+                                       index range (start, stop) as array of shape (n, channels)
+        """
+        if base_factor < 1 or factor < 2 or levels < 1:
+            raise ValueError('MinMaxPyramid requires base_factor >= 1, factor >= 2 and levels >= 1')
+        self._channel_count = int(channel_count)
+        self._capacity = None if capacity is None else int(capacity)
+        self._factor = int(factor)
+        self._block_sizes = [int(base_factor) * self._factor ** level for level in range(levels)]
+        self._dtype = np.dtype(dtype)
+        self._sample_reader = sample_reader
+        self._sample_count = 0
+        # Samples (level 0) or blocks (higher levels) not yet combined into a full block
+        self._pending_samples = np.empty((0, self._channel_count), dtype=self._dtype)
+        self._pending_blocks = [np.empty((0, 2, self._channel_count), dtype=self._dtype)
+                                for _ in self._block_sizes]
+        # Blocks of each level with minima at [:, 0] and maxima at [:, 1]
+        if self._capacity is None:
+            self._blocks = [np.empty((16, 2, self._channel_count), dtype=self._dtype)
+                            for _ in self._block_sizes]
+        else:
+            # Keep 2 blocks more than needed to cover all full blocks within capacity
+            self._blocks = [RingBuffer(size=self._capacity // size + 2,
+                                       sample_shape=(2, self._channel_count),
+                                       dtype=self._dtype)
+                            for size in self._block_sizes]
+
+    @property
+    def sample_count(self) -> int:
+        """ Total number of samples appended so far """
+        return self._sample_count
+
+    @property
+    def first_sample(self) -> int:
+        """ Absolute index of the oldest sample covered """
+        if self._capacity is None:
+            return 0
+        return max(0, self._sample_count - self._capacity)
+
+    @property
+    def block_sizes(self) -> List[int]:
+        """ Number of samples per block for each level """
+        return self._block_sizes.copy()
+
+    def append(self, samples: np.ndarray) -> None:
+        """ Append new samples and update all levels.
+
+        @param numpy.ndarray samples: new samples of shape (n, channels) or (n,) for one channel
+        """
+        samples = np.asarray(samples).reshape((-1, self._channel_count))
+        if samples.shape[0] == 0:
+            return
+        self._sample_count += samples.shape[0]
+        if self._pending_samples.shape[0] > 0:
+            samples = np.concatenate([self._pending_samples, samples])
+        base_factor = self._block_sizes[0]
+        block_count = samples.shape[0] // base_factor
+        self._pending_samples = samples[block_count * base_factor:].astype(self._dtype, copy=True)
+        if block_count == 0:
+            return
+        reshaped = samples[:block_count * base_factor].reshape(
+            (block_count, base_factor, self._channel_count)
+        )
+        blocks = np.stack([reshaped.min(axis=1), reshaped.max(axis=1)], axis=1)
+        for level in range(len(self._block_sizes)):
+            self._store_blocks(level, blocks)
+            if level + 1 == len(self._block_sizes):
+                break
+            blocks = self._combine_blocks(level + 1, blocks)
+            if blocks.shape[0] == 0:
+                break
+
+    def envelope(self,
+                 start: int,
+                 stop: int,
+                 pixel_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Min/max envelope of the samples in absolute index range [start, stop) reduced to at most
+        pixel_count pixels of (almost) equal sample count. The range is clipped to the covered
+        samples.
+
+        @param int start: absolute index of the first sample
+        @param int stop: absolute index behind the last sample
+        @param int pixel_count: maximum number of pixels to return
+
+        @return (numpy.ndarray, numpy.ndarray, numpy.ndarray): absolute index of the first sample of
+            each pixel (pixels,), minima and maxima of each pixel and channel (pixels, channels)
+        """
+        start = max(int(start), self.first_sample)
+        stop = min(int(stop), self._sample_count)
+        pixel_count = max(1, int(pixel_count))
+        if stop <= start:
+            empty = np.empty((0, self._channel_count), dtype=self._dtype)
+            return np.empty(0, dtype=np.int64), empty, empty.copy()
+
+        # Use the coarsest level providing at least one full block per pixel
+        for level in reversed(range(len(self._block_sizes))):
+            block_size = self._block_sizes[level]
+            first_block = max(-(-start // block_size), self._stored_blocks_range(level)[0])
+            stop_block = stop // block_size
+            if stop_block - first_block >= pixel_count or (level == 0 and
+                                                           self._sample_reader is None):
+                return self._block_envelope(level, start, stop, first_block, stop_block, pixel_count)
+        # Requested resolution is finer than the finest level. Reduce raw samples directly.
+        samples = np.asarray(self._sample_reader(start, stop)).reshape((-1, self._channel_count))
+        edges = self._pixel_edges(samples.shape[0], pixel_count)
+        return (start + edges,
+                np.minimum.reduceat(samples, edges, axis=0).astype(self._dtype, copy=False),
+                np.maximum.reduceat(samples, edges, axis=0).astype(self._dtype, copy=False))
+
+    def _block_envelope(self,
+                        level: int,
+                        start: int,
+                        stop: int,
+                        first_block: int,
+                        stop_block: int,
+                        pixel_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        block_size = self._block_sizes[level]
+        if stop_block <= first_block:
+            empty = np.empty((0, self._channel_count), dtype=self._dtype)
+            return np.empty(0, dtype=np.int64), empty, empty.copy()
+        blocks = self._get_blocks(level, first_block, stop_block)
+        edges = self._pixel_edges(blocks.shape[0], pixel_count)
+        indices = (first_block + edges) * block_size
+        minima = np.minimum.reduceat(blocks[:, 0], edges, axis=0)
+        maxima = np.maximum.reduceat(blocks[:, 1], edges, axis=0)
+        if self._sample_reader is not None:
+            # Merge partial blocks at the range borders into the first and last pixel
+            head_stop = first_block * block_size
+            if start < head_stop:
+                head = np.asarray(self._sample_reader(start, head_stop))
+                head = head.reshape((-1, self._channel_count))
+                minima[0] = np.minimum(minima[0], head.min(axis=0))
+                maxima[0] = np.maximum(maxima[0], head.max(axis=0))
+                indices[0] = start
+            tail_start = stop_block * block_size
+            if tail_start < stop:
+                tail = np.asarray(self._sample_reader(tail_start, stop))
+                tail = tail.reshape((-1, self._channel_count))
+                minima[-1] = np.minimum(minima[-1], tail.min(axis=0))
+                maxima[-1] = np.maximum(maxima[-1], tail.max(axis=0))
+        return indices, minima, maxima
+
+    @staticmethod
+    def _pixel_edges(count: int, pixel_count: int) -> np.ndarray:
+        """ Start offsets of pixel_count (or fewer if count < pixel_count) consecutive pixels of
+        (almost) equal size within count elements.
+        """
+        if count <= pixel_count:
+            return np.arange(count, dtype=np.int64)
+        return (np.arange(pixel_count, dtype=np.int64) * count) // pixel_count
+
+    def _combine_blocks(self, level: int, blocks: np.ndarray) -> np.ndarray:
+        """ Combine blocks of level - 1 (and pending ones) into full blocks of level """
+        pending = self._pending_blocks[level]
+        if pending.shape[0] > 0:
+            blocks = np.concatenate([pending, blocks])
+        block_count = blocks.shape[0] // self._factor
+        self._pending_blocks[level] = blocks[block_count * self._factor:].copy()
+        reshaped = blocks[:block_count * self._factor].reshape(
+            (block_count, self._factor, 2, self._channel_count)
+        )
+        return np.stack([reshaped[:, :, 0].min(axis=1), reshaped[:, :, 1].max(axis=1)], axis=1)
+
+    def _total_blocks(self, level: int) -> int:
+        return self._sample_count // self._block_sizes[level]
+
+    def _stored_blocks_range(self, level: int) -> Tuple[int, int]:
+        """ Absolute index range [first, stop) of the blocks stored for the given level """
+        total = self._total_blocks(level)
+        if self._capacity is None:
+            return 0, total
+        return max(0, total - len(self._blocks[level])), total
+
+    def _store_blocks(self, level: int, blocks: np.ndarray) -> None:
+        if self._capacity is not None:
+            self._blocks[level].append(blocks)
+            return
+        storage = self._blocks[level]
+        total = self._total_blocks(level)
+        if total > storage.shape[0]:
+            new_storage = np.empty((max(total, 2 * storage.shape[0]), *storage.shape[1:]),
+                                   dtype=self._dtype)
+            new_storage[:total - blocks.shape[0]] = storage[:total - blocks.shape[0]]
+            self._blocks[level] = storage = new_storage
+        storage[total - blocks.shape[0]:total] = blocks
+
+    def _get_blocks(self, level: int, first: int, stop: int) -> np.ndarray:
+        """ Stored blocks of the given level in absolute block index range [first, stop) """
+        if self._capacity is None:
+            return self._blocks[level][first:stop]
+        stored_stop = self._stored_blocks_range(level)[1]
+        return self._blocks[level].latest(stored_stop - first)[:stop - first]
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains a helper to continuously stream sample blocks into .npy files on disk.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['NpyStreamWriter']
+
+import os
+import queue
+import struct
+import threading
+import numpy as np
+from typing import Dict, Mapping, Sequence, Tuple, Union
+
+
+class NpyStreamWriter:
+    """
+    Appends blocks of samples to one or more .npy files from a background writer thread.
+
+    Each file is created with a fixed size .npy header that is rewritten after each block has been
+    written. The files are therefore valid .npy files at all times, even if the process terminates
+    unexpectedly, and can be opened as memory maps with numpy.load(path, mmap_mode='r').
+    Memory usage is bounded by the maximum number of queued blocks. If the writer thread can not
+    keep up, append blocks until there is space in the queue again.
+
+    Usage example:
+
+        writer = NpyStreamWriter({'data': ('data.npy', np.float64, (channel_count,)),
+                                  'times': ('times.npy', np.float64, ())})
+        writer.start()
+        writer.append(data=data_block, times=times_block)
+        ...
+        sample_counts = writer.stop()
+        data = np.load('data.npy', mmap_mode='r')
+    """
+
+    # Total size of the .npy header in bytes (incl. magic string). Must be a multiple of 64.
+    _header_size = 128
+
+    def __init__(self,
+                 files: Mapping[str, Tuple[str, Union[type, str, np.dtype], Sequence[int]]],
+                 max_queued_blocks: int = 256):
+        """
+        @param dict files: file names as keys and tuples (path, dtype, sample_shape) as values
+        @param int max_queued_blocks: maximum number of blocks waiting to be written to disk
+        """
+        self._files = {name: (path, np.dtype(dtype), tuple(sample_shape))
+                       for name, (path, dtype, sample_shape) in files.items()}
+        self._queue = queue.Queue(maxsize=max(1, int(max_queued_blocks)))
+        self._handles = dict()
+        self._sample_counts = {name: 0 for name in self._files}
+        self._thread = None
+        self._error = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def paths(self) -> Dict[str, str]:
+        return {name: path for name, (path, _, _) in self._files.items()}
+
+    @property
+    def sample_counts(self) -> Dict[str, int]:
+        """ Number of samples written to disk so far for each file """
+        return self._sample_counts.copy()
+
+    @property
+    def queued_blocks(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """ Create all files (overwriting existing ones) and start the writer thread """
+        if self._thread is not None:
+            raise RuntimeError('NpyStreamWriter is already running')
+        self._error = None
+        self._sample_counts = {name: 0 for name in self._files}
+        try:
+            for name, (path, dtype, sample_shape) in self._files.items():
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                file = open(path, 'wb')
+                self._handles[name] = file
+                file.write(self._create_header(dtype, (0, *sample_shape)))
+                file.flush()
+        except:
+            self._close_files()
+            raise
+        self._thread = threading.Thread(target=self._write_loop,
+                                        name='NpyStreamWriter',
+                                        daemon=True)
+        self._thread.start()
+
+    def append(self, **blocks: np.ndarray) -> None:
+        """ Queue new sample blocks to be appended to the files given by keyword.
+        The blocks are copied, so the passed arrays can be reused immediately.
+        Blocks until there is space in the queue.
+        """
+        if self._thread is None:
+            raise RuntimeError('NpyStreamWriter is not running')
+        if self._error is not None:
+            raise RuntimeError('NpyStreamWriter failed to write data to disk') from self._error
+        copies = dict()
+        for name, block in blocks.items():
+            _, dtype, sample_shape = self._files[name]
+            copies[name] = np.array(block, dtype=dtype, copy=True).reshape((-1, *sample_shape))
+        self._queue.put(copies)
+
+    def stop(self) -> Dict[str, int]:
+        """ Write all queued blocks, stop the writer thread and close all files.
+
+        @return dict: number of samples written for each file
+        """
+        if self._thread is None:
+            return self.sample_counts
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._close_files()
+        if self._error is not None:
+            raise RuntimeError('NpyStreamWriter failed to write data to disk') from self._error
+        return self.sample_counts
+
+    def _write_loop(self) -> None:
+        while True:
+            blocks = self._queue.get()
+            if blocks is None:
+                break
+            # Keep draining the queue after an error so append does not block forever
+            if self._error is not None:
+                continue
+            try:
+                for name, block in blocks.items():
+                    file = self._handles[name]
+                    file.seek(0, os.SEEK_END)
+                    file.write(block.tobytes())
+                    self._sample_counts[name] += block.shape[0]
+                # Only update the headers after the data has been written
+                for name in blocks:
+                    _, dtype, sample_shape = self._files[name]
+                    file = self._handles[name]
+                    file.seek(0)
+                    file.write(
+                        self._create_header(dtype, (self._sample_counts[name], *sample_shape))
+                    )
+                    file.flush()
+            except Exception as err:
+                self._error = err
+
+    def _close_files(self) -> None:
+        handles = self._handles
+        self._handles = dict()
+        for file in handles.values():
+            try:
+                file.close()
+            except OSError:
+                pass
+
+    @classmethod
+    def _create_header(cls, dtype: np.dtype, shape: Tuple[int, ...]) -> bytes:
+        """ Create a .npy (version 1.0) header padded to a fixed size """
+        header = "{{'descr': {0!r}, 'fortran_order': False, 'shape': {1!r}, }}".format(
+            np.lib.format.dtype_to_descr(dtype), tuple(int(dim) for dim in shape)
+        )
+        magic = np.lib.format.magic(1, 0)
+        header_length = cls._header_size - len(magic) - 2
+        if len(header) + 1 > header_length:
+            raise ValueError(f'npy header "{header}" exceeds {cls._header_size:d} bytes')
+        header = header.ljust(header_length - 1) + '\n'
+        return magic + struct.pack('<H', header_length) + header.encode('latin1')
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains a fixed size ring buffer for numpy array samples.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['RingBuffer']
+
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+
+
+class RingBuffer:
+    """
+    Fixed size FIFO buffer of samples stacked along the first array axis.
+
+    Appending new samples drops the same number of oldest samples and costs amortized
+    O(new samples), no matter how large the buffer is. The buffer contents are always available as
+    a contiguous array view ordered from oldest to newest sample without copying (see data and
+    latest).
+
+    New samples are written behind the newest sample into storage three times the buffer size.
+    Once the end of the storage is reached, the current contents are moved to the beginning of the
+    storage. As a consequence, a view returned by data or latest does not change until at least
+    (size - n) more samples have been appended, with n being the largest number of samples appended
+    at once. Views are read-only.
+    """
+
+    def __init__(self,
+                 size: int,
+                 sample_shape: Optional[Sequence[int]] = None,
+                 dtype: Union[type, str, np.dtype] = np.float64,
+                 fill_value: Union[int, float] = 0):
+        """
+        @param int size: number of samples the buffer can hold
+        @param tuple sample_shape: optional shape of a single sample (e.g. (channel_count,))
+        @param dtype: numpy data type of the samples
+        @param fill_value: initial value of all samples
+        """
+        self._size = int(size)
+        if self._size < 0:
+            raise ValueError(f'RingBuffer size must be >= 0 (received: {self._size:d})')
+        sample_shape = tuple() if sample_shape is None else tuple(sample_shape)
+        self._storage = np.full((3 * self._size, *sample_shape), fill_value, dtype=dtype)
+        # Storage index behind the newest sample. Always in range [size, 3 * size].
+        self._stop = self._size
+
+    @classmethod
+    def from_array(cls, array: np.ndarray) -> 'RingBuffer':
+        """ Create a RingBuffer initially holding the samples of the given array. The buffer size,
+        sample shape and dtype are taken from the array.
+        """
+        array = np.asarray(array)
+        buffer = cls(size=array.shape[0], sample_shape=array.shape[1:], dtype=array.dtype)
+        buffer.append(array)
+        return buffer
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """ Shape of the buffer contents (number of samples, *sample_shape) """
+        return (self._size, *self._storage.shape[1:])
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._storage.dtype
+
+    @property
+    def data(self) -> np.ndarray:
+        """ Read-only contiguous view of all samples ordered from oldest to newest """
+        return self.latest(self._size)
+
+    def latest(self, count: int) -> np.ndarray:
+        """ Read-only contiguous view of the newest samples ordered from oldest to newest.
+
+        @param int count: number of newest samples to return (clipped to buffer size)
+        """
+        count = min(max(int(count), 0), self._size)
+        view = self._storage[self._stop - count:self._stop]
+        view.flags.writeable = False
+        return view
+
+    def append(self, samples: np.ndarray) -> None:
+        """ Append new samples to the buffer dropping the same number of oldest samples.
+        If more samples than the buffer size are given, only the newest samples are kept.
+
+        @param numpy.ndarray samples: new samples stacked along the first axis
+        """
+        samples = np.asarray(samples)
+        count = samples.shape[0]
+        if count == 0 or self._size == 0:
+            return
+        if count > self._size:
+            samples = samples[-self._size:]
+            count = self._size
+        if self._stop + count > self._storage.shape[0]:
+            # Move current contents to the beginning of the storage. Source and destination do not
+            # overlap since self._stop > 2 * size at this point.
+            self._storage[:self._size] = self._storage[self._stop - self._size:self._stop]
+            self._stop = self._size
+        self._storage[self._stop:self._stop + count] = samples
+        self._stop += count
+
+    def fill(self, value: Union[int, float]) -> None:
+        """ Set all samples in the buffer to the given value """
+        self._storage[:] = value
+        self._stop = self._size
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains a growing stack of equally sized sweeps with incrementally averaged signal.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+__all__ = ['SweepBuffer']
+
+import numpy as np
+from typing import Tuple, Union
+
+
+class SweepBuffer:
+    """
+    Stack of sweeps (e.g. ODMR frequency sweeps) with a fixed number of points each, stored as
+    matrix of shape (points, lines) with the newest sweep in column 0. Columns not yet holding a
+    sweep are NaN.
+
+    Adding a sweep costs O(points), no matter how many sweeps have been added before. Sweeps are
+    written from right to left into storage twice the line buffer size, so the matrix (see data) is
+    always a contiguous view without copying or rolling data. Once all lines are used, the line
+    buffer size is doubled, which costs amortized O(points) per sweep.
+
+    The mean over all sweeps or over the newest average_lines sweeps is kept up to date with
+    running sums and counts of valid (finite) values. Invalid values (NaN, inf) are ignored.
+    """
+
+    def __init__(self,
+                 points: int,
+                 line_buffer_size: int = 1,
+                 average_lines: int = 0,
+                 dtype: Union[type, str, np.dtype] = np.float64):
+        """
+        @param int points: number of points per sweep
+        @param int line_buffer_size: initial number of lines (estimated number of sweeps)
+        @param int average_lines: number of newest sweeps to average (0 for all sweeps)
+        @param dtype: numpy floating point data type of the sweeps
+        """
+        self._points = int(points)
+        self._dtype = np.dtype(dtype)
+        self._lines = max(1, int(line_buffer_size))
+        self._storage = np.full((self._points, 2 * self._lines), np.nan, dtype=self._dtype)
+        self._sweep_count = 0
+        self._average_lines = max(0, int(average_lines))
+        # Running sums and numbers of valid values of all sweeps and of the newest average_lines
+        self._total_sum = np.zeros(self._points, dtype=np.float64)
+        self._total_count = np.zeros(self._points, dtype=np.int64)
+        self._window_sum = np.zeros(self._points, dtype=np.float64)
+        self._window_count = np.zeros(self._points, dtype=np.int64)
+
+    @property
+    def points(self) -> int:
+        return self._points
+
+    @property
+    def sweep_count(self) -> int:
+        """ Number of sweeps added so far """
+        return self._sweep_count
+
+    @property
+    def line_buffer_size(self) -> int:
+        """ Number of lines of the data matrix (sweeps plus NaN lines not used yet) """
+        return self._lines
+
+    @property
+    def data(self) -> np.ndarray:
+        """ Read-only view of shape (points, line_buffer_size) with the newest sweep in column 0 and
+        NaN in all columns not holding a sweep yet.
+        """
+        start = self._lines - self._sweep_count
+        view = self._storage[:, start:start + self._lines]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def sweeps(self) -> np.ndarray:
+        """ Read-only view of shape (points, sweep_count) with the newest sweep in column 0 """
+        return self.data[:, :self._sweep_count]
+
+    @property
+    def average_lines(self) -> int:
+        return self._average_lines
+
+    @average_lines.setter
+    def average_lines(self, value: int) -> None:
+        self.set_average_lines(value)
+
+    def set_average_lines(self, value: int) -> None:
+        """ Set the number of newest sweeps to average (0 for all sweeps). Recalculates the running
+        sum of the newest sweeps once.
+        """
+        self._average_lines = max(0, int(value))
+        if self._average_lines > 0:
+            self._window_sum, self._window_count = self._reduce(
+                self.sweeps[:, :self._average_lines]
+            )
+
+    def add_sweep(self, values: np.ndarray) -> None:
+        """ Add a new sweep. Missing values at the end of a sweep shorter than points are NaN.
+
+        @param numpy.ndarray values: 1D array of at most points values
+        """
+        values = np.asarray(values).ravel()
+        if values.size > self._points:
+            raise ValueError(f'Sweep has more values ({values.size:d}) than points per sweep '
+                             f'({self._points:d})')
+        if self._sweep_count == self._lines:
+            self._expand()
+        column = self._lines - self._sweep_count - 1
+        self._storage[:values.size, column] = values
+        self._storage[values.size:, column] = np.nan
+        self._sweep_count += 1
+
+        new_values = self._storage[:, column]
+        valid = np.isfinite(new_values)
+        new_values = np.where(valid, new_values, 0)
+        self._total_sum += new_values
+        self._total_count += valid
+        if self._average_lines > 0:
+            self._window_sum += new_values
+            self._window_count += valid
+            if self._sweep_count > self._average_lines:
+                # Remove the sweep dropping out of the averaging window
+                old_values = self._storage[:, column + self._average_lines]
+                valid = np.isfinite(old_values)
+                self._window_sum -= np.where(valid, old_values, 0)
+                self._window_count -= valid
+
+    def mean(self) -> np.ndarray:
+        """ Mean of the newest average_lines sweeps (all sweeps if average_lines is 0) ignoring
+        invalid values. Points without any valid value are 0.
+
+        @return numpy.ndarray: mean value of each point
+        """
+        if self._average_lines > 0:
+            value_sum, count = self._window_sum, self._window_count
+        else:
+            value_sum, count = self._total_sum, self._total_count
+        mean = np.zeros(self._points, dtype=np.float64)
+        np.divide(value_sum, count, out=mean, where=count > 0)
+        return mean
+
+    def _expand(self) -> None:
+        """ Double the line buffer size and move all sweeps into new storage """
+        lines = 2 * self._lines
+        storage = np.full((self._points, 2 * lines), np.nan, dtype=self._dtype)
+        storage[:, lines - self._sweep_count:lines] = self.sweeps
+        self._storage = storage
+        self._lines = lines
+
+    @staticmethod
+    def _reduce(sweeps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        valid = np.isfinite(sweeps)
+        return np.where(valid, sweeps, 0).sum(axis=1), valid.sum(axis=1)
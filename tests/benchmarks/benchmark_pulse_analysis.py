@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark of the BasicPulseAnalyzer analysis methods for typical laser data shapes.
+Compares the batched analysis methods with a per-laser-pulse reference implementation and checks
+both for identical results.
+
+Usage: python benchmark_pulse_analysis.py [--repeat N]
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+import logging
+import argparse
+import numpy as np
+from types import SimpleNamespace
+
+from qudi.logic.pulsed.pulsed_analysis_methods.basic_analysis_methods import BasicPulseAnalyzer
+
+BIN_WIDTH = 1e-9
+# (number of laser pulses, bins per laser pulse)
+LASER_SHAPES = [(50, 3000), (100, 3000), (500, 3000), (1000, 3000), (5000, 500), (50, 20000)]
+WINDOWS = {'signal_start': 100e-9, 'signal_end': 400e-9, 'norm_start': 1500e-9, 'norm_end': 2500e-9}
+
+
+def reference_mean_norm(laser_data, signal_start, signal_end, norm_start, norm_end):
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    signal_slice = slice(round(signal_start / BIN_WIDTH), round(signal_end / BIN_WIDTH))
+    norm_slice = slice(round(norm_start / BIN_WIDTH), round(norm_end / BIN_WIDTH))
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_slice]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_slice]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        if reference_mean > 0 and signal_mean >= 0:
+            signal_data[ii] = signal_mean / reference_mean
+        else:
+            signal_data[ii] = 0.0
+        if reference_sum > 0 and signal_sum > 0:
+            error_data[ii] = signal_data[ii] * np.sqrt(1 / signal_sum + 1 / reference_sum)
+        else:
+            error_data[ii] = 0.0
+    return signal_data, error_data
+
+
+def reference_mean_reference(laser_data, signal_start, signal_end, norm_start, norm_end):
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    signal_slice = slice(round(signal_start / BIN_WIDTH), round(signal_end / BIN_WIDTH))
+    norm_slice = slice(round(norm_start / BIN_WIDTH), round(norm_end / BIN_WIDTH))
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_slice]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_slice]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        signal_data[ii] = signal_mean - reference_mean
+        error_data[ii] = signal_data[ii] * np.sqrt(1 / abs(signal_sum) + 1 / abs(reference_sum))
+    return signal_data, error_data
+
+
+def reference_sum(laser_data, signal_start, signal_end):
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    signal_slice = slice(round(signal_start / BIN_WIDTH), round(signal_end / BIN_WIDTH))
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[signal_slice].sum()
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = np.sqrt(signal)
+    return signal_data, error_data
+
+
+def reference_mean(laser_data, signal_start, signal_end):
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    start_bin, end_bin = round(signal_start / BIN_WIDTH), round(signal_end / BIN_WIDTH)
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[start_bin:end_bin].mean()
+        signal_error = np.sqrt(laser_arr[start_bin:end_bin].sum()) / (end_bin - start_bin)
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = signal_error
+    return signal_data, error_data
+
+
+METHODS = {
+    'mean_norm': (reference_mean_norm, ('signal_start', 'signal_end', 'norm_start', 'norm_end')),
+    'mean_reference': (reference_mean_reference,
+                       ('signal_start', 'signal_end', 'norm_start', 'norm_end')),
+    'sum': (reference_sum, ('signal_start', 'signal_end')),
+    'mean': (reference_mean, ('signal_start', 'signal_end')),
+}
+
+
+def time_call(func, repeat, *args, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main(repeat):
+    logic = SimpleNamespace(fast_counter_settings={'bin_width': BIN_WIDTH, 'is_gated': False},
+                            measurement_settings=dict(),
+                            sampling_information=dict(),
+                            log=logging.getLogger(__name__))
+    analyzer = BasicPulseAnalyzer(logic)
+    rng = np.random.default_rng(42)
+
+    print('{0:>16s} {1:>14s} {2:>14s} {3:>14s} {4:>9s} {5:>10s}'.format(
+        'method', 'shape', 'reference [ms]', 'batched [ms]', 'speedup', 'identical'))
+    for shape in LASER_SHAPES:
+        laser_data = rng.poisson(5, shape).astype('int64')
+        for name, (reference, params) in METHODS.items():
+            kwargs = {param: WINDOWS[param] for param in params}
+            method = getattr(analyzer, 'analyse_' + name)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ref_time, ref_result = time_call(reference, repeat, laser_data, **kwargs)
+            new_time, new_result = time_call(method, repeat, laser_data, **kwargs)
+            identical = all(np.array_equal(ref, new, equal_nan=True)
+                            for ref, new in zip(ref_result, new_result))
+            print('{0:>16s} {1:>14s} {2:14.3f} {3:14.3f} {4:9.1f} {5:>10s}'.format(
+                name, 'x'.join(str(dim) for dim in shape), ref_time * 1e3, new_time * 1e3,
+                ref_time / new_time, str(identical)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=10, help='number of calls to average over')
+    main(parser.parse_args().repeat)
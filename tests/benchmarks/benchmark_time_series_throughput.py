@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+
+"""
+Headless end-to-end throughput benchmark of the time series streaming stack (InStreamDummy and
+TimeSeriesReaderLogic) for several sample rates, channel counts and sample timing modes.
+Measures the sustained throughput, the time spent in each processing stage (read, oversampling,
+trace buffers, moving average, recording, display update) and the lowest sample rate at which the
+hardware buffer overflows. Results are written to a JSON file in order to track the hot path
+performance across versions.
+
+Usage: python benchmark_time_series_throughput.py [--rates R [R ...]] [--channels N [N ...]]
+           [--timing {CONSTANT,TIMESTAMP,RANDOM} [...]] [--duration SEC] [--output FILE]
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sys
+import json
+import time
+import weakref
+import logging
+import platform
+import argparse
+import tempfile
+import functools
+import subprocess
+import datetime as dt
+import numpy as np
+from PySide2 import QtCore
+
+from qudi.hardware.dummy.data_instream_dummy import InStreamDummy
+from qudi.logic.time_series_reader_logic import TimeSeriesReaderLogic
+
+RATES = [1e3, 1e4, 1e5, 2.5e5, 5e5, 1024**2]
+CHANNELS = [1, 4]
+TIMINGS = ['CONSTANT', 'TIMESTAMP', 'RANDOM']
+# Logic methods of the processing stages (timed in the logic thread)
+STAGES = {'oversampling'  : '_oversample_trace_data',
+          'trace_buffers' : '_append_trace_data',
+          'moving_average': '_append_moving_average',
+          'timestamps'    : '_process_trace_times',
+          'recording'     : '_add_to_recording_array',
+          'display'       : '_emit_data_changed'}
+# A run is considered sustained if at least this fraction of the expected samples was processed
+SUSTAINED_FRACTION = 0.95
+
+
+class HeadlessQudiMain:
+    """ Minimal replacement of the qudi main instance the modules keep a weak reference to """
+    def __init__(self, data_dir):
+        self.configuration = {'default_data_dir': data_dir, 'daily_data_dirs': False}
+        self.gui = None
+
+
+def create_module(module_class, name, config, qudi_main):
+    """ Creates a module instance outside of a qudi session. Status variables are initialized with
+    their defaults (no saved status variables with the given module name exist) and are not dumped
+    to disk upon deactivation.
+    """
+    instance = None
+
+    def deactivate(event=None):
+        try:
+            instance.on_deactivate()
+        except Exception:
+            logging.getLogger(__name__).exception(f'Error while deactivating "{name}":')
+        return True
+
+    instance = module_class(qudi_main_weakref=weakref.ref(qudi_main),
+                            name=name,
+                            config=config,
+                            callbacks={'on_before_deactivate': deactivate})
+    return instance
+
+
+class StageTimer:
+    """ Accumulates the time spent in instrumented bound methods of a module instance """
+    def __init__(self):
+        self.times = dict()
+        self.calls = dict()
+
+    def instrument(self, instance, method_name, stage):
+        method = getattr(instance, method_name)
+        self.times[stage] = 0.
+        self.calls[stage] = 0
+
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.times[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+
+        setattr(instance, method_name, timed_method)
+
+
+def run_benchmark(app, qudi_main, sample_rate, channel_count, timing, args):
+    """ Runs a single configuration and returns the result dictionary """
+    channel_names = [f'channel {ii:d}' for ii in range(channel_count)]
+    streamer = create_module(
+        InStreamDummy,
+        name='benchmark_instream_dummy',
+        config={'channel_names'  : channel_names,
+                'channel_units'  : ['Hz' if ii % 2 == 0 else 'V' for ii in range(channel_count)],
+                'channel_signals': ['counts' if ii % 2 == 0 else 'sine' for ii in
+                                    range(channel_count)],
+                'data_type'      : 'float64',
+                'sample_timing'  : timing},
+        qudi_main=qudi_main
+    )
+    logic = create_module(
+        TimeSeriesReaderLogic,
+        name='benchmark_time_series_reader_logic',
+        config={'max_frame_rate'          : args.frame_rate,
+                'channel_buffer_size'     : args.buffer_size,
+                'max_raw_data_bytes'      : args.max_raw_data_bytes,
+                'acquisition_buffer_count': args.buffer_count,
+                'backpressure_policy'     : 'block'},
+        qudi_main=qudi_main
+    )
+    logic._streamer.connect(streamer)
+    streamer.module_state.activate()
+    logic.module_state.activate()
+
+    try:
+        logic.set_trace_settings(data_rate=sample_rate / args.oversampling,
+                                 oversampling_factor=args.oversampling,
+                                 moving_average_width=args.moving_average,
+                                 trace_window_size=args.trace_window)
+        logic.set_display_resolution(args.display_resolution)
+
+        timer = StageTimer()
+        timer.instrument(streamer, 'read_data_into_buffer', 'read')
+        for stage, method_name in STAGES.items():
+            timer.instrument(logic, method_name, stage)
+        processed = [0]
+        process_trace_data = logic._process_trace_data
+
+        def count_processed(data_buffer):
+            processed[0] += data_buffer.size // channel_count
+            return process_trace_data(data_buffer)
+
+        logic._process_trace_data = count_processed
+
+        start = time.perf_counter()
+        logic.start_reading()
+        if args.record:
+            logic.start_recording()
+        while time.perf_counter() - start < args.duration and logic.module_state() == 'locked':
+            app.processEvents()
+            time.sleep(0.005)
+        error = logic._acquisition_error
+        # Discard the recorded data instead of saving it to disk
+        logic._data_recording_active = False
+        # All samples acquired up to here are processed before stop_reading returns
+        logic.stop_reading()
+        elapsed = time.perf_counter() - start
+        metrics = logic.acquisition_metrics
+    finally:
+        logic.module_state.deactivate()
+        streamer.module_state.deactivate()
+
+    expected = sample_rate * elapsed
+    processing_time = sum(t for stage, t in timer.times.items() if stage != 'read')
+    return {
+        'sample_rate'          : sample_rate,
+        'channel_count'        : channel_count,
+        'sample_timing'        : timing,
+        'elapsed_time'         : elapsed,
+        'processed_samples'    : processed[0],
+        'throughput'           : processed[0] / elapsed,
+        'channel_throughput'   : processed[0] * channel_count / elapsed,
+        'processed_fraction'   : processed[0] / expected if expected > 0 else 0.,
+        'sustained'            : error is None and processed[0] >= SUSTAINED_FRACTION * expected,
+        'overflow'             : isinstance(error, OverflowError),
+        'error'                : None if error is None else f'{type(error).__name__}: {error}',
+        'stage_times'          : timer.times,
+        'stage_calls'          : timer.calls,
+        'stage_time_per_sample': {stage: t / processed[0] if processed[0] else None for
+                                  stage, t in timer.times.items()},
+        'processing_load'      : processing_time / elapsed,
+        'acquisition_metrics'  : metrics
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'],
+                              capture_output=True,
+                              text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    logging.basicConfig(level=logging.ERROR)
+    app = QtCore.QCoreApplication.instance()
+    if app is None:
+        app = QtCore.QCoreApplication(sys.argv[:1])
+
+    results = list()
+    first_overflow_rates = list()
+    print('{0:>10s} {1:>3s} {2:>12s} {3:>14s} {4:>10s} {5:>9s} {6:>8s} {7:>8s}'.format(
+        'timing', 'ch', 'rate [Hz]', 'throughput', 'fraction', 'load', 'overflow', 'error'))
+    with tempfile.TemporaryDirectory() as data_dir:
+        qudi_main = HeadlessQudiMain(data_dir)
+        for timing in args.timing:
+            for channel_count in args.channels:
+                overflow_rate = None
+                for rate in sorted(args.rates):
+                    result = run_benchmark(app, qudi_main, rate, channel_count, timing, args)
+                    results.append(result)
+                    print('{0:>10s} {1:3d} {2:12.1f} {3:14.1f} {4:10.3f} {5:9.3f} {6:>8s} '
+                          '{7:>8s}'.format(timing,
+                                           channel_count,
+                                           rate,
+                                           result['throughput'],
+                                           result['processed_fraction'],
+                                           result['processing_load'],
+                                           str(result['overflow']),
+                                           str(result['error'] is not None)))
+                    if result['overflow']:
+                        overflow_rate = rate
+                        if not args.continue_after_overflow:
+                            break
+                first_overflow_rates.append({'sample_timing'      : timing,
+                                             'channel_count'      : channel_count,
+                                             'first_overflow_rate': overflow_rate})
+
+    report = {
+        'benchmark'          : 'time_series_throughput',
+        'timestamp'          : dt.datetime.now().isoformat(),
+        'revision'           : git_revision(),
+        'python'             : platform.python_version(),
+        'numpy'              : np.__version__,
+        'platform'           : platform.platform(),
+        'settings'           : {'duration'          : args.duration,
+                                'buffer_size'       : args.buffer_size,
+                                'buffer_count'      : args.buffer_count,
+                                'frame_rate'        : args.frame_rate,
+                                'oversampling'      : args.oversampling,
+                                'moving_average'    : args.moving_average,
+                                'trace_window'      : args.trace_window,
+                                'display_resolution': args.display_resolution,
+                                'record'            : args.record},
+        'first_overflow'     : first_overflow_rates,
+        'results'            : results
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'Results written to "{args.output}"')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rates', type=float, nargs='+', default=RATES,
+                        help='hardware sample rates in Hz (ascending sweep)')
+    parser.add_argument('--channels', type=int, nargs='+', default=CHANNELS,
+                        help='numbers of active channels')
+    parser.add_argument('--timing', type=str.upper, nargs='+', default=TIMINGS, choices=TIMINGS,
+                        help='sample timing modes of the streamer')
+    parser.add_argument('--duration', type=float, default=3,
+                        help='run time in seconds for each configuration')
+    parser.add_argument('--buffer-size', type=int, default=2**18,
+                        help='hardware and logic buffer size in samples per channel')
+    parser.add_argument('--buffer-count', type=int, default=4,
+                        help='number of data blocks queued between acquisition and processing')
+    parser.add_argument('--frame-rate', type=float, default=20,
+                        help='maximum frame rate (ConfigOption max_frame_rate) in Hz')
+    parser.add_argument('--oversampling', type=int, default=1, help='oversampling factor')
+    parser.add_argument('--moving-average', type=int, default=9,
+                        help='moving average width in samples (odd)')
+    parser.add_argument('--trace-window', type=float, default=6,
+                        help='trace window size in seconds')
+    parser.add_argument('--display-resolution', type=int, default=0,
+                        help='number of display pixels to reduce the emitted trace data to (0 for '
+                             'full trace data)')
+    parser.add_argument('--max-raw-data-bytes', type=int, default=2 * 1024**3,
+                        help='maximum size of the recorded raw data in bytes')
+    parser.add_argument('--no-record', dest='record', action='store_false',
+                        help='do not record raw data')
+    parser.add_argument('--continue-after-overflow', action='store_true',
+                        help='run higher sample rates after the first overflow')
+    parser.add_argument('--output', type=str, default='benchmark_time_series_throughput.json',
+                        help='JSON file to write the results to')
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the CountTrace and SampleArray utilities.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+from qudi.util.count_trace import CountTrace, SampleArray
+
+CHANNEL_COUNT = 2
+LENGTH = 50
+
+
+def reference_trace(samples, window):
+    """
+    Trace and moving average of the newest LENGTH samples, with the trace initially filled with
+    zeros.
+
+    Parameters
+    ----------
+    samples : numpy.ndarray
+        all samples appended so far of shape (n, channels)
+    window : int
+        number of samples averaged for each smoothed value
+
+    Returns
+    -------
+    tuple
+        trace and smoothed trace of shape (channels, LENGTH)
+    """
+    full = np.concatenate([np.zeros((LENGTH + window, CHANNEL_COUNT)), samples])
+    smoothed = np.array([full[ii - window + 1:ii + 1].mean(axis=0)
+                         for ii in range(full.shape[0] - LENGTH, full.shape[0])])
+    return full[-LENGTH:].T, smoothed.T
+
+
+@pytest.mark.parametrize('window', [1, 2, 10, LENGTH])
+def test_moving_average(window):
+    """
+    Tests the trace and its moving average for blocks of varying size, incl. blocks longer than
+    the trace.
+    """
+    rng = np.random.default_rng(0)
+    trace = CountTrace(CHANNEL_COUNT, LENGTH, smooth_window_length=window)
+    assert trace.data.shape == trace.smoothed.shape == (CHANNEL_COUNT, LENGTH)
+    samples = np.empty((0, CHANNEL_COUNT))
+    for block_size in (1, 3, 7, 40, 120, 2, 60):
+        block = rng.poisson(1000, (block_size, CHANNEL_COUNT)).astype(float)
+        trace.append(block)
+        samples = np.concatenate([samples, block])
+        ref_data, ref_smoothed = reference_trace(samples, window)
+        np.testing.assert_array_equal(trace.data, ref_data)
+        np.testing.assert_allclose(trace.smoothed, ref_smoothed, rtol=1e-12)
+    assert trace.sample_count == samples.shape[0]
+
+    trace.clear()
+    assert trace.sample_count == 0
+    np.testing.assert_array_equal(trace.data, np.zeros((CHANNEL_COUNT, LENGTH)))
+    np.testing.assert_array_equal(trace.smoothed, np.zeros((CHANNEL_COUNT, LENGTH)))
+
+
+def test_window_limits():
+    trace = CountTrace(1, 10, smooth_window_length=100)
+    assert trace.smooth_window_length == 10
+    trace = CountTrace(1, 10, smooth_window_length=0)
+    assert trace.smooth_window_length == 1
+
+
+def test_append_binned():
+    """
+    Tests if oversampled samples are averaged bin-wise and incomplete bins are dropped.
+    """
+    trace = CountTrace(CHANNEL_COUNT, LENGTH, smooth_window_length=3)
+    raw = np.arange(2 * 23, dtype=float).reshape(23, CHANNEL_COUNT)
+    trace.append_binned(raw, bin_size=5)
+    binned = raw[:20].reshape(4, 5, CHANNEL_COUNT).mean(axis=1)
+    ref_data, ref_smoothed = reference_trace(binned, 3)
+    assert trace.sample_count == 4
+    np.testing.assert_array_equal(trace.data, ref_data)
+    np.testing.assert_allclose(trace.smoothed, ref_smoothed, rtol=1e-12)
+
+
+def test_sample_array():
+    """
+    Tests if the SampleArray holds all appended samples beyond its initial capacity.
+    """
+    array = SampleArray(sample_shape=(CHANNEL_COUNT,), capacity=4)
+    samples = np.arange(2 * 37, dtype=float).reshape(37, CHANNEL_COUNT)
+    for start in range(0, 37, 5):
+        array.append(samples[start:start + 5])
+    assert len(array) == 37
+    np.testing.assert_array_equal(array.data, samples)
+    assert not array.data.flags.writeable
+    array.clear()
+    assert array.data.shape == (0, CHANNEL_COUNT)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests comparing the EnsembleSampler with sampling each PulseBlockElement
+separately.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+from qudi.logic.pulsed.ensemble_sampler import EnsembleSampler
+from qudi.logic.pulsed.pulse_objects import PulseBlock, PulseBlockElement, PulseBlockEnsemble
+from qudi.logic.pulsed.sampling_function_defs import basic_sampling_functions as sf
+
+SAMPLE_RATE = 1.234e9
+AMPLITUDES = {'a_ch1': 0.5, 'a_ch2': 1.0}
+DIGITAL_CHANNELS = ('d_ch1', 'd_ch2')
+CHUNK_LENGTHS = [None, 4096, 1000, 37]
+
+
+def make_function(index):
+    """
+    Sampling function of a varying type including a non-elementwise one (Chirp).
+    """
+    functions = [sf.Idle(),
+                 sf.Sin(amplitude=0.1, frequency=2.87e9, phase=90. * (index % 4)),
+                 sf.DC(voltage=0.2),
+                 sf.Chirp(amplitude=0.1, phase=0, start_freq=2.8e9, stop_freq=2.9e9),
+                 sf.DoubleSinSum(amplitude_1=0.1, frequency_1=1e8, phase_1=0,
+                                 amplitude_2=0.05, frequency_2=2e8, phase_2=30)]
+    return functions[index % len(functions)]
+
+
+@pytest.fixture
+def blocks():
+    """
+    Fixture for three PulseBlocks with random element lengths and increments.
+    """
+    rng = np.random.default_rng(1)
+    blocks = dict()
+    for block_index in range(3):
+        elements = list()
+        for element_index in range(5):
+            elements.append(PulseBlockElement(
+                init_length_s=rng.uniform(1e-9, 2e-8),
+                increment_s=rng.uniform(0, 1e-9),
+                pulse_function={'a_ch1': make_function(block_index + element_index),
+                                'a_ch2': make_function(2 * block_index + element_index + 1)},
+                digital_high={'d_ch1': bool(rng.integers(2)), 'd_ch2': bool(element_index % 2)}
+            ))
+        name = 'block{0:d}'.format(block_index)
+        blocks[name] = PulseBlock(name=name, element_list=elements)
+    return blocks
+
+
+def elements_length_bins(ensemble, blocks):
+    """
+    Length in bins of all elements incl. repetitions, discretized like analyze_block_ensemble.
+    """
+    lengths = list()
+    time = 0.
+    start_bin = 0
+    for block_name, reps in ensemble.block_list:
+        for rep in range(reps + 1):
+            for element in blocks[block_name].element_list:
+                time += element.init_length_s + rep * element.increment_s
+                end_bin = int(np.rint(time * SAMPLE_RATE))
+                lengths.append(end_bin - start_bin)
+                start_bin = end_bin
+    return np.array(lengths, dtype='int64')
+
+
+def sample_elementwise(ensemble, blocks, length_bins, offset_bin, chunk_length=None):
+    """
+    Reference sampling each element separately, as done before the EnsembleSampler.
+    Elements crossing the boundary of a chunk are split into one sampling call per chunk.
+
+    Parameters
+    ----------
+    ensemble : PulseBlockEnsemble
+        ensemble to sample
+    blocks : dict
+        PulseBlocks referenced by the ensemble
+    length_bins : numpy.ndarray
+        length in bins of all elements incl. repetitions
+    offset_bin : int
+        time offset in bins of the first sample
+    chunk_length : int
+        number of samples sampled at once. Entire waveform if None.
+
+    Returns
+    -------
+    tuple
+        analog samples (dict), digital samples (dict) and the offset bin after the ensemble (int)
+    """
+    number_of_samples = int(length_bins.sum())
+    chunk_length = number_of_samples if chunk_length is None else chunk_length
+    analog = {chnl: np.empty(number_of_samples, dtype='float32') for chnl in AMPLITUDES}
+    digital = {chnl: np.empty(number_of_samples, dtype=bool) for chnl in DIGITAL_CHANNELS}
+    position = 0
+    element_index = 0
+    for block_name, reps in ensemble.block_list:
+        for _ in range(reps + 1):
+            for element in blocks[block_name].element_list:
+                element_length = length_bins[element_index]
+                written = 0
+                while written != element_length:
+                    length = min(chunk_length - position % chunk_length, element_length - written)
+                    time_arr = (offset_bin + np.arange(length, dtype='float64')) / SAMPLE_RATE
+                    for chnl, state in element.digital_high.items():
+                        digital[chnl][position:position + length] = state
+                    for chnl, function in element.pulse_function.items():
+                        analog[chnl][position:position + length] = \
+                            function.get_samples(time_arr) / (AMPLITUDES[chnl] / 2)
+                    position += length
+                    written += length
+                    if ensemble.rotating_frame:
+                        offset_bin += length
+                element_index += 1
+    return analog, digital, offset_bin
+
+
+def sample_chunked(sampler, chunk_length):
+    """
+    Samples the entire waveform with the EnsembleSampler in chunks of the given length.
+    """
+    number_of_samples = sampler.number_of_samples
+    chunk_length = number_of_samples if chunk_length is None else chunk_length
+    analog = {chnl: np.empty(number_of_samples, dtype='float32') for chnl in AMPLITUDES}
+    digital = {chnl: np.empty(number_of_samples, dtype=bool) for chnl in DIGITAL_CHANNELS}
+    for start in range(0, number_of_samples, chunk_length):
+        length = min(chunk_length, number_of_samples - start)
+        analog_chunk = {chnl: np.empty(length, dtype='float32') for chnl in AMPLITUDES}
+        digital_chunk = {chnl: np.empty(length, dtype=bool) for chnl in DIGITAL_CHANNELS}
+        sampler.fill_chunk(start, length, analog_chunk, digital_chunk)
+        for chnl in AMPLITUDES:
+            analog[chnl][start:start + length] = analog_chunk[chnl]
+        for chnl in DIGITAL_CHANNELS:
+            digital[chnl][start:start + length] = digital_chunk[chnl]
+    return analog, digital
+
+
+@pytest.mark.filterwarnings('ignore:invalid value encountered:RuntimeWarning')
+@pytest.mark.parametrize('rotating_frame', [True, False])
+@pytest.mark.parametrize('chunk_length', CHUNK_LENGTHS)
+@pytest.mark.parametrize('offset_bin', [0, 12345])
+def test_sampler_identical(blocks, rotating_frame, chunk_length, offset_bin):
+    """
+    Tests if the EnsembleSampler gives bit-identical samples to sampling each element separately
+    for different chunk lengths.
+    """
+    ensemble = PulseBlockEnsemble(name='test_ensemble',
+                                  block_list=[('block0', 3), ('block1', 0), ('block2', 200), ('block0', 1)],
+                                  rotating_frame=rotating_frame)
+    length_bins = elements_length_bins(ensemble, blocks)
+    ref_analog, ref_digital, ref_offset = sample_elementwise(ensemble, blocks, length_bins,
+                                                             offset_bin, chunk_length)
+
+    sampler = EnsembleSampler(ensemble, blocks, length_bins, SAMPLE_RATE, AMPLITUDES, offset_bin)
+    assert sampler.number_of_samples == length_bins.sum()
+    assert sampler.end_offset_bin == ref_offset
+    analog, digital = sample_chunked(sampler, chunk_length)
+    for chnl in AMPLITUDES:
+        assert analog[chnl].tobytes() == ref_analog[chnl].tobytes()
+    for chnl in DIGITAL_CHANNELS:
+        np.testing.assert_array_equal(digital[chnl], ref_digital[chnl])
+
+
+@pytest.mark.filterwarnings('ignore:invalid value encountered:RuntimeWarning')
+def test_sampler_small_batches(blocks, monkeypatch):
+    """
+    Tests if splitting batched sampling function calls gives identical samples.
+    """
+    monkeypatch.setattr(EnsembleSampler, 'max_batch_samples', 100)
+    ensemble = PulseBlockEnsemble(name='test_ensemble',
+                                  block_list=[('block0', 10), ('block2', 20)],
+                                  rotating_frame=True)
+    length_bins = elements_length_bins(ensemble, blocks)
+    ref_analog, _, _ = sample_elementwise(ensemble, blocks, length_bins, 0, 4096)
+    analog, _ = sample_chunked(EnsembleSampler(ensemble, blocks, length_bins, SAMPLE_RATE, AMPLITUDES), 4096)
+    for chnl in AMPLITUDES:
+        assert analog[chnl].tobytes() == ref_analog[chnl].tobytes()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the MinMaxPyramid utility.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+from qudi.util.min_max_pyramid import MinMaxPyramid
+from qudi.util.ring_buffer import RingBuffer
+
+CHANNEL_COUNT = 2
+# (start, stop, pixel_count) of the requested envelopes
+RANGES = [(0, 10000, 100), (123, 9876, 50), (5000, 5100, 20), (17, 9000, 3000), (0, 10000, 1),
+          (9990, 10000, 100)]
+
+
+def make_samples(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, CHANNEL_COUNT))
+
+
+def brute_force_envelope(samples, indices, stop):
+    """
+    Min/max of the samples of each pixel starting at the given absolute indices.
+
+    Parameters
+    ----------
+    samples : numpy.ndarray
+        all samples of shape (n, channels), addressed by absolute index
+    indices : numpy.ndarray
+        absolute index of the first sample of each pixel
+    stop : int
+        absolute index behind the last sample of the last pixel
+
+    Returns
+    -------
+    tuple
+        minima and maxima of shape (pixels, channels)
+    """
+    edges = np.append(indices, stop)
+    minima = np.array([samples[a:b].min(axis=0) for a, b in zip(edges[:-1], edges[1:])])
+    maxima = np.array([samples[a:b].max(axis=0) for a, b in zip(edges[:-1], edges[1:])])
+    return minima, maxima
+
+
+def append_in_chunks(pyramid, samples, seed=1):
+    """
+    Appends the samples in chunks of random size, incl. chunks smaller than a block.
+    """
+    rng = np.random.default_rng(seed)
+    start = 0
+    while start < samples.shape[0]:
+        stop = start + int(rng.integers(1, 700))
+        pyramid.append(samples[start:stop])
+        start = stop
+
+
+@pytest.mark.parametrize('start, stop, pixel_count', RANGES)
+def test_envelope_exact(start, stop, pixel_count):
+    """
+    Tests if the envelope with a sample reader is exact for any range and pixel count.
+    """
+    samples = make_samples(10000)
+    pyramid = MinMaxPyramid(CHANNEL_COUNT, levels=4, sample_reader=lambda a, b: samples[a:b])
+    append_in_chunks(pyramid, samples)
+    assert pyramid.sample_count == samples.shape[0]
+
+    indices, minima, maxima = pyramid.envelope(start, stop, pixel_count)
+    assert 0 < len(indices) <= pixel_count
+    assert indices[0] == start
+    assert np.all(np.diff(indices) > 0)
+    ref_minima, ref_maxima = brute_force_envelope(samples, indices, stop)
+    np.testing.assert_array_equal(minima, ref_minima)
+    np.testing.assert_array_equal(maxima, ref_maxima)
+
+
+def test_envelope_without_reader():
+    """
+    Tests if the envelope without a sample reader is shrunk to full blocks and exact within them.
+    """
+    samples = make_samples(10000)
+    pyramid = MinMaxPyramid(CHANNEL_COUNT, levels=4)
+    append_in_chunks(pyramid, samples)
+    indices, minima, maxima = pyramid.envelope(123, 9876, 100)
+    # Level 1 (blocks of 32 samples) is the coarsest level with at least 100 full blocks in range
+    block_size = pyramid.block_sizes[1]
+    assert indices[0] == 128
+    assert np.all(indices % block_size == 0)
+    ref_minima, ref_maxima = brute_force_envelope(samples, indices, 9876 // block_size * block_size)
+    np.testing.assert_array_equal(minima, ref_minima)
+    np.testing.assert_array_equal(maxima, ref_maxima)
+
+    # Range within a single block
+    indices, minima, maxima = pyramid.envelope(1, 5, 10)
+    assert len(indices) == 0
+    assert minima.shape == maxima.shape == (0, CHANNEL_COUNT)
+
+
+def test_envelope_sliding_window():
+    """
+    Tests the envelope of a pyramid with limited capacity on top of a RingBuffer.
+    """
+    capacity = 3000
+    samples = make_samples(20000)
+    buffer = RingBuffer(capacity, sample_shape=(CHANNEL_COUNT,))
+
+    def reader(start, stop):
+        offset = pyramid.sample_count - capacity
+        return buffer.data[start - offset:stop - offset]
+
+    pyramid = MinMaxPyramid(CHANNEL_COUNT, capacity=capacity, levels=4, sample_reader=reader)
+    rng = np.random.default_rng(2)
+    start = 0
+    while start < samples.shape[0]:
+        chunk = samples[start:start + int(rng.integers(1, 700))]
+        buffer.append(chunk)
+        pyramid.append(chunk)
+        start += chunk.shape[0]
+        first = pyramid.first_sample
+        assert first == max(0, start - capacity)
+        for pixel_count in (1, 10, 400):
+            indices, minima, maxima = pyramid.envelope(0, start, pixel_count)
+            assert indices[0] == first
+            ref_minima, ref_maxima = brute_force_envelope(samples, indices, start)
+            np.testing.assert_array_equal(minima, ref_minima)
+            np.testing.assert_array_equal(maxima, ref_maxima)
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        MinMaxPyramid(1, base_factor=0)
+    with pytest.raises(ValueError):
+        MinMaxPyramid(1, factor=1)
+    with pytest.raises(ValueError):
+        MinMaxPyramid(1, levels=0)
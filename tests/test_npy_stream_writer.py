@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the NpyStreamWriter utility.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+import numpy as np
+import pytest
+
+from qudi.util.npy_stream_writer import NpyStreamWriter
+
+CHANNEL_COUNT = 3
+TIMEOUT = 10
+
+
+@pytest.fixture
+def writer(tmp_path):
+    """
+    Fixture for a NpyStreamWriter writing multi-channel data and timestamps, stopped on teardown.
+    """
+    writer = NpyStreamWriter({'data': (str(tmp_path / 'data.npy'), np.float32, (CHANNEL_COUNT,)),
+                              'times': (str(tmp_path / 'sub' / 'times.npy'), np.float64, ())})
+    yield writer
+    if writer.is_running:
+        writer.stop()
+
+
+def load_when_written(path, sample_count):
+    """
+    Loads a .npy file as memory map until it contains the given number of samples. Each
+    intermediate state of the file must be a valid .npy file.
+    """
+    start = time.time()
+    while True:
+        arr = np.load(path, mmap_mode='r')
+        if arr.shape[0] >= sample_count or time.time() - start > TIMEOUT:
+            return arr
+        del arr
+        time.sleep(0.001)
+
+
+def test_readable_while_streaming(writer):
+    """
+    Tests if the files can be read at any time while blocks are appended.
+    """
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(1000, CHANNEL_COUNT)).astype(np.float32)
+    times = np.arange(1000, dtype=np.float64)
+    writer.start()
+    assert writer.is_running
+    assert np.load(writer.paths['data']).shape == (0, CHANNEL_COUNT)
+    assert np.load(writer.paths['times']).shape == (0,)
+
+    for stop in range(100, 1001, 100):
+        # Reuse the passed arrays immediately to make sure blocks are copied
+        block = data[stop - 100:stop].copy()
+        writer.append(data=block, times=times[stop - 100:stop])
+        block[:] = np.nan
+        loaded = load_when_written(writer.paths['data'], stop)
+        assert loaded.shape == (stop, CHANNEL_COUNT)
+        np.testing.assert_array_equal(loaded, data[:stop])
+        del loaded
+        loaded_times = load_when_written(writer.paths['times'], stop)
+        np.testing.assert_array_equal(loaded_times, times[:stop])
+        del loaded_times
+
+
+def test_complete_on_stop(writer):
+    """
+    Tests if all queued blocks are written once the writer is stopped and that the writer can be
+    restarted, which overwrites the files.
+    """
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(5000, CHANNEL_COUNT)).astype(np.float32)
+    writer.start()
+    for start in range(0, 5000, 37):
+        writer.append(data=data[start:start + 37])
+    writer.append(times=np.arange(10.))
+    assert writer.stop() == {'data': 5000, 'times': 10}
+    assert not writer.is_running
+    np.testing.assert_array_equal(np.load(writer.paths['data']), data)
+    np.testing.assert_array_equal(np.load(writer.paths['times']), np.arange(10.))
+
+    writer.start()
+    writer.append(data=data[:5].ravel())
+    assert writer.stop() == {'data': 5, 'times': 0}
+    np.testing.assert_array_equal(np.load(writer.paths['data']), data[:5])
+    assert np.load(writer.paths['times']).shape == (0,)
+
+
+def test_not_running(writer):
+    with pytest.raises(RuntimeError):
+        writer.append(times=np.arange(3.))
+    assert writer.stop() == {'data': 0, 'times': 0}
+    writer.start()
+    with pytest.raises(RuntimeError):
+        writer.start()
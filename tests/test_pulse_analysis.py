@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests comparing the batched BasicPulseAnalyzer methods with the former
+per-laser-pulse implementation.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from qudi.logic.pulsed.pulsed_analysis_methods.basic_analysis_methods import BasicPulseAnalyzer
+
+BIN_WIDTH = 1e-9
+LASER_LENGTH = 3000
+PULSE_COUNTS = [1, 7, 100]
+WINDOWS = {
+    'default': {'signal_start': 100e-9, 'signal_end': 400e-9, 'norm_start': 1500e-9, 'norm_end': 2500e-9},
+    'empty': {'signal_start': 200e-9, 'signal_end': 200e-9, 'norm_start': 1500e-9, 'norm_end': 2500e-9},
+    'out_of_range': {'signal_start': 100e-9, 'signal_end': 400e-9, 'norm_start': 2800e-9, 'norm_end': 4000e-9},
+    'reversed': {'signal_start': 400e-9, 'signal_end': 100e-9, 'norm_start': 1500e-9, 'norm_end': 2500e-9},
+}
+
+
+def reference_mean_norm(laser_data, signal_start, signal_end, norm_start, norm_end):
+    """ Former per-laser-pulse implementation of BasicPulseAnalyzer.analyse_mean_norm """
+    signal_start_bin = round(signal_start / BIN_WIDTH)
+    signal_end_bin = round(signal_end / BIN_WIDTH)
+    norm_start_bin = round(norm_start / BIN_WIDTH)
+    norm_end_bin = round(norm_end / BIN_WIDTH)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_start_bin:norm_end_bin]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_start_bin:signal_end_bin]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        if reference_mean > 0 and signal_mean >= 0:
+            signal_data[ii] = signal_mean / reference_mean
+        else:
+            signal_data[ii] = 0.0
+        if reference_sum > 0 and signal_sum > 0:
+            error_data[ii] = signal_data[ii] * np.sqrt(1 / signal_sum + 1 / reference_sum)
+        else:
+            error_data[ii] = 0.0
+    return signal_data, error_data
+
+
+def reference_mean_reference(laser_data, signal_start, signal_end, norm_start, norm_end):
+    """ Former per-laser-pulse implementation of BasicPulseAnalyzer.analyse_mean_reference """
+    signal_start_bin = round(signal_start / BIN_WIDTH)
+    signal_end_bin = round(signal_end / BIN_WIDTH)
+    norm_start_bin = round(norm_start / BIN_WIDTH)
+    norm_end_bin = round(norm_end / BIN_WIDTH)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_start_bin:norm_end_bin]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_start_bin:signal_end_bin]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        signal_data[ii] = signal_mean - reference_mean
+        error_data[ii] = signal_data[ii] * np.sqrt(1 / abs(signal_sum) + 1 / abs(reference_sum))
+    return signal_data, error_data
+
+
+def reference_sum(laser_data, signal_start, signal_end):
+    """ Former per-laser-pulse implementation of BasicPulseAnalyzer.analyse_sum """
+    signal_start_bin = round(signal_start / BIN_WIDTH)
+    signal_end_bin = round(signal_end / BIN_WIDTH)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[signal_start_bin:signal_end_bin].sum()
+        signal_error = np.sqrt(signal)
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = signal_error
+    return signal_data, error_data
+
+
+def reference_mean(laser_data, signal_start, signal_end):
+    """ Former per-laser-pulse implementation of BasicPulseAnalyzer.analyse_mean """
+    signal_start_bin = round(signal_start / BIN_WIDTH)
+    signal_end_bin = round(signal_end / BIN_WIDTH)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[signal_start_bin:signal_end_bin].mean()
+        signal_sum = laser_arr[signal_start_bin:signal_end_bin].sum()
+        signal_error = np.sqrt(signal_sum) / (signal_end_bin - signal_start_bin)
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = signal_error
+    return signal_data, error_data
+
+
+METHODS = {
+    'mean_norm': (reference_mean_norm, ('signal_start', 'signal_end', 'norm_start', 'norm_end')),
+    'mean_reference': (reference_mean_reference, ('signal_start', 'signal_end', 'norm_start', 'norm_end')),
+    'sum': (reference_sum, ('signal_start', 'signal_end')),
+    'mean': (reference_mean, ('signal_start', 'signal_end')),
+}
+
+
+@pytest.fixture
+def analyzer():
+    """
+    Fixture for a BasicPulseAnalyzer instance of an ungated fast counter.
+    """
+    logic = SimpleNamespace(fast_counter_settings={'bin_width': BIN_WIDTH, 'is_gated': False},
+                            measurement_settings=dict(),
+                            sampling_information=dict(),
+                            log=logging.getLogger(__name__))
+    return BasicPulseAnalyzer(logic)
+
+
+def make_laser_data(pulse_count, gaps, seed):
+    """
+    Simulated laser pulses with a fluorescence peak on a Poisson background.
+
+    Parameters
+    ----------
+    pulse_count : int
+        number of laser pulses
+    gaps : bool
+        zero the counts of every third laser pulse and of the signal window of every second one,
+        as for missing or blanked laser pulses
+    seed : int
+        seed of the random number generator
+
+    Returns
+    -------
+    numpy.ndarray
+        laser data of shape (pulse_count, LASER_LENGTH)
+    """
+    rng = np.random.default_rng(seed)
+    rate = np.full(LASER_LENGTH, 2.)
+    rate[50:2500] += 20 * np.exp(-np.arange(2450) / 800)
+    laser_data = rng.poisson(rate, (pulse_count, LASER_LENGTH)).astype('int64')
+    if gaps:
+        laser_data[::3] = 0
+        laser_data[1::2, 100:400] = 0
+    return laser_data
+
+
+@pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('windows', WINDOWS)
+@pytest.mark.parametrize('gaps', [False, True])
+@pytest.mark.parametrize('pulse_count', PULSE_COUNTS)
+def test_batched_analysis_identical(analyzer, method, windows, gaps, pulse_count):
+    """
+    Tests if the batched analysis methods give identical results to the per-laser-pulse
+    implementation.
+    """
+    reference, params = METHODS[method]
+    kwargs = {param: WINDOWS[windows][param] for param in params}
+    laser_data = make_laser_data(pulse_count, gaps, seed=pulse_count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ref_signal, ref_error = reference(laser_data, **kwargs)
+        signal, error = getattr(analyzer, 'analyse_' + method)(laser_data, **kwargs)
+    assert signal.shape == (pulse_count,)
+    assert error.shape == (pulse_count,)
+    np.testing.assert_array_equal(signal, ref_signal)
+    np.testing.assert_array_equal(error, ref_error)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_batched_analysis_float_data(analyzer, method):
+    """
+    Tests float laser data with negative values (e.g. after background subtraction) with changing
+    laser pulse lengths, which invalidates the cached analysis windows.
+    """
+    reference, params = METHODS[method]
+    kwargs = {param: WINDOWS['default'][param] for param in params}
+    rng = np.random.default_rng(0)
+    for laser_length in (LASER_LENGTH, 2000, LASER_LENGTH):
+        laser_data = rng.normal(0.5, 2., (10, laser_length))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ref_signal, ref_error = reference(laser_data, **kwargs)
+            signal, error = getattr(analyzer, 'analyse_' + method)(laser_data, **kwargs)
+        np.testing.assert_allclose(signal, ref_signal, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(error, ref_error, rtol=1e-12, atol=1e-12)
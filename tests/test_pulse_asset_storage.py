@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the lazily loaded pulse asset storage.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+
+from qudi.logic.pulsed.pulse_asset_storage import LazyAssetDict, PulseAssetDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    Fixture for an open asset database with two stored blocks.
+    """
+    db = PulseAssetDatabase(str(tmp_path / 'assets.db'))
+    db.open()
+    with db.batch():
+        db.store('block', 'block_b', {'name': 'block_b'})
+        db.store('block', 'block_a', {'name': 'block_a'})
+    yield db
+    db.close()
+
+
+def test_database_roundtrip(database):
+    """
+    Tests storing, listing, loading and removing objects.
+    """
+    assert database.names('block') == ['block_a', 'block_b']
+    assert database.names('ensemble') == []
+    assert database.load('block', 'block_a') == {'name': 'block_a'}
+    assert database.load('block', 'missing') is None
+    database.remove('block', 'block_a')
+    assert database.names('block') == ['block_b']
+
+
+def test_lazy_loading(database):
+    """
+    Tests that objects are only loaded on access and never leak placeholders.
+    """
+    loaded = list()
+
+    def loader(name):
+        loaded.append(name)
+        return database.load('block', name)
+
+    assets = LazyAssetDict(loader, database.names('block'))
+    assert len(assets) == 2
+    assert 'block_a' in assets
+    assert list(assets) == ['block_a', 'block_b']
+    assert loaded == []
+
+    assert assets['block_a'] == {'name': 'block_a'}
+    assert assets.loaded_names == ['block_a']
+    # conversions load the remaining objects instead of exposing placeholders
+    assert dict(assets) == {'block_a': {'name': 'block_a'}, 'block_b': {'name': 'block_b'}}
+    assert {**assets} == dict(assets)
+    assert assets.values() == [{'name': 'block_a'}, {'name': 'block_b'}]
+    assert loaded == ['block_a', 'block_b']
+
+
+def test_lazy_mutation_and_broken_entries():
+    """
+    Tests item assignment, removal and that entries failing to load are dropped.
+    """
+    assets = LazyAssetDict(lambda name: None if name == 'broken' else name.upper(), ['a', 'broken'])
+    assets['c'] = 'C'
+    assert assets.get('broken') is None
+    assert 'broken' not in assets
+    assert assets.copy() == {'a': 'A', 'c': 'C'}
+    assert assets.pop('a') == 'A'
+    assert assets.pop('a', None) is None
+    del assets['c']
+    assert len(assets) == 0
+    with pytest.raises(KeyError):
+        assets['c']
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the RingBuffer utility.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+from qudi.util.ring_buffer import RingBuffer
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 10, 25])
+def test_wraparound(chunk_size):
+    """
+    Tests if the buffer always holds the newest samples in order while the storage wraps around
+    several times, incl. appending more samples than the buffer size at once.
+    """
+    size = 10
+    buffer = RingBuffer(size, fill_value=-1)
+    np.testing.assert_array_equal(buffer.data, np.full(size, -1.))
+    reference = np.full(size, -1.)
+    for start in range(0, 200, chunk_size):
+        chunk = np.arange(start, start + chunk_size, dtype=float)
+        buffer.append(chunk)
+        reference = np.concatenate([reference, chunk])[-size:]
+        np.testing.assert_array_equal(buffer.data, reference)
+        np.testing.assert_array_equal(buffer.latest(4), reference[-4:])
+
+
+def test_sample_shape():
+    """
+    Tests multi-channel samples and construction from an array.
+    """
+    buffer = RingBuffer(5, sample_shape=(2,), dtype=np.int32)
+    assert buffer.shape == (5, 2)
+    assert buffer.dtype == np.int32
+    assert len(buffer) == 5
+    samples = np.arange(14, dtype=np.int32).reshape(7, 2)
+    buffer.append(samples[:4])
+    buffer.append(samples[4:])
+    np.testing.assert_array_equal(buffer.data, samples[-5:])
+
+    buffer = RingBuffer.from_array(samples)
+    assert buffer.shape == samples.shape
+    np.testing.assert_array_equal(buffer.data, samples)
+
+
+def test_views():
+    """
+    Tests if views are contiguous, read-only and stay valid until the storage wraps around.
+    """
+    size = 10
+    buffer = RingBuffer(size)
+    buffer.append(np.arange(size, dtype=float))
+    view = buffer.data
+    assert view.flags.c_contiguous
+    assert not view.flags.writeable
+    with pytest.raises(ValueError):
+        view[0] = 1
+    # Views are not changed by appending up to (size - n) more samples in chunks of n samples
+    for ii in range(size // 2):
+        buffer.append(np.full(2, 100. + ii))
+    np.testing.assert_array_equal(view, np.arange(size, dtype=float))
+    assert buffer.latest(0).shape == (0,)
+    assert buffer.latest(2 * size).shape == (size,)
+
+
+def test_fill_and_empty():
+    """
+    Tests resetting the buffer contents and a buffer of size 0.
+    """
+    buffer = RingBuffer(4)
+    buffer.append(np.arange(30, dtype=float))
+    buffer.fill(7)
+    np.testing.assert_array_equal(buffer.data, np.full(4, 7.))
+    buffer.append(np.array([1.]))
+    np.testing.assert_array_equal(buffer.data, [7, 7, 7, 1])
+
+    buffer = RingBuffer(0)
+    buffer.append(np.arange(3, dtype=float))
+    assert buffer.data.shape == (0,)
+    with pytest.raises(ValueError):
+        RingBuffer(-1)
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the peak estimation and refinement of the scanning optimize logic.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+import weakref
+import numpy as np
+import pytest
+
+from qudi.hardware.dummy.scanning_probe_dummy import ScanningProbeDummy
+from qudi.logic.scanning_probe_logic import ScanningProbeLogic
+from qudi.logic.scanning_optimize_logic import ScanningOptimizeLogic
+
+REFINE_STEPS = 4
+TIMEOUT = 60
+
+
+class QudiMain:
+    """
+    Minimal stand-in for the qudi main instance the modules are created with.
+    """
+    configuration = {'default_data_dir': None, 'daily_data_dirs': False}
+    gui = None
+
+
+def gaussian(coords, center, sigma, amplitude=1e5, offset=1e3):
+    """
+    Gaussian peak without noise evaluated on the given coordinates.
+
+    Parameters
+    ----------
+    coords : numpy.ndarray
+        coordinates of shape (dimensions, points)
+    center : list
+        center of the peak for each dimension
+    sigma : list
+        width of the peak for each dimension
+
+    Returns
+    -------
+    numpy.ndarray
+        peak values of shape (points,)
+    """
+    exponent = sum((c - c0) ** 2 / (2 * s ** 2) for c, c0, s in zip(coords, center, sigma))
+    return offset + amplitude * np.exp(-exponent)
+
+
+def test_centroid_1d():
+    """
+    Tests if the centroid estimator finds center and width of a sampled 1D Gaussian peak.
+    """
+    x = np.linspace(-2e-6, 2e-6, 41)[np.newaxis, :]
+    data = gaussian(x, [0.3e-6], [0.4e-6])
+    values = ScanningOptimizeLogic._estimate_centroid(x, data)
+    np.testing.assert_allclose(values['center'], [0.3e-6], atol=0.02e-6)
+    np.testing.assert_allclose(values['sigma'], [0.4e-6], rtol=0.15)
+    np.testing.assert_allclose(values['offset'], 1e3, rtol=0.01)
+    np.testing.assert_allclose(values['amplitude'], 1e5, rtol=0.01)
+
+
+def test_centroid_2d():
+    """
+    Tests if the centroid estimator finds center and widths of a sampled 2D Gaussian peak.
+    """
+    x, y = np.meshgrid(np.linspace(-2e-6, 2e-6, 41), np.linspace(-2e-6, 2e-6, 41), indexing='ij')
+    coords = np.stack([x.ravel(), y.ravel()])
+    data = gaussian(coords, [-0.5e-6, 0.2e-6], [0.3e-6, 0.5e-6])
+    values = ScanningOptimizeLogic._estimate_centroid(coords, data)
+    np.testing.assert_allclose(values['center'], [-0.5e-6, 0.2e-6], atol=0.02e-6)
+    np.testing.assert_allclose(values['sigma'], [0.3e-6, 0.5e-6], rtol=0.15)
+
+
+def test_centroid_ignores_invalid_data():
+    """
+    Tests if NaN data points (e.g. of an unfinished scan) do not affect the estimate.
+    """
+    x = np.linspace(-2e-6, 2e-6, 41)[np.newaxis, :]
+    data = gaussian(x, [0.3e-6], [0.4e-6])
+    data[:5] = np.nan
+    values = ScanningOptimizeLogic._estimate_centroid(x, data)
+    np.testing.assert_allclose(values['center'], [0.3e-6], atol=0.02e-6)
+
+
+def test_centroid_unresolved_peak():
+    """
+    Tests if a peak narrower than the pixel size is located at the maximum pixel with the width
+    limited to half the pixel size.
+    """
+    x = np.linspace(-2e-6, 2e-6, 5)[np.newaxis, :]
+    data = gaussian(x, [1e-6], [0.1e-6])
+    values = ScanningOptimizeLogic._estimate_centroid(x, data)
+    np.testing.assert_allclose(values['center'], [1e-6])
+    np.testing.assert_allclose(values['sigma'], [0.5e-6 / np.sqrt(2 * np.log(2))])
+
+
+def test_centroid_without_peak():
+    """
+    Tests if flat data raises an error.
+    """
+    x = np.linspace(-2e-6, 2e-6, 11)[np.newaxis, :]
+    with pytest.raises(ValueError):
+        ScanningOptimizeLogic._estimate_centroid(x, np.full(11, 5.))
+
+
+def test_position_converged():
+    """
+    Tests the convergence criterion of the refinement scans.
+    """
+    pixel_sizes = {'x': 100e-9, 'y': 100e-9}
+    position = {'x': 1e-6, 'y': 2e-6}
+    converged = ScanningOptimizeLogic._position_converged
+    assert not converged(None, position, pixel_sizes, 0.5)
+    assert converged({'x': 1.04e-6, 'y': 1.96e-6}, position, pixel_sizes, 0.5)
+    assert not converged({'x': 1.04e-6, 'y': 1.94e-6}, position, pixel_sizes, 0.5)
+    assert not converged({'x': 1.04e-6, 'y': 1.96e-6}, position, pixel_sizes, 0.3)
+
+
+@pytest.fixture
+def optimize_logic(qt_app):
+    """
+    Fixture for an activated optimize logic connected to a scanning probe dummy with a single spot.
+    """
+    np.random.seed(0)
+    qudi_main = QudiMain()
+    modules = list()
+
+    def create(cls, name, config):
+        module = cls(qudi_main_weakref=weakref.ref(qudi_main),
+                     name=name,
+                     config=config,
+                     callbacks={'on_before_deactivate': lambda *args: module.on_deactivate() or True})
+        modules.append(module)
+        return module
+
+    scanner = create(ScanningProbeDummy, 'test_optimizer_scanner',
+                     {'position_ranges': {'x': [0, 20e-6], 'y': [0, 20e-6], 'z': [-10e-6, 10e-6]},
+                      'frequency_ranges': {'x': [1, 5000], 'y': [1, 5000], 'z': [1, 1000]},
+                      'resolution_ranges': {'x': [1, 10000], 'y': [1, 10000], 'z': [2, 1000]},
+                      'position_accuracy': {'x': 10e-9, 'y': 10e-9, 'z': 50e-9},
+                      'spot_density': 5e4})
+    scan_logic = create(ScanningProbeLogic, 'test_optimizer_scan_logic', {})
+    scan_logic._scanner.connect(scanner)
+    logic = create(ScanningOptimizeLogic, 'test_optimize_logic',
+                   {'estimator': 'centroid', 'refine_steps': REFINE_STEPS})
+    logic._scan_logic.connect(scan_logic)
+    for module in modules:
+        module.module_state.activate()
+
+    logic.set_optimize_settings(data_channel=logic.data_channel,
+                                scan_sequence=(('x', 'y'),),
+                                scan_dimension=[2],
+                                range={'x': 2e-6, 'y': 2e-6},
+                                resolution={'x': 32, 'y': 32},
+                                frequency={'x': 5000, 'y': 5000})
+    spot = scanner._image_generator._spots['pos'][0]
+    scan_logic.set_target_position({'x': spot[0] + 0.3e-6, 'y': spot[1] - 0.2e-6, 'z': spot[2]},
+                                   move_blocking=True)
+    yield logic, spot
+    for module in reversed(modules):
+        module.module_state.deactivate()
+
+
+def test_refinement_stops_early(qt_app, optimize_logic):
+    """
+    Tests if the coarse-to-fine refinement of a sequence step stops before the maximum number of
+    scans once the position estimate converged, and restores the scan settings of the step.
+    """
+    logic, spot = optimize_logic
+    scan_logic = logic._scan_logic()
+    ranges = scan_logic.scan_ranges
+    resolution = scan_logic.scan_resolution
+
+    logic.start_optimize()
+    start = time.time()
+    while logic.module_state() != 'idle' and time.time() - start < TIMEOUT:
+        qt_app.processEvents()
+        time.sleep(0.005)
+    qt_app.processEvents()
+
+    assert logic.module_state() == 'idle'
+    scan_count = logic.last_optimize_timing['scan_count']
+    assert 1 < scan_count < REFINE_STEPS + 1
+    position = logic.optimal_position
+    assert abs(position['x'] - spot[0]) < 0.1e-6
+    assert abs(position['y'] - spot[1]) < 0.1e-6
+    assert scan_logic.scan_ranges == ranges
+    assert scan_logic.scan_resolution == resolution
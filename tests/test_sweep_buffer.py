@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the SweepBuffer utility.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pytest
+
+from qudi.util.sweep_buffer import SweepBuffer
+
+POINTS = 20
+
+
+def make_sweeps(count, seed=0):
+    """
+    Random sweeps with some invalid values (NaN, inf) and a few sweeps shorter than POINTS.
+
+    Returns
+    -------
+    list
+        1D arrays of the sweeps in the order they are added
+    """
+    rng = np.random.default_rng(seed)
+    sweeps = list()
+    for ii in range(count):
+        sweep = rng.normal(100, 10, POINTS)
+        sweep[rng.random(POINTS) < 0.1] = np.nan
+        sweep[rng.random(POINTS) < 0.02] = np.inf
+        if ii % 7 == 3:
+            sweep = sweep[:POINTS // 2]
+        sweeps.append(sweep)
+    return sweeps
+
+
+def reference_mean(sweeps, average_lines):
+    """
+    Mean of the newest average_lines sweeps (all if 0) over valid values, 0 without valid values.
+    """
+    padded = np.full((len(sweeps), POINTS), np.nan)
+    for ii, sweep in enumerate(sweeps):
+        padded[ii, :sweep.size] = sweep
+    if average_lines > 0:
+        padded = padded[-average_lines:]
+    padded[~np.isfinite(padded)] = np.nan
+    return np.nan_to_num(np.nanmean(padded, axis=0), nan=0.)
+
+
+@pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+@pytest.mark.parametrize('average_lines', [0, 1, 5, 50])
+def test_windowed_mean(average_lines):
+    """
+    Tests the running mean of all or the newest sweeps after each added sweep.
+    """
+    sweeps = make_sweeps(40)
+    buffer = SweepBuffer(POINTS, average_lines=average_lines)
+    np.testing.assert_array_equal(buffer.mean(), np.zeros(POINTS))
+    for ii, sweep in enumerate(sweeps):
+        buffer.add_sweep(sweep)
+        np.testing.assert_allclose(buffer.mean(),
+                                   reference_mean(sweeps[:ii + 1], average_lines),
+                                   rtol=1e-12)
+
+
+@pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+def test_change_average_lines():
+    """
+    Tests if changing the number of averaged sweeps recalculates the mean of the newest sweeps.
+    """
+    sweeps = make_sweeps(30)
+    buffer = SweepBuffer(POINTS, average_lines=0)
+    for sweep in sweeps[:20]:
+        buffer.add_sweep(sweep)
+    buffer.average_lines = 8
+    np.testing.assert_allclose(buffer.mean(), reference_mean(sweeps[:20], 8), rtol=1e-12)
+    for ii, sweep in enumerate(sweeps[20:], 21):
+        buffer.add_sweep(sweep)
+        np.testing.assert_allclose(buffer.mean(), reference_mean(sweeps[:ii], 8), rtol=1e-12)
+    buffer.set_average_lines(0)
+    np.testing.assert_allclose(buffer.mean(), reference_mean(sweeps, 0), rtol=1e-12)
+
+
+def test_sweep_matrix():
+    """
+    Tests the order of the sweep matrix incl. expanding the line buffer.
+    """
+    buffer = SweepBuffer(3, line_buffer_size=2)
+    assert buffer.data.shape == (3, 2)
+    assert np.all(np.isnan(buffer.data))
+    assert buffer.sweeps.shape == (3, 0)
+    for ii in range(5):
+        buffer.add_sweep(np.full(3, ii))
+    assert buffer.sweep_count == 5
+    assert buffer.line_buffer_size == 8
+    np.testing.assert_array_equal(buffer.sweeps, np.tile([4., 3., 2., 1., 0.], (3, 1)))
+    assert np.all(np.isnan(buffer.data[:, 5:]))
+    assert not buffer.data.flags.writeable
+
+    buffer.add_sweep([7.])
+    np.testing.assert_array_equal(buffer.sweeps[:, 0], [7., np.nan, np.nan])
+    with pytest.raises(ValueError):
+        buffer.add_sweep(np.zeros(4))
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains unit tests for the content-addressed waveform cache of the pulsed toolchain.
+
+Copyright (c) 2021, the qudi developers. See the AUTHORS.md file at the top-level directory of this
+distribution and on <https://github.com/Ulm-IQO/qudi-iqo-modules/>
+
+This file is part of qudi.
+
+Qudi is free software: you can redistribute it and/or modify it under the terms of
+the GNU Lesser General Public License as published by the Free Software Foundation,
+either version 3 of the License, or (at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License along with qudi.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import copy
+import numpy as np
+import pytest
+
+from qudi.logic.pulsed.waveform_cache import WaveformCache
+from qudi.logic.pulsed.pulse_objects import PulseBlock, PulseBlockElement, PulseBlockEnsemble
+from qudi.logic.pulsed.sampling_function_defs import basic_sampling_functions as sf
+
+ANALOG_CHANNELS = ['a_ch1']
+DIGITAL_CHANNELS = ['d_ch1']
+
+
+@pytest.fixture
+def settings():
+    """
+    Fixture for pulse generator settings as provided by SequenceGeneratorLogic.
+    """
+    return {'sample_rate': 1e9,
+            'activation_config': ('config0', {'a_ch1', 'd_ch1'}),
+            'analog_levels': ({'a_ch1': 0.5}, {'a_ch1': 0.0})}
+
+
+@pytest.fixture
+def blocks():
+    """
+    Fixture for a single PulseBlock with a microwave and a laser element.
+    """
+    elements = [PulseBlockElement(init_length_s=100e-9,
+                                  pulse_function={'a_ch1': sf.Sin(amplitude=0.1,
+                                                                  frequency=100e6,
+                                                                  phase=0)},
+                                  digital_high={'d_ch1': False}),
+                PulseBlockElement(init_length_s=1e-6,
+                                  pulse_function={'a_ch1': sf.Idle()},
+                                  digital_high={'d_ch1': True},
+                                  laser_on=True)]
+    return {'block': PulseBlock(name='block', element_list=elements)}
+
+
+def make_ensemble(rotating_frame=True):
+    return PulseBlockEnsemble(name='ensemble', block_list=[('block', 9)],
+                              rotating_frame=rotating_frame)
+
+
+def write_samples(cache, key, number_of_samples, chunk_length=7):
+    """
+    Stores random samples for the given content key in chunks via the sample store.
+
+    Returns
+    -------
+    tuple
+        the stored analog and digital samples (dicts)
+    """
+    rng = np.random.default_rng(0)
+    analog = {chnl: rng.normal(size=number_of_samples).astype('float32')
+              for chnl in ANALOG_CHANNELS}
+    digital = {chnl: rng.integers(2, size=number_of_samples).astype(bool)
+               for chnl in DIGITAL_CHANNELS}
+    store = cache.create_sample_store(key, ANALOG_CHANNELS, DIGITAL_CHANNELS, number_of_samples)
+    for start in range(0, number_of_samples, chunk_length):
+        cache.append_to_sample_store(
+            store,
+            {chnl: arr[start:start + chunk_length] for chnl, arr in analog.items()},
+            {chnl: arr[start:start + chunk_length] for chnl, arr in digital.items()}
+        )
+    cache.finalize_sample_store(key, store)
+    return analog, digital
+
+
+def test_content_key_invalidation(blocks, settings):
+    """
+    Tests if the content key changes with every parameter affecting the samples.
+    """
+    ensemble = make_ensemble()
+    key = WaveformCache.content_key(ensemble, blocks, settings)
+    assert key == WaveformCache.content_key(make_ensemble(), copy.deepcopy(blocks), settings)
+
+    changed_blocks = copy.deepcopy(blocks)
+    changed_blocks['block'][0].pulse_function['a_ch1'].frequency = 101e6
+    assert key != WaveformCache.content_key(ensemble, changed_blocks, settings)
+
+    changed_blocks = copy.deepcopy(blocks)
+    changed_blocks['block'][1].init_length_s = 2e-6
+    assert key != WaveformCache.content_key(ensemble, changed_blocks, settings)
+
+    changed_ensemble = make_ensemble()
+    changed_ensemble.block_list = [('block', 10)]
+    assert key != WaveformCache.content_key(changed_ensemble, blocks, settings)
+
+    for name, value in [('sample_rate', 2e9),
+                        ('activation_config', ('config1', {'a_ch1', 'd_ch1'})),
+                        ('analog_levels', ({'a_ch1': 1.0}, {'a_ch1': 0.0}))]:
+        changed_settings = dict(settings)
+        changed_settings[name] = value
+        assert key != WaveformCache.content_key(ensemble, blocks, changed_settings)
+
+
+def test_content_key_offset(blocks, settings):
+    """
+    Tests if the time offset only changes the content key in rotating frame.
+    """
+    ensemble = make_ensemble(rotating_frame=True)
+    assert WaveformCache.content_key(ensemble, blocks, settings, offset_bin=0) != \
+           WaveformCache.content_key(ensemble, blocks, settings, offset_bin=100)
+    ensemble = make_ensemble(rotating_frame=False)
+    assert WaveformCache.content_key(ensemble, blocks, settings, offset_bin=0) == \
+           WaveformCache.content_key(ensemble, blocks, settings, offset_bin=100)
+
+
+def test_lookup(blocks, settings):
+    """
+    Tests cache hits and invalidation by content change or deleted device waveforms.
+    """
+    index = dict()
+    cache = WaveformCache(index=index)
+    key = WaveformCache.content_key(make_ensemble(), blocks, settings)
+    waveforms = ['ensemble_ch1', 'ensemble_d_ch1']
+    assert cache.lookup('ensemble', key, waveforms) is None
+
+    cache.record_miss()
+    cache.add('ensemble', key, waveforms)
+    assert index['ensemble'] == {'key': key, 'waveforms': waveforms}
+    assert cache.lookup('ensemble', key, waveforms + ['other']) == waveforms
+    assert cache.lookup('ensemble', 'other_key', waveforms) is None
+    assert cache.lookup('ensemble', key, waveforms[:1]) is None
+    assert cache.statistics == {'hits': 1, 'disk_hits': 0, 'misses': 1, 'hit_ratio': 0.5}
+
+    cache.discard('ensemble')
+    assert cache.lookup('ensemble', key, waveforms) is None
+    cache.add('ensemble', key, waveforms)
+    cache.clear()
+    assert index == dict()
+    cache.reset_statistics()
+    assert np.isnan(cache.statistics['hit_ratio'])
+
+
+def test_sample_store(tmp_path):
+    """
+    Tests if samples stored in chunks are loaded back identically and that stores with a wrong
+    length or an aborted store are discarded.
+    """
+    cache = WaveformCache(storage_dir=str(tmp_path))
+    assert cache.load_samples('key', ANALOG_CHANNELS, DIGITAL_CHANNELS, 100) is None
+    analog, digital = write_samples(cache, 'key', 100)
+    assert not os.path.exists(tmp_path / 'key.tmp')
+
+    loaded_analog, loaded_digital = cache.load_samples('key', ANALOG_CHANNELS, DIGITAL_CHANNELS, 100)
+    for chnl in ANALOG_CHANNELS:
+        np.testing.assert_array_equal(loaded_analog[chnl], analog[chnl])
+    for chnl in DIGITAL_CHANNELS:
+        np.testing.assert_array_equal(loaded_digital[chnl], digital[chnl])
+    assert cache.disk_hits == 1
+    del loaded_analog, loaded_digital
+
+    assert cache.load_samples('key', ANALOG_CHANNELS, DIGITAL_CHANNELS, 99) is None
+    assert not os.path.exists(tmp_path / 'key')
+
+    store = cache.create_sample_store('aborted', ANALOG_CHANNELS, DIGITAL_CHANNELS, 10)
+    cache.finalize_sample_store('aborted', store, success=False)
+    assert os.listdir(tmp_path) == []
+
+
+def test_storage_limit(tmp_path):
+    """
+    Tests if the least recently used samples are removed to meet the disk storage limit.
+    """
+    cache = WaveformCache(storage_dir=str(tmp_path))
+    for ii, key in enumerate(('key0', 'key1', 'key2')):
+        write_samples(cache, key, 1000)
+        os.utime(tmp_path / key, (ii, ii))
+    store_size = sum(entry.stat().st_size for entry in os.scandir(tmp_path / 'key0'))
+    assert cache.prune() == 0
+
+    # Loading marks the samples as recently used
+    cache.load_samples('key0', ANALOG_CHANNELS, DIGITAL_CHANNELS, 1000)
+    cache.storage_limit = 2 * store_size
+    assert cache.prune() == 1
+    assert sorted(os.listdir(tmp_path)) == ['key0', 'key2']
+
+    cache.storage_limit = store_size
+    assert cache.prune(keep='key2') == 1
+    assert os.listdir(tmp_path) == ['key2']
+
+    os.makedirs(tmp_path / 'key3.tmp')
+    assert cache.prune() == 0
+    assert cache.prune(remove_incomplete=True) == 1
+    assert os.listdir(tmp_path) == ['key2']